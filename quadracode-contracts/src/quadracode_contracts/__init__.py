@@ -41,11 +41,16 @@ from .messaging import (
 )
 from .workspace import (
     DEFAULT_WORKSPACE_MOUNT,
+    ManifestFileChange,
+    WorkspaceBatchCopyResult,
     WorkspaceCommandResult,
+    WorkspaceCopiedFile,
     WorkspaceCopyResult,
     WorkspaceDescriptor,
+    WorkspaceManifestDiff,
     WorkspaceSnapshotRecord,
     collect_environment_keys,
+    diff_manifests,
     normalize_workspace_name,
 )
 
@@ -83,9 +88,14 @@ __all__ = [
     "DEFAULT_WORKSPACE_MOUNT",
     "WorkspaceDescriptor",
     "WorkspaceCommandResult",
+    "WorkspaceBatchCopyResult",
+    "WorkspaceCopiedFile",
     "WorkspaceCopyResult",
     "WorkspaceSnapshotRecord",
+    "ManifestFileChange",
+    "WorkspaceManifestDiff",
     "collect_environment_keys",
+    "diff_manifests",
     "normalize_workspace_name",
 ]
 
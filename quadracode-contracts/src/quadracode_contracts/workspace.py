@@ -11,7 +11,9 @@ operations, and records for workspace snapshots.
 from __future__ import annotations
 
 import re
-from typing import Any
+from collections import deque
+from collections.abc import Iterable, Mapping
+from typing import Any, Literal
 
 from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_validator
 
@@ -80,9 +82,14 @@ class WorkspaceDescriptor(BaseModel):
 class WorkspaceCommandResult(BaseModel):
     """Structured response for commands executed in a workspace.
 
-    Captures the complete output of a command — exit code, stdout, stderr,
-    and performance metrics.  This structured format allows the orchestrator
-    and agents to reliably interpret command outcomes.
+    Captures the outcome of a command — exit code, stdout, stderr, and
+    performance metrics.  Large streams are reduced to their head and tail;
+    ``stdout_bytes``/``stderr_bytes`` always report the full sizes.  One-off
+    execs also write the complete output to the log files named by the
+    ``*_log_path`` fields; commands run in a persistent ``session`` write no
+    log files, so those fields are ``None`` and a truncated stream cannot be
+    recovered.  This structured format allows the orchestrator and agents to
+    reliably interpret command outcomes.
     """
 
     workspace: WorkspaceDescriptor
@@ -97,9 +104,24 @@ class WorkspaceCommandResult(BaseModel):
     stderr: str = ""
     stdout_bytes: int = Field(default=0, ge=0)
     stderr_bytes: int = Field(default=0, ge=0)
-    stdout_log_path: str | None = None
-    stderr_log_path: str | None = None
-    log_bundle_path: str | None = None
+    stdout_truncated: bool = False
+    stderr_truncated: bool = False
+    stdout_log_path: str | None = Field(
+        default=None,
+        description="Log file with the complete stdout; None in session mode.",
+    )
+    stderr_log_path: str | None = Field(
+        default=None,
+        description="Log file with the complete stderr; None in session mode.",
+    )
+    log_bundle_path: str | None = Field(
+        default=None,
+        description="Combined log of both streams; None in session mode.",
+    )
+    session: str | None = Field(
+        default=None,
+        description="Persistent shell session the command ran in, if any (no log files).",
+    )
 
 
 class WorkspaceCopyResult(BaseModel):
@@ -115,6 +137,31 @@ class WorkspaceCopyResult(BaseModel):
     bytes_transferred: int | None = Field(default=None, ge=0)
 
 
+class WorkspaceCopiedFile(BaseModel):
+    """One regular file moved by a batch copy, with its content checksum."""
+
+    path: str = Field(..., description="Path of the file at the destination.")
+    size: int = Field(..., ge=0)
+    sha256: str
+
+
+class WorkspaceBatchCopyResult(BaseModel):
+    """Structured response for multi-path copies streamed as one tar archive.
+
+    Lists every file that was transferred with its size and SHA-256, so the
+    caller can verify the copy without another round trip.
+    """
+
+    workspace: WorkspaceDescriptor
+    sources: list[str] = Field(default_factory=list, description="Paths or glob patterns requested.")
+    unmatched: list[str] = Field(default_factory=list, description="Patterns that matched nothing.")
+    destination: str
+    files: list[WorkspaceCopiedFile] = Field(default_factory=list)
+    total_bytes: int = Field(default=0, ge=0, description="Combined size of the copied files.")
+    archive_bytes: int = Field(default=0, ge=0, description="Size of the tar stream on the wire.")
+    compressed: bool = False
+
+
 class WorkspaceSnapshotRecord(BaseModel):
     """Metadata for a captured workspace snapshot.
 
@@ -129,10 +176,23 @@ class WorkspaceSnapshotRecord(BaseModel):
     reason: str = Field(..., description="Trigger description (e.g., exhaustion mode, rejection).")
     checksum: str = Field(..., description="Aggregate checksum covering the captured manifest.")
     manifest_path: str = Field(..., description="Filesystem path to the manifest JSON file.")
-    archive_path: str = Field(..., description="Filesystem path to the archived workspace tarball.")
+    archive_path: str = Field(
+        ...,
+        description=(
+            "Filesystem path to the archived workspace tarball, or to the blob directory "
+            "for content-addressed snapshots."
+        ),
+    )
+    storage: Literal["archive", "blobs"] = Field(
+        default="archive",
+        description=(
+            "How the snapshot contents are stored: a tarball at `archive_path`, or blobs "
+            "referenced by digest from the manifest."
+        ),
+    )
     diff_path: str | None = Field(
         default=None,
-        description="Optional path to a diff/patch file against the previous snapshot.",
+        description="Optional path to the JSON manifest diff against the previous snapshot.",
     )
     exhaustion_mode: HumanCloneExhaustionMode | None = Field(
         default=None,
@@ -144,6 +204,144 @@ class WorkspaceSnapshotRecord(BaseModel):
     )
 
 
+class ManifestFileChange(BaseModel):
+    """One file-level difference between two workspace manifests."""
+
+    path: str = Field(..., description="Path of the file in the newer manifest (or the removed path).")
+    previous_path: str | None = Field(
+        default=None,
+        description="Former path when the file was renamed (detected by identical content hash).",
+    )
+    size_before: int | None = Field(default=None, ge=0)
+    size_after: int | None = Field(default=None, ge=0)
+    sha256_before: str | None = None
+    sha256_after: str | None = None
+
+    @property
+    def byte_delta(self) -> int:
+        return (self.size_after or 0) - (self.size_before or 0)
+
+
+class WorkspaceManifestDiff(BaseModel):
+    """Structured difference between two workspace manifests.
+
+    Produced by `diff_manifests` and shared by snapshot capture (persisted as
+    JSON next to the snapshot), integrity metrics and the UI comparison view.
+    """
+
+    added: list[ManifestFileChange] = Field(default_factory=list)
+    removed: list[ManifestFileChange] = Field(default_factory=list)
+    modified: list[ManifestFileChange] = Field(default_factory=list)
+    renamed: list[ManifestFileChange] = Field(default_factory=list)
+    unchanged_count: int = Field(default=0, ge=0)
+    bytes_before: int = Field(default=0, ge=0)
+    bytes_after: int = Field(default=0, ge=0)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed or self.modified or self.renamed)
+
+    def summary(self) -> dict[str, int]:
+        """Counts and byte totals, suitable for metrics payloads."""
+        return {
+            "added_count": len(self.added),
+            "removed_count": len(self.removed),
+            "modified_count": len(self.modified),
+            "renamed_count": len(self.renamed),
+            "unchanged_count": self.unchanged_count,
+            "bytes_added": sum(change.size_after or 0 for change in self.added),
+            "bytes_removed": sum(change.size_before or 0 for change in self.removed),
+            "bytes_modified_delta": sum(change.byte_delta for change in self.modified),
+            "net_byte_delta": self.bytes_after - self.bytes_before,
+        }
+
+
+# SHA-256 of zero bytes: empty files are interchangeable, so they are never paired as renames.
+_EMPTY_FILE_SHA256 = "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
+
+
+def diff_manifests(
+    previous: Iterable[Mapping[str, Any]],
+    current: Iterable[Mapping[str, Any]],
+) -> WorkspaceManifestDiff:
+    """Compute the structured difference between two manifests in linear time.
+
+    Manifest entries are mappings with ``path``, ``size`` and ``sha256`` keys.
+    Entries are joined by path through dictionaries; paths that only exist on
+    one side are then paired by content hash, so a moved file is reported once
+    as renamed instead of as a removal plus an addition. Empty files are not
+    paired, since any empty file would match any other.
+
+    Args:
+        previous: Entries of the older manifest.
+        current: Entries of the newer manifest.
+
+    Returns:
+        A `WorkspaceManifestDiff` with every list sorted by path.
+    """
+    before = {str(entry.get("path", "")): entry for entry in previous}
+    after = {str(entry.get("path", "")): entry for entry in current}
+    diff = WorkspaceManifestDiff(
+        bytes_before=sum(int(entry.get("size") or 0) for entry in before.values()),
+        bytes_after=sum(int(entry.get("size") or 0) for entry in after.values()),
+    )
+
+    removed_by_hash: dict[str, deque[str]] = {}
+    for path, entry in before.items():
+        if path in after:
+            continue
+        removed_by_hash.setdefault(str(entry.get("sha256") or ""), deque()).append(path)
+
+    for path, entry in after.items():
+        digest = str(entry.get("sha256") or "")
+        size = int(entry.get("size") or 0)
+        old = before.get(path)
+        if old is not None:
+            if str(old.get("sha256") or "") == digest:
+                diff.unchanged_count += 1
+            else:
+                diff.modified.append(
+                    ManifestFileChange(
+                        path=path,
+                        size_before=int(old.get("size") or 0),
+                        size_after=size,
+                        sha256_before=str(old.get("sha256") or ""),
+                        sha256_after=digest,
+                    )
+                )
+            continue
+        candidates = removed_by_hash.get(digest) if digest and digest != _EMPTY_FILE_SHA256 else None
+        if candidates:
+            source = candidates.popleft()
+            diff.renamed.append(
+                ManifestFileChange(
+                    path=path,
+                    previous_path=source,
+                    size_before=int(before[source].get("size") or 0),
+                    size_after=size,
+                    sha256_before=digest,
+                    sha256_after=digest,
+                )
+            )
+            continue
+        diff.added.append(ManifestFileChange(path=path, size_after=size, sha256_after=digest))
+
+    for paths in removed_by_hash.values():
+        for path in paths:
+            entry = before[path]
+            diff.removed.append(
+                ManifestFileChange(
+                    path=path,
+                    size_before=int(entry.get("size") or 0),
+                    sha256_before=str(entry.get("sha256") or ""),
+                )
+            )
+
+    for changes in (diff.added, diff.removed, diff.modified, diff.renamed):
+        changes.sort(key=lambda change: change.path)
+    return diff
+
+
 def collect_environment_keys(env: dict[str, str] | None = None) -> list[str]:
     """Extract and sort the keys from an environment dictionary.
 
@@ -165,8 +363,13 @@ __all__ = [
     "DEFAULT_WORKSPACE_MOUNT",
     "WorkspaceDescriptor",
     "WorkspaceCommandResult",
+    "WorkspaceBatchCopyResult",
+    "WorkspaceCopiedFile",
     "WorkspaceCopyResult",
     "WorkspaceSnapshotRecord",
+    "ManifestFileChange",
+    "WorkspaceManifestDiff",
     "collect_environment_keys",
+    "diff_manifests",
     "normalize_workspace_name",
 ]
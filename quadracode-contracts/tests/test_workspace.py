@@ -1,4 +1,6 @@
 """Tests for workspace module."""
+import hashlib
+
 import pytest
 from pydantic import ValidationError
 
@@ -10,6 +12,7 @@ from quadracode_contracts.workspace import (
     WorkspaceCopyResult,
     WorkspaceSnapshotRecord,
     collect_environment_keys,
+    diff_manifests,
 )
 
 
@@ -317,3 +320,61 @@ class TestCollectEnvironmentKeys:
         assert "ANTHROPIC_API_KEY" in keys
         assert "REDIS_HOST" in keys
         assert keys == sorted(keys)  # verify sorted
+
+
+class TestDiffManifests:
+    """Tests for diff_manifests function."""
+
+    @staticmethod
+    def _entry(path, sha, size):
+        return {"path": path, "sha256": sha, "size": size}
+
+    def test_classifies_changes(self):
+        """Should report added, removed, modified and renamed files with byte deltas."""
+        previous = [
+            self._entry("./keep.py", "k", 10),
+            self._entry("./edit.py", "e1", 10),
+            self._entry("./old_name.py", "r", 7),
+            self._entry("./gone.py", "g", 5),
+        ]
+        current = [
+            self._entry("./keep.py", "k", 10),
+            self._entry("./edit.py", "e2", 14),
+            self._entry("./new_name.py", "r", 7),
+            self._entry("./fresh.py", "f", 3),
+        ]
+
+        diff = diff_manifests(previous, current)
+
+        assert [change.path for change in diff.added] == ["./fresh.py"]
+        assert [change.path for change in diff.removed] == ["./gone.py"]
+        assert [change.path for change in diff.modified] == ["./edit.py"]
+        assert diff.modified[0].byte_delta == 4
+        assert [(c.previous_path, c.path) for c in diff.renamed] == [("./old_name.py", "./new_name.py")]
+        summary = diff.summary()
+        assert summary["unchanged_count"] == 1
+        assert summary["net_byte_delta"] == 2
+        assert diff.changed
+
+    def test_empty_files_are_not_paired_as_renames(self):
+        """Should report empty files as removed and added, never as renamed."""
+        empty = hashlib.sha256(b"").hexdigest()
+        previous = [self._entry("./a/__init__.py", empty, 0), self._entry("./dup1", "d", 2)]
+        current = [
+            self._entry("./b/__init__.py", empty, 0),
+            self._entry("./dup2", "d", 2),
+            self._entry("./dup3", "d", 2),
+        ]
+
+        diff = diff_manifests(previous, current)
+
+        assert [(c.previous_path, c.path) for c in diff.renamed] == [("./dup1", "./dup2")]
+        assert [change.path for change in diff.added] == ["./b/__init__.py", "./dup3"]
+        assert [change.path for change in diff.removed] == ["./a/__init__.py"]
+
+    def test_identical_manifests(self):
+        """Should report no changes for identical manifests."""
+        entries = [self._entry("./a", "x", 1)]
+        diff = diff_manifests(entries, entries)
+        assert not diff.changed
+        assert diff.unchanged_count == 1
@@ -27,6 +27,7 @@ Setup:
 Toolset:
 - workspace_exec: Execute shell commands (set working_dir under /workspace).
 - workspace_copy_to / workspace_copy_from: Transfer artifacts between host and workspace.
+- workspace_copy_to_batch / workspace_copy_from_batch: Transfer many artifacts (globs allowed) in one tar stream.
 - workspace_info: Inspect container and volume state.
 - workspace_destroy: Tear down the workspace when the task is fully complete.
 
@@ -63,6 +63,7 @@ You and your agents are "remote drivers" of the workspace container.
 Tools:
 - workspace_exec: Run shell commands (defaults to /workspace).
 - workspace_copy_to / workspace_copy_from: Move files between host and workspace.
+- workspace_copy_to_batch / workspace_copy_from_batch: Move many files or glob matches in one tar transfer, with checksums.
 - workspace_info: Inspect container and volume state.
 - workspace_destroy: Clean up when the task is closed.
 
@@ -0,0 +1,432 @@
+"""
+Persistent inverted index behind the progressive loader's code search.
+
+Searching by walking the source tree and scanning every line of every file on
+each turn costs seconds of disk I/O against a real workspace. `CodeSearchIndex`
+instead keeps a token index in SQLite: every identifier of every line is stored
+lowercased, together with its camelCase / snake_case parts, as a posting
+``(token, file, term frequency, line numbers)``. The index is built once and
+refreshed incrementally: a refresh only ``stat``s the tree (pruning excluded
+directories) and re-reads files whose size or mtime changed, at most every
+``code_search_refresh_seconds``.
+
+Query terms match tokens exactly or by prefix (a B-tree range scan), and files
+are ranked with BM25 over the matched postings, weighted by how many of the
+terms a file matches and boosted when those terms occur on nearby lines. Only
+the files returned are opened, to read back the best matching line.
+
+Environment Variables (read by `ContextEngineConfig.from_environment`):
+    QUADRACODE_CODE_SEARCH_ROOTS: Comma-separated directories to index,
+        relative to the project root unless absolute.
+    QUADRACODE_CODE_SEARCH_INDEX_PATH: Directory holding the index databases
+        (default ``<external_memory_path>/code_search_index``).
+    QUADRACODE_CODE_SEARCH_REFRESH_SECONDS: Minimum seconds between two
+        incremental refreshes of the same index (default 30).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .config import ContextEngineConfig
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA_VERSION = 1
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    token TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    lines TEXT NOT NULL,
+    PRIMARY KEY (token, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_by_file ON postings (file_id);
+"""
+
+_WORD = re.compile(r"[A-Za-z0-9_]+")
+_SUBWORD = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+_MIN_TOKEN = 2
+_MAX_TOKEN = 64
+_MAX_FILE_BYTES = 1024 * 1024
+# Line numbers kept per posting; enough to pick a snippet and measure proximity.
+_MAX_POSTING_LINES = 32
+_PREFIX_WEIGHT = 0.5
+_PROXIMITY_WEIGHT = 1.0
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+_SQL_BATCH = 500
+_SNIPPET_CHARS = 160
+
+
+def line_tokens(line: str) -> Set[str]:
+    """Lowercased identifiers of a line plus their camelCase / snake_case parts."""
+    tokens: Set[str] = set()
+    for word in _WORD.findall(line):
+        if len(word) > _MAX_TOKEN:
+            continue
+        if len(word) >= _MIN_TOKEN:
+            tokens.add(word.lower())
+        parts = _SUBWORD.findall(word)
+        if len(parts) > 1:
+            tokens.update(part.lower() for part in parts if len(part) >= _MIN_TOKEN)
+    return tokens
+
+
+def _query_tokens(terms: Iterable[str]) -> List[str]:
+    tokens: Set[str] = set()
+    for term in terms:
+        tokens.update(word.lower() for word in _WORD.findall(term) if len(word) >= _MIN_TOKEN)
+    return sorted(tokens)
+
+
+@dataclass
+class CodeSearchHit:
+    """One ranked file, with its best matching line."""
+
+    path: Path
+    line: int
+    snippet: str
+    score: float
+
+
+@dataclass
+class IndexRefreshStats:
+    """What the last refresh had to do."""
+
+    files: int = 0
+    reindexed: int = 0
+    removed: int = 0
+    seconds: float = 0.0
+
+
+class CodeSearchIndex:
+    """
+    Token index over a set of directory roots, persisted in one SQLite file.
+
+    Thread-safe: the loader queries it from worker threads, so every database
+    access goes through one connection guarded by a lock.
+
+    Attributes:
+        roots: Directories indexed recursively.
+        extensions: Lowercased file suffixes to index.
+        exclude_dirs: Directory names skipped anywhere in the tree.
+        refresh_interval: Seconds during which a previous refresh is trusted.
+        last_refresh: Statistics of the most recent refresh.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | str,
+        roots: Sequence[Path],
+        *,
+        extensions: Iterable[str],
+        exclude_dirs: Iterable[str] = (),
+        refresh_interval: float = 30.0,
+    ) -> None:
+        self.db_path = str(db_path)
+        self.roots = [Path(root) for root in roots]
+        self.extensions = {ext.lower() for ext in extensions}
+        self.exclude_dirs = set(exclude_dirs)
+        self.refresh_interval = refresh_interval
+        self.last_refresh = IndexRefreshStats()
+        self._refreshed_at: Optional[float] = None
+        self._lock = Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._prepare_schema()
+
+    def _prepare_schema(self) -> None:
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        with self._conn:
+            if version != _SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS postings")
+                self._conn.execute("DROP TABLE IF EXISTS files")
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def _walk(self) -> Dict[str, Tuple[int, int]]:
+        found: Dict[str, Tuple[int, int]] = {}
+        for root in self.roots:
+            if not root.is_dir():
+                continue
+            for directory, dirnames, filenames in os.walk(root):
+                dirnames[:] = sorted(name for name in dirnames if name not in self.exclude_dirs)
+                for name in filenames:
+                    if os.path.splitext(name)[1].lower() not in self.extensions:
+                        continue
+                    path = os.path.join(directory, name)
+                    try:
+                        info = os.stat(path)
+                    except OSError:
+                        continue
+                    found[path] = (info.st_size, info.st_mtime_ns)
+        return found
+
+    def _read_postings(self, path: str, size: int) -> Dict[str, List[int]]:
+        if size > _MAX_FILE_BYTES:
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                text = handle.read()
+        except (UnicodeDecodeError, OSError):
+            return {}
+        postings: Dict[str, List[int]] = {}
+        for number, line in enumerate(text.splitlines(), start=1):
+            for token in line_tokens(line):
+                postings.setdefault(token, []).append(number)
+        return postings
+
+    def refresh(self, *, force: bool = False) -> IndexRefreshStats:
+        """Brings the index up to date with the roots, re-reading only changed files."""
+        with self._lock:
+            now = time.monotonic()
+            if (
+                not force
+                and self._refreshed_at is not None
+                and now - self._refreshed_at < self.refresh_interval
+            ):
+                return self.last_refresh
+            started = time.perf_counter()
+            found = self._walk()
+            known = {
+                path: (file_id, (size, mtime_ns))
+                for file_id, path, size, mtime_ns in self._conn.execute(
+                    "SELECT id, path, size, mtime_ns FROM files"
+                )
+            }
+            stale = [file_id for path, (file_id, stamp) in known.items() if found.get(path) != stamp]
+            changed = [path for path, stamp in found.items() if path not in known or known[path][1] != stamp]
+            with self._conn:
+                for start in range(0, len(stale), _SQL_BATCH):
+                    batch = stale[start : start + _SQL_BATCH]
+                    marks = ",".join("?" * len(batch))
+                    self._conn.execute(f"DELETE FROM postings WHERE file_id IN ({marks})", batch)
+                    self._conn.execute(f"DELETE FROM files WHERE id IN ({marks})", batch)
+                for path in changed:
+                    size, mtime_ns = found[path]
+                    postings = self._read_postings(path, size)
+                    cursor = self._conn.execute(
+                        "INSERT INTO files (path, size, mtime_ns, length) VALUES (?, ?, ?, ?)",
+                        (path, size, mtime_ns, sum(len(lines) for lines in postings.values())),
+                    )
+                    file_id = cursor.lastrowid
+                    self._conn.executemany(
+                        "INSERT INTO postings (token, file_id, tf, lines) VALUES (?, ?, ?, ?)",
+                        (
+                            (token, file_id, len(lines), " ".join(map(str, lines[:_MAX_POSTING_LINES])))
+                            for token, lines in postings.items()
+                        ),
+                    )
+            self._refreshed_at = now
+            self.last_refresh = IndexRefreshStats(
+                files=len(found),
+                reindexed=len(changed),
+                removed=sum(1 for path in known if path not in found),
+                seconds=time.perf_counter() - started,
+            )
+            if changed or stale:
+                logger.debug(
+                    "Code search index %s: %d file(s) reindexed, %d removed in %.3fs",
+                    self.db_path,
+                    self.last_refresh.reindexed,
+                    self.last_refresh.removed,
+                    self.last_refresh.seconds,
+                )
+            return self.last_refresh
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    def search(self, terms: Iterable[str], limit: int) -> List[CodeSearchHit]:
+        """Returns up to ``limit`` files ranked for ``terms``, best first."""
+        tokens = _query_tokens(terms)
+        if not tokens or limit <= 0:
+            return []
+        self.refresh()
+        with self._lock:
+            total_files, avg_length = self._conn.execute(
+                "SELECT COUNT(*), AVG(length) FROM files"
+            ).fetchone()
+            if not total_files:
+                return []
+            # term -> file_id -> (weighted tf, lines)
+            matches: Dict[str, Dict[int, Tuple[float, Set[int]]]] = {}
+            for term in tokens:
+                per_file: Dict[int, Tuple[float, Set[int]]] = {}
+                rows = self._conn.execute(
+                    "SELECT token, file_id, tf, lines FROM postings WHERE token >= ? AND token < ?",
+                    (term, term + "\U0010ffff"),
+                )
+                for token, file_id, tf, lines in rows:
+                    weight = 1.0 if token == term else _PREFIX_WEIGHT
+                    previous_tf, previous_lines = per_file.get(file_id, (0.0, set()))
+                    previous_lines.update(int(number) for number in lines.split())
+                    per_file[file_id] = (previous_tf + tf * weight, previous_lines)
+                if per_file:
+                    matches[term] = per_file
+            if not matches:
+                return []
+            file_ids = sorted({file_id for per_file in matches.values() for file_id in per_file})
+            files: Dict[int, Tuple[str, int]] = {}
+            for start in range(0, len(file_ids), _SQL_BATCH):
+                batch = file_ids[start : start + _SQL_BATCH]
+                marks = ",".join("?" * len(batch))
+                for file_id, path, length in self._conn.execute(
+                    f"SELECT id, path, length FROM files WHERE id IN ({marks})", batch
+                ):
+                    files[file_id] = (path, length)
+
+        idf = {
+            term: math.log(1 + (total_files - len(per_file) + 0.5) / (len(per_file) + 0.5))
+            for term, per_file in matches.items()
+        }
+        avg_length = avg_length or 1.0
+        ranked: List[Tuple[float, str, int]] = []
+        for file_id, (path, length) in files.items():
+            norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * length / avg_length)
+            score = 0.0
+            term_lines: Dict[str, Set[int]] = {}
+            for term, per_file in matches.items():
+                entry = per_file.get(file_id)
+                if entry is None:
+                    continue
+                tf, lines = entry
+                score += idf[term] * tf * (_BM25_K1 + 1) / (tf + norm)
+                term_lines[term] = lines
+            coverage = len(term_lines) / len(tokens)
+            score *= coverage
+            if len(term_lines) > 1:
+                score += _PROXIMITY_WEIGHT * coverage / (1 + _min_span(term_lines))
+            ranked.append((score, path, _best_line(term_lines, idf)))
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+
+        hits: List[CodeSearchHit] = []
+        for score, path, line in ranked:
+            snippet = _read_line(path, line)
+            if snippet is None:
+                continue
+            hits.append(CodeSearchHit(path=Path(path), line=line, snippet=snippet, score=round(score, 4)))
+            if len(hits) >= limit:
+                break
+        return hits
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _min_span(term_lines: Dict[str, Set[int]]) -> int:
+    """Smallest number of lines separating an occurrence of every term."""
+    events = sorted((line, term) for term, lines in term_lines.items() for line in lines)
+    needed = len(term_lines)
+    counts: Dict[str, int] = {}
+    best = events[-1][0] - events[0][0]
+    left = 0
+    for line, term in events:
+        counts[term] = counts.get(term, 0) + 1
+        while len(counts) == needed:
+            left_line, left_term = events[left]
+            best = min(best, line - left_line)
+            counts[left_term] -= 1
+            if not counts[left_term]:
+                del counts[left_term]
+            left += 1
+    return best
+
+
+def _best_line(term_lines: Dict[str, Set[int]], idf: Dict[str, float]) -> int:
+    """The line carrying the most (IDF-weighted) distinct terms, earliest on ties."""
+    weights: Dict[int, float] = {}
+    for term, lines in term_lines.items():
+        for line in lines:
+            weights[line] = weights.get(line, 0.0) + idf[term]
+    return min(weights, key=lambda line: (-weights[line], line))
+
+
+def _read_line(path: str, number: int) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            for current, line in enumerate(handle, start=1):
+                if current == number:
+                    snippet = line.strip()
+                    if len(snippet) > _SNIPPET_CHARS:
+                        snippet = snippet[: _SNIPPET_CHARS - 3] + "…"
+                    return snippet
+    except (UnicodeDecodeError, OSError):
+        return None
+    return None
+
+
+_INDEXES: Dict[Tuple[str, ...], CodeSearchIndex] = {}
+_INDEXES_LOCK = Lock()
+
+
+def _index_db_path(config: ContextEngineConfig, roots: Sequence[Path]) -> str:
+    directory = Path(
+        config.code_search_index_path
+        or os.path.join(config.external_memory_path, "code_search_index")
+    )
+    identity = "\n".join(sorted(str(root) for root in roots))
+    name = hashlib.sha1(identity.encode("utf-8")).hexdigest()[:16]
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+    except OSError as exc:
+        logger.warning("Code search index dir %s unavailable (%s); indexing in memory", directory, exc)
+        return ":memory:"
+    return str(directory / f"{name}.sqlite3")
+
+
+def get_code_search_index(config: ContextEngineConfig, roots: Sequence[Path]) -> CodeSearchIndex:
+    """Returns the process-wide index for ``roots``, opening or creating it on first use."""
+    resolved = [Path(root).resolve() for root in roots]
+    key = (
+        *sorted(str(root) for root in resolved),
+        config.code_search_index_path or config.external_memory_path,
+    )
+    options = {
+        "extensions": config.code_search_extensions,
+        "exclude_dirs": config.code_search_exclude_dirs,
+        "refresh_interval": config.code_search_refresh_seconds,
+    }
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            db_path = _index_db_path(config, resolved)
+            try:
+                index = CodeSearchIndex(db_path, resolved, **options)
+            except sqlite3.DatabaseError as exc:
+                logger.warning("Unusable code search index %s (%s); indexing in memory", db_path, exc)
+                index = CodeSearchIndex(":memory:", resolved, **options)
+            _INDEXES[key] = index
+        return index
+
+
+__all__ = [
+    "CodeSearchHit",
+    "CodeSearchIndex",
+    "IndexRefreshStats",
+    "get_code_search_index",
+    "line_tokens",
+]
@@ -43,6 +43,10 @@ class ContextEngineConfig:
     message_budget_ratio: float = 0.6  # Max % of context window for messages
     min_message_count_to_compress: int = 15  # Only compress if > N messages
     message_retention_count: int = 10  # Keep last N messages raw
+    history_high_watermark: float = 1.0  # Fraction of message budget that triggers folding
+    history_low_watermark: float = 0.6  # Fraction of message budget a fold aims to get under
+    speculative_curation_enabled: bool = True  # Compact the next turn's context in the background
+    speculative_hard_limit_ratio: float = 0.9  # Above this share of the window, compact inline
 
     # Quality thresholds
     quality_threshold: float = 0.7
@@ -86,6 +90,11 @@ class ContextEngineConfig:
         ]
     )
     code_search_max_results: int = 3
+    code_search_roots: List[str] = field(
+        default_factory=lambda: ["quadracode-runtime", "quadracode-tools", "quadracode-ui"]
+    )  # relative to project_root; an active workspace's host_path takes precedence
+    code_search_index_path: str = ""  # defaults to external_memory_path/code_search_index
+    code_search_refresh_seconds: float = 30.0  # minimum interval between incremental index refreshes
     code_search_extensions: List[str] = field(
         default_factory=lambda: [".py", ".md", ".json", ".yaml", ".yml"]
     )
@@ -93,12 +102,25 @@ class ContextEngineConfig:
         default_factory=lambda: [".git", ".venv", "node_modules", "build", "dist", "__pycache__"]
     )
     prefetch_queue_limit: int = 20
+    static_segment_cache_enabled: bool = True  # memoize filesystem-derived loader segments
     max_tool_payload_chars: int = 4_096
 
     # Reducer / summarization
     reducer_model: Optional[str] = "anthropic:claude-haiku-4-5-20251001"
     reducer_chunk_tokens: int = 600
     reducer_target_tokens: int = 200
+    reducer_max_concurrency: int = 4  # parallel chunk summaries per reduction
+    reducer_combine_fanout: int = 4  # partial summaries merged per combine call
+    reducer_call_timeout: float = 30.0  # seconds per LLM call; <=0 disables
+    reducer_cache_entries: int = 512  # memoized chunk summaries
+
+    # Summary cache (content-addressed reducer outputs shared across threads)
+    summary_cache_backend: str = "disk"  # disk | redis | memory | none
+    summary_cache_path: str = ""  # defaults to external_memory_path/summary_cache
+    summary_cache_redis_url: str = ""  # defaults to metrics_redis_url
+    summary_cache_entries: int = 1024
+    summary_cache_ttl_seconds: int = 7 * 24 * 3600  # both persistent tiers; <=0 disables
+    summary_cache_disk_max_entries: int = 20_000  # disk tier files kept by its sweep; <=0 unbounded
 
     # Governor / planning
     governor_model: Optional[str] = "heuristic"
@@ -109,6 +131,9 @@ class ContextEngineConfig:
     
     # Scorer / quality evaluation  
     scorer_model: Optional[str] = "anthropic:claude-haiku-4-5-20251001"
+    embedding_backend: str = "hashed"  # hashed | registered name | module:factory
+    embedding_dimension: int = 1024
+    embedding_cache_entries: int = 4096  # vectors memoized by content hash
 
     # Skills / progressive disclosure
     skills_paths: List[str] = field(
@@ -116,6 +141,8 @@ class ContextEngineConfig:
             "private/skills",
         ]
     )
+    skills_refresh_seconds: float = 5.0  # minimum interval between skill file rescans
+    skills_body_cache_entries: int = 64  # LRU of skill bodies read on activation
 
     # Externalization persistence
     externalize_write_enabled: bool = False
@@ -226,9 +253,38 @@ class ContextEngineConfig:
         base.message_budget_ratio = _float("QUADRACODE_MESSAGE_BUDGET_RATIO", base.message_budget_ratio)
         base.min_message_count_to_compress = _int("QUADRACODE_MIN_MESSAGE_COUNT_TO_COMPRESS", base.min_message_count_to_compress)
         base.message_retention_count = _int("QUADRACODE_MESSAGE_RETENTION_COUNT", base.message_retention_count)
+        base.history_high_watermark = _float("QUADRACODE_HISTORY_HIGH_WATERMARK", base.history_high_watermark)
+        base.history_low_watermark = _float("QUADRACODE_HISTORY_LOW_WATERMARK", base.history_low_watermark)
+        base.speculative_hard_limit_ratio = _float(
+            "QUADRACODE_SPECULATIVE_HARD_LIMIT_RATIO", base.speculative_hard_limit_ratio
+        )
         base.max_tool_payload_chars = _int("QUADRACODE_MAX_TOOL_PAYLOAD_CHARS", base.max_tool_payload_chars)
         base.reducer_chunk_tokens = _int("QUADRACODE_REDUCER_CHUNK_TOKENS", base.reducer_chunk_tokens)
         base.reducer_target_tokens = _int("QUADRACODE_REDUCER_TARGET_TOKENS", base.reducer_target_tokens)
+        base.reducer_max_concurrency = _int(
+            "QUADRACODE_REDUCER_MAX_CONCURRENCY", base.reducer_max_concurrency
+        )
+        base.reducer_combine_fanout = _int("QUADRACODE_REDUCER_COMBINE_FANOUT", base.reducer_combine_fanout)
+        base.reducer_call_timeout = _float("QUADRACODE_REDUCER_CALL_TIMEOUT", base.reducer_call_timeout)
+        base.reducer_cache_entries = _int("QUADRACODE_REDUCER_CACHE_ENTRIES", base.reducer_cache_entries)
+        base.summary_cache_entries = _int("QUADRACODE_SUMMARY_CACHE_ENTRIES", base.summary_cache_entries)
+        base.summary_cache_ttl_seconds = _int(
+            "QUADRACODE_SUMMARY_CACHE_TTL_SECONDS", base.summary_cache_ttl_seconds
+        )
+        base.summary_cache_disk_max_entries = _int(
+            "QUADRACODE_SUMMARY_CACHE_DISK_MAX_ENTRIES", base.summary_cache_disk_max_entries
+        )
+        base.code_search_refresh_seconds = _float(
+            "QUADRACODE_CODE_SEARCH_REFRESH_SECONDS", base.code_search_refresh_seconds
+        )
+        base.skills_refresh_seconds = _float("QUADRACODE_SKILLS_REFRESH_SECONDS", base.skills_refresh_seconds)
+        base.skills_body_cache_entries = _int(
+            "QUADRACODE_SKILLS_BODY_CACHE_ENTRIES", base.skills_body_cache_entries
+        )
+        base.embedding_dimension = _int("QUADRACODE_EMBEDDING_DIMENSION", base.embedding_dimension)
+        base.embedding_cache_entries = _int(
+            "QUADRACODE_EMBEDDING_CACHE_ENTRIES", base.embedding_cache_entries
+        )
         base.governor_max_segments = _int("QUADRACODE_GOVERNOR_MAX_SEGMENTS", base.governor_max_segments)
         base.quality_threshold = _float("QUADRACODE_QUALITY_THRESHOLD", base.quality_threshold)
         base.context_reset_trigger_tokens = _int(
@@ -246,6 +302,7 @@ class ContextEngineConfig:
         base.governor_model = os.environ.get("QUADRACODE_GOVERNOR_MODEL", base.governor_model)
         base.curator_model = os.environ.get("QUADRACODE_CURATOR_MODEL", base.curator_model)
         base.scorer_model = os.environ.get("QUADRACODE_SCORER_MODEL", base.scorer_model)
+        base.embedding_backend = os.environ.get("QUADRACODE_EMBEDDING_BACKEND", base.embedding_backend)
         base.metrics_emit_mode = os.environ.get("QUADRACODE_METRICS_EMIT_MODE", base.metrics_emit_mode)
         base.metrics_redis_url = os.environ.get("QUADRACODE_METRICS_REDIS_URL", base.metrics_redis_url)
         base.metrics_stream_key = os.environ.get("QUADRACODE_METRICS_STREAM_KEY", base.metrics_stream_key)
@@ -254,6 +311,19 @@ class ContextEngineConfig:
             base.autonomous_metrics_stream_key,
         )
         base.context_reset_root = os.environ.get("QUADRACODE_CONTEXT_RESET_ROOT", base.context_reset_root)
+        base.summary_cache_backend = os.environ.get(
+            "QUADRACODE_SUMMARY_CACHE_BACKEND", base.summary_cache_backend
+        )
+        base.summary_cache_path = os.environ.get("QUADRACODE_SUMMARY_CACHE_PATH", base.summary_cache_path)
+        base.summary_cache_redis_url = os.environ.get(
+            "QUADRACODE_SUMMARY_CACHE_REDIS_URL", base.summary_cache_redis_url
+        )
+        base.code_search_index_path = os.environ.get(
+            "QUADRACODE_CODE_SEARCH_INDEX_PATH", base.code_search_index_path
+        )
+        roots = os.environ.get("QUADRACODE_CODE_SEARCH_ROOTS")
+        if roots:
+            base.code_search_roots = [root.strip() for root in roots.split(",") if root.strip()]
 
         # Booleans
         base.metrics_enabled = _bool("QUADRACODE_METRICS_ENABLED", base.metrics_enabled)
@@ -263,6 +333,12 @@ class ContextEngineConfig:
         base.context_reset_enabled = _bool(
             "QUADRACODE_CONTEXT_RESET_ENABLED", base.context_reset_enabled
         )
+        base.static_segment_cache_enabled = _bool(
+            "QUADRACODE_STATIC_SEGMENT_CACHE", base.static_segment_cache_enabled
+        )
+        base.speculative_curation_enabled = _bool(
+            "QUADRACODE_SPECULATIVE_CURATION", base.speculative_curation_enabled
+        )
         base.context_reset_trigger_ratio = _float(
             "QUADRACODE_CONTEXT_RESET_TRIGGER_RATIO", base.context_reset_trigger_ratio
         )
@@ -0,0 +1,290 @@
+"""
+This module provides the embedding layer used for relevance and similarity
+heuristics, and a small in-process `VectorIndex` to query it in batches.
+
+Embedders turn texts into rows of a NumPy matrix whose rows are L2-normalized,
+so cosine similarity against many texts is one matrix-vector product. The
+default `HashedNgramEmbedder` is local and CPU-only: it hashes word unigrams
+and bigrams into a fixed number of buckets (the "hashing trick"), needing no
+vocabulary, model download or network access. Other embedders can be plugged
+in with `register_embedder` or by naming a ``module:factory`` callable as the
+backend; factories receive the `ContextEngineConfig`.
+
+`get_embedder` wraps the configured embedder in a `CachedEmbedder` shared by
+the whole process, which memoizes vectors by content hash so unchanged segments
+are never embedded twice.
+
+Environment Variables (read by `ContextEngineConfig.from_environment`):
+    QUADRACODE_EMBEDDING_BACKEND: ``hashed`` (default), a registered name, or
+        ``module:factory``.
+    QUADRACODE_EMBEDDING_DIMENSION: Buckets of the hashed embedder (default 1024).
+    QUADRACODE_EMBEDDING_CACHE_ENTRIES: Vectors memoized per process (default 4096).
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import re
+import zlib
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional, Protocol, Sequence, Set, Tuple
+
+import numpy as np
+
+from .config import ContextEngineConfig
+from .tokenizer import content_hash
+
+LOGGER = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"\b\w+\b")
+
+
+class Embedder(Protocol):
+    """Maps texts to a ``(len(texts), dimension)`` matrix of L2-normalized rows."""
+
+    dimension: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        ...
+
+
+class HashedNgramEmbedder:
+    """
+    Feature-hashed bag of word n-grams.
+
+    Words are lowercased ``\\w+`` runs longer than ``min_token_length - 1``
+    characters; each n-gram in ``ngram_range`` adds one count to bucket
+    ``crc32(ngram) % dimension``. Rows with no features are all zeros, so their
+    similarity to anything is 0.
+    """
+
+    def __init__(
+        self,
+        dimension: int = 1024,
+        *,
+        ngram_range: Tuple[int, int] = (1, 2),
+        min_token_length: int = 3,
+    ) -> None:
+        self.dimension = max(8, int(dimension))
+        self.ngram_range = ngram_range
+        self.min_token_length = min_token_length
+
+    def _features(self, text: str) -> List[int]:
+        words = [word for word in _WORD_PATTERN.findall(text.lower()) if len(word) >= self.min_token_length]
+        low, high = self.ngram_range
+        buckets: List[int] = []
+        for size in range(low, high + 1):
+            for start in range(len(words) - size + 1):
+                gram = " ".join(words[start : start + size])
+                buckets.append(zlib.crc32(gram.encode("utf-8")) % self.dimension)
+        return buckets
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            buckets = self._features(text) if text else []
+            if buckets:
+                np.add.at(matrix[row], buckets, 1.0)
+        return normalize_rows(matrix)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scales every non-zero row to unit length (in place) and returns the matrix."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+class CachedEmbedder:
+    """
+    Memoizes another embedder's vectors by content hash (LRU).
+
+    Thread-safe; misses of one call are embedded together in a single batch.
+    """
+
+    def __init__(self, embedder: Embedder, *, max_entries: int = 4096) -> None:
+        self.embedder = embedder
+        self.dimension = embedder.dimension
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = Lock()
+
+    def embed(self, texts: Sequence[str], *, keys: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Embeds ``texts``; ``keys`` (e.g. segments' ``token_hash``) skip rehashing them."""
+        keys = list(keys) if keys is not None else [content_hash(text) for text in texts]
+        matrix = np.empty((len(texts), self.dimension), dtype=np.float32)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for row, key in enumerate(keys):
+                vector = self._vectors.get(key)
+                if vector is None:
+                    missing.setdefault(key, []).append(row)
+                    continue
+                self._vectors.move_to_end(key)
+                matrix[row] = vector
+            self.hits += len(keys) - sum(len(rows) for rows in missing.values())
+            self.misses += len(missing)
+        if missing:
+            pending = list(missing)
+            fresh = self.embedder.embed([texts[missing[key][0]] for key in pending])
+            with self._lock:
+                for key, vector in zip(pending, fresh):
+                    matrix[missing[key]] = vector
+                    if self.max_entries > 0:
+                        self._vectors[key] = vector.copy()
+                while len(self._vectors) > self.max_entries:
+                    self._vectors.popitem(last=False)
+        return matrix
+
+    def embed_one(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+
+class VectorIndex:
+    """
+    Keyed unit vectors stored as one contiguous matrix.
+
+    Similarity queries are a single matrix product over every stored row.
+    Capacity grows by doubling; removals move the last row into the hole.
+    """
+
+    def __init__(self, dimension: int) -> None:
+        self.dimension = dimension
+        self._matrix = np.zeros((16, dimension), dtype=np.float32)
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._rows
+
+    @property
+    def keys(self) -> List[str]:
+        return list(self._keys)
+
+    def upsert(self, keys: Sequence[str], vectors: np.ndarray) -> None:
+        for key, vector in zip(keys, vectors):
+            row = self._rows.get(key)
+            if row is None:
+                row = len(self._keys)
+                if row == len(self._matrix):
+                    grown = np.zeros((2 * len(self._matrix), self.dimension), dtype=np.float32)
+                    grown[:row] = self._matrix[:row]
+                    self._matrix = grown
+                self._keys.append(key)
+                self._rows[key] = row
+            self._matrix[row] = vector
+
+    def remove(self, key: str) -> None:
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+        last = len(self._keys) - 1
+        if row != last:
+            moved = self._keys[last]
+            self._matrix[row] = self._matrix[last]
+            self._keys[row] = moved
+            self._rows[moved] = row
+        self._keys.pop()
+
+    def retain(self, keys: Iterable[str]) -> None:
+        """Drops every key not in ``keys``."""
+        keep = set(keys)
+        for key in [key for key in self._keys if key not in keep]:
+            self.remove(key)
+
+    def similarities(self, query: np.ndarray, keys: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Cosine similarity of ``query`` to ``keys`` (in that order), or to every row."""
+        if keys is None:
+            return self._matrix[: len(self._keys)] @ query
+        rows = np.fromiter((self._rows[key] for key in keys), dtype=np.intp, count=len(keys))
+        return self._matrix[rows] @ query
+
+    def nearest(self, query: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        """The ``k`` most similar keys, best first."""
+        if not self._keys or k <= 0:
+            return []
+        scores = self.similarities(query)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self._keys[row], float(scores[row])) for row in top]
+
+
+def jaccard_similarities(query: Set[str], candidates: Sequence[Set[str]]) -> np.ndarray:
+    """Exact Jaccard similarity of ``query`` to every candidate set.
+
+    Shared tokens are tallied per candidate in one pass, and the unions and
+    ratios for all candidates are then computed as array operations.
+    """
+    result = np.zeros(len(candidates), dtype=np.float64)
+    if not query or not candidates:
+        return result
+    shared = [row for row, tokens in enumerate(candidates) for token in tokens if token in query]
+    intersection = np.bincount(np.asarray(shared, dtype=np.intp), minlength=len(candidates)).astype(np.float64)
+    sizes = np.fromiter((len(tokens) for tokens in candidates), dtype=np.float64, count=len(candidates))
+    union = len(query) + sizes - intersection
+    np.divide(intersection, union, out=result, where=(sizes > 0) & (union > 0))
+    return result
+
+
+EmbedderFactory = Callable[[ContextEngineConfig], Embedder]
+
+_FACTORIES: Dict[str, EmbedderFactory] = {
+    "hashed": lambda config: HashedNgramEmbedder(config.embedding_dimension),
+}
+_EMBEDDERS: Dict[Tuple[str, int, int], CachedEmbedder] = {}
+_EMBEDDERS_LOCK = Lock()
+
+
+def register_embedder(name: str, factory: EmbedderFactory) -> None:
+    """Makes ``factory`` selectable as ``embedding_backend = name``."""
+    _FACTORIES[name.strip().lower()] = factory
+
+
+def _resolve_factory(backend: str) -> EmbedderFactory:
+    factory = _FACTORIES.get(backend.lower())
+    if factory is not None:
+        return factory
+    if ":" in backend:
+        module_name, _, attribute = backend.partition(":")
+        try:
+            return getattr(importlib.import_module(module_name), attribute)
+        except (ImportError, AttributeError) as exc:
+            LOGGER.warning("Embedding backend %r unavailable (%s); using hashed embeddings", backend, exc)
+    else:
+        LOGGER.warning("Unknown embedding backend %r; using hashed embeddings", backend)
+    return _FACTORIES["hashed"]
+
+
+def get_embedder(config: ContextEngineConfig) -> CachedEmbedder:
+    """Returns the process-wide cached embedder for the configured backend."""
+    backend = (config.embedding_backend or "hashed").strip()
+    identity = (backend, config.embedding_dimension, config.embedding_cache_entries)
+    with _EMBEDDERS_LOCK:
+        embedder = _EMBEDDERS.get(identity)
+        if embedder is None:
+            embedder = CachedEmbedder(
+                _resolve_factory(backend)(config),
+                max_entries=config.embedding_cache_entries,
+            )
+            _EMBEDDERS[identity] = embedder
+        return embedder
+
+
+__all__ = [
+    "CachedEmbedder",
+    "Embedder",
+    "HashedNgramEmbedder",
+    "VectorIndex",
+    "get_embedder",
+    "jaccard_similarities",
+    "normalize_rows",
+    "register_embedder",
+]
@@ -0,0 +1,222 @@
+"""
+This module provides the `HotpathProbe`, a cached client for the agent
+registry's ``/agents/hotpath`` endpoint.
+
+The context engine checks hotpath residency on every ``pre_process`` call, so the
+probe must not put network latency on the critical path. The probe therefore:
+
+- keeps one long-lived, keep-alive ``httpx.AsyncClient``, bound to the event
+  loop that uses it; a call from another loop closes the previous client on
+  its own loop before opening a new one, and callers that run the probe on a
+  short-lived loop (the context engine's sync wrappers) `aclose` it before
+  that loop ends;
+- caches the agent list for a short TTL and, once the entry is stale, serves the
+  stale value while a background task refreshes it;
+- opens a circuit breaker after repeated failures, during which calls return
+  the last known value without touching the network.
+
+Environment Variables:
+    QUADRACODE_HOTPATH_PROBE_TIMEOUT: Request timeout in seconds (default 3).
+    QUADRACODE_HOTPATH_CACHE_TTL: Seconds a result is considered fresh (default 10).
+    QUADRACODE_HOTPATH_BREAKER_THRESHOLD: Consecutive failures that open the
+        breaker (default 3).
+    QUADRACODE_HOTPATH_BREAKER_COOLDOWN: Seconds the breaker stays open (default 30).
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+import weakref
+from typing import Any, Callable, Dict, List
+
+import httpx
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        LOGGER.warning("Invalid float for %s=%s; using %.2f", name, raw, default)
+        return default
+
+
+class HotpathProbe:
+    """
+    Cached, circuit-broken reader of the registry's hotpath agent list.
+
+    Attributes:
+        base_url: The agent registry base URL.
+        timeout: The per-request timeout in seconds.
+        ttl: How long a fetched result is served without refreshing.
+        failure_threshold: Consecutive failures that open the breaker.
+        cooldown: How long the breaker stays open.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        timeout: float = 3.0,
+        ttl: float = 10.0,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.ttl = ttl
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self._clock = clock
+        self._transport = transport
+        self._agents: List[Dict[str, Any]] | None = None
+        self._fetched_at = 0.0
+        self._failures = 0
+        self._open_until = 0.0
+        self._client: httpx.AsyncClient | None = None
+        self._client_loop: "weakref.ReferenceType[asyncio.AbstractEventLoop] | None" = None
+        self._refresh_task: asyncio.Task[None] | None = None
+
+    @classmethod
+    def from_environment(cls, base_url: str) -> "HotpathProbe":
+        """Creates a probe configured from the ``QUADRACODE_HOTPATH_*`` variables."""
+        return cls(
+            base_url,
+            timeout=_env_float("QUADRACODE_HOTPATH_PROBE_TIMEOUT", 3.0),
+            ttl=_env_float("QUADRACODE_HOTPATH_CACHE_TTL", 10.0),
+            failure_threshold=int(_env_float("QUADRACODE_HOTPATH_BREAKER_THRESHOLD", 3)),
+            cooldown=_env_float("QUADRACODE_HOTPATH_BREAKER_COOLDOWN", 30.0),
+        )
+
+    @property
+    def breaker_open(self) -> bool:
+        """Whether the circuit breaker is currently short-circuiting requests."""
+        return self._clock() < self._open_until
+
+    def invalidate(self) -> None:
+        """Marks the cached result stale so the next call triggers a refresh."""
+        self._fetched_at = float("-inf")
+
+    async def agents(self) -> List[Dict[str, Any]]:
+        """
+        Returns the hotpath agents, fetching only when the cache requires it.
+
+        A cold cache is filled inline (bounded by ``timeout``); a stale cache is
+        returned immediately while a background refresh runs; an open breaker
+        returns the last known value, or an empty list, without any I/O.
+        """
+        if not self.base_url:
+            return []
+        if self.breaker_open:
+            return list(self._agents or [])
+        if self._agents is None:
+            await self._refresh()
+            return list(self._agents or [])
+        if self._clock() - self._fetched_at >= self.ttl:
+            self._schedule_refresh()
+        return list(self._agents)
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.get_running_loop().create_task(self._refresh())
+
+    async def _refresh(self) -> None:
+        try:
+            client = self._ensure_client()
+            resp = await client.get(f"{self.base_url}/agents/hotpath")
+            resp.raise_for_status()
+            data = resp.json()
+        except Exception as exc:  # noqa: BLE001 - best effort
+            self._record_failure(exc)
+            return
+        agents: List[Dict[str, Any]] = []
+        if isinstance(data, dict) and isinstance(data.get("agents"), list):
+            agents = data["agents"]
+        elif isinstance(data, list):
+            agents = data
+        self._agents = agents
+        self._fetched_at = self._clock()
+        self._failures = 0
+
+    def _record_failure(self, exc: Exception) -> None:
+        self._failures += 1
+        LOGGER.debug("Hotpath registry probe failed (%d): %s", self._failures, exc)
+        if self._failures >= self.failure_threshold:
+            self._open_until = self._clock() + self.cooldown
+            self._failures = 0
+            LOGGER.info(
+                "Hotpath registry probe disabled for %.0fs after repeated failures",
+                self.cooldown,
+            )
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        # httpx clients are bound to the loop that opened their connections.
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._client_owner() is not loop:
+            self._retire_client()
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                transport=self._transport,
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=2),
+            )
+            self._client_loop = weakref.ref(loop)
+        return self._client
+
+    def _client_owner(self) -> asyncio.AbstractEventLoop | None:
+        return self._client_loop() if self._client_loop is not None else None
+
+    def _retire_client(self) -> None:
+        """Closes the current client from outside its loop, on that loop."""
+        client, owner = self._client, self._client_owner()
+        self._client = None
+        self._client_loop = None
+        if client is None:
+            return
+        if owner is not None and owner.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), owner)
+            return
+        # A stopped or closed loop can no longer run the close; its sockets
+        # are released when the transports are collected.
+        LOGGER.warning(
+            "Hotpath probe client outlived its event loop; call aclose() before the loop ends"
+        )
+
+    async def aclose(self) -> None:
+        """Closes the HTTP client and cancels a pending background refresh."""
+        loop = asyncio.get_running_loop()
+        task, self._refresh_task = self._refresh_task, None
+        if task is not None and not task.done() and task.get_loop() is loop:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        if self._client is None:
+            return
+        if self._client_owner() is not loop:
+            self._retire_client()
+            return
+        client, self._client, self._client_loop = self._client, None, None
+        await client.aclose()
+
+
+_PROBES: Dict[str, HotpathProbe] = {}
+
+
+def get_hotpath_probe(base_url: str) -> HotpathProbe:
+    """Returns the process-wide probe for ``base_url``, creating it on first use."""
+    key = base_url.rstrip("/")
+    probe = _PROBES.get(key)
+    if probe is None:
+        probe = HotpathProbe.from_environment(key)
+        _PROBES[key] = probe
+    return probe
@@ -20,9 +20,11 @@ from datetime import datetime, timezone
 from typing import Any, Dict, Iterable, List, Literal, Sequence, Tuple, Union
 
 import networkx as nx
+import numpy as np
 from langchain_core.messages import SystemMessage, ToolMessage
 from pydantic import BaseModel, Field
 
+from .embeddings import jaccard_similarities
 from .state import (
     ExhaustionMode,
     QuadraCodeState,
@@ -451,24 +453,26 @@ def _analyze_novelty(
     strategy_norm = (strategy or "").strip().lower()
     ledger_lookup = {entry.cycle_id: entry for entry in ledger_entries}
 
-    for entry in ledger_entries:
-        existing_tokens = _tokenize(entry.hypothesis)
-        similarity = _token_similarity(tokens, existing_tokens)
-        if similarity > max_similarity:
-            max_similarity = similarity
-            similar_cycle = entry.cycle_id
-        if similarity >= 0.7:
-            basis.append(
-                f"Shares {similarity:.2f} similarity with {entry.cycle_id}"
+    similarities = jaccard_similarities(tokens, [_tokenize(entry.hypothesis) for entry in ledger_entries])
+    if similarities.size and similarities.max() > 0.0:
+        best = int(similarities.argmax())
+        max_similarity = float(similarities[best])
+        similar_cycle = ledger_entries[best].cycle_id
+
+    for position in np.flatnonzero(similarities >= 0.7):
+        entry = ledger_entries[position]
+        similarity = float(similarities[position])
+        basis.append(
+            f"Shares {similarity:.2f} similarity with {entry.cycle_id}"
+        )
+        entry_strategy = (entry.strategy or "").strip().lower()
+        entry_status = entry.status.lower()
+        if entry_status in {"failed", "abandoned"} and (
+            not strategy_norm or strategy_norm == entry_strategy
+        ):
+            blockers.append(
+                f"Cycle {entry.cycle_id} previously {entry_status} without a new strategy"
             )
-            entry_strategy = (entry.strategy or "").strip().lower()
-            entry_status = entry.status.lower()
-            if entry_status in {"failed", "abandoned"} and (
-                not strategy_norm or strategy_norm == entry_strategy
-            ):
-                blockers.append(
-                    f"Cycle {entry.cycle_id} previously {entry_status} without a new strategy"
-                )
 
     for dependency in dependencies:
         dep_entry = ledger_lookup.get(dependency)
@@ -513,12 +517,10 @@ def _predict_success_probability(
     else:
         success_rate = 0.5
 
-    tokens = _tokenize(hypothesis)
-    similar_entries = [
-        entry
-        for entry in concluded
-        if _token_similarity(tokens, _tokenize(entry.hypothesis)) >= 0.6
-    ]
+    similarities = jaccard_similarities(
+        _tokenize(hypothesis), [_tokenize(entry.hypothesis) for entry in concluded]
+    )
+    similar_entries = [concluded[position] for position in np.flatnonzero(similarities >= 0.6)]
     if similar_entries:
         similar_success_rate = sum(1 for entry in similar_entries if entry.status.lower() == "succeeded") / len(similar_entries)
         combined = (similar_success_rate * 0.65) + (success_rate * 0.35)
@@ -599,17 +601,6 @@ def _tokenize(text: str) -> set[str]:
     return set(_TOKEN_PATTERN.findall(text.lower()))
 
 
-def _token_similarity(lhs: set[str], rhs: set[str]) -> float:
-    """Calculates the Jaccard similarity between two sets of tokens."""
-    if not lhs or not rhs:
-        return 0.0
-    intersection = len(lhs & rhs)
-    union = len(lhs | rhs)
-    if union == 0:
-        return 0.0
-    return intersection / union
-
-
 def _normalize_identifiers(values: Sequence[Union[str, int]]) -> List[str]:
     """Normalizes a sequence of identifiers into a list of strings."""
     normalized: List[str] = []
@@ -1,20 +1,49 @@
 """
-This module provides a high-level, asynchronous messaging interface, 
-`RedisMCPMessaging`, which is built on top of the Redis tools exposed by an MCP 
-(Model-Centric Programming) server.
+This module provides the high-level, asynchronous messaging interfaces used by 
+the Quadracode runtime to talk to the Redis Streams message bus.
 
-It abstracts away the low-level details of interacting with the Redis MCP tools, 
-providing a clean and simple API for publishing, reading, and deleting messages 
-from Redis streams. The module is designed to be a self-contained component for 
-all Redis-based messaging in the Quadracode runtime, ensuring that all 
-interactions with the message bus are consistent and robust.
+Two transports are available:
+
+- `RedisStreamMessaging` talks to Redis directly through a pooled 
+  `redis.asyncio` client. It consumes mailboxes through consumer groups with 
+  blocking `XREADGROUP`, acknowledges entries with `XACK`, and pipelines the 
+  publication of responses with the acknowledgement of the handled entry.
+- `RedisMCPMessaging` routes every operation through the Redis tools exposed by 
+  an MCP (Model-Centric Programming) server. It is kept as a fallback for 
+  deployments where the runtime cannot reach Redis directly.
+
+Both transports expose the same `publish` / `read` / `ack` / `publish_and_ack` 
+API, and `create_messaging` selects one based on configuration.
+
+Environment Variables:
+    QUADRACODE_MESSAGING_TRANSPORT: "native" (default) or "mcp". The native 
+        transport falls back to MCP when Redis is unreachable.
+    QUADRACODE_REDIS_URL: Redis URL for the native transport. Defaults to 
+        ``redis://$REDIS_HOST:$REDIS_PORT/0``.
+    QUADRACODE_MESSAGING_BLOCK_MS: `XREADGROUP` block timeout (default 5000).
+    QUADRACODE_MESSAGING_MAX_CONNECTIONS: Connection pool size (default 16).
+    QUADRACODE_MESSAGING_STREAM_MAXLEN: Approximate cap applied to mailbox 
+        streams on publish (default 10000, 0 disables trimming).
+    QUADRACODE_MESSAGING_CLAIM_IDLE_MS: Entries pending on another consumer 
+        for longer than this are claimed with `XAUTOCLAIM` (default 600000, 
+        0 disables claiming).
+    QUADRACODE_MESSAGING_CLAIM_INTERVAL_MS: How often each mailbox is 
+        checked for such entries (default 60000).
+    QUADRACODE_ENVELOPE_LOG_THRESHOLD_BYTES: Envelopes whose encoded payload 
+        exceeds this many UTF-8 bytes are logged at INFO (default 262144); 
+        smaller ones only at DEBUG. Read once at import.
 
 Supports mock mode for standalone testing via QUADRACODE_MOCK_MODE=true.
 """
 from __future__ import annotations
 
 import ast
-from typing import Dict, List, Tuple
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
 
 from langchain_core.tools import BaseTool
 
@@ -23,9 +52,80 @@ from quadracode_contracts import MessageEnvelope, mailbox_key
 from .tools.mcp_loader import aget_mcp_tools
 from .mock_mode import is_mock_mode, get_mock_redis_tools, MockRedisMCPMessaging
 
+LOGGER = logging.getLogger(__name__)
+
 _REQUIRED_TOOLS = {"xadd", "xrange", "xdel"}
 _TOOL_CACHE: Dict[str, BaseTool] | None = None
 
+TRANSPORT_ENV_VAR = "QUADRACODE_MESSAGING_TRANSPORT"
+NATIVE_TRANSPORT = "native"
+MCP_TRANSPORT = "mcp"
+_DEFAULT_BLOCK_MS = 5000
+_DEFAULT_MAX_CONNECTIONS = 16
+_DEFAULT_STREAM_MAXLEN = 10000
+_DEFAULT_CLAIM_IDLE_MS = 600_000
+_DEFAULT_CLAIM_INTERVAL_MS = 60_000
+_DEFAULT_ENVELOPE_LOG_THRESHOLD_BYTES = 256 * 1024
+
+
+def _read_int_env(var_name: str, default: int) -> int:
+    raw = os.environ.get(var_name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        LOGGER.warning("Invalid integer for %s=%s; using default %d", var_name, raw, default)
+        return default
+    return default if value < 0 else value
+
+
+@dataclass
+class EnvelopeSizeMetrics:
+    """Running totals of encoded envelope payload sizes published by this process."""
+
+    count: int = 0
+    total_bytes: int = 0
+    max_bytes: int = 0
+
+    def record(self, size: int) -> None:
+        self.count += 1
+        self.total_bytes += size
+        self.max_bytes = max(self.max_bytes, size)
+
+
+ENVELOPE_SIZE_METRICS = EnvelopeSizeMetrics()
+_ENVELOPE_LOG_THRESHOLD_BYTES = _read_int_env(
+    "QUADRACODE_ENVELOPE_LOG_THRESHOLD_BYTES", _DEFAULT_ENVELOPE_LOG_THRESHOLD_BYTES
+)
+
+
+def _encode_envelope(envelope: MessageEnvelope) -> Dict[str, str]:
+    """Encodes an envelope for ``XADD`` and records its payload size."""
+    fields = envelope.to_stream_fields()
+    payload = fields["payload"]
+    # ASCII text (the usual JSON encoding) is measured without copying it.
+    size = len(payload) if payload.isascii() else len(payload.encode("utf-8"))
+    ENVELOPE_SIZE_METRICS.record(size)
+    LOGGER.log(
+        logging.INFO if size > _ENVELOPE_LOG_THRESHOLD_BYTES else logging.DEBUG,
+        "[envelope] recipient=%s thread=%s payload_bytes=%d state_version=%s",
+        envelope.recipient,
+        envelope.payload.get("thread_id") or envelope.payload.get("chat_id"),
+        size,
+        envelope.payload.get("state_version"),
+    )
+    return fields
+
+
+def _redis_url_from_env() -> str:
+    url = os.environ.get("QUADRACODE_REDIS_URL", "").strip()
+    if url:
+        return url
+    host = os.environ.get("REDIS_HOST", "redis").strip() or "redis"
+    port = os.environ.get("REDIS_PORT", "6379").strip() or "6379"
+    return f"redis://{host}:{port}/0"
+
 
 async def _ensure_tool_cache() -> Dict[str, BaseTool]:
     """
@@ -112,6 +212,8 @@ class RedisMCPMessaging:
         _xdel: The `xdel` tool.
     """
 
+    blocking_reads = False
+
     def __init__(self, tools: Dict[str, BaseTool]):
         """
         Initializes the `RedisMCPMessaging` instance.
@@ -151,11 +253,15 @@ class RedisMCPMessaging:
         """
         stream_key = mailbox_key(recipient)
         return await self._xadd.ainvoke(
-            {"key": stream_key, "fields": envelope.to_stream_fields()}
+            {"key": stream_key, "fields": _encode_envelope(envelope)}
         )
 
     async def read(
-        self, recipient: str, *, batch_size: int = 10
+        self,
+        recipient: str,
+        *,
+        batch_size: int = 10,
+        block_ms: int | None = None,
     ) -> List[Tuple[str, MessageEnvelope]]:
         """
         Reads a batch of messages from a recipient's mailbox.
@@ -163,6 +269,7 @@ class RedisMCPMessaging:
         Args:
             recipient: The ID of the recipient.
             batch_size: The maximum number of messages to read.
+            block_ms: Ignored; the MCP tools do not support blocking reads.
 
         Returns:
             A list of tuples, each containing a stream entry ID and the 
@@ -185,3 +292,345 @@ class RedisMCPMessaging:
         """
         stream_key = mailbox_key(recipient)
         return await self._xdel.ainvoke({"key": stream_key, "entry_id": entry_id})
+
+    async def ack(self, recipient: str, entry_id: str) -> None:
+        """
+        Marks an entry as handled. The MCP transport has no consumer groups, so 
+        handled entries are removed from the mailbox with `xdel`.
+        """
+        await self.delete(recipient, entry_id)
+
+    async def publish_and_ack(
+        self,
+        recipient: str,
+        entry_id: str,
+        responses: Sequence[MessageEnvelope],
+    ) -> None:
+        """
+        Publishes the responses produced for an entry, then acknowledges it.
+
+        Args:
+            recipient: The ID of the mailbox owner that handled the entry.
+            entry_id: The ID of the handled stream entry.
+            responses: The envelopes to publish to their recipients.
+        """
+        for response in responses:
+            await self.publish(response.recipient, response)
+        await self.ack(recipient, entry_id)
+
+
+class RedisStreamMessaging:
+    """
+    Native Redis Streams transport backed by a pooled `redis.asyncio` client.
+
+    Mailboxes are consumed through a consumer group named after the mailbox 
+    owner, so replicas of the same runtime share the work. Entries that were 
+    delivered but never acknowledged are redelivered: to the same consumer 
+    when it restarts, and to any live consumer through `XAUTOCLAIM` once they 
+    have been pending longer than the claim idle time (a restarted container 
+    usually comes back under a new ``<hostname>-<pid>`` name). Handled 
+    entries are acknowledged and deleted, so mailboxes only hold unhandled 
+    work.
+
+    Attributes:
+        _client: The `redis.asyncio.Redis` client.
+        _consumer: The consumer name used for `XREADGROUP`.
+        _block_ms: The default block timeout for reads.
+        _maxlen: Approximate stream length cap applied on publish.
+        _claim_idle_ms: Minimum idle time before another consumer's pending 
+            entry is claimed (0 disables claiming).
+        _claim_interval: Seconds between `XAUTOCLAIM` sweeps of a mailbox.
+    """
+
+    blocking_reads = True
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        consumer: str | None = None,
+        block_ms: int = _DEFAULT_BLOCK_MS,
+        maxlen: int = _DEFAULT_STREAM_MAXLEN,
+        claim_idle_ms: int = _DEFAULT_CLAIM_IDLE_MS,
+        claim_interval_ms: int = _DEFAULT_CLAIM_INTERVAL_MS,
+    ) -> None:
+        """
+        Initializes the `RedisStreamMessaging` instance.
+
+        Args:
+            client: A `redis.asyncio.Redis` client created with 
+                    ``decode_responses=True``.
+            consumer: The consumer name; defaults to ``<hostname>-<pid>``.
+            block_ms: The default `XREADGROUP` block timeout in milliseconds.
+            maxlen: Approximate stream length cap (0 disables trimming).
+            claim_idle_ms: Idle time after which entries pending on other 
+                consumers are claimed (0 disables claiming).
+            claim_interval_ms: Minimum time between claim sweeps per mailbox.
+        """
+        self._client = client
+        self._consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self._block_ms = block_ms
+        self._maxlen = maxlen
+        self._claim_idle_ms = claim_idle_ms
+        self._claim_interval = claim_interval_ms / 1000.0
+        self._groups: set[str] = set()
+        # Per-stream cursor into this consumer's pending entries list; ``None``
+        # once the backlog left by a previous run has been fully replayed.
+        self._pending_cursor: Dict[str, str | None] = {}
+        # Per-stream `XAUTOCLAIM` cursor and the monotonic time of the next sweep.
+        self._claim_cursor: Dict[str, str] = {}
+        self._next_claim: Dict[str, float] = {}
+
+    @classmethod
+    async def create(cls, url: str | None = None) -> "RedisStreamMessaging":
+        """
+        Creates a pooled client from the environment and verifies connectivity.
+
+        Raises:
+            ImportError: If the `redis` package is not installed.
+            redis.exceptions.RedisError: If Redis is unreachable.
+        """
+        from redis.asyncio import ConnectionPool, Redis  # type: ignore
+
+        pool = ConnectionPool.from_url(
+            url or _redis_url_from_env(),
+            decode_responses=True,
+            max_connections=_read_int_env(
+                "QUADRACODE_MESSAGING_MAX_CONNECTIONS", _DEFAULT_MAX_CONNECTIONS
+            )
+            or _DEFAULT_MAX_CONNECTIONS,
+            health_check_interval=30,
+        )
+        client = Redis(connection_pool=pool)
+        try:
+            await client.ping()
+        except Exception:
+            await client.aclose()
+            raise
+        return cls(
+            client,
+            block_ms=_read_int_env("QUADRACODE_MESSAGING_BLOCK_MS", _DEFAULT_BLOCK_MS),
+            maxlen=_read_int_env("QUADRACODE_MESSAGING_STREAM_MAXLEN", _DEFAULT_STREAM_MAXLEN),
+            claim_idle_ms=_read_int_env(
+                "QUADRACODE_MESSAGING_CLAIM_IDLE_MS", _DEFAULT_CLAIM_IDLE_MS
+            ),
+            claim_interval_ms=_read_int_env(
+                "QUADRACODE_MESSAGING_CLAIM_INTERVAL_MS", _DEFAULT_CLAIM_INTERVAL_MS
+            ),
+        )
+
+    @staticmethod
+    def _group_name(recipient: str) -> str:
+        return recipient
+
+    def _xadd_kwargs(self) -> Dict[str, Any]:
+        if self._maxlen > 0:
+            return {"maxlen": self._maxlen, "approximate": True}
+        return {}
+
+    async def _ensure_group(self, stream_key: str, group: str) -> None:
+        if stream_key in self._groups:
+            return
+        from redis.exceptions import ResponseError  # type: ignore
+
+        try:
+            await self._client.xgroup_create(stream_key, group, id="0", mkstream=True)
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+        self._groups.add(stream_key)
+
+    async def _xreadgroup(
+        self, stream_key: str, group: str, start_id: str, count: int, block: int | None
+    ) -> List[Tuple[str, MessageEnvelope]]:
+        from redis.exceptions import ResponseError  # type: ignore
+
+        try:
+            response = await self._client.xreadgroup(
+                group, self._consumer, {stream_key: start_id}, count=count, block=block
+            )
+        except ResponseError as exc:
+            if "NOGROUP" not in str(exc):
+                raise
+            # Stream or group was deleted underneath us; recreate and retry once.
+            self._groups.discard(stream_key)
+            await self._ensure_group(stream_key, group)
+            response = await self._client.xreadgroup(
+                group, self._consumer, {stream_key: start_id}, count=count, block=block
+            )
+        entries: List[Tuple[str, MessageEnvelope]] = []
+        for _stream, items in response or []:
+            entries.extend(await self._decode_entries(stream_key, group, items))
+        return entries
+
+    async def _decode_entries(
+        self, stream_key: str, group: str, items: Sequence[Any]
+    ) -> List[Tuple[str, MessageEnvelope]]:
+        entries: List[Tuple[str, MessageEnvelope]] = []
+        for entry_id, fields in items:
+            if not fields:
+                # Pending entry whose payload was trimmed or deleted.
+                await self._client.xack(stream_key, group, entry_id)
+                continue
+            entries.append((entry_id, MessageEnvelope.from_stream_fields(fields)))
+        return entries
+
+    async def _claim_stale(
+        self, stream_key: str, group: str, count: int
+    ) -> List[Tuple[str, MessageEnvelope]]:
+        """
+        Claims entries left pending on other consumers for longer than the 
+        claim idle time, typically by a runtime that crashed or was replaced.
+
+        The first read of a mailbox always sweeps; later sweeps run at most 
+        once per claim interval. A sweep that returns entries keeps its cursor 
+        so the next read continues it.
+        """
+        if self._claim_idle_ms <= 0:
+            return []
+        now = time.monotonic()
+        if now < self._next_claim.get(stream_key, 0.0):
+            return []
+        cursor = self._claim_cursor.get(stream_key, "0-0")
+        response = await self._client.xautoclaim(
+            stream_key, group, self._consumer, self._claim_idle_ms, start_id=cursor, count=count
+        )
+        next_cursor = str(response[0]) if response else "0-0"
+        items = response[1] if response and len(response) > 1 else []
+        if next_cursor in ("0", "0-0"):
+            # The pending entries list has been scanned to its end.
+            self._claim_cursor.pop(stream_key, None)
+            self._next_claim[stream_key] = now + self._claim_interval
+        else:
+            self._claim_cursor[stream_key] = next_cursor
+        claimed = await self._decode_entries(stream_key, group, items)
+        if claimed:
+            LOGGER.info("Claimed %d stale entries from %s", len(claimed), stream_key)
+        return claimed
+
+    async def publish(self, recipient: str, envelope: MessageEnvelope) -> str:
+        """
+        Publishes a message envelope to a recipient's mailbox.
+
+        Returns:
+            The ID of the newly created stream entry.
+        """
+        return await self._client.xadd(
+            mailbox_key(recipient), _encode_envelope(envelope), **self._xadd_kwargs()
+        )
+
+    async def read(
+        self,
+        recipient: str,
+        *,
+        batch_size: int = 10,
+        block_ms: int | None = None,
+    ) -> List[Tuple[str, MessageEnvelope]]:
+        """
+        Reads a batch of messages for this consumer from a recipient's mailbox.
+
+        Entries previously delivered to this consumer but never acknowledged 
+        are returned first, then entries claimed from consumers that left 
+        them pending for too long (see `_claim_stale`); afterwards the call 
+        blocks for up to ``block_ms`` (or the configured default) waiting for 
+        new entries.
+
+        Args:
+            recipient: The ID of the recipient.
+            batch_size: The maximum number of messages to read.
+            block_ms: Block timeout in milliseconds; ``0`` disables blocking.
+
+        Returns:
+            A list of ``(entry_id, envelope)`` tuples.
+        """
+        stream_key = mailbox_key(recipient)
+        group = self._group_name(recipient)
+        await self._ensure_group(stream_key, group)
+
+        cursor = self._pending_cursor.setdefault(stream_key, "0")
+        if cursor is not None:
+            pending = await self._xreadgroup(stream_key, group, cursor, batch_size, None)
+            if pending:
+                self._pending_cursor[stream_key] = pending[-1][0]
+                return pending
+            self._pending_cursor[stream_key] = None
+
+        claimed = await self._claim_stale(stream_key, group, batch_size)
+        if claimed:
+            return claimed
+
+        block = self._block_ms if block_ms is None else block_ms
+        return await self._xreadgroup(
+            stream_key, group, ">", batch_size, block if block > 0 else None
+        )
+
+    async def ack(self, recipient: str, entry_id: str) -> None:
+        """Acknowledges a handled entry and deletes it from the mailbox."""
+        stream_key = mailbox_key(recipient)
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.xack(stream_key, self._group_name(recipient), entry_id)
+            pipe.xdel(stream_key, entry_id)
+            await pipe.execute()
+
+    async def delete(self, recipient: str, entry_id: str) -> str:
+        """Deletes a specific message from a recipient's mailbox."""
+        return str(await self._client.xdel(mailbox_key(recipient), entry_id))
+
+    async def publish_and_ack(
+        self,
+        recipient: str,
+        entry_id: str,
+        responses: Sequence[MessageEnvelope],
+    ) -> None:
+        """
+        Publishes the responses for an entry, then acknowledges and deletes 
+        it, in a single pipelined round trip.
+
+        Args:
+            recipient: The ID of the mailbox owner that handled the entry.
+            entry_id: The ID of the handled stream entry.
+            responses: The envelopes to publish to their recipients.
+        """
+        xadd_kwargs = self._xadd_kwargs()
+        async with self._client.pipeline(transaction=False) as pipe:
+            for response in responses:
+                pipe.xadd(
+                    mailbox_key(response.recipient),
+                    _encode_envelope(response),
+                    **xadd_kwargs,
+                )
+            pipe.xack(mailbox_key(recipient), self._group_name(recipient), entry_id)
+            pipe.xdel(mailbox_key(recipient), entry_id)
+            await pipe.execute()
+
+    async def close(self) -> None:
+        """Closes the client and disconnects its connection pool."""
+        await self._client.aclose()
+
+
+async def create_messaging() -> RedisStreamMessaging | RedisMCPMessaging:
+    """
+    Creates the messaging transport selected by ``QUADRACODE_MESSAGING_TRANSPORT``.
+
+    The native transport is preferred; when it cannot be initialized (missing 
+    `redis` package or unreachable server) the MCP transport is used instead. 
+    In mock mode the in-memory mock transport is always returned.
+    """
+    if is_mock_mode():
+        return await MockRedisMCPMessaging.create()  # type: ignore[return-value]
+
+    transport = os.environ.get(TRANSPORT_ENV_VAR, NATIVE_TRANSPORT).strip().lower()
+    if transport == NATIVE_TRANSPORT:
+        try:
+            messaging = await RedisStreamMessaging.create()
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.warning(
+                "Native Redis transport unavailable (%s); falling back to MCP tools", exc
+            )
+        else:
+            LOGGER.info("Using native Redis stream transport")
+            return messaging
+    elif transport != MCP_TRANSPORT:
+        LOGGER.warning("Unknown %s=%s; using MCP tools", TRANSPORT_ENV_VAR, transport)
+
+    return await RedisMCPMessaging.create()
@@ -181,6 +181,8 @@ class MockLLMResponse:
 class MockRedisMCPMessaging:
     """Mock implementation of RedisMCPMessaging using in-memory storage."""
     
+    blocking_reads = False
+    
     def __init__(self) -> None:
         self._storage = MockRedisStorage.get_instance()
     
@@ -197,9 +199,9 @@ class MockRedisMCPMessaging:
         return entry_id
     
     async def read(
-        self, recipient: str, *, batch_size: int = 10
+        self, recipient: str, *, batch_size: int = 10, block_ms: int | None = None
     ) -> List[Tuple[str, MessageEnvelope]]:
-        """Read messages from mock storage."""
+        """Read messages from mock storage (``block_ms`` is ignored)."""
         stream_key = f"qc:mailbox/{recipient}"
         raw_entries = self._storage.xrange(stream_key, batch_size)
         entries = []
@@ -213,6 +215,18 @@ class MockRedisMCPMessaging:
         stream_key = f"qc:mailbox/{recipient}"
         deleted = self._storage.xdel(stream_key, entry_id)
         return str(deleted)
+    
+    async def ack(self, recipient: str, entry_id: str) -> None:
+        """Acknowledge a handled message by deleting it from mock storage."""
+        await self.delete(recipient, entry_id)
+    
+    async def publish_and_ack(
+        self, recipient: str, entry_id: str, responses: List[MessageEnvelope]
+    ) -> None:
+        """Publish responses, then acknowledge the handled message."""
+        for response in responses:
+            await self.publish(response.recipient, response)
+        await self.ack(recipient, entry_id)
 
 
 # ============================================================================
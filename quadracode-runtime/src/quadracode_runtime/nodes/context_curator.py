@@ -16,6 +16,7 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import math
 from collections import deque
 from datetime import datetime, timezone
 from pathlib import Path
@@ -27,6 +28,7 @@ from langchain_core.messages import HumanMessage, SystemMessage
 
 from ..config import ContextEngineConfig
 from ..context_engine_logging import log_context_compression
+from ..segment_features import SegmentFeatureTable, curation_scores, parse_timestamp
 from ..state import ContextEngineState, ContextSegment
 from .context_operations import ContextOperation
 
@@ -176,26 +178,8 @@ class ContextCurator:
     async def _score_segments(self, segments: Iterable[ContextSegment]) -> List[float]:
         """Score segments using priority, recency, and length heuristics."""
 
-        now = datetime.now(timezone.utc)
-        scores: List[float] = []
-
-        for segment in segments:
-            priority = segment.get("priority", 5)
-            token_count = max(segment.get("token_count", 1), 1)
-            timestamp = segment.get("timestamp")
-            recency = 1.0
-            if timestamp:
-                try:
-                    delta = now - datetime.fromisoformat(timestamp)
-                    recency = max(0.1, 1.0 - delta.total_seconds() / 86_400)
-                except ValueError:
-                    recency = 0.5
-
-            efficiency = 1 / (1 + token_count / 256)
-            score = (priority / 10) * 0.5 + recency * 0.3 + efficiency * 0.2
-            scores.append(min(max(score, 0.0), 1.0))
-
-        return scores
+        table = SegmentFeatureTable.from_segments(list(segments))
+        return curation_scores(table).tolist()
 
     async def _ensure_llm(self):
         """Lazy-load LLM for curator operations."""
@@ -526,11 +510,14 @@ class ContextCurator:
         }
         handler = handlers.get(segment.get("type"))
         if handler:
-            return handler(segment)
-
-        compressed = dict(segment)
-        compressed["content"] = self._truncate(segment["content"], 200)
-        compressed["token_count"] = max(1, compressed.get("token_count", 1) // 2)
+            compressed = handler(segment)
+        else:
+            compressed = dict(segment)
+            compressed["content"] = self._truncate(segment["content"], 200)
+            compressed["token_count"] = max(1, compressed.get("token_count", 1) // 2)
+        # The count is an estimate for the new content; drop the hash so the
+        # engine counts it exactly.
+        compressed.pop("token_hash", None)
         return compressed
 
     def _summarize_segment(self, segment: ContextSegment) -> ContextSegment:
@@ -541,11 +528,12 @@ class ContextCurator:
         }
         handler = handlers.get(segment.get("type"))
         if handler:
-            return handler(segment)
-
-        summary = dict(segment)
-        summary["content"] = self._simple_summary(segment["content"])
-        summary["token_count"] = max(1, summary.get("token_count", 1) // 4)
+            summary = handler(segment)
+        else:
+            summary = dict(segment)
+            summary["content"] = self._simple_summary(segment["content"])
+            summary["token_count"] = max(1, summary.get("token_count", 1) // 4)
+        summary.pop("token_hash", None)
         return summary
 
     def _externalize_segment(self, segment: ContextSegment) -> Tuple[ContextSegment, Dict[str, str]]:
@@ -553,6 +541,7 @@ class ContextCurator:
         pointer = dict(segment)
         pointer["content"] = self._truncate(segment["content"], 160)
         pointer["token_count"] = max(1, pointer.get("token_count", 1) // 8)
+        pointer.pop("token_hash", None)
         pointer["type"] = f"pointer:{segment['type']}"
         pointer["restorable_reference"] = ref_id
 
@@ -646,8 +635,7 @@ class ContextCurator:
         timestamp = segment.get("timestamp")
         if not timestamp:
             return False
-        try:
-            delta = datetime.now(timezone.utc) - datetime.fromisoformat(timestamp)
-        except ValueError:
+        parsed = parse_timestamp(timestamp)
+        if math.isinf(parsed):
             return False
-        return delta.total_seconds() > 86_400 * 7  # 7 days
+        return datetime.now(timezone.utc).timestamp() - parsed > 86_400 * 7  # 7 days
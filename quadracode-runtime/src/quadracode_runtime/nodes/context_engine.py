@@ -20,9 +20,7 @@ import logging
 import os
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Sequence
-
-import httpx
+from typing import Any, Awaitable, Dict, List, Optional, Sequence
 
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage, RemoveMessage, BaseMessage
@@ -52,9 +50,11 @@ from ..state import (
     remove_segment,
 )
 from ..long_term_memory import update_memory_guidance
+from ..hotpath_probe import get_hotpath_probe
 from ..metrics import ContextMetricsEmitter
 from ..observability import get_meta_observer
 from ..time_travel import get_time_travel_recorder
+from ..tokenizer import get_token_counter, tally_tokens
 from ..invariants import mark_context_updated
 from ..workspace_integrity import (
     capture_workspace_snapshot,
@@ -62,7 +62,8 @@ from ..workspace_integrity import (
 )
 from .context_curator import ContextCurator
 from .context_operations import ContextOperation
-from .context_reducer import ContextReducer
+from .context_reducer import ContextReducer, ReducerResult
+from .context_speculation import SpeculativeCuration, apply_speculation
 from .context_scorer import ContextScorer
 from .context_reset import ContextResetAgent
 from .progressive_loader import ProgressiveContextLoader
@@ -111,6 +112,7 @@ class ContextEngine:
         """
         self.config = config
         self.system_prompt = system_prompt
+        self.token_counter = get_token_counter()
         self.system_prompt_tokens = self._estimate_tokens(system_prompt)
         self.curator = ContextCurator(config)
         self.scorer = ContextScorer(config)
@@ -134,35 +136,46 @@ class ContextEngine:
             "AGENT_REGISTRY_URL",
             "http://agent-registry:8090",
         ).rstrip("/")
-        self._hotpath_probe_timeout = float(
-            os.environ.get("QUADRACODE_HOTPATH_PROBE_TIMEOUT", "3")
-        )
+        self._hotpath_probe = get_hotpath_probe(self.registry_url) if self.registry_url else None
         self.deliberative_planner = DeliberativePlanner()
+        self.speculation = (
+            SpeculativeCuration() if config.speculative_curation_enabled else None
+        )
 
     def _estimate_tokens(self, text: str) -> int:
-        """Roughly estimates token count as 1 token per 4 characters."""
-        if not text:
-            return 0
-        return int(len(text) / 4)
+        """Counts the tokens of ``text`` with the shared, memoized tokenizer."""
+        return self.token_counter.count(text)
+
+    def _run_sync(self, coro: Awaitable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Runs ``coro`` on a fresh event loop, closing loop-bound clients before it ends."""
+
+        async def _run() -> Dict[str, Any]:
+            try:
+                return await coro
+            finally:
+                if self._hotpath_probe is not None:
+                    await self._hotpath_probe.aclose()
+
+        return asyncio.run(_run())
 
     def pre_process_sync(self, state: QuadraCodeState) -> Dict[str, Any]:
         """Synchronous wrapper for the `pre_process` method."""
-        return asyncio.run(self.pre_process(state))
+        return self._run_sync(self.pre_process(state))
 
     def post_process_sync(self, state: QuadraCodeState) -> Dict[str, Any]:
         """Synchronous wrapper for the `post_process` method."""
-        return asyncio.run(self.post_process(state))
+        return self._run_sync(self.post_process(state))
 
     def govern_context_sync(self, state: QuadraCodeState) -> Dict[str, Any]:
         """Synchronous wrapper for the `govern_context` method."""
-        return asyncio.run(self.govern_context(state))
+        return self._run_sync(self.govern_context(state))
 
     def handle_tool_response_sync(
         self, state: QuadraCodeState
     ) -> Dict[str, Any]:
         """Synchronous wrapper for the `handle_tool_response` method."""
         tool_messages = self._extract_tool_messages(state)
-        return asyncio.run(self.handle_tool_response(state, tool_messages))
+        return self._run_sync(self.handle_tool_response(state, tool_messages))
 
     async def pre_process_node(self, state: QuadraCodeState) -> Dict[str, Any]:
         updated = await self.pre_process(state)
@@ -226,24 +239,21 @@ class ContextEngine:
             current_dynamic_tokens > optimal_tokens
             or message_count > self.config.min_message_count_to_compress
         )
-        
-        if should_manage_context:
-            # Dynamic content exceeds optimal or message count limit - manage context
-            available_dynamic_space = optimal_tokens
-            
-            # Compress conversation history and segments to fit
-            history_updates = await self._manage_conversation_history(state, available_dynamic_space)
-            if history_updates:
-                state = self._recompute_context_usage(state)
 
-            # After message compression, check if segment compression is still needed
-            current_segment_tokens = state.get("_context_breakdown", {}).get("segment_tokens", 0)
-            segment_budget = available_dynamic_space * (1 - self.config.message_budget_ratio)
-            if current_segment_tokens > segment_budget:
-                state = await self.curator.optimize(state, int(segment_budget))
-                state = self._recompute_context_usage(state)
-                await self._emit_curation_metrics(state, reason="overflow_control")
-                await self._emit_externalization_metrics(state)
+        thread_id = self._speculation_thread(state)
+        if should_manage_context and thread_id is not None:
+            state, committed = await self._commit_speculation(state, thread_id)
+            if committed:
+                should_manage_context = self._should_manage_context(state)
+
+        if should_manage_context:
+            if thread_id is None or self._exceeds_hard_limit(state):
+                # Dynamic content exceeds optimal or message count limit - manage context
+                state, history_updates = await self._compact_context(state)
+            else:
+                # Below the hard limit the compaction runs off the critical path
+                # and is committed at the next pre_process.
+                self._schedule_speculation(thread_id, state)
 
         state = await self.loader.prepare_context(state)
         state = self._recompute_context_usage(state)
@@ -291,6 +301,82 @@ class ContextEngine:
         LOGGER.debug("pre_process returning: %d context_segments", len(state.get("context_segments", [])))
         return state
 
+    async def _compact_context(
+        self, state: QuadraCodeState, *, emit_metrics: bool = True
+    ) -> tuple[QuadraCodeState, Dict[str, Any]]:
+        """Folds conversation history and curates segments to fit the optimal size."""
+        available_dynamic_space = self.config.optimal_context_size
+
+        # Compress conversation history and segments to fit
+        history_updates = await self._manage_conversation_history(state, available_dynamic_space)
+        if history_updates:
+            state = self._recompute_context_usage(state)
+
+        # After message compression, check if segment compression is still needed
+        current_segment_tokens = state.get("_context_breakdown", {}).get("segment_tokens", 0)
+        segment_budget = available_dynamic_space * (1 - self.config.message_budget_ratio)
+        if current_segment_tokens > segment_budget:
+            state = await self.curator.optimize(state, int(segment_budget))
+            state = self._recompute_context_usage(state)
+            if emit_metrics:
+                await self._emit_curation_metrics(state, reason="overflow_control")
+                await self._emit_externalization_metrics(state)
+        return state, history_updates
+
+    def _should_manage_context(self, state: QuadraCodeState) -> bool:
+        breakdown = state.get("_context_breakdown", {})
+        dynamic_tokens = breakdown.get("message_tokens", 0) + breakdown.get("segment_tokens", 0)
+        return (
+            dynamic_tokens > self.config.optimal_context_size
+            or len(state.get("messages") or []) > self.config.min_message_count_to_compress
+        )
+
+    def _exceeds_hard_limit(self, state: QuadraCodeState) -> bool:
+        max_tokens = int(state.get("context_window_max", 0) or self.config.context_window_max)
+        used = int(state.get("context_window_used", 0) or 0)
+        return used >= max_tokens * self.config.speculative_hard_limit_ratio
+
+    def _speculation_thread(self, state: QuadraCodeState) -> str | None:
+        """Returns the thread key for speculative curation, or ``None`` if disabled."""
+        if self.speculation is None:
+            return None
+        thread_id = state.get("thread_id")
+        return str(thread_id) if thread_id else None
+
+    def _schedule_speculation(self, thread_id: str, state: QuadraCodeState) -> None:
+        self.speculation.schedule(thread_id, state, self._speculative_compact)
+
+    async def _speculative_compact(self, snapshot: QuadraCodeState) -> QuadraCodeState | None:
+        snapshot["_context_breakdown"] = {}
+        snapshot = self._recompute_context_usage(snapshot)
+        if not self._should_manage_context(snapshot):
+            return None
+        snapshot, _ = await self._compact_context(snapshot, emit_metrics=False)
+        return snapshot
+
+    async def _commit_speculation(
+        self, state: QuadraCodeState, thread_id: str
+    ) -> tuple[QuadraCodeState, bool]:
+        """Commits the background compaction prepared for ``thread_id`` if still valid."""
+        result = self.speculation.take(thread_id)
+        if result is None:
+            return state, False
+        applied = apply_speculation(state, result)
+        self.speculation.record(applied)
+        if applied:
+            state = self._recompute_context_usage(state)
+        await self.metrics.emit(
+            state,
+            "speculative_curation",
+            {
+                "outcome": "committed" if applied else "stale",
+                "folded_messages": len(result.folded_message_ids),
+                "context_window_used": state.get("context_window_used", 0),
+                **self.speculation.stats(),
+            },
+        )
+        return state, applied
+
     async def post_process(self, state: QuadraCodeState) -> Dict[str, Any]:
         """
         Executes the post-processing stage of the context engineering pipeline.
@@ -362,6 +448,11 @@ class ContextEngine:
             },
         )
         self._record_stage_observability(state, "post_process")
+
+        # Start compacting the next turn's context while tools and the driver run.
+        thread_id = self._speculation_thread(state)
+        if thread_id is not None and self._should_manage_context(state):
+            self._schedule_speculation(thread_id, state)
         
         # IMPORTANT: Remove messages to prevent duplication via add_messages reducer
         state.pop("messages", None)
@@ -544,7 +635,7 @@ class ContextEngine:
 
         if needs_reduction:
             prior_content = segment.get("content", "")
-            prior_tokens = int(segment.get("token_count", len(prior_content.split())) or 0)
+            prior_tokens = int(segment.get("token_count") or 0)
             reduction_reason = (
                 f"operation::{operation.value}"
                 if operation in {ContextOperation.SUMMARIZE, ContextOperation.COMPRESS}
@@ -553,8 +644,10 @@ class ContextEngine:
             reduced = await self.reducer.reduce(
                 segment["content"], focus=segment.get("type")
             )
+            await self._emit_summary_cache(state, "context_engine.handle_tool_response", reduced)
             segment["content"] = reduced.content
             segment["token_count"] = reduced.token_count
+            segment.pop("token_hash", None)
             await log_context_compression(
                 state,
                 action="tool_payload_reduction",
@@ -602,17 +695,19 @@ class ContextEngine:
 
         normalized_content = content.strip() or "Tool returned no textual output."
 
-        return {
+        segment: ContextSegment = {
             "id": segment_id,
             "content": normalized_content,
             "type": segment_type,
             "priority": 5,
-            "token_count": len(normalized_content.split()),
+            "token_count": 0,
             "timestamp": _utc_now().isoformat(),
             "decay_rate": 0.1,
             "compression_eligible": True,
             "restorable_reference": restorable_reference,
         }
+        self.token_counter.annotate(segment)
+        return segment
 
     async def _handle_tool_messages(
         self, state: QuadraCodeState, tool_messages: List[ToolMessage]
@@ -878,14 +973,14 @@ class ContextEngine:
                 summarized = self.curator._summarize_segment(segment_copy)
                 summarized["restorable_reference"] = segment_copy.get("restorable_reference") or segment_id
                 summarized["compression_eligible"] = False
-                summarized["token_count"] = max(1, len(summarized["content"].split()))
+                self.token_counter.annotate(summarized)
                 summarized["type"] = f"summary:{segment_copy.get('type', 'generic')}"
                 modified[segment_id] = summarized
                 continue
 
             if decision == "compress":
                 compressed = self.curator._compress_segment(segment_copy)
-                compressed["token_count"] = max(1, len(compressed["content"].split()))
+                self.token_counter.annotate(compressed)
                 modified[segment_id] = compressed
                 continue
 
@@ -1187,14 +1282,26 @@ class ContextEngine:
     def _recompute_context_usage(
         self, state: QuadraCodeState
     ) -> QuadraCodeState:
-        # Count tokens from context segments
-        segment_tokens = sum(
-            max(segment.get("token_count", 0), 0)
-            for segment in state.get("context_segments", [])
+        # Segments and messages carry their stored counts, so only new or
+        # rewritten items are tokenized, and the running totals are adjusted
+        # only for items added, removed or rewritten since the last call.
+        tallies = state.get("token_tallies")
+        if not isinstance(tallies, dict):
+            tallies = state["token_tallies"] = {}
+        segment_tokens = tally_tokens(
+            tallies.setdefault("segments", {}),
+            (
+                (str(segment.get("id") or f"#{position}"), self.token_counter.segment_tokens(segment))
+                for position, segment in enumerate(state.get("context_segments", []))
+            ),
+        )
+        message_tokens = tally_tokens(
+            tallies.setdefault("messages", {}),
+            (
+                (str(getattr(message, "id", None) or f"#{position}"), self.token_counter.message_tokens(message))
+                for position, message in enumerate(state.get("messages", []) or [])
+            ),
         )
-        
-        # Count tokens from messages
-        message_tokens = self._count_message_tokens(state)
 
         addendum = state.get("system_prompt_addendum")
         addendum_tokens = self._estimate_tokens(addendum) if isinstance(addendum, str) else 0
@@ -1217,8 +1324,15 @@ class ContextEngine:
         Manages conversation history by summarizing and trimming messages when they exceed their budget.
         
         CRITICAL: This method must respect message_retention_count to keep the last N messages
-        intact BEFORE any summarization happens. The working memory summary must be created
-        from the full message history, not from already-trimmed messages.
+        intact BEFORE any summarization happens.
+
+        Summarization is incremental and batched. Only messages evicted since the
+        last fold (tracked by ``history_summary_watermark``) are folded into the
+        running ``conversation-summary`` segment, and folding fires only when the
+        history crosses a high water mark: more than ``min_message_count_to_compress``
+        messages, or more than ``history_high_watermark`` of the message budget in
+        tokens with enough evictable history to get back under
+        ``history_low_watermark`` (or to free at least the gap between the two).
         """
         messages: list[BaseMessage] = state.get("messages", [])
         if not messages:
@@ -1230,17 +1344,6 @@ class ContextEngine:
         breakdown = state.get("_context_breakdown", {})
         message_tokens = breakdown.get("message_tokens", 0)
 
-        # Compress if EITHER condition is met:
-        # 1. We have more than min_message_count_to_compress messages
-        # 2. OR tokens exceed budget
-        should_compress = (
-            len(messages) > self.config.min_message_count_to_compress
-            or message_tokens > message_budget
-        )
-        
-        if not should_compress:
-            return {}
-        
         # Determine how many recent messages to keep intact
         # MUST keep at least message_retention_count messages for the LLM to see recent context
         retention_count = max(1, self.config.message_retention_count)
@@ -1248,33 +1351,53 @@ class ContextEngine:
         # Ensure we have enough messages to actually compress
         if len(messages) <= retention_count:
             return {}
+
+        # Messages up to the watermark were already folded into the summary; their
+        # removal may simply not have been applied by the checkpointer yet.
+        watermark = dict(state.get("history_summary_watermark") or {})
+        folded_until = 0
+        last_folded_id = watermark.get("last_message_id")
+        if last_folded_id:
+            for index, msg in enumerate(messages[:-retention_count]):
+                if getattr(msg, "id", None) == last_folded_id:
+                    folded_until = index + 1
+                    break
+        already_folded = messages[:folded_until]
+        evictable = messages[folded_until:-retention_count]
         
         # Calculate tokens in messages we want to keep
         messages_to_keep = messages[-retention_count:]
         kept_message_tokens = sum(
-            self._estimate_tokens(str(msg.content)) for msg in messages_to_keep
+            self.token_counter.message_tokens(msg) for msg in messages_to_keep
         )
         
         # If the messages we want to keep already exceed budget, we can't help
         # (this should trigger other context management strategies)
         if kept_message_tokens >= message_budget:
             return {}
-        
-        # Find oldest messages to summarize (everything before the retention window)
-        # Summarize enough to fit within budget
-        available_for_old = message_budget - kept_message_tokens
-        summarization_candidates: list[BaseMessage] = []
-        removed_tokens = 0
-        
-        # Process messages from oldest to newest, stopping before retention window
-        for msg in messages[:-retention_count]:
-            msg_tokens = self._estimate_tokens(str(msg.content))
-            summarization_candidates.append(msg)
-            removed_tokens += msg_tokens
-        
-        if not summarization_candidates:
+
+        evictable_tokens = sum(self.token_counter.message_tokens(msg) for msg in evictable)
+        high_tokens = message_budget * self.config.history_high_watermark
+        low_tokens = message_budget * min(
+            self.config.history_low_watermark, self.config.history_high_watermark
+        )
+        over_count = len(messages) - len(already_folded) > self.config.min_message_count_to_compress
+        over_tokens = message_tokens > high_tokens and (
+            message_tokens - evictable_tokens <= low_tokens
+            or evictable_tokens >= high_tokens - low_tokens
+        )
+
+        if not evictable or not (over_count or over_tokens):
+            if already_folded:
+                state["messages"] = messages[folded_until:]
+                return {
+                    "messages": [RemoveMessage(id=msg.id) for msg in already_folded if msg.id]
+                }
             return {}
-            
+
+        summarization_candidates: list[BaseMessage] = list(evictable)
+        removed_tokens = evictable_tokens
+
         # Generate summary
         summary_text = get_buffer_string(summarization_candidates)
         existing_summary = get_segment_content(state, "conversation-summary")
@@ -1286,11 +1409,24 @@ class ContextEngine:
         )
         
         reduction = await self.reducer.reduce(prompt, focus="conversation_summary")
+        await self._emit_summary_cache(state, "context_engine.manage_history", reduction)
         new_summary = reduction.content
         
         # Construct updates to be returned
         updates: Dict[str, Any] = {
-            "messages": [RemoveMessage(id=msg.id) for msg in summarization_candidates if msg.id]
+            "messages": [
+                RemoveMessage(id=msg.id)
+                for msg in [*already_folded, *summarization_candidates]
+                if msg.id
+            ]
+        }
+        folded_ids = [msg.id for msg in summarization_candidates if getattr(msg, "id", None)]
+        state["history_summary_watermark"] = {
+            "last_message_id": folded_ids[-1] if folded_ids else last_folded_id,
+            "folded_messages": int(watermark.get("folded_messages", 0) or 0)
+            + len(summarization_candidates),
+            "folds": int(watermark.get("folds", 0) or 0) + 1,
+            "updated_at": _utc_now().isoformat(),
         }
 
         # Apply trimming to the state for direct-call semantics
@@ -1326,7 +1462,8 @@ class ContextEngine:
             after_content=new_summary,
             metadata={
                 "removed_messages": len(summarization_candidates),
-                "budget_ratio": self.config.message_budget_ratio
+                "budget_ratio": self.config.message_budget_ratio,
+                "trigger": "message_count" if over_count else "token_high_watermark",
             }
         )
         
@@ -1360,6 +1497,7 @@ class ContextEngine:
             "segments_path": artifacts.segments_path,
             "summary_path": artifacts.summary_path,
             "system_prompt_path": artifacts.system_prompt_path,
+            "summary_cache": self.reducer.summary_store.stats.as_dict(),
         }
         await self.metrics.emit(updated, "context_reset", payload)
         self.time_travel.log_transition(
@@ -1370,6 +1508,18 @@ class ContextEngine:
         )
         return updated, artifacts
 
+    async def _emit_summary_cache(
+        self, state: QuadraCodeState, stage: str, reduction: ReducerResult
+    ) -> None:
+        """Emits whether a reduction was served by the shared summary cache."""
+        payload = {
+            "stage": stage,
+            "outcome": "hit" if reduction.cache_tier else "miss",
+            "tier": reduction.cache_tier,
+            **self.reducer.summary_store.stats.as_dict(),
+        }
+        await self.metrics.emit(state, "summary_cache", payload)
+
     @staticmethod
     def _build_message_updates(
         original: List[BaseMessage],
@@ -1390,48 +1540,21 @@ class ContextEngine:
     def _count_message_tokens(self, state: QuadraCodeState) -> int:
         """
         Counts tokens in the conversation messages.
-        
-        Uses usage_metadata from the most recent AI message if available,
-        otherwise estimates based on message content length.
-        
+
+        Uses the same tokenizer as segments and prompts so that every budget
+        comparison is made in one unit. Counts are stamped onto the messages,
+        so messages carried over from earlier turns are not re-tokenized.
+
         Args:
             state: The current state containing messages
-            
+
         Returns:
-            Estimated total token count for all messages
+            Total token count for all messages
         """
         messages = state.get("messages", [])
         if not messages:
             return 0
-        
-        # Try to get actual token count from the most recent AI message's usage_metadata
-        for msg in reversed(messages):
-            if hasattr(msg, "usage_metadata") and msg.usage_metadata:
-                # usage_metadata contains input_tokens and output_tokens
-                # input_tokens includes all previous messages + context
-                # So we return just the input_tokens as it represents the full conversation window
-                return int(msg.usage_metadata.get("input_tokens", 0))
-        
-        # Fallback: rough estimate based on character count
-        total_chars = 0
-        for msg in messages:
-            content = ""
-            if hasattr(msg, "content"):
-                if isinstance(msg.content, str):
-                    content = msg.content
-                elif isinstance(msg.content, list):
-                    # Handle content blocks (text, tool calls, etc.)
-                    for block in msg.content:
-                        if isinstance(block, dict):
-                            content += str(block.get("text", ""))
-                        elif isinstance(block, str):
-                            content += block
-                        else:
-                            content += str(block)
-            total_chars += len(content)
-        
-        # Estimate tokens as 1 token per 4 characters
-        return int(total_chars / 4)
+        return sum(self.token_counter.message_tokens(msg) for msg in messages)
 
     def _normalize_refinement_ledger(self, state: QuadraCodeState) -> QuadraCodeState:
         ledger_entries: List[RefinementLedgerEntry] = []
@@ -1898,23 +2021,9 @@ class ContextEngine:
         )
 
     async def _fetch_hotpath_agents(self) -> List[Dict[str, Any]]:
-        if not self.registry_url:
+        if self._hotpath_probe is None:
             return []
-        url = f"{self.registry_url}/agents/hotpath"
-        try:
-            async with httpx.AsyncClient(timeout=self._hotpath_probe_timeout) as client:
-                resp = await client.get(url)
-                resp.raise_for_status()
-                data = resp.json()
-                if isinstance(data, dict):
-                    agents = data.get("agents")
-                    if isinstance(agents, list):
-                        return agents
-                if isinstance(data, list):
-                    return data
-        except Exception as exc:  # pragma: no cover - best-effort
-            LOGGER.debug("Hotpath registry probe failed: %s", exc)
-        return []
+        return await self._hotpath_probe.agents()
 
     @staticmethod
     def _coerce_exhaustion_mode(value: Any) -> ExhaustionMode:
@@ -2040,6 +2149,7 @@ class ContextEngine:
             "count": len(load_events),
             "segments": load_events,
             "context_window_used": state.get("context_window_used", 0),
+            "segment_cache": self.loader.segment_cache.stats.as_dict(),
         }
         await self.metrics.emit(state, "load", payload)
         state["recent_loads"] = []
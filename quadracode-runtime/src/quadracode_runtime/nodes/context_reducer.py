@@ -6,19 +6,43 @@ The `ContextReducer` is a key component of the context engine's optimization
 process. It is designed to reduce the token count of verbose context segments 
 while preserving their essential information. Unlike earlier versions that 
 allowed heuristic fallbacks, the reducer now always routes through a configured 
-LLM to ensure consistent, high-quality reductions and observability.
+LLM to ensure consistent, high-quality reductions and observability. Only an
+individual call that times out or fails is replaced by an extractive excerpt.
+
+Chunks are summarized concurrently and merged with a tree of combine calls, so
+the wall time of a reduction grows with the depth of the tree rather than the
+number of chunks.
 """
 
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Iterable, Optional
+from typing import Any, Callable, Dict, Iterable, Optional
 
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage
 
 from ..config import ContextEngineConfig
+from ..summary_cache import get_summary_store
+from ..tokenizer import get_token_counter
+
+LOGGER = logging.getLogger(__name__)
+
+
+async def _passthrough(value: str) -> str:
+    return value
+
+
+@dataclass
+class _ReductionOutcome:
+    """Per-reduction bookkeeping shared by its concurrent calls."""
+
+    fallbacks: int = 0
 
 
 @dataclass
@@ -29,9 +53,12 @@ class ReducerResult:
     Attributes:
         content: The reduced (summarized or compressed) content.
         token_count: The estimated token count of the reduced content.
+        cache_tier: The summary cache tier that served the result, or ``None``
+                    when it was computed by the LLM.
     """
     content: str
     token_count: int
+    cache_tier: Optional[str] = None
 
 
 class ContextReducer:
@@ -69,6 +96,16 @@ class ContextReducer:
             )
         self.chunk_tokens = max(50, config.reducer_chunk_tokens)
         self.target_tokens = max(20, config.reducer_target_tokens)
+        self.max_concurrency = max(1, config.reducer_max_concurrency)
+        self.combine_fanout = max(2, config.reducer_combine_fanout)
+        self.call_timeout = config.reducer_call_timeout if config.reducer_call_timeout > 0 else None
+        self.cache_entries = max(0, config.reducer_cache_entries)
+        self._summary_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future[tuple[str, bool]]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.token_counter = get_token_counter()
+        self.summary_store = get_summary_store(config)
         self._llm = None
         self._llm_lock = asyncio.Lock()
 
@@ -91,68 +128,200 @@ class ContextReducer:
         if not content.strip():
             return ReducerResult(content="", token_count=0)
 
-        summary = await self._reduce_with_llm(content, focus=focus)
-        return ReducerResult(content=summary, token_count=self._estimate_tokens(summary))
+        key = self.summary_store.key(
+            content,
+            focus=focus,
+            template_version=self._template_version(),
+            model=f"{self.model_name}@{self.target_tokens}",
+        )
+        cached = await self.summary_store.get(key)
+        if cached is not None:
+            return ReducerResult(
+                content=cached.summary,
+                token_count=cached.token_count or self._estimate_tokens(cached.summary),
+                cache_tier=cached.tier,
+            )
+
+        outcome = _ReductionOutcome()
+        summary = await self._reduce_with_llm(content, focus=focus, outcome=outcome)
+        token_count = self._estimate_tokens(summary)
+        if not outcome.fallbacks:
+            # Excerpts standing in for failed calls are not worth persisting.
+            await self.summary_store.put(key, summary, token_count)
+        return ReducerResult(content=summary, token_count=token_count)
 
-    async def _reduce_with_llm(self, content: str, *, focus: str | None = None) -> str:
+    def _template_version(self) -> str:
+        """Fingerprints the prompt templates so edits invalidate cached summaries."""
+        templates = self.config.prompt_templates.to_dict()
+        encoded = json.dumps(templates, sort_keys=True, default=str)
+        return hashlib.blake2b(encoded.encode("utf-8"), digest_size=8).hexdigest()
+
+    async def _reduce_with_llm(
+        self,
+        content: str,
+        *,
+        focus: str | None = None,
+        outcome: "_ReductionOutcome | None" = None,
+    ) -> str:
         """
         Performs a high-quality, LLM-based reduction of the content.
 
-        This method chunks the content, generates a summary for each chunk using 
-        an LLM, and then combines the partial summaries into a final, coherent 
-        summary.
+        The reduction is a map-reduce: every chunk is summarized concurrently
+        (bounded by ``reducer_max_concurrency``), then the partial summaries are
+        merged in groups of ``reducer_combine_fanout`` until one remains. Chunk
+        summaries are memoized by content hash, and a call that exceeds
+        ``reducer_call_timeout`` or fails falls back to an extractive excerpt so
+        one slow chunk cannot stall the whole reduction.
         """
         llm = await self._ensure_llm()
-        chunks = self._chunk_content(content)
-        partial_summaries: list[str] = []
-        
+        chunks = list(self._chunk_content(content))
+
         # Use configurable prompts
         prompts = self.config.prompt_templates
         system_prompt = prompts.reducer_system_prompt
-        
+
         # Check if we should use domain-specific templates
         domain = self._detect_domain(content, focus)
         if domain:
             system_prompt = prompts.customize_for_domain(system_prompt, domain)
-        
-        # Get compression profile based on context pressure
-        compression_profile = prompts.get_compression_profile(self.config.compression_profile)
-        
-        for chunk in chunks:
-            # Build focus clause if needed
-            focus_clause = prompts.reducer_focus_clause.format(focus=focus) if focus else ""
-            
-            # Format the chunk prompt
+
+        # Build focus clause if needed
+        focus_clause = prompts.reducer_focus_clause.format(focus=focus) if focus else ""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def summarize_chunk(chunk: str) -> str:
             prompt = prompts.get_prompt(
                 "reducer_chunk_prompt",
                 focus_clause=focus_clause,
                 target_tokens=self.target_tokens,
-                chunk=chunk
+                chunk=chunk,
             )
-            
-            response = await llm.ainvoke(
-                [SystemMessage(content=system_prompt), HumanMessage(content=prompt)],
+            return await self._invoke_cached(
+                llm, semaphore, system_prompt, prompt, fallback=chunk, outcome=outcome
             )
-            partial_summaries.append(str(response.content).strip())
-        
-        combined = "\n\n".join(partial_summaries)
-        if len(partial_summaries) == 1:
-            return combined
-        
-        # Use configurable combine prompt
-        final_prompt = prompts.get_prompt(
-            "reducer_combine_prompt",
-            combined=combined
-        )
-        
-        response = await llm.ainvoke(
-            [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=final_prompt),
-            ],
-        )
-        return str(response.content).strip()
-    
+
+        async def combine(parts: list[str]) -> str:
+            prompt = prompts.get_prompt("reducer_combine_prompt", combined="\n\n".join(parts))
+            return await self._invoke_cached(
+                llm, semaphore, system_prompt, prompt, fallback="\n\n".join(parts), outcome=outcome
+            )
+
+        summaries = list(await asyncio.gather(*(summarize_chunk(chunk) for chunk in chunks)))
+        if len(summaries) == 1:
+            return summaries[0]
+
+        while len(summaries) > 1:
+            groups = [
+                summaries[start : start + self.combine_fanout]
+                for start in range(0, len(summaries), self.combine_fanout)
+            ]
+            summaries = list(
+                await asyncio.gather(
+                    *(combine(group) if len(group) > 1 else _passthrough(group[0]) for group in groups)
+                )
+            )
+        return summaries[0]
+
+    async def _invoke_cached(
+        self,
+        llm: Any,
+        semaphore: asyncio.Semaphore,
+        system_prompt: str,
+        prompt: str,
+        *,
+        fallback: str,
+        outcome: "_ReductionOutcome | None" = None,
+    ) -> str:
+        """Runs one reducer call through the chunk cache, bounded and timed out."""
+        key = self._cache_key(system_prompt, prompt)
+        cached = self._summary_cache.get(key)
+        if cached is not None:
+            self._summary_cache.move_to_end(key)
+            self.cache_hits += 1
+            return cached
+        pending = self._pending.get(key)
+        if pending is None:
+            # Identical chunks in flight at the same time share one call.
+            pending = asyncio.ensure_future(
+                self._invoke(llm, semaphore, system_prompt, prompt, fallback=fallback)
+            )
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _task: self._pending.pop(key, None))
+        result, degraded = await asyncio.shield(pending)
+        if degraded:
+            if outcome is not None:
+                outcome.fallbacks += 1
+            return result
+        if key not in self._summary_cache:
+            self.cache_misses += 1
+            self._summary_cache[key] = result
+            while len(self._summary_cache) > self.cache_entries:
+                self._summary_cache.popitem(last=False)
+        return result
+
+    async def _invoke(
+        self,
+        llm: Any,
+        semaphore: asyncio.Semaphore,
+        system_prompt: str,
+        prompt: str,
+        *,
+        fallback: str,
+    ) -> tuple[str, bool]:
+        """Returns ``(text, degraded)``; ``degraded`` marks an extractive fallback."""
+        async with semaphore:
+            try:
+                response = await asyncio.wait_for(
+                    llm.ainvoke(
+                        [SystemMessage(content=system_prompt), HumanMessage(content=prompt)],
+                    ),
+                    timeout=self.call_timeout,
+                )
+            except asyncio.TimeoutError:
+                LOGGER.warning(
+                    "Reducer call exceeded %.1fs; using extractive fallback", self.call_timeout
+                )
+                return self._fallback_summary(fallback), True
+            except Exception as exc:  # noqa: BLE001 - one failed chunk must not abort the reduction
+                LOGGER.warning("Reducer call failed (%s); using extractive fallback", exc)
+                return self._fallback_summary(fallback), True
+        return str(response.content).strip(), False
+
+    def _cache_key(self, system_prompt: str, prompt: str) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (self.model_name, str(self.target_tokens), system_prompt, prompt):
+            digest.update(part.encode("utf-8", "surrogatepass"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def _fallback_summary(self, text: str) -> str:
+        """
+        Extractive stand-in for a reducer call that timed out or failed.
+
+        Keeps the head and the tail of ``text`` within ``target_tokens``, cut
+        on word boundaries (inside a word only when that word alone exceeds
+        the budget). This preserves headers and final results (errors, test
+        summaries) that matter most in tool output, and holds the excerpt to
+        the budget a summary would have had.
+        """
+        text = text.strip()
+        # Candidate cuts are measured with the raw tokenizer so the probing
+        # does not flood the shared memo.
+        count = self.token_counter.tokenizer.count
+        if count(text) <= self.target_tokens:
+            return text
+        marker_cost = count(f"\n[... {len(text.split())} words omitted ...]\n")
+        budget = max(2, self.target_tokens - marker_cost)
+        while True:
+            head = _clip_to_tokens(text, budget // 2, count)
+            tail = _clip_to_tokens(text[len(head) :], budget - budget // 2, count, from_end=True)
+            omitted = len(text[len(head) : len(text) - len(tail)].split())
+            excerpt = f"{head.rstrip()}\n[... {omitted} words omitted ...]\n{tail.lstrip()}".strip()
+            overshoot = count(excerpt) - self.target_tokens
+            if overshoot <= 0 or budget <= 2:
+                return excerpt
+            budget = max(2, budget - overshoot)
+
     def _detect_domain(self, content: str, focus: str | None = None) -> str | None:
         """Detect the domain of the content for domain-specific compression."""
         if focus:
@@ -196,5 +365,43 @@ class ContextReducer:
             yield " ".join(words[start : start + chunk_size])
 
     def _estimate_tokens(self, text: str) -> int:
-        """Estimates the number of tokens in a string of text."""
-        return max(1, len(text.split()))
+        """Counts the tokens of ``text`` with the shared, memoized tokenizer."""
+        return max(1, self.token_counter.count(text))
+
+
+def _clip_to_tokens(
+    text: str,
+    budget: int,
+    count: Callable[[str], int],
+    *,
+    from_end: bool = False,
+) -> str:
+    """
+    Returns the longest prefix (or suffix) of ``text`` within ``budget``
+    tokens, shortened to a whitespace boundary when it cuts through a word.
+    """
+    if budget <= 0 or not text:
+        return ""
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        piece = text[len(text) - middle :] if from_end else text[:middle]
+        if count(piece) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    if low == len(text):
+        return text
+    if from_end:
+        piece = text[len(text) - low :]
+        if low and not text[len(text) - low - 1].isspace():
+            boundary = next((index for index, char in enumerate(piece) if char.isspace()), -1)
+            if boundary > 0:
+                piece = piece[boundary:]
+        return piece
+    piece = text[:low]
+    if low and not text[low].isspace():
+        boundary = max(piece.rfind(" "), piece.rfind("\n"), piece.rfind("\t"))
+        if boundary > 0:
+            piece = piece[:boundary]
+    return piece
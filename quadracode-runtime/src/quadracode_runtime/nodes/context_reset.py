@@ -11,6 +11,7 @@ from langchain_core.messages.utils import get_buffer_string
 
 from ..config import ContextEngineConfig
 from ..state import ContextSegment, QuadraCodeState
+from ..tokenizer import get_token_counter
 from .context_reducer import ContextReducer
 
 
@@ -193,13 +194,15 @@ class ContextResetAgent:
             ),
             "type": "context_reset_history",
             "priority": 9,
-            "token_count": max(1, len(str(history_path).split())),
+            "token_count": 0,
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "decay_rate": 0.0,
             "compression_eligible": False,
             "restorable_reference": str(history_path),
         }
 
+        get_token_counter().annotate(history_segment)
+
         state["messages"] = trimmed_messages
         state["context_segments"] = [summary_segment, history_segment]
 
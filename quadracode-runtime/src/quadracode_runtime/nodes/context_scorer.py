@@ -14,24 +14,35 @@ predefined threshold.
 from __future__ import annotations
 
 import asyncio
-from collections import Counter
+from collections import OrderedDict
 from dataclasses import asdict, dataclass
-from datetime import datetime, timedelta, timezone
 import json
 import logging
-import math
 import re
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Optional
 
+import numpy as np
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage
 
 from ..config import ContextEngineConfig
+from ..embeddings import VectorIndex, get_embedder
+from ..segment_features import (
+    SegmentFeatureTable,
+    coherence_score,
+    diversity_score,
+    freshness_score,
+    relevance_weights,
+)
 from ..state import ContextEngineState, ContextSegment
+from ..tokenizer import content_hash
 
 
 LOGGER = logging.getLogger(__name__)
 
+# Per-thread segment indexes kept; the least recently scored thread is dropped.
+_MAX_INDEXED_THREADS = 64
+
 
 @dataclass(slots=True)
 class ScoreBreakdown:
@@ -59,6 +70,11 @@ class ContextScorer:
 
     Attributes:
         config: The configuration for the context engine.
+        embedder: The process-wide cached embedder used for relevance.
+        segment_indexes: Per conversation thread, vectors of the segments
+            currently in context keyed by content hash, so relevance is one
+            matrix-vector product. The least recently scored threads are
+            dropped beyond `_MAX_INDEXED_THREADS`.
     """
 
     def __init__(self, config: ContextEngineConfig) -> None:
@@ -69,6 +85,8 @@ class ContextScorer:
             config: The configuration for the context engine.
         """
         self.config = config
+        self.embedder = get_embedder(config)
+        self.segment_indexes: "OrderedDict[str, VectorIndex]" = OrderedDict()
         self._llm = None
         self._llm_lock = asyncio.Lock()
 
@@ -93,14 +111,15 @@ class ContextScorer:
 
     async def _evaluate_heuristic(self, state: ContextEngineState) -> float:
         """Evaluate context quality using heuristic-based metrics."""
-        segments = state.get("context_segments", [])
+        segments = list(state.get("context_segments", []))
+        table = SegmentFeatureTable.from_segments(segments)
 
         breakdown = ScoreBreakdown(
-            relevance=await self._score_relevance(segments, state),
-            coherence=await self._score_coherence(segments),
+            relevance=await self._score_relevance(segments, state, table),
+            coherence=await self._score_coherence(segments, table),
             completeness=await self._score_completeness(segments, state),
-            freshness=await self._score_freshness(segments),
-            diversity=await self._score_diversity(segments),
+            freshness=await self._score_freshness(segments, table),
+            diversity=await self._score_diversity(segments, table),
             efficiency=await self._score_efficiency(state),
         )
 
@@ -243,7 +262,10 @@ class ContextScorer:
         return 0.8
 
     async def _score_relevance(
-        self, segments: Iterable[ContextSegment], state: ContextEngineState
+        self,
+        segments: Iterable[ContextSegment],
+        state: ContextEngineState,
+        table: Optional[SegmentFeatureTable] = None,
     ) -> float:
         """Calculates the relevance score of the context."""
         segments = list(segments)
@@ -251,42 +273,55 @@ class ContextScorer:
             return 1.0
 
         goal_text = self._determine_goal_text(state)
-        goal_embedding = self._embed_text(goal_text)
-        if not goal_embedding:
+        if not goal_text:
+            return 1.0
+        goal_embedding = self.embedder.embed_one(goal_text)
+        if not goal_embedding.any():
             return 1.0
 
-        priorities = self.config.context_priorities
-        total_weight = 0.0
-        cumulative = 0.0
-
-        for segment in segments:
-            segment_type = segment.get("type", "generic").split(":", 1)[0]
-            priority_hint = priorities.get(segment_type, segment.get("priority", 5))
-            priority = max(segment.get("priority", priority_hint), priority_hint)
-            weight = min(priority, 10)
-            content = segment.get("content") or ""
-            similarity = self._cosine_similarity(goal_embedding, self._embed_text(content))
-            cumulative += similarity * weight
-            total_weight += weight
-
+        table = table if table is not None else SegmentFeatureTable.from_segments(segments)
+        weights = relevance_weights(table, self.config.context_priorities)
+        contents = [segment.get("content") or "" for segment in segments]
+        keys = [
+            segment.get("token_hash") or content_hash(content)
+            for segment, content in zip(segments, contents)
+        ]
+
+        index = self._segment_index(state)
+        self._sync_segment_index(index, keys, contents)
+        similarities = np.clip(index.similarities(goal_embedding, keys), 0.0, 1.0)
+        total_weight = float(weights.sum())
         if total_weight == 0:
             return 1.0
-        return max(0.0, min(1.0, cumulative / total_weight))
-
-    async def _score_coherence(self, segments: Iterable[ContextSegment]) -> float:
+        return max(0.0, min(1.0, float(similarities @ weights) / total_weight))
+
+    def _segment_index(self, state: ContextEngineState) -> VectorIndex:
+        """Returns the segment index of the state's thread, creating it if needed."""
+        thread_id = str(state.get("thread_id") or "")
+        index = self.segment_indexes.get(thread_id)
+        if index is not None:
+            self.segment_indexes.move_to_end(thread_id)
+            return index
+        index = self.segment_indexes[thread_id] = VectorIndex(self.embedder.dimension)
+        if len(self.segment_indexes) > _MAX_INDEXED_THREADS:
+            self.segment_indexes.popitem(last=False)
+        return index
+
+    def _sync_segment_index(self, index: VectorIndex, keys: List[str], contents: List[str]) -> None:
+        """Embeds segments not yet indexed and forgets those no longer in context."""
+        missing = {key: content for key, content in zip(keys, contents) if key not in index}
+        if missing:
+            index.upsert(list(missing), self.embedder.embed(list(missing.values()), keys=list(missing)))
+        if len(index) > len(keys):
+            index.retain(keys)
+
+    async def _score_coherence(
+        self, segments: Iterable[ContextSegment], table: Optional[SegmentFeatureTable] = None
+    ) -> float:
         """Calculates the coherence score of the context."""
-        segments = list(segments)
-        if len(segments) < 2:
-            return 1.0
-
-        scores: List[float] = []
-        for prev, current in zip(segments, segments[1:]):
-            priority_gap = abs(prev.get("priority", 5) - current.get("priority", 5)) / 10
-            time_gap = self._time_gap(prev.get("timestamp"), current.get("timestamp"))
-            penalty = min(1.0, (priority_gap + time_gap) / 2)
-            scores.append(max(0.0, 1.0 - penalty))
-
-        return sum(scores) / len(scores) if scores else 1.0
+        if table is None:
+            table = SegmentFeatureTable.from_segments(list(segments))
+        return coherence_score(table)
 
     async def _score_completeness(
         self, segments: Iterable[ContextSegment], state: ContextEngineState
@@ -306,39 +341,21 @@ class ContextScorer:
 
         return min(1.0, coverage + hierarchy_bonus)
 
-    async def _score_freshness(self, segments: Iterable[ContextSegment]) -> float:
+    async def _score_freshness(
+        self, segments: Iterable[ContextSegment], table: Optional[SegmentFeatureTable] = None
+    ) -> float:
         """Calculates the freshness score of the context."""
-        segments = list(segments)
-        if not segments:
-            return 1.0
+        if table is None:
+            table = SegmentFeatureTable.from_segments(list(segments))
+        return freshness_score(table)
 
-        now = datetime.now(timezone.utc)
-        horizon = timedelta(hours=12)
-        scores: List[float] = []
-        for segment in segments:
-            timestamp = self._parse_timestamp(segment.get("timestamp"))
-            if not timestamp:
-                scores.append(0.5)
-                continue
-
-            age = now - timestamp
-            if age <= timedelta(0):
-                scores.append(1.0)
-            else:
-                freshness = max(0.0, 1.0 - age / horizon)
-                scores.append(float(freshness))
-
-        return sum(scores) / len(scores) if scores else 1.0
-
-    async def _score_diversity(self, segments: Iterable[ContextSegment]) -> float:
+    async def _score_diversity(
+        self, segments: Iterable[ContextSegment], table: Optional[SegmentFeatureTable] = None
+    ) -> float:
         """Calculates the diversity score of the context."""
-        segments = list(segments)
-        if not segments:
-            return 1.0
-
-        types = {segment.get("type", "").split(":", 1)[0] for segment in segments}
-        diversity = len(types) / len(segments)
-        return min(1.0, diversity)
+        if table is None:
+            table = SegmentFeatureTable.from_segments(list(segments))
+        return diversity_score(table)
 
     async def _score_efficiency(self, state: ContextEngineState) -> float:
         """Calculates the efficiency score of the context."""
@@ -382,28 +399,6 @@ class ContextScorer:
         total = sum(weights.values()) or 1.0
         return {k: v / total for k, v in weights.items()}
 
-    def _time_gap(self, a: str | None, b: str | None) -> float:
-        """Calculates the time gap between two timestamps."""
-        first = self._parse_timestamp(a)
-        second = self._parse_timestamp(b)
-        if not first or not second:
-            return 0.5
-        delta = abs((second - first).total_seconds())
-        return min(1.0, delta / (3600 * 4))  # 4-hour horizon
-
-    def _parse_timestamp(self, value: str | None) -> datetime | None:
-        """Safely parses an ISO-8601 formatted timestamp string."""
-        if not value:
-            return None
-        try:
-            normalized = value.replace("Z", "+00:00")
-            ts = datetime.fromisoformat(normalized)
-            if ts.tzinfo is None:
-                ts = ts.replace(tzinfo=timezone.utc)
-            return ts.astimezone(timezone.utc)
-        except ValueError:
-            return None
-
     def _determine_goal_text(self, state: ContextEngineState) -> str:
         """Extracts the current goal from the state."""
         if state.get("task_goal"):
@@ -418,31 +413,3 @@ class ContextScorer:
                     return str(last.content)
             return str(last)
         return ""
-
-    def _embed_text(self, text: str) -> Dict[str, float]:
-        """
-        Creates a simple, normalized bag-of-words embedding for a string of 
-        text.
-        """
-        if not text:
-            return {}
-        tokens = [token for token in re.findall(r"\b\w+\b", text.lower()) if len(token) > 2]
-        if not tokens:
-            return {}
-        counts = Counter(tokens)
-        norm = math.sqrt(sum(value * value for value in counts.values()))
-        if norm == 0:
-            return {}
-        return {token: value / norm for token, value in counts.items()}
-
-    def _cosine_similarity(
-        self, lhs: Dict[str, float], rhs: Dict[str, float]
-    ) -> float:
-        """Calculates the cosine similarity between two bag-of-words embeddings."""
-        if not lhs or not rhs:
-            return 0.0
-        keys = lhs.keys() & rhs.keys()
-        if not keys:
-            return 0.0
-        value = sum(lhs[key] * rhs[key] for key in keys)
-        return max(0.0, min(1.0, value))
@@ -0,0 +1,249 @@
+"""
+This module implements speculative context curation: preparing the next turn's
+compacted context in the background while the driver and tools are running.
+
+`ContextEngine.post_process` hands a snapshot of the thread's segments and
+messages to `SpeculativeCuration.schedule`, which runs the engine's compaction
+(history folding and segment curation) as a background task. At the next
+`pre_process` the engine calls `take` and `apply_speculation`, which commits the
+prepared result only if it still describes the current state:
+
+- every segment the speculation started from is still present with the same
+  content (segments added since then are kept as they are);
+- the history summary watermark has not moved, so no other fold happened.
+
+A stale or unfinished speculation is discarded, and the synchronous path runs
+only when the context exceeds the hard limit; otherwise the compaction is simply
+deferred to the next speculation.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from copy import deepcopy
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..state import ContextSegment, QuadraCodeState
+from ..tokenizer import content_hash
+
+LOGGER = logging.getLogger(__name__)
+
+# State keys written by history folding and curation that a commit carries over.
+SPECULATIVE_STATE_KEYS = (
+    "history_summary_watermark",
+    "external_memory_index",
+    "recent_externalizations",
+    "recent_compressions",
+    "last_compression_event",
+    "last_curation_summary",
+)
+
+
+@dataclass
+class SpeculativeResult:
+    """A compacted context prepared in the background for one thread."""
+
+    base_segments: Dict[str, str]
+    base_watermark: Dict[str, Any]
+    segments: List[ContextSegment]
+    folded_message_ids: List[str]
+    state_updates: Dict[str, Any] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.monotonic)
+
+
+def _segment_fingerprints(segments: List[ContextSegment]) -> Dict[str, str]:
+    return {
+        str(segment.get("id")): content_hash(str(segment.get("content") or ""))
+        for segment in segments
+    }
+
+
+def snapshot_for_speculation(state: QuadraCodeState) -> QuadraCodeState:
+    """
+    Copies the parts of ``state`` compaction reads and mutates.
+
+    Segments are deep-copied so the background task cannot race with the
+    driver or tool nodes; messages are immutable and are shared.
+    """
+    snapshot: QuadraCodeState = dict(state)  # type: ignore[assignment]
+    snapshot["context_segments"] = deepcopy(list(state.get("context_segments") or []))
+    snapshot["messages"] = list(state.get("messages") or [])
+    snapshot["metrics_log"] = []
+    snapshot["_context_breakdown"] = {}
+    snapshot["token_tallies"] = deepcopy(state.get("token_tallies") or {})
+    for key in SPECULATIVE_STATE_KEYS:
+        if key in state:
+            snapshot[key] = deepcopy(state[key])
+    return snapshot
+
+
+def build_speculative_result(
+    snapshot: QuadraCodeState,
+    base_segments: Dict[str, str],
+    base_watermark: Dict[str, Any],
+    base_message_ids: List[str],
+) -> SpeculativeResult:
+    """Packages a compacted snapshot as a `SpeculativeResult`."""
+    remaining = {getattr(message, "id", None) for message in snapshot.get("messages") or []}
+    return SpeculativeResult(
+        base_segments=base_segments,
+        base_watermark=base_watermark,
+        segments=list(snapshot.get("context_segments") or []),
+        folded_message_ids=[message_id for message_id in base_message_ids if message_id not in remaining],
+        state_updates={key: snapshot[key] for key in SPECULATIVE_STATE_KEYS if key in snapshot},
+    )
+
+
+def apply_speculation(state: QuadraCodeState, result: SpeculativeResult) -> bool:
+    """
+    Commits ``result`` into ``state`` if it is still valid.
+
+    Returns:
+        ``True`` if the result was applied, ``False`` if it was stale.
+    """
+    if dict(state.get("history_summary_watermark") or {}) != result.base_watermark:
+        return False
+    current = list(state.get("context_segments") or [])
+    current_fingerprints = _segment_fingerprints(current)
+    for segment_id, digest in result.base_segments.items():
+        if current_fingerprints.get(segment_id) != digest:
+            return False
+
+    merged: List[ContextSegment] = list(result.segments)
+    seen = {str(segment.get("id")) for segment in merged}
+    for segment in current:
+        segment_id = str(segment.get("id"))
+        if segment_id not in result.base_segments and segment_id not in seen:
+            merged.append(segment)
+            seen.add(segment_id)
+    state["context_segments"] = merged
+
+    if result.folded_message_ids:
+        folded = set(result.folded_message_ids)
+        state["messages"] = [
+            message
+            for message in state.get("messages") or []
+            if getattr(message, "id", None) not in folded
+        ]
+    for key, value in result.state_updates.items():
+        state[key] = value
+    return True
+
+
+Compactor = Callable[[QuadraCodeState], Awaitable[Optional[QuadraCodeState]]]
+
+
+class SpeculativeCuration:
+    """
+    Runs at most one background compaction per thread and keeps its result.
+
+    Results are plain data validated at commit time, so a result is safe to
+    commit from any event loop; results older than ``max_age_seconds`` are
+    dropped.
+    """
+
+    def __init__(self, max_age_seconds: float = 600.0) -> None:
+        self.max_age_seconds = max_age_seconds
+        self._tasks: Dict[str, asyncio.Task[None]] = {}
+        self._results: Dict[str, SpeculativeResult] = {}
+        self.scheduled = 0
+        self.committed = 0
+        self.discarded = 0
+
+    def pending(self, thread_id: str) -> bool:
+        """Whether a background compaction for ``thread_id`` is still running."""
+        task = self._tasks.get(thread_id)
+        return task is not None and not task.done()
+
+    def schedule(self, thread_id: str, state: QuadraCodeState, compactor: Compactor) -> bool:
+        """
+        Starts a background compaction of ``state`` unless one is running.
+
+        Args:
+            thread_id: The conversation thread the state belongs to.
+            state: The state as handed to the driver/tools.
+            compactor: Coroutine function that compacts a snapshot in place
+                       and returns it, or returns ``None`` when no compaction
+                       is needed.
+
+        Returns:
+            ``True`` if a task was started.
+        """
+        if self.pending(thread_id):
+            return False
+        snapshot = snapshot_for_speculation(state)
+        base_segments = _segment_fingerprints(snapshot["context_segments"])
+        base_watermark = dict(snapshot.get("history_summary_watermark") or {})
+        base_message_ids = [
+            message.id for message in snapshot["messages"] if getattr(message, "id", None)
+        ]
+
+        async def _run() -> None:
+            try:
+                compacted = await compactor(snapshot)
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # noqa: BLE001 - speculation is best effort
+                LOGGER.exception("Speculative curation failed for thread %s", thread_id)
+                return
+            if compacted is None:
+                self._results.pop(thread_id, None)
+                return
+            self._results[thread_id] = build_speculative_result(
+                compacted, base_segments, base_watermark, base_message_ids
+            )
+
+        self._results.pop(thread_id, None)
+        task = asyncio.get_running_loop().create_task(_run(), name=f"context-speculation:{thread_id}")
+        self._tasks[thread_id] = task
+        task.add_done_callback(lambda done: self._forget_task(thread_id, done))
+        self.scheduled += 1
+        return True
+
+    def _forget_task(self, thread_id: str, task: asyncio.Task[None]) -> None:
+        if self._tasks.get(thread_id) is task:
+            self._tasks.pop(thread_id, None)
+
+    def take(self, thread_id: str) -> Optional[SpeculativeResult]:
+        """Removes and returns the finished result for ``thread_id``, if fresh."""
+        result = self._results.pop(thread_id, None)
+        if result is None:
+            return None
+        if time.monotonic() - result.created_at > self.max_age_seconds:
+            self.discarded += 1
+            return None
+        return result
+
+    def record(self, applied: bool) -> None:
+        """Counts the outcome of a commit attempt."""
+        if applied:
+            self.committed += 1
+        else:
+            self.discarded += 1
+
+    def cancel(self, thread_id: str) -> None:
+        """Cancels the running compaction and drops any result for the thread."""
+        task = self._tasks.pop(thread_id, None)
+        if task is not None:
+            task.cancel()
+        self._results.pop(thread_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "scheduled": self.scheduled,
+            "committed": self.committed,
+            "discarded": self.discarded,
+            "running": sum(1 for task in self._tasks.values() if not task.done()),
+        }
+
+
+__all__ = [
+    "SPECULATIVE_STATE_KEYS",
+    "SpeculativeCuration",
+    "SpeculativeResult",
+    "apply_speculation",
+    "build_speculative_result",
+    "snapshot_for_speculation",
+]
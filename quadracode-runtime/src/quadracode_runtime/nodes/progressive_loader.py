@@ -15,15 +15,20 @@ from __future__ import annotations
 import asyncio
 import ast
 import json
-import re
+import os
 import textwrap
 import tomllib
 from datetime import datetime, timezone
+from fnmatch import fnmatch
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
+from ..code_search_index import get_code_search_index
 from ..config import ContextEngineConfig
+from ..segment_cache import get_static_segment_cache
+from ..skills_registry import SkillsRegistry
 from ..state import ContextEngineState, ContextSegment
+from ..tokenizer import content_hash, get_token_counter
 
 
 class ProgressiveContextLoader:
@@ -50,10 +55,16 @@ class ProgressiveContextLoader:
             config: The configuration for the context engine.
         """
         self.config = config
+        self.token_counter = get_token_counter()
         self.project_root = Path(config.project_root).resolve()
         self.documentation_paths = [self.project_root / path for path in config.documentation_paths]
         self.skills_roots = [self.project_root / path for path in config.skills_paths]
-        self._skills_cache: Dict[str, Dict[str, Any]] = {}
+        self.skills = SkillsRegistry(
+            self.skills_roots,
+            refresh_interval=config.skills_refresh_seconds,
+            body_cache_entries=config.skills_body_cache_entries,
+        )
+        self.segment_cache = get_static_segment_cache()
 
     async def prepare_context(self, state: ContextEngineState) -> ContextEngineState:
         """
@@ -91,7 +102,7 @@ class ProgressiveContextLoader:
         search_terms = self._compile_search_terms(state)
         state = await self._activate_skills(state, search_terms)
         if search_terms:
-            search_segment = await self._load_code_search(search_terms)
+            search_segment = await self._load_code_search(search_terms, self._code_search_roots(state))
             if search_segment:
                 state = await self._integrate_context(state, search_segment)
                 self._remove_pending(state, "code_search_results")
@@ -242,8 +253,14 @@ class ProgressiveContextLoader:
 
     async def _load_code_context(self, state: ContextEngineState) -> Optional[ContextSegment]:
         """Loads a segment with general information about the codebase."""
+        return self._static_segment(
+            "context-code-overview", "code_context", self._render_code_context, min_tokens=50
+        )
+
+    def _render_code_context(self, inputs: Set[Path]) -> str:
         lines: List[str] = []
         pyproject = self.project_root / "pyproject.toml"
+        inputs.add(pyproject)
         if pyproject.exists():
             try:
                 data = tomllib.loads(pyproject.read_text())
@@ -269,7 +286,10 @@ class ProgressiveContextLoader:
             lines.append("pyproject.toml not found at project root.")
 
         package_dirs = []
+        inputs.add(self.project_root)
         for child in sorted(self.project_root.iterdir()):
+            if child.is_dir():
+                inputs.add(child / "pyproject.toml")
             if (child / "pyproject.toml").exists():
                 package_dirs.append(child.name)
         if package_dirs:
@@ -277,23 +297,22 @@ class ProgressiveContextLoader:
             lines.append(", ".join(package_dirs))
 
         runtime_src = self.project_root / "quadracode-runtime/src/quadracode_runtime"
+        inputs.add(runtime_src)
         if runtime_src.exists():
             modules = sorted(str(path.relative_to(self.project_root)) for path in runtime_src.glob("*.py"))
             if modules:
                 lines.append("Runtime modules:")
                 lines.extend(f"  - {module}" for module in modules[:20])
 
-        content = "\n".join(lines)
-        tokens = len(content.split())
-        return self._build_segment(
-            segment_id="context-code-overview",
-            content=content,
-            segment_type="code_context",
-            tokens=max(tokens, 50),
-        )
+        return "\n".join(lines)
 
     async def _load_file_structure(self, state: ContextEngineState) -> Optional[ContextSegment]:
         """Loads a segment with an overview of the file structure."""
+        return self._static_segment(
+            "context-file-structure", "file_structure", self._render_file_structure, min_tokens=60
+        )
+
+    def _render_file_structure(self, inputs: Set[Path]) -> str:
         roots = [
             self.project_root / "quadracode-runtime",
             self.project_root / "quadracode-tools",
@@ -302,6 +321,7 @@ class ProgressiveContextLoader:
         ]
         lines: List[str] = []
         for root in roots:
+            inputs.add(root)
             if not root.exists():
                 continue
             lines.append(f"/{root.name}")
@@ -309,17 +329,11 @@ class ProgressiveContextLoader:
                 prefix = "├──" if child.is_dir() else "└──"
                 lines.append(f"  {prefix} {child.name}")
                 if child.is_dir():
+                    inputs.add(child)
                     for sub in sorted(child.iterdir())[:5]:
                         sub_prefix = "│   ├──" if sub.is_dir() else "│   └──"
                         lines.append(f"  {sub_prefix} {sub.name}")
-        content = "\n".join(lines) if lines else "Repository directories not discovered."
-        tokens = len(content.split())
-        return self._build_segment(
-            segment_id="context-file-structure",
-            content=content,
-            segment_type="file_structure",
-            tokens=max(tokens, 60),
-        )
+        return "\n".join(lines) if lines else "Repository directories not discovered."
 
     async def _load_error_history(self, state: ContextEngineState) -> Optional[ContextSegment]:
         errors = state.get("error_history", [])
@@ -334,7 +348,7 @@ class ProgressiveContextLoader:
                 attempt_info = f" | attempts: {len(attempts)}" if attempts else ""
                 lines.append(f"- {occurred}: {summary}{attempt_info}")
             content = "\n".join(lines)
-        tokens = len(content.split())
+        tokens = self.token_counter.count(content)
         return self._build_segment(
             segment_id="context-error-history",
             content=content,
@@ -350,7 +364,7 @@ class ProgressiveContextLoader:
             if trace:
                 traces.append(textwrap.dedent(trace).strip())
         content = "\n\n".join(traces) if traces else "No stack traces captured in error history."
-        tokens = len(content.split())
+        tokens = self.token_counter.count(content)
         return self._build_segment(
             segment_id="context-stack-traces",
             content=content,
@@ -359,8 +373,18 @@ class ProgressiveContextLoader:
         )
 
     async def _load_architecture_docs(self, state: ContextEngineState) -> Optional[ContextSegment]:
+        return self._static_segment(
+            "context-architecture-docs",
+            "architecture_docs",
+            self._render_architecture_docs,
+            min_tokens=60,
+            variant=tuple(str(path) for path in self.documentation_paths),
+        )
+
+    def _render_architecture_docs(self, inputs: Set[Path]) -> str:
         snippets: List[str] = []
         for path in self.documentation_paths:
+            inputs.add(path)
             if not path.exists():
                 continue
             try:
@@ -369,20 +393,20 @@ class ProgressiveContextLoader:
                 continue
             preview = textwrap.shorten(text, width=800, placeholder="…")
             snippets.append(f"# {path.relative_to(self.project_root)}\n{preview}")
-        content = "\n\n".join(snippets) if snippets else "No documentation files found in configured paths."
-        tokens = len(content.split())
-        return self._build_segment(
-            segment_id="context-architecture-docs",
-            content=content,
-            segment_type="architecture_docs",
-            tokens=max(tokens, 60),
-        )
+        return "\n\n".join(snippets) if snippets else "No documentation files found in configured paths."
 
     async def _load_design_patterns(self, state: ContextEngineState) -> Optional[ContextSegment]:
+        return self._static_segment(
+            "context-design-patterns", "design_patterns", self._render_design_patterns, min_tokens=40
+        )
+
+    def _render_design_patterns(self, inputs: Set[Path]) -> str:
         runtime_src = self.project_root / "quadracode-runtime/src/quadracode_runtime"
+        inputs.add(runtime_src)
         classes: List[str] = []
         if runtime_src.exists():
             for py_file in runtime_src.glob("*.py"):
+                inputs.add(py_file)
                 try:
                     tree = ast.parse(py_file.read_text(encoding="utf-8"))
                 except (SyntaxError, OSError):
@@ -390,34 +414,31 @@ class ProgressiveContextLoader:
                 for node in tree.body:
                     if isinstance(node, ast.ClassDef):
                         classes.append(f"{py_file.relative_to(self.project_root)}::{node.name}")
-        content = (
+        return (
             "Identified runtime classes:\n" + "\n".join(classes[:60])
             if classes
             else "No class definitions discovered under quadracode-runtime/src/quadracode_runtime."
         )
-        tokens = len(content.split())
-        return self._build_segment(
-            segment_id="context-design-patterns",
-            content=content,
-            segment_type="design_patterns",
-            tokens=max(tokens, 40),
-        )
 
     async def _load_test_suite(self, state: ContextEngineState) -> Optional[ContextSegment]:
+        return self._static_segment(
+            "context-test-suite", "test_suite", self._render_test_suite, min_tokens=30
+        )
+
+    def _render_test_suite(self, inputs: Set[Path]) -> str:
         entries: List[str] = []
         for root in [self.project_root / "tests", self.project_root / "quadracode-runtime/tests"]:
+            inputs.add(root)
             if not root.exists():
                 continue
-            for path in sorted(root.rglob("test_*.py")):
-                entries.append(str(path.relative_to(self.project_root)))
-        content = "Pytest files:\n" + "\n".join(entries[:80]) if entries else "No pytest files discovered under tests directories."
-        tokens = len(content.split())
-        return self._build_segment(
-            segment_id="context-test-suite",
-            content=content,
-            segment_type="test_suite",
-            tokens=max(tokens, 30),
-        )
+            # Walked by hand so every directory listed is recorded as an input:
+            # adding or removing a test file changes its directory's mtime.
+            found: List[Path] = []
+            for directory, _, filenames in os.walk(root):
+                inputs.add(Path(directory))
+                found.extend(Path(directory) / name for name in filenames if fnmatch(name, "test_*.py"))
+            entries.extend(str(path.relative_to(self.project_root)) for path in sorted(found))
+        return "Pytest files:\n" + "\n".join(entries[:80]) if entries else "No pytest files discovered under tests directories."
 
     async def _load_coverage_reports(self, state: ContextEngineState) -> Optional[ContextSegment]:
         coverage_files = [
@@ -431,7 +452,7 @@ class ProgressiveContextLoader:
             if existing
             else "Coverage artifacts not found (expected coverage.xml, .coverage, or htmlcov/index.html)."
         )
-        tokens = len(content.split())
+        tokens = self.token_counter.count(content)
         return self._build_segment(
             segment_id="context-coverage-reports",
             content=content,
@@ -439,15 +460,17 @@ class ProgressiveContextLoader:
             tokens=max(tokens, 20),
         )
 
-    async def _load_code_search(self, terms: Set[str]) -> Optional[ContextSegment]:
-        matches = await asyncio.to_thread(self._perform_code_search, terms)
+    async def _load_code_search(
+        self, terms: Set[str], roots: Optional[List[Path]] = None
+    ) -> Optional[ContextSegment]:
+        matches = await asyncio.to_thread(self._perform_code_search, terms, roots)
         if not matches:
             return None
         lines = ["Code search results:"]
         for match in matches:
             lines.append(f"{match['path']}: line {match['line']} — {match['snippet']}")
         content = "\n".join(lines)
-        tokens = len(content.split())
+        tokens = self.token_counter.count(content)
         return self._build_segment(
             segment_id="context-code-search",
             content=content,
@@ -455,169 +478,55 @@ class ProgressiveContextLoader:
             tokens=max(tokens, 30),
         )
 
-    def _perform_code_search(self, terms: Set[str]) -> List[Dict[str, Any]]:
-        lowercase_terms = {term.lower() for term in terms}
-        if not lowercase_terms:
+    def _code_search_roots(self, state: ContextEngineState) -> List[Path]:
+        """Searches the active workspace when it is reachable from here, else the configured roots."""
+        workspace = state.get("workspace")
+        if isinstance(workspace, dict):
+            host_path = workspace.get("host_path")
+            if isinstance(host_path, str) and host_path.strip() and Path(host_path.strip()).is_dir():
+                return [Path(host_path.strip())]
+        return [self.project_root / root for root in self.config.code_search_roots]
+
+    def _perform_code_search(
+        self, terms: Set[str], roots: Optional[List[Path]] = None
+    ) -> List[Dict[str, Any]]:
+        if not terms:
             return []
-
-        results: List[Dict[str, Any]] = []
-        max_results = max(1, self.config.code_search_max_results)
-        search_roots = [
-            self.project_root / "quadracode-runtime",
-            self.project_root / "quadracode-tools",
-            self.project_root / "quadracode-ui",
-        ]
-        for root in search_roots:
-            if not root.exists():
-                continue
-            for path in root.rglob("*"):
-                if len(results) >= max_results:
-                    return results
-                if path.is_dir():
-                    if self._path_excluded(path):
-                        continue
-                    continue
-                if self._path_excluded(path):
-                    continue
-                if path.suffix.lower() not in self.config.code_search_extensions:
-                    continue
-                try:
-                    text = path.read_text(encoding="utf-8")
-                except (UnicodeDecodeError, OSError):
-                    continue
-                lower_lines = text.lower().splitlines()
-                original_lines = text.splitlines()
-                for idx, line in enumerate(lower_lines, start=1):
-                    if any(term in line for term in lowercase_terms):
-                        snippet = original_lines[idx - 1].strip()
-                        if len(snippet) > 160:
-                            snippet = snippet[:157] + "…"
-                        results.append(
-                            {
-                                "path": str(path.relative_to(self.project_root)),
-                                "line": idx,
-                                "snippet": snippet,
-                            }
-                        )
-                        break
-        return results
-
-    def _ensure_skills_catalog(self, state: ContextEngineState) -> None:
-        if self._skills_cache:
-            state["skills_catalog"] = list(self._skills_cache.values())
-            return
-
-        catalog = self._scan_skills()
-        self._skills_cache = catalog
-        state["skills_catalog"] = list(catalog.values())
-
-    def _scan_skills(self) -> Dict[str, Dict[str, Any]]:
-        catalog: Dict[str, Dict[str, Any]] = {}
-        for root in self.skills_roots:
-            if not root.exists() or not root.is_dir():
-                continue
-            for skill_dir in sorted(root.iterdir()):
-                if not skill_dir.is_dir():
-                    continue
-                skill_file = skill_dir / "SKILL.md"
-                if not skill_file.exists():
-                    continue
-                try:
-                    metadata = self._parse_skill_file(skill_file)
-                except Exception:
-                    continue
-                slug = metadata["slug"]
-                if slug in catalog:
-                    continue
-                catalog[slug] = metadata
-        return catalog
-
-    def _parse_skill_file(self, path: Path) -> Dict[str, Any]:
-        text = path.read_text(encoding="utf-8")
-        front_lines: List[str] = []
-        body_lines: List[str] = []
-        lines = text.splitlines()
-        if lines and lines[0].strip() == "---":
-            idx = 1
-            while idx < len(lines) and lines[idx].strip() != "---":
-                front_lines.append(lines[idx])
-                idx += 1
-            idx += 1  # skip closing ---
-            body_lines = lines[idx:]
-        else:
-            body_lines = lines
-
-        metadata = self._parse_front_matter(front_lines)
-        name = metadata.get("name") or path.parent.name
-        description = metadata.get("description") or ""
-        tags = self._coerce_list(metadata.get("tags"))
-        links = self._coerce_list(metadata.get("links"))
-        slug = self._slugify_skill(name)
-
-        metadata.update(
+        if roots is None:
+            roots = [self.project_root / root for root in self.config.code_search_roots]
+        search_roots = [root for root in roots if root.is_dir()]
+        if not search_roots:
+            return []
+        index = get_code_search_index(self.config, search_roots)
+        hits = index.search(terms, max(1, self.config.code_search_max_results))
+        return [
             {
-                "name": name,
-                "description": description,
-                "tags": tags,
-                "links": links,
-                "slug": slug,
-                "skill_file": str(path),
-                "skill_dir": str(path.parent),
+                "path": self._display_path(hit.path, index.roots),
+                "line": hit.line,
+                "snippet": hit.snippet,
+                "score": hit.score,
             }
-        )
-        return metadata
-
-    def _parse_front_matter(self, lines: List[str]) -> Dict[str, Any]:
-        data: Dict[str, Any] = {}
-        current_key: Optional[str] = None
-        for raw in lines:
-            line = raw.strip()
-            if not line or line.startswith("#"):
-                continue
-            if line.startswith("-") and current_key:
-                data.setdefault(current_key, [])
-                data[current_key].append(line[1:].strip())
-                continue
-            if ":" in line:
-                key, value = line.split(":", 1)
-                key = key.strip()
-                value = value.strip()
-                if value:
-                    data[key] = value
-                else:
-                    data[key] = []
-                current_key = key
-            elif current_key:
-                existing = data.get(current_key, "")
-                if isinstance(existing, list):
-                    data[current_key].append(line)
-                else:
-                    data[current_key] = f"{existing} {line}".strip()
-        return data
-
-    def _coerce_list(self, value: Any) -> List[str]:
-        if value is None:
-            return []
-        if isinstance(value, list):
-            return [str(item).strip() for item in value if str(item).strip()]
-        text = str(value).strip()
-        if not text:
-            return []
-        return [item.strip() for item in text.split(",") if item.strip()]
+            for hit in hits
+        ]
 
-    def _slugify_skill(self, name: str) -> str:
-        slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
-        return slug or "skill"
+    def _display_path(self, path: Path, roots: List[Path]) -> str:
+        for base in (self.project_root, *roots):
+            if path.is_relative_to(base):
+                return str(path.relative_to(base))
+        return str(path)
+
+    def _ensure_skills_catalog(self, state: ContextEngineState) -> None:
+        self.skills.refresh()
+        state["skills_catalog"] = self.skills.catalog()
 
     async def _activate_skills(
         self, state: ContextEngineState, search_terms: Set[str]
     ) -> ContextEngineState:
-        catalog = {meta["slug"]: meta for meta in state.get("skills_catalog", [])}
-        if not catalog:
+        if not len(self.skills):
             state["active_skills_metadata"] = []
             return state
 
-        relevant = self._select_skills(catalog, search_terms)
+        relevant = self.skills.select(search_terms)
         active_slugs = {meta.get("slug") for meta in state.get("active_skills_metadata", [])}
         for slug, meta in relevant.items():
             if slug not in active_slugs:
@@ -645,19 +554,6 @@ class ProgressiveContextLoader:
             self._schedule_skill_links(state, meta)
         return state
 
-    def _select_skills(
-        self, catalog: Dict[str, Dict[str, Any]], search_terms: Set[str]
-    ) -> Dict[str, Dict[str, Any]]:
-        if not catalog:
-            return {}
-        lowercase_terms = {term.lower() for term in search_terms}
-        relevant: Dict[str, Dict[str, Any]] = {}
-        for slug, meta in catalog.items():
-            tags = {str(tag).lower() for tag in meta.get("tags", [])}
-            if "auto" in tags or lowercase_terms & tags:
-                relevant[slug] = meta
-        return relevant
-
     def _skill_entry(self, state: ContextEngineState, slug: str) -> Dict[str, Any]:
         store = state.setdefault("loaded_skills", {})
         if slug not in store:
@@ -669,13 +565,13 @@ class ProgressiveContextLoader:
         return bool(entry.get("main_loaded"))
 
     def _load_skill_main_segment(self, metadata: Dict[str, Any]) -> Optional[ContextSegment]:
-        body = self._read_skill_body(Path(metadata["skill_file"]))
+        slug = metadata["slug"]
+        body = self.skills.body(slug)
         if not body:
             return None
-        slug = metadata["slug"]
         segment_id = f"skill-{slug}"
         content = body
-        tokens = max(60, len(content.split()))
+        tokens = max(60, self.token_counter.count(content))
         return self._build_segment(
             segment_id=segment_id,
             content=content,
@@ -683,14 +579,6 @@ class ProgressiveContextLoader:
             tokens=tokens,
         )
 
-    def _read_skill_body(self, path: Path) -> str:
-        text = path.read_text(encoding="utf-8")
-        if text.startswith("---"):
-            parts = text.split("---", 2)
-            if len(parts) >= 3:
-                return parts[2].strip()
-        return text.strip()
-
     def _schedule_skill_links(
         self, state: ContextEngineState, metadata: Dict[str, Any]
     ) -> None:
@@ -703,10 +591,6 @@ class ProgressiveContextLoader:
             queue_key = f"skill_link:{slug}:{link}"
             self._enqueue_prefetch(state, queue_key, reason="skill-link")
 
-    def _path_excluded(self, path: Path) -> bool:
-        excluded = set(self.config.code_search_exclude_dirs)
-        return any(part in excluded for part in path.parts)
-
     def _enqueue_prefetch(self, state: ContextEngineState, need: str, *, reason: str) -> None:
         queue = state["prefetch_queue"]
         if any(item["type"] == need for item in queue):
@@ -787,6 +671,30 @@ class ProgressiveContextLoader:
                 return str(raw)
         return str(raw)
 
+    def _static_segment(
+        self,
+        segment_id: str,
+        segment_type: str,
+        builder: Callable[[Set[Path]], str],
+        *,
+        min_tokens: int,
+        variant: Tuple[str, ...] = (),
+    ) -> ContextSegment:
+        """Builds a filesystem-derived segment, or reuses it while its inputs are unchanged."""
+        key = (segment_type, str(self.project_root), *variant)
+        if self.config.static_segment_cache_enabled:
+            entry, _ = self.segment_cache.get_or_build(key, builder, self.token_counter.count)
+            content, tokens = entry.content, entry.tokens
+        else:
+            content = builder(set())
+            tokens = self.token_counter.count(content)
+        return self._build_segment(
+            segment_id=segment_id,
+            content=content,
+            segment_type=segment_type,
+            tokens=max(tokens, min_tokens),
+        )
+
     def _build_segment(
         self,
         *,
@@ -802,6 +710,7 @@ class ProgressiveContextLoader:
             "type": segment_type,
             "priority": self._need_priority(segment_type),
             "token_count": tokens,
+            "token_hash": content_hash(content),
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "decay_rate": 0.1,
             "compression_eligible": True,
@@ -35,7 +35,12 @@ from quadracode_contracts import (
     MessageEnvelope,
     AutonomousRoutingDirective,
 )
-from quadracode_tools.tools.workspace import ensure_workspace
+from quadracode_tools.tools.workspace import aensure_workspace
+from quadracode_tools.workspace_context import (
+    WORKSPACE_CONFIG_KEY,
+    bind_active_workspace,
+    reset_active_workspace,
+)
 
 from .graph import (
     GRAPH_RECURSION_LIMIT,
@@ -44,11 +49,18 @@ from .graph import (
     create_checkpointer,
 )
 from .logging_utils import configure_logging
-from .messaging import RedisMCPMessaging
+from .messaging import RedisMCPMessaging, RedisStreamMessaging, create_messaging
 from .mock_mode import is_mock_mode, configure_mock_mode
 from .profiles import RuntimeProfile, is_autonomous_mode_enabled
 from .state import ExhaustionMode, RuntimeState
 from .registry import AgentRegistryIntegration
+from .scheduler import ThreadScheduler
+from .state_delta import (
+    StateDeltaReceiver,
+    StateDeltaTracker,
+    checkpoint_message_ids,
+    new_messages,
+)
 from .validation import validate_supervisor_envelope
 
 # Configure mock mode early if enabled
@@ -58,20 +70,34 @@ configure_logging()
 IDENTITY_ENV_VAR = "QUADRACODE_ID"
 AUTONOMOUS_DEFAULT_MAX_ITERATIONS = 1000
 AUTONOMOUS_DEFAULT_MAX_HOURS = 48.0
+# "delta" sends only changed state keys and this turn's messages; "full" keeps
+# the legacy behaviour of attaching the whole snapshot and message history.
+ENVELOPE_STATE_MODE = os.environ.get("QUADRACODE_ENVELOPE_STATE_MODE", "delta").strip().lower()
+# Payload keys describing the inbound envelope that are not echoed in replies.
+_INBOUND_ONLY_KEYS = frozenset(
+    {"reply_to", "messages", "state", "state_version", "state_base_version", "state_removed"}
+)
+# State keys an incoming envelope may seed the graph input with.
+ENVELOPE_STATE_KEYS = (
+    "autonomous_mode",
+    "task_goal",
+    "current_phase",
+    "iteration_count",
+    "milestones",
+    "error_history",
+    "autonomous_started_at",
+    "last_iteration_at",
+    "iteration_limit_triggered",
+    "runtime_limit_triggered",
+    "autonomous_settings",
+    "workspace",
+)
 AUTONOMOUS_STREAM_KEY = os.environ.get("QUADRACODE_AUTONOMOUS_STREAM_KEY", "qc:autonomous:events")
 AUTONOMOUS_METRICS_REDIS_URL = os.environ.get("QUADRACODE_METRICS_REDIS_URL", "redis://redis:6379/0")
 _AUTONOMOUS_METRICS_CLIENT = None
 _AUTONOMOUS_METRICS_DISABLED = False
 _AUTONOMOUS_METRICS_LOCK = Lock()
 
-_WORKSPACE_ENV_KEYS = (
-    "QUADRACODE_ACTIVE_WORKSPACE_DESCRIPTOR",
-    "QUADRACODE_ACTIVE_WORKSPACE_ID",
-    "QUADRACODE_ACTIVE_WORKSPACE_VOLUME",
-    "QUADRACODE_ACTIVE_WORKSPACE_CONTAINER",
-    "QUADRACODE_ACTIVE_WORKSPACE_MOUNT",
-)
-
 LOGGER = logging.getLogger(__name__)
 
 
@@ -102,6 +128,18 @@ async def _await_with_timeout(
         ) from exc
 
 
+def _read_positive_int_env(var_name: str, default: int) -> int:
+    raw = os.environ.get(var_name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        LOGGER.warning("Invalid integer for %s=%s; using default %d", var_name, raw, default)
+        return default
+    return default if value <= 0 else value
+
+
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="seconds")
 
@@ -205,27 +243,6 @@ def _publish_autonomous_event(
         _AUTONOMOUS_METRICS_DISABLED = True
 
 
-def _set_workspace_environment(descriptor: dict[str, Any] | None) -> None:
-    if descriptor:
-        os.environ["QUADRACODE_ACTIVE_WORKSPACE_DESCRIPTOR"] = json.dumps(
-            descriptor, separators=(",", ":")
-        )
-        mapping = {
-            "QUADRACODE_ACTIVE_WORKSPACE_ID": descriptor.get("workspace_id"),
-            "QUADRACODE_ACTIVE_WORKSPACE_VOLUME": descriptor.get("volume"),
-            "QUADRACODE_ACTIVE_WORKSPACE_CONTAINER": descriptor.get("container"),
-            "QUADRACODE_ACTIVE_WORKSPACE_MOUNT": descriptor.get("mount_path"),
-        }
-        for key, value in mapping.items():
-            if value is not None and str(value).strip():
-                os.environ[key] = str(value)
-            else:
-                os.environ.pop(key, None)
-    else:
-        for key in _WORKSPACE_ENV_KEYS:
-            os.environ.pop(key, None)
-
-
 def _append_error_history(result: dict[str, object], entry: dict[str, object]) -> None:
     errors = result.get("error_history")
     if isinstance(errors, list):
@@ -377,8 +394,11 @@ class RuntimeRunner:
         _batch_size: The maximum number of messages to process in each poll.
         _identity: The unique identity of this runtime instance.
         _graph: The compiled LangGraph instance.
-        _messaging: The `RedisMCPMessaging` client.
+        _messaging: The messaging transport (`RedisStreamMessaging` or 
+                    `RedisMCPMessaging`).
         _registry: The `AgentRegistryIntegration` instance.
+        _scheduler: The `ThreadScheduler` that runs envelopes of different 
+                    threads concurrently while keeping per-thread order.
     """
     def __init__(
         self,
@@ -414,13 +434,20 @@ class RuntimeRunner:
         self._identity = os.environ.get(IDENTITY_ENV_VAR, profile.default_identity)
         self._graph = None  # Built in start() after async checkpointer init
         self._checkpointer = None  # Set in start()
-        self._messaging: RedisMCPMessaging | None = None
+        self._messaging: RedisStreamMessaging | RedisMCPMessaging | None = None
         self._messaging_start_timeout = _read_timeout_env(
             "QUADRACODE_MESSAGING_START_TIMEOUT", 60.0
         )
         self._registry = AgentRegistryIntegration.from_environment(
             profile.name, self._identity
         )
+        self._scheduler = ThreadScheduler(
+            max_concurrency=_read_positive_int_env("QUADRACODE_MAX_CONCURRENT_THREADS", 4),
+            max_in_flight=_read_positive_int_env("QUADRACODE_MAX_IN_FLIGHT_ENVELOPES", 0) or None,
+        )
+        self._in_flight_entries: set[str] = set()
+        self._state_tracker = StateDeltaTracker()
+        self._state_receiver = StateDeltaReceiver()
         if profile.name == "agent":
             if self._registry:
                 LOGGER.info(
@@ -433,11 +460,14 @@ class RuntimeRunner:
                     self._identity,
                 )
         LOGGER.info(
-            "Runtime initialized profile=%s identity=%s registry=%s timeout=%.1fs",
+            "Runtime initialized profile=%s identity=%s registry=%s timeout=%.1fs "
+            "concurrency=%d in_flight=%d",
             profile.name,
             self._identity,
             "enabled" if self._registry else "disabled",
             self._messaging_start_timeout,
+            self._scheduler.max_concurrency,
+            self._scheduler.max_in_flight,
         )
 
     async def start(self) -> None:
@@ -461,11 +491,15 @@ class RuntimeRunner:
         LOGGER.info("LangGraph compiled with checkpointer")
 
         messaging = await _await_with_timeout(
-            RedisMCPMessaging.create(),
+            create_messaging(),
             "Redis messaging initialization",
             self._messaging_start_timeout,
         )
-        LOGGER.info("Redis messaging client ready (identity=%s)", self._identity)
+        LOGGER.info(
+            "Redis messaging client ready (identity=%s transport=%s)",
+            self._identity,
+            type(messaging).__name__,
+        )
         self._messaging = messaging
         try:
             if self._registry:
@@ -475,29 +509,62 @@ class RuntimeRunner:
                 entries = await messaging.read(
                     self._identity, batch_size=self._batch_size
                 )
+                # Non-group transports keep returning entries until they are
+                # acknowledged, so skip the ones already queued or running.
+                entries = [
+                    (entry_id, envelope)
+                    for entry_id, envelope in entries
+                    if entry_id not in self._in_flight_entries
+                ]
                 if not entries:
-                    LOGGER.debug("Mailbox empty, sleeping for %s s", self._poll_interval)
-                    await asyncio.sleep(self._poll_interval)
+                    # Blocking transports already waited inside ``read``.
+                    if not messaging.blocking_reads:
+                        LOGGER.debug("Mailbox empty, sleeping for %s s", self._poll_interval)
+                        await asyncio.sleep(self._poll_interval)
                     continue
                 LOGGER.debug("Found %d new message(s)", len(entries))
                 for entry_id, envelope in entries:
-                    await self._handle_entry(messaging, entry_id, envelope)
+                    await self._schedule_entry(messaging, entry_id, envelope)
         finally:
+            await self._scheduler.shutdown()
             if self._registry:
                 await self._registry.shutdown()
+            if isinstance(messaging, RedisStreamMessaging):
+                await messaging.close()
+
+    async def _schedule_entry(
+        self,
+        messaging: RedisStreamMessaging | RedisMCPMessaging,
+        entry_id: str,
+        envelope: MessageEnvelope,
+    ) -> None:
+        """
+        Queues an entry on its thread's shard, waiting if the in-flight limit 
+        has been reached.
+        """
+        thread_id = self._resolve_thread_id(envelope.payload, envelope)
+        self._in_flight_entries.add(entry_id)
+
+        async def _job() -> None:
+            try:
+                await self._handle_entry(messaging, entry_id, envelope)
+            finally:
+                self._in_flight_entries.discard(entry_id)
+
+        await self._scheduler.submit(thread_id, _job)
 
     async def _handle_entry(
         self,
-        messaging: RedisMCPMessaging,
+        messaging: RedisStreamMessaging | RedisMCPMessaging,
         entry_id: str,
         envelope: MessageEnvelope,
     ) -> None:
         """Handles a single message from the message bus."""
         valid, feedback = validate_supervisor_envelope(envelope)
         if not valid:
-            if feedback:
-                await messaging.publish(feedback.recipient, feedback)
-            await messaging.delete(self._identity, entry_id)
+            await messaging.publish_and_ack(
+                self._identity, entry_id, [feedback] if feedback else []
+            )
             return
 
         try:
@@ -510,14 +577,10 @@ class RuntimeRunner:
                 exc,
                 exc_info=exc,
             )
-            await messaging.delete(self._identity, entry_id)
+            await messaging.ack(self._identity, entry_id)
             return
 
-        if outgoing:
-            for response in outgoing:
-                await messaging.publish(response.recipient, response)
-
-        await messaging.delete(self._identity, entry_id)
+        await messaging.publish_and_ack(self._identity, entry_id, list(outgoing or []))
 
     async def shutdown(self) -> None:
         """
@@ -526,17 +589,8 @@ class RuntimeRunner:
         if self._registry:
             await self._registry.shutdown()
 
-    async def _process_envelope(
-        self, envelope: MessageEnvelope
-    ) -> Sequence[MessageEnvelope]:
-        """
-        Processes a single `MessageEnvelope` through the LangGraph.
-
-        This is the core logic of the runtime. It prepares the input state for 
-        the graph, invokes the graph, and then processes the result to generate 
-        a set of outgoing message envelopes.
-        """
-        payload = deepcopy(envelope.payload)
+    def _resolve_thread_id(self, payload: dict, envelope: MessageEnvelope) -> str:
+        """Returns the conversation thread id an envelope belongs to."""
         raw_thread_id = (
             payload.get("chat_id")
             or payload.get("thread_id")
@@ -547,7 +601,24 @@ class RuntimeRunner:
         )
         if raw_thread_id is None or str(raw_thread_id).strip() == "":
             raw_thread_id = self._identity
-        thread_id = str(raw_thread_id)
+        return str(raw_thread_id)
+
+    async def _process_envelope(
+        self, envelope: MessageEnvelope
+    ) -> Sequence[MessageEnvelope]:
+        """
+        Processes a single `MessageEnvelope` through the LangGraph.
+
+        This is the core logic of the runtime. It prepares the input state for 
+        the graph, invokes the graph, and then processes the result to generate 
+        a set of outgoing message envelopes.
+        """
+        # Only top-level keys of ``payload`` are reassigned below; nested state
+        # values are deep-copied as they enter the graph input, which mutates
+        # them in place, so ``envelope.payload`` and the receiver's rebuilt
+        # state are never shared with the graph.
+        payload = dict(envelope.payload)
+        thread_id = self._resolve_thread_id(payload, envelope)
         configurable: dict[str, object] = {"thread_id": thread_id}
         is_orchestrator = self._profile.default_identity == ORCHESTRATOR_RECIPIENT
         autonomous_active = is_orchestrator and is_autonomous_mode_enabled()
@@ -556,8 +627,24 @@ class RuntimeRunner:
 
         config = {"configurable": configurable, "recursion_limit": GRAPH_RECURSION_LIMIT}
 
-        has_checkpoint = (await self._checkpointer.aget_tuple(config)) is not None
+        checkpoint_tuple = await self._checkpointer.aget_tuple(config)
+        has_checkpoint = checkpoint_tuple is not None
+        prior_message_ids = checkpoint_message_ids(checkpoint_tuple)
         LOGGER.info("Processing envelope: has_checkpoint=%s, include_history=%s", has_checkpoint, not has_checkpoint)
+        if "state_version" in payload:
+            payload["state"] = await self._state_receiver.receive(
+                thread_id,
+                envelope.sender,
+                payload,
+                self._checkpointer,
+                keys=ENVELOPE_STATE_KEYS,
+            )
+            if not has_checkpoint and payload.get("state_base_version") is not None:
+                LOGGER.warning(
+                    "Delta envelope for thread %s without a local checkpoint; "
+                    "history is limited to the messages it carries",
+                    thread_id,
+                )
         LOGGER.debug("Payload keys: %s", list(payload.keys()))
         LOGGER.debug("Payload.messages type: %s, len: %d", type(payload.get("messages")), len(payload.get("messages", [])))
         messages = _extract_messages(
@@ -571,29 +658,16 @@ class RuntimeRunner:
 
         state_payload = payload.get("state")
         if isinstance(state_payload, dict):
-            for key in (
-                "autonomous_mode",
-                "task_goal",
-                "current_phase",
-                "iteration_count",
-                "milestones",
-                "error_history",
-                "autonomous_started_at",
-                "last_iteration_at",
-                "iteration_limit_triggered",
-                "runtime_limit_triggered",
-                "autonomous_settings",
-                "workspace",
-            ):
+            for key in ENVELOPE_STATE_KEYS:
                 value = state_payload.get(key)
                 if value is None:
                     continue
                 if key in {"milestones", "error_history"} and not isinstance(value, list):
                     continue
-                if key == "workspace":
-                    if isinstance(value, dict):
-                        state["workspace"] = deepcopy(value)
+                if key == "workspace" and not isinstance(value, dict):
                     continue
+                if isinstance(value, (dict, list)):
+                    value = deepcopy(value)
                 state[key] = value  # type: ignore[assignment]
 
         workspace_payload = payload.get("workspace")
@@ -602,20 +676,20 @@ class RuntimeRunner:
 
         settings_payload = payload.get("autonomous_settings")
         if isinstance(settings_payload, dict):
-            state["autonomous_settings"] = settings_payload
+            state["autonomous_settings"] = deepcopy(settings_payload)
 
         control_payload = payload.get("autonomous_control")
         if isinstance(control_payload, dict) and control_payload.get("action") == "emergency_stop":
             return self._handle_emergency_stop(envelope, payload, state, thread_id)
 
         if is_orchestrator:
-            self._ensure_workspace_for_thread(thread_id, state, payload)
+            await self._ensure_workspace_for_thread(thread_id, state, payload)
 
         workspace_descriptor = state.get("workspace")
-        if isinstance(workspace_descriptor, dict):
-            _set_workspace_environment(workspace_descriptor)
-        else:
-            _set_workspace_environment(None)
+        if not isinstance(workspace_descriptor, dict):
+            workspace_descriptor = None
+        if workspace_descriptor is not None:
+            configurable[WORKSPACE_CONFIG_KEY] = deepcopy(workspace_descriptor)
 
         if autonomous_active:
             state["autonomous_mode"] = True
@@ -640,12 +714,17 @@ class RuntimeRunner:
         elif "autonomous_mode" not in state:
             state["autonomous_mode"] = False
 
-        result = await self._graph.ainvoke(state, config)
+        # Bound per invocation (not in os.environ) so concurrently processed
+        # threads each resolve their own workspace inside tools.
+        workspace_token = bind_active_workspace(workspace_descriptor)
+        try:
+            result = await self._graph.ainvoke(state, config)
+        finally:
+            reset_active_workspace(workspace_token)
         result.pop("_last_envelope_sender", None)
         output_messages = result.get("messages", [])
-        output_serialized = messages_to_dict(output_messages)
         if "workspace" not in result and isinstance(state.get("workspace"), dict):
-            result["workspace"] = deepcopy(state["workspace"])  # type: ignore[index]
+            result["workspace"] = state["workspace"]  # type: ignore[index]
 
         if autonomous_active:
             prior_raw = state.get("iteration_count", 0)
@@ -667,9 +746,9 @@ class RuntimeRunner:
             result["iteration_count"] = new_iteration
             result["autonomous_mode"] = True
             if "milestones" not in result and state.get("milestones") is not None:
-                result["milestones"] = deepcopy(state.get("milestones", []))
+                result["milestones"] = state.get("milestones", [])
             if "error_history" not in result and state.get("error_history") is not None:
-                result["error_history"] = deepcopy(state.get("error_history", []))
+                result["error_history"] = list(state.get("error_history", []))
             if "task_goal" not in result and state.get("task_goal") is not None:
                 result["task_goal"] = state.get("task_goal")
             if "current_phase" not in result and state.get("current_phase") is not None:
@@ -683,7 +762,7 @@ class RuntimeRunner:
             if "runtime_limit_triggered" not in result:
                 result["runtime_limit_triggered"] = state.get("runtime_limit_triggered", False)
             if "autonomous_settings" not in result and state.get("autonomous_settings") is not None:
-                result["autonomous_settings"] = deepcopy(state.get("autonomous_settings", {}))
+                result["autonomous_settings"] = state.get("autonomous_settings", {})
             result["thread_id"] = thread_id
             _apply_autonomous_limits(state, result)
         else:
@@ -692,7 +771,7 @@ class RuntimeRunner:
         response_payload = {
             key: value
             for key, value in payload.items()
-            if key not in {"reply_to", "messages", "state"}
+            if key not in _INBOUND_ONLY_KEYS
         }
         autonomous_snapshot: dict[str, object] = {}
         for key in (
@@ -718,7 +797,7 @@ class RuntimeRunner:
                 continue
             if key == "workspace":
                 if isinstance(value, dict):
-                    autonomous_snapshot[key] = deepcopy(value)
+                    autonomous_snapshot[key] = value
                 continue
             if key == "exhaustion_mode":
                 if isinstance(value, ExhaustionMode):
@@ -736,19 +815,16 @@ class RuntimeRunner:
                 continue
             if key == "exhaustion_recovery_log":
                 if isinstance(value, list):
-                    autonomous_snapshot[key] = deepcopy(value[-20:])
+                    autonomous_snapshot[key] = value[-20:]
                 continue
-            autonomous_snapshot[key] = deepcopy(value)
-        if autonomous_snapshot:
-            response_payload["state"] = autonomous_snapshot
+            autonomous_snapshot[key] = value
 
         routing_payload = result.pop("autonomous_routing", None)
         if routing_payload:
-            response_payload["autonomous"] = deepcopy(routing_payload)
-        response_payload["messages"] = output_serialized
+            response_payload["autonomous"] = routing_payload
         workspace_descriptor = result.get("workspace")
         if isinstance(workspace_descriptor, dict):
-            response_payload["workspace"] = deepcopy(workspace_descriptor)
+            response_payload["workspace"] = workspace_descriptor
         else:
             response_payload.pop("workspace", None)
         response_payload.setdefault("chat_id", thread_id)
@@ -767,13 +843,13 @@ class RuntimeRunner:
         except (TypeError, ValueError):
             response_payload["exhaustion_probability"] = 0.0
         recovery_log = result.get("exhaustion_recovery_log")
-        if isinstance(recovery_log, list):
-            response_payload["exhaustion_recovery_log"] = deepcopy(recovery_log[-20:])
+        if ENVELOPE_STATE_MODE == "full" and isinstance(recovery_log, list):
+            response_payload["exhaustion_recovery_log"] = recovery_log[-20:]
 
         response_body = _last_message_content(output_messages)
-        routing_context = deepcopy(payload)
+        routing_context = dict(payload)
         if routing_payload:
-            routing_context["autonomous"] = deepcopy(routing_payload)
+            routing_context["autonomous"] = routing_payload
         recipients = self._profile.resolve_recipients(envelope, routing_context)
 
         responses = [
@@ -781,13 +857,53 @@ class RuntimeRunner:
                 sender=self._identity,
                 recipient=recipient,
                 message=response_body,
-                payload=response_payload,
+                payload=self._recipient_payload(
+                    response_payload,
+                    thread_id,
+                    recipient,
+                    autonomous_snapshot,
+                    output_messages,
+                    prior_message_ids,
+                ),
             )
             for recipient in recipients
         ]
         return responses
 
-    def _ensure_workspace_for_thread(
+    def _recipient_payload(
+        self,
+        response_payload: dict[str, Any],
+        thread_id: str,
+        recipient: str,
+        snapshot: dict[str, Any],
+        history: Sequence[BaseMessage] = (),
+        prior_message_ids: set[str] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Returns the payload for one recipient: ``response_payload`` plus the 
+        thread's state and messages.
+
+        In delta mode the state is a versioned delta against the snapshot last 
+        published to *this* recipient, and only the messages added during this 
+        turn are sent. A recipient without a baseline gets the complete 
+        snapshot and the full history instead, so a receiver without a 
+        checkpoint of the thread can rebuild both. The legacy ``full`` mode 
+        always sends everything.
+        """
+        payload = dict(response_payload)
+        if ENVELOPE_STATE_MODE == "full":
+            if snapshot:
+                payload["state"] = snapshot
+            payload["messages"] = messages_to_dict(list(history))
+            return payload
+        delta = self._state_tracker.delta(thread_id, snapshot, recipient=recipient)
+        delta.apply_to(payload)
+        if delta.base_version is not None:
+            history = new_messages(history, prior_message_ids or set())
+        payload["messages"] = messages_to_dict(list(history))
+        return payload
+
+    async def _ensure_workspace_for_thread(
         self,
         thread_id: str,
         state: RuntimeState,
@@ -795,7 +911,7 @@ class RuntimeRunner:
     ) -> None:
         """
         Ensures that a workspace is provisioned for the current thread, creating 
-        one if necessary.
+        one if necessary. The Docker calls run off the event loop.
         """
         existing = state.get("workspace")
         overrides = payload.get("workspace_config")
@@ -816,7 +932,9 @@ class RuntimeRunner:
             if network is None and isinstance(existing_network, str) and existing_network.strip():
                 network = existing_network.strip()
 
-        success, descriptor_model, error = ensure_workspace(thread_id, image=image, network=network)
+        success, descriptor_model, error = await aensure_workspace(
+            thread_id, image=image, network=network
+        )
         if not success or descriptor_model is None:
             LOGGER.error("[workspace] unable to provision workspace for %s: %s", thread_id, error)
             return
@@ -884,24 +1002,22 @@ class RuntimeRunner:
         }
         workspace_state = state.get("workspace")
         if isinstance(workspace_state, dict):
-            snapshot["workspace"] = deepcopy(workspace_state)
+            snapshot["workspace"] = workspace_state
 
         response_payload = {
             key: value
             for key, value in payload.items()
-            if key not in {"reply_to", "messages", "state"}
+            if key not in _INBOUND_ONLY_KEYS
         }
-        response_payload["messages"] = []
         response_payload.setdefault("chat_id", thread_id)
         response_payload["thread_id"] = thread_id
-        response_payload["state"] = deepcopy(snapshot)
         if isinstance(workspace_state, dict):
-            response_payload["workspace"] = deepcopy(workspace_state)
+            response_payload["workspace"] = workspace_state
         response_payload["autonomous"] = directive.to_payload()
 
         response_body = "Emergency stop acknowledged. Autonomous run halted."
 
-        routing_context = deepcopy(payload)
+        routing_context = dict(payload)
         routing_context["autonomous"] = directive.to_payload()
         recipients = self._profile.resolve_recipients(envelope, routing_context)
 
@@ -910,7 +1026,7 @@ class RuntimeRunner:
                 sender=self._identity,
                 recipient=recipient,
                 message=response_body,
-                payload=response_payload,
+                payload=self._recipient_payload(response_payload, thread_id, recipient, snapshot),
             )
             for recipient in recipients
         ]
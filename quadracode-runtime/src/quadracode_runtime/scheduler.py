@@ -0,0 +1,122 @@
+"""
+This module provides the `ThreadScheduler`, which lets a `RuntimeRunner` work on
+envelopes for several conversation threads at once.
+
+Envelopes are sharded by thread id. Each thread owns a FIFO queue drained by a
+single worker task, so messages within one thread are always handled in arrival
+order, while different threads run concurrently up to ``max_concurrency``. The
+total number of accepted-but-unfinished jobs is capped by ``max_in_flight``; once
+the cap is reached `submit` waits, which in turn stops the runner from pulling
+more entries off the mailbox (backpressure).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from contextlib import suppress
+from typing import Awaitable, Callable, Deque, Dict
+
+LOGGER = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+
+class ThreadScheduler:
+    """
+    Runs jobs concurrently across threads while preserving per-thread order.
+
+    Attributes:
+        max_concurrency: Maximum number of threads executing a job at once.
+        max_in_flight: Maximum number of queued or running jobs before
+                       `submit` blocks.
+    """
+
+    def __init__(self, max_concurrency: int = 1, max_in_flight: int | None = None) -> None:
+        """
+        Initializes the `ThreadScheduler`.
+
+        Args:
+            max_concurrency: Maximum number of threads processed concurrently.
+            max_in_flight: Maximum number of accepted jobs that have not yet
+                           finished. Defaults to four times ``max_concurrency``.
+        """
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_in_flight = max(
+            self.max_concurrency,
+            int(max_in_flight) if max_in_flight else self.max_concurrency * 4,
+        )
+        self._running = asyncio.Semaphore(self.max_concurrency)
+        self._capacity = asyncio.Semaphore(self.max_in_flight)
+        self._queues: Dict[str, Deque[Job]] = {}
+        self._workers: Dict[str, asyncio.Task[None]] = {}
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """The number of jobs accepted but not yet finished."""
+        return self._in_flight
+
+    @property
+    def active_threads(self) -> int:
+        """The number of threads with queued or running jobs."""
+        return len(self._workers)
+
+    async def submit(self, key: str, job: Job) -> None:
+        """
+        Queues a job for a thread, waiting while the in-flight limit is reached.
+
+        Args:
+            key: The thread id the job belongs to.
+            job: A zero-argument coroutine function to execute.
+        """
+        await self._capacity.acquire()
+        self._in_flight += 1
+        self._queues.setdefault(key, deque()).append(job)
+        if key not in self._workers:
+            self._workers[key] = asyncio.create_task(
+                self._drain(key), name=f"thread-worker:{key}"
+            )
+
+    async def _drain(self, key: str) -> None:
+        queue = self._queues[key]
+        try:
+            while queue:
+                job = queue.popleft()
+                try:
+                    async with self._running:
+                        await job()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:  # noqa: BLE001
+                    LOGGER.exception("Unhandled error while processing thread %s", key)
+                finally:
+                    self._in_flight -= 1
+                    self._capacity.release()
+        finally:
+            # No await between the empty-queue check and this cleanup, so a
+            # concurrent ``submit`` either saw this worker alive and queued
+            # before the check, or will start a fresh worker afterwards.
+            self._workers.pop(key, None)
+            if not queue:
+                self._queues.pop(key, None)
+
+    async def join(self) -> None:
+        """Waits until every queued job has finished."""
+        while self._workers:
+            await asyncio.gather(*list(self._workers.values()), return_exceptions=True)
+
+    async def shutdown(self) -> None:
+        """Cancels all workers and drops any queued jobs."""
+        workers = list(self._workers.values())
+        for task in workers:
+            task.cancel()
+        for task in workers:
+            with suppress(asyncio.CancelledError):
+                await task
+        for queue in self._queues.values():
+            for _ in queue:
+                self._in_flight -= 1
+                self._capacity.release()
+        self._queues.clear()
+        self._workers.clear()
@@ -0,0 +1,152 @@
+"""
+This module provides the `StaticSegmentCache`, a process-wide memo of the
+progressive loader's filesystem-derived segments (project overview, file
+structure, documentation previews, runtime classes, test inventory).
+
+Those segments only change when the files behind them change, yet building one
+means reading ``pyproject.toml``, walking directories or parsing modules. A
+builder therefore records every path it consulted; the cache stores the
+rendered content and token count together with a fingerprint of those paths
+(``mtime_ns`` and size, or absence). A later lookup re-``stat``s the recorded
+paths and serves the memoized segment when the fingerprint still matches, so an
+unchanged tree costs a handful of ``stat`` calls instead of a rebuild. Adding
+or removing a file changes its directory's mtime, so directory listings are
+invalidated by recording the directories themselves.
+"""
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+PathStamp = Optional[Tuple[int, int]]
+"""``(mtime_ns, size)`` of a path, or ``None`` when it does not exist."""
+
+SegmentBuilder = Callable[[Set[Path]], str]
+"""Renders a segment's content, adding every path it consulted to the given set."""
+
+
+def _stamp(path: Path) -> PathStamp:
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return info.st_mtime_ns, info.st_size
+
+
+def fingerprint_paths(paths: Tuple[Path, ...]) -> Tuple[PathStamp, ...]:
+    """Stamps of ``paths`` in order; any difference means the inputs changed."""
+    return tuple(_stamp(path) for path in paths)
+
+
+@dataclass(frozen=True)
+class CachedSegment:
+    """Memoized content of one static segment and the inputs it was built from."""
+
+    content: str
+    tokens: int
+    inputs: Tuple[Path, ...]
+    fingerprint: Tuple[PathStamp, ...]
+
+
+@dataclass
+class SegmentCacheStats:
+    """Running counters of a `StaticSegmentCache`."""
+
+    hits: int = 0
+    misses: int = 0
+    build_seconds: float = 0.0
+    validate_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "build_seconds": round(self.build_seconds, 6),
+            "avg_build_ms": round(1000 * self.build_seconds / self.misses, 3) if self.misses else 0.0,
+            "avg_validate_us": round(1e6 * self.validate_seconds / self.hits, 1) if self.hits else 0.0,
+        }
+
+
+class StaticSegmentCache:
+    """Fingerprint-validated segment contents, shared by every loader of the process."""
+
+    def __init__(self) -> None:
+        self._entries: Dict[Hashable, CachedSegment] = {}
+        self._lock = Lock()
+        self.stats = SegmentCacheStats()
+
+    def get_or_build(
+        self,
+        key: Hashable,
+        builder: SegmentBuilder,
+        count_tokens: Callable[[str], int],
+    ) -> Tuple[CachedSegment, bool]:
+        """Returns the segment for ``key`` and whether it was served from the cache.
+
+        The builder runs outside the lock; when two threads miss at once both
+        build and the last one to finish is kept, which is harmless because
+        they render the same inputs.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            started = time.perf_counter()
+            current = fingerprint_paths(entry.inputs)
+            elapsed = time.perf_counter() - started
+            if current == entry.fingerprint:
+                with self._lock:
+                    self.stats.hits += 1
+                    self.stats.validate_seconds += elapsed
+                return entry, True
+
+        started = time.perf_counter()
+        inputs: Set[Path] = set()
+        content = builder(inputs)
+        ordered = tuple(sorted(inputs))
+        entry = CachedSegment(
+            content=content,
+            tokens=count_tokens(content),
+            inputs=ordered,
+            fingerprint=fingerprint_paths(ordered),
+        )
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._entries[key] = entry
+            self.stats.misses += 1
+            self.stats.build_seconds += elapsed
+        return entry, False
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Forgets ``key``, or every entry when no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_CACHE = StaticSegmentCache()
+
+
+def get_static_segment_cache() -> StaticSegmentCache:
+    """Returns the process-wide `StaticSegmentCache`."""
+    return _CACHE
+
+
+__all__ = [
+    "CachedSegment",
+    "PathStamp",
+    "SegmentCacheStats",
+    "StaticSegmentCache",
+    "fingerprint_paths",
+    "get_static_segment_cache",
+]
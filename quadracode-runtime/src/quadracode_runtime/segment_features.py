@@ -0,0 +1,276 @@
+"""
+This module provides `SegmentFeatureTable`, a columnar view of the numeric
+features of context segments, and the NumPy-vectorized scoring functions the
+`ContextCurator` and `ContextScorer` compute from it.
+
+Segments live in the state as dictionaries, which is what the checkpointer
+persists, so the table is derived from ``context_segments`` rather than stored
+next to it. Building it is one pass that copies each segment's priority, token
+count, timestamp, type and decay rate into arrays. ISO timestamps are parsed
+through a process-wide memo, so a segment's timestamp is parsed once no matter
+how many stages, turns or threads score it. Every score is then a handful of
+array operations, and curation cost grows with the number of segments only
+through that copy.
+
+Running the module benchmarks the vectorized scores against the per-segment
+loops they replaced::
+
+    python -m quadracode_runtime.segment_features 1000 10000
+"""
+
+from __future__ import annotations
+
+import math
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .state import ContextSegment
+
+# Stand-in for an unparseable timestamp; missing timestamps are NaN.
+_INVALID_TIMESTAMP = -math.inf
+_DAY_SECONDS = 86_400.0
+_COHERENCE_HORIZON_SECONDS = 4 * 3600.0
+_FRESHNESS_HORIZON_SECONDS = 12 * 3600.0
+
+
+@lru_cache(maxsize=65_536)
+def parse_timestamp(value: str) -> float:
+    """POSIX seconds of an ISO-8601 timestamp (naive means UTC), or ``-inf`` if invalid."""
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return _INVALID_TIMESTAMP
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+@dataclass
+class SegmentFeatureTable:
+    """
+    Numeric features of a list of segments, one array per feature.
+
+    Attributes:
+        priority: Segment priority, NaN where the segment has none.
+        token_count: Declared token count (0 when missing).
+        timestamp: POSIX seconds; NaN when missing, ``-inf`` when unparseable.
+        type_id: Index into `type_names` of the segment's base type (before ``:``).
+        decay: Declared decay rate (0 when missing).
+        type_names: Distinct base types, in order of first appearance.
+    """
+
+    priority: np.ndarray
+    token_count: np.ndarray
+    timestamp: np.ndarray
+    type_id: np.ndarray
+    decay: np.ndarray
+    type_names: List[str]
+
+    @classmethod
+    def from_segments(cls, segments: Sequence[Mapping[str, object]]) -> "SegmentFeatureTable":
+        count = len(segments)
+        priority = np.empty(count, dtype=np.float64)
+        token_count = np.empty(count, dtype=np.float64)
+        timestamp = np.empty(count, dtype=np.float64)
+        type_id = np.empty(count, dtype=np.int32)
+        decay = np.empty(count, dtype=np.float64)
+        type_ids: Dict[str, int] = {}
+        for row, segment in enumerate(segments):
+            value = segment.get("priority")
+            priority[row] = math.nan if value is None else value
+            token_count[row] = segment.get("token_count") or 0
+            stamp = segment.get("timestamp")
+            timestamp[row] = parse_timestamp(stamp) if isinstance(stamp, str) and stamp else math.nan
+            base_type = str(segment.get("type") or "").split(":", 1)[0]
+            type_id[row] = type_ids.setdefault(base_type, len(type_ids))
+            decay[row] = segment.get("decay_rate") or 0.0
+        return cls(priority, token_count, timestamp, type_id, decay, list(type_ids))
+
+    def __len__(self) -> int:
+        return len(self.priority)
+
+    def priority_or(self, default: float) -> np.ndarray:
+        return np.where(np.isnan(self.priority), default, self.priority)
+
+
+def _now_seconds(now: Optional[datetime]) -> float:
+    return (now or datetime.now(timezone.utc)).timestamp()
+
+
+def curation_scores(table: SegmentFeatureTable, now: Optional[datetime] = None) -> np.ndarray:
+    """Priority, recency and length blend used by the curator, clipped to ``[0, 1]``.
+
+    Recency decays linearly over a day (floor 0.1); segments without a
+    timestamp count as fresh and unparseable ones as 0.5.
+    """
+    age = _now_seconds(now) - table.timestamp
+    with np.errstate(invalid="ignore"):
+        recency = np.maximum(0.1, 1.0 - age / _DAY_SECONDS)
+    recency = np.where(np.isnan(table.timestamp), 1.0, recency)
+    recency = np.where(np.isneginf(table.timestamp), 0.5, recency)
+    efficiency = 1.0 / (1.0 + np.maximum(table.token_count, 1.0) / 256.0)
+    scores = (table.priority_or(5.0) / 10.0) * 0.5 + recency * 0.3 + efficiency * 0.2
+    return np.clip(scores, 0.0, 1.0)
+
+
+def relevance_weights(table: SegmentFeatureTable, priorities: Mapping[str, int]) -> np.ndarray:
+    """Per-segment relevance weight: the larger of its priority and its type's, capped at 10."""
+    type_priority = np.array(
+        [priorities.get(name, math.nan) for name in table.type_names] or [math.nan],
+        dtype=np.float64,
+    )[table.type_id]
+    hint = np.where(np.isnan(type_priority), table.priority_or(5.0), type_priority)
+    own = np.where(np.isnan(table.priority), hint, table.priority)
+    return np.minimum(np.maximum(own, hint), 10.0)
+
+
+def coherence_score(table: SegmentFeatureTable) -> float:
+    """Mean agreement of consecutive segments in priority and time (1.0 below two segments)."""
+    if len(table) < 2:
+        return 1.0
+    priority = table.priority_or(5.0)
+    priority_gap = np.abs(np.diff(priority)) / 10.0
+    valid = np.isfinite(table.timestamp)
+    time_gap = np.minimum(1.0, np.abs(np.diff(np.where(valid, table.timestamp, 0.0))) / _COHERENCE_HORIZON_SECONDS)
+    time_gap = np.where(valid[:-1] & valid[1:], time_gap, 0.5)
+    penalty = np.minimum(1.0, (priority_gap + time_gap) / 2.0)
+    return float(np.mean(np.maximum(0.0, 1.0 - penalty)))
+
+
+def freshness_score(table: SegmentFeatureTable, now: Optional[datetime] = None) -> float:
+    """Mean linear freshness over 12 hours; segments without a valid timestamp count 0.5."""
+    if not len(table):
+        return 1.0
+    valid = np.isfinite(table.timestamp)
+    age = _now_seconds(now) - np.where(valid, table.timestamp, 0.0)
+    freshness = np.where(age <= 0.0, 1.0, np.maximum(0.0, 1.0 - age / _FRESHNESS_HORIZON_SECONDS))
+    return float(np.mean(np.where(valid, freshness, 0.5)))
+
+
+def diversity_score(table: SegmentFeatureTable) -> float:
+    """Distinct base types per segment, capped at 1.0."""
+    if not len(table):
+        return 1.0
+    return min(1.0, len(table.type_names) / len(table))
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+
+def _loop_curation_scores(segments: Iterable[ContextSegment], now: datetime) -> List[float]:
+    """The per-segment loop `curation_scores` replaced, kept for comparison."""
+    scores: List[float] = []
+    for segment in segments:
+        priority = segment.get("priority", 5)
+        token_count = max(segment.get("token_count", 1), 1)
+        recency = 1.0
+        timestamp = segment.get("timestamp")
+        if timestamp:
+            try:
+                delta = now - datetime.fromisoformat(timestamp)
+                recency = max(0.1, 1.0 - delta.total_seconds() / 86_400)
+            except ValueError:
+                recency = 0.5
+        efficiency = 1 / (1 + token_count / 256)
+        score = (priority / 10) * 0.5 + recency * 0.3 + efficiency * 0.2
+        scores.append(min(max(score, 0.0), 1.0))
+    return scores
+
+
+def synthetic_segments(count: int, *, now: Optional[datetime] = None) -> List[ContextSegment]:
+    """Segments spread over two days with varied types, priorities and sizes."""
+    now = now or datetime.now(timezone.utc)
+    types = ["conversation", "tool_output", "code_search_results", "skill:debugging", "error_context"]
+    return [
+        {
+            "id": f"segment-{index}",
+            "content": "",
+            "type": types[index % len(types)],
+            "priority": index % 10 + 1,
+            "token_count": 50 + (index * 37) % 2_000,
+            "timestamp": (now - timedelta(minutes=(index * 7) % 2_880)).isoformat(),
+            "decay_rate": 0.1,
+            "compression_eligible": True,
+            "restorable_reference": None,
+        }
+        for index in range(count)
+    ]
+
+
+def run_benchmark(sizes: Sequence[int] = (1_000, 10_000), *, repeat: int = 5) -> List[Dict[str, float]]:
+    """Times curator scoring per segment count: loop vs. table build plus vectorized scores.
+
+    Timestamps are parsed once up front so that every vectorized run measures
+    the steady state, where the memo already holds them.
+    """
+    results: List[Dict[str, float]] = []
+    now = datetime.now(timezone.utc)
+    for size in sizes:
+        segments = synthetic_segments(size, now=now)
+        SegmentFeatureTable.from_segments(segments)
+
+        def _best(func) -> float:
+            best = math.inf
+            for _ in range(repeat):
+                started = time.perf_counter()
+                func()
+                best = min(best, time.perf_counter() - started)
+            return best
+
+        loop_seconds = _best(lambda: _loop_curation_scores(segments, now))
+        vector_seconds = _best(lambda: curation_scores(SegmentFeatureTable.from_segments(segments), now))
+        table = SegmentFeatureTable.from_segments(segments)
+        score_seconds = _best(
+            lambda: (
+                curation_scores(table, now),
+                coherence_score(table),
+                freshness_score(table, now),
+                diversity_score(table),
+            )
+        )
+        results.append(
+            {
+                "segments": size,
+                "loop_segments_per_s": size / loop_seconds,
+                "table_segments_per_s": size / vector_seconds,
+                "scores_only_segments_per_s": size / score_seconds,
+                "speedup": loop_seconds / vector_seconds,
+            }
+        )
+    return results
+
+
+def main(argv: Sequence[str]) -> None:
+    sizes = [int(arg) for arg in argv] or [1_000, 10_000]
+    print(f"{'segments':>10} {'loop seg/s':>14} {'table seg/s':>14} {'scores seg/s':>14} {'speedup':>8}")
+    for row in run_benchmark(sizes):
+        print(
+            f"{row['segments']:>10,} {row['loop_segments_per_s']:>14,.0f} "
+            f"{row['table_segments_per_s']:>14,.0f} {row['scores_only_segments_per_s']:>14,.0f} "
+            f"{row['speedup']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+
+__all__ = [
+    "SegmentFeatureTable",
+    "coherence_score",
+    "curation_scores",
+    "diversity_score",
+    "freshness_score",
+    "parse_timestamp",
+    "relevance_weights",
+    "run_benchmark",
+    "synthetic_segments",
+]
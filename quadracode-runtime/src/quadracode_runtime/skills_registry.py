@@ -0,0 +1,334 @@
+"""
+This module provides the `SkillsRegistry`, the progressive loader's catalog of
+skills (``<skills root>/<skill>/SKILL.md`` files with a YAML-like front matter).
+
+The registry keeps the parsed front matter of every skill and an inverted
+index from selection terms to skills: ``tags`` match exactly, while the words
+of ``triggers`` and ``keywords`` entries match individually. Selecting the
+skills relevant to a turn is then one dictionary lookup per search term rather
+than a pass over the whole catalog. Skills tagged ``auto`` are always selected.
+
+The catalog is refreshed incrementally instead of being scanned once per
+process: at most every ``skills_refresh_seconds`` the registry ``stat``s the
+skill files and re-parses only those whose ``(mtime_ns, size)`` changed, so new
+or edited skills are picked up without a restart. Skill bodies are read lazily
+when a skill is activated and kept in a small LRU keyed by that fingerprint.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SKILL_FILENAME = "SKILL.md"
+AUTO_TAG = "auto"
+
+FileStamp = Tuple[int, int]
+"""``(mtime_ns, size)`` of a skill file."""
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def parse_front_matter(lines: List[str]) -> Dict[str, Any]:
+    """Parses the ``key: value`` / ``- item`` subset of YAML used by skill files."""
+    data: Dict[str, Any] = {}
+    current_key: Optional[str] = None
+    for raw in lines:
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("-") and current_key:
+            data.setdefault(current_key, [])
+            data[current_key].append(line[1:].strip())
+            continue
+        if ":" in line:
+            key, value = line.split(":", 1)
+            key = key.strip()
+            value = value.strip()
+            if value:
+                data[key] = value
+            else:
+                data[key] = []
+            current_key = key
+        elif current_key:
+            existing = data.get(current_key, "")
+            if isinstance(existing, list):
+                data[current_key].append(line)
+            else:
+                data[current_key] = f"{existing} {line}".strip()
+    return data
+
+
+def coerce_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    text = str(value).strip()
+    if not text:
+        return []
+    return [item.strip() for item in text.split(",") if item.strip()]
+
+
+def slugify_skill(name: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+    return slug or "skill"
+
+
+def parse_skill_file(path: Path) -> Dict[str, Any]:
+    """Reads a skill's front matter into its catalog metadata."""
+    lines = path.read_text(encoding="utf-8").splitlines()
+    front_lines: List[str] = []
+    if lines and lines[0].strip() == "---":
+        idx = 1
+        while idx < len(lines) and lines[idx].strip() != "---":
+            front_lines.append(lines[idx])
+            idx += 1
+
+    metadata = parse_front_matter(front_lines)
+    name = metadata.get("name") or path.parent.name
+    metadata.update(
+        {
+            "name": name,
+            "description": metadata.get("description") or "",
+            "tags": coerce_list(metadata.get("tags")),
+            "triggers": coerce_list(metadata.get("triggers")),
+            "keywords": coerce_list(metadata.get("keywords")),
+            "links": coerce_list(metadata.get("links")),
+            "slug": slugify_skill(name),
+            "skill_file": str(path),
+            "skill_dir": str(path.parent),
+        }
+    )
+    return metadata
+
+
+def read_skill_body(path: Path) -> str:
+    """Returns a skill file's content without its front matter."""
+    text = path.read_text(encoding="utf-8")
+    if text.startswith("---"):
+        parts = text.split("---", 2)
+        if len(parts) >= 3:
+            return parts[2].strip()
+    return text.strip()
+
+
+def selection_terms(metadata: Dict[str, Any]) -> Set[str]:
+    """Terms under which a skill is indexed for selection."""
+    terms = {str(tag).strip().lower() for tag in metadata.get("tags", []) if str(tag).strip()}
+    for phrase in [*metadata.get("triggers", []), *metadata.get("keywords", [])]:
+        terms.update(_WORD.findall(str(phrase).lower()))
+    return terms
+
+
+@dataclass
+class SkillsRegistryStats:
+    """What the registry has had to do so far."""
+
+    refreshes: int = 0
+    parsed: int = 0
+    body_hits: int = 0
+    body_misses: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.body_hits + self.body_misses
+        return {
+            "refreshes": self.refreshes,
+            "parsed": self.parsed,
+            "body_hits": self.body_hits,
+            "body_misses": self.body_misses,
+            "body_hit_rate": round(self.body_hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+@dataclass(frozen=True)
+class _SkillIndex:
+    """One consistent generation of the registry's lookup tables.
+
+    `SkillsRegistry.refresh` builds a new one and swaps it in with a single
+    assignment, so readers that take one reference never see tables from
+    different generations.
+    """
+
+    skills: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    stamps: Dict[str, FileStamp] = field(default_factory=dict)
+    terms: Dict[str, Set[str]] = field(default_factory=dict)
+    auto: Set[str] = field(default_factory=set)
+    order: Dict[str, int] = field(default_factory=dict)
+    catalog: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class SkillsRegistry:
+    """
+    Skills found under a list of roots, indexed by selection term.
+
+    When two skills share a slug, the one found first (in root order, then
+    directory name order) wins, as with a full scan.
+
+    Attributes:
+        roots: Directories whose subdirectories hold ``SKILL.md`` files.
+        refresh_interval: Seconds during which the last refresh is trusted.
+        body_cache_entries: Skill bodies kept in memory.
+        stats: Refresh and body cache counters.
+    """
+
+    def __init__(
+        self,
+        roots: Sequence[Path],
+        *,
+        refresh_interval: float = 5.0,
+        body_cache_entries: int = 64,
+    ) -> None:
+        self.roots = [Path(root) for root in roots]
+        self.refresh_interval = refresh_interval
+        self.body_cache_entries = body_cache_entries
+        self.stats = SkillsRegistryStats()
+        self._parsed: Dict[str, Tuple[FileStamp, Optional[Dict[str, Any]]]] = {}
+        self._index = _SkillIndex()
+        self._bodies: "OrderedDict[Tuple[str, FileStamp], str]" = OrderedDict()
+        self._refreshed_at: Optional[float] = None
+        self._lock = Lock()
+
+    def _discover(self) -> List[Tuple[str, FileStamp]]:
+        found: List[Tuple[str, FileStamp]] = []
+        for root in self.roots:
+            try:
+                entries = sorted(os.scandir(root), key=lambda entry: entry.name)
+            except OSError:
+                continue
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                path = os.path.join(entry.path, SKILL_FILENAME)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                found.append((path, (info.st_mtime_ns, info.st_size)))
+        return found
+
+    def refresh(self, *, force: bool = False) -> bool:
+        """Re-parses added or modified skill files; returns whether the catalog changed."""
+        with self._lock:
+            now = time.monotonic()
+            if (
+                not force
+                and self._refreshed_at is not None
+                and now - self._refreshed_at < self.refresh_interval
+            ):
+                return False
+            self._refreshed_at = now
+            self.stats.refreshes += 1
+            found = self._discover()
+            changed = len(found) != len(self._parsed)
+            for path, stamp in found:
+                previous = self._parsed.get(path)
+                if previous is not None and previous[0] == stamp:
+                    continue
+                changed = True
+                try:
+                    metadata: Optional[Dict[str, Any]] = parse_skill_file(Path(path))
+                except (OSError, UnicodeDecodeError) as exc:
+                    logger.warning("Skipping unreadable skill %s: %s", path, exc)
+                    metadata = None
+                self._parsed[path] = (stamp, metadata)
+                self.stats.parsed += 1
+            if not changed:
+                return False
+            live = {path for path, _ in found}
+            for path in [path for path in self._parsed if path not in live]:
+                del self._parsed[path]
+            self._rebuild([(path, *self._parsed[path]) for path, _ in found])
+            return True
+
+    def _rebuild(self, ordered: Iterable[Tuple[str, FileStamp, Optional[Dict[str, Any]]]]) -> None:
+        skills: Dict[str, Dict[str, Any]] = {}
+        stamps: Dict[str, FileStamp] = {}
+        for _, stamp, metadata in ordered:
+            if metadata is None or metadata["slug"] in skills:
+                continue
+            skills[metadata["slug"]] = metadata
+            stamps[metadata["slug"]] = stamp
+        index: Dict[str, Set[str]] = {}
+        auto: Set[str] = set()
+        for slug, metadata in skills.items():
+            terms = selection_terms(metadata)
+            if AUTO_TAG in {str(tag).lower() for tag in metadata.get("tags", [])}:
+                auto.add(slug)
+            for term in terms:
+                index.setdefault(term, set()).add(slug)
+        self._index = _SkillIndex(
+            skills=skills,
+            stamps=stamps,
+            terms=index,
+            auto=auto,
+            order={slug: position for position, slug in enumerate(skills)},
+            catalog=list(skills.values()),
+        )
+
+    def catalog(self) -> List[Dict[str, Any]]:
+        """Metadata of every skill, in discovery order."""
+        return list(self._index.catalog)
+
+    def get(self, slug: str) -> Optional[Dict[str, Any]]:
+        return self._index.skills.get(slug)
+
+    def select(self, search_terms: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Skills indexed under any of ``search_terms`` plus ``auto`` skills, in catalog order."""
+        index = self._index
+        slugs = set(index.auto)
+        for term in search_terms:
+            slugs.update(index.terms.get(term.lower(), ()))
+        ordered = sorted(slugs, key=index.order.__getitem__)
+        return {slug: index.skills[slug] for slug in ordered}
+
+    def body(self, slug: str) -> str:
+        """Returns a skill's body, reading the file only when it is not cached."""
+        index = self._index
+        metadata = index.skills.get(slug)
+        if metadata is None:
+            return ""
+        key = (slug, index.stamps[slug])
+        with self._lock:
+            cached = self._bodies.get(key)
+            if cached is not None:
+                self._bodies.move_to_end(key)
+                self.stats.body_hits += 1
+                return cached
+            self.stats.body_misses += 1
+        try:
+            body = read_skill_body(Path(metadata["skill_file"]))
+        except (OSError, UnicodeDecodeError) as exc:
+            logger.warning("Unable to read skill %s: %s", metadata["skill_file"], exc)
+            return ""
+        if self.body_cache_entries > 0:
+            with self._lock:
+                self._bodies[key] = body
+                while len(self._bodies) > self.body_cache_entries:
+                    self._bodies.popitem(last=False)
+        return body
+
+    def __len__(self) -> int:
+        return len(self._index.skills)
+
+
+__all__ = [
+    "AUTO_TAG",
+    "SKILL_FILENAME",
+    "SkillsRegistry",
+    "SkillsRegistryStats",
+    "coerce_list",
+    "parse_front_matter",
+    "parse_skill_file",
+    "read_skill_body",
+    "selection_terms",
+    "slugify_skill",
+]
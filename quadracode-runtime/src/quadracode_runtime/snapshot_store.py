@@ -0,0 +1,277 @@
+"""
+Content-addressed blob storage for workspace snapshots.
+
+Every file captured by a snapshot is stored once, under its SHA-256, in
+``<snapshot_root>/blobs``; a snapshot is then just its manifest (path, size,
+digest, mode) referencing those blobs. Capturing a snapshot after a small edit
+therefore writes only the changed files, and restoring one only rewrites the
+files whose digest differs from the live workspace.
+
+Blobs are gzip-compressed when that makes them smaller (configurable), and are
+reference counted per snapshot: `SnapshotBlobStore.release` drops a snapshot's
+references and returns the digests nobody references any more, which
+`SnapshotBlobStore.delete_blobs` then removes. `SnapshotBlobStore.collect_garbage`
+sweeps every shard for orphans and abandoned temp files and is meant for
+explicit maintenance, not for every pruned snapshot.
+
+Runtimes on one host share the default snapshot root, so the reference counts
+in ``refs.json`` are re-read, updated and written back under an exclusive
+``flock`` on ``refs.lock`` for every change, and blobs are only deleted while
+holding it. Blobs are written without the lock; a caller that found a blob
+present must check it again after `SnapshotBlobStore.acquire`, since another
+process may have deleted it before the reference was recorded.
+
+Environment Variables:
+    QUADRACODE_SNAPSHOT_BLOB_COMPRESSION: ``gzip`` (default) or ``none``.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_COPY_CHUNK = 1024 * 1024
+# Below this size compression rarely pays for the gzip header.
+_COMPRESS_MIN_BYTES = 512
+
+
+class SnapshotBlobStore:
+    """
+    Stores file contents by digest and tracks how many snapshots reference each blob.
+
+    Attributes:
+        root: Directory holding ``blobs/``, the ``refs.json`` reference counts and
+            the ``refs.lock`` file guarding them.
+        compression: ``"gzip"`` to compress blobs when beneficial, ``"none"`` otherwise.
+    """
+
+    def __init__(self, root: Path, *, compression: Optional[str] = None) -> None:
+        self.root = Path(root)
+        self.blob_root = self.root / "blobs"
+        self.blob_root.mkdir(parents=True, exist_ok=True)
+        self.compression = (
+            compression or os.environ.get("QUADRACODE_SNAPSHOT_BLOB_COMPRESSION", "gzip")
+        ).lower()
+        self._refs_path = self.root / "refs.json"
+        self._lock_path = self.root / "refs.lock"
+        self._thread_lock = threading.RLock()
+        self._lock_handle: Optional[IO[str]] = None
+        self._lock_depth = 0
+        self.blobs_written = 0
+        self.bytes_written = 0
+
+    # ------------------------------------------------------------------
+    # Blob access
+    # ------------------------------------------------------------------
+
+    def _blob_base(self, digest: str) -> Path:
+        return self.blob_root / digest[:2] / digest
+
+    def blob_path(self, digest: str) -> Optional[Path]:
+        base = self._blob_base(digest)
+        for candidate in (base, base.with_name(f"{digest}.gz")):
+            if candidate.exists():
+                return candidate
+        return None
+
+    def has(self, digest: str) -> bool:
+        return self.blob_path(digest) is not None
+
+    def ingest_file(self, path: Path, *, known_digest: Optional[str] = None) -> Tuple[str, int]:
+        """Stores the contents of ``path`` unless already present; returns ``(digest, size)``.
+
+        ``known_digest`` (typically from the stat-keyed manifest cache) lets an
+        unchanged file be recorded without reading it at all.
+        """
+        if known_digest and self.has(known_digest):
+            return known_digest, path.stat().st_size
+        with path.open("rb") as handle:
+            return self.ingest_stream(handle)
+
+    def ingest_stream(self, stream: IO[bytes]) -> Tuple[str, int]:
+        """Stores a stream, hashing while copying so the digest matches what was stored."""
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.blob_root, prefix=".ingest-")
+        tmp_path = Path(tmp_name)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                while chunk := stream.read(_COPY_CHUNK):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    tmp.write(chunk)
+            hexdigest = digest.hexdigest()
+            if not self.has(hexdigest):
+                self._commit_blob(tmp_path, hexdigest, size)
+            return hexdigest, size
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _commit_blob(self, tmp_path: Path, digest: str, size: int) -> None:
+        base = self._blob_base(digest)
+        base.parent.mkdir(parents=True, exist_ok=True)
+        if self.compression == "gzip" and size >= _COMPRESS_MIN_BYTES:
+            packed = tmp_path.with_name(f"{tmp_path.name}.gz")
+            with tmp_path.open("rb") as source, gzip.open(packed, "wb", compresslevel=6) as target:
+                shutil.copyfileobj(source, target, _COPY_CHUNK)
+            if packed.stat().st_size < size:
+                self.bytes_written += packed.stat().st_size
+                os.replace(packed, base.with_name(f"{digest}.gz"))
+                self.blobs_written += 1
+                return
+            packed.unlink()
+        os.replace(tmp_path, base)
+        self.blobs_written += 1
+        self.bytes_written += size
+
+    def open_blob(self, digest: str) -> IO[bytes]:
+        path = self.blob_path(digest)
+        if path is None:
+            raise FileNotFoundError(f"snapshot blob {digest} is missing")
+        if path.suffix == ".gz":
+            return gzip.open(path, "rb")  # type: ignore[return-value]
+        return path.open("rb")
+
+    def restore_file(self, digest: str, destination: Path, *, mode: Optional[int] = None) -> None:
+        """Atomically writes a blob's contents to ``destination``."""
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=destination.parent, prefix=f".{destination.name}.")
+        try:
+            with os.fdopen(fd, "wb") as target, self.open_blob(digest) as source:
+                shutil.copyfileobj(source, target, _COPY_CHUNK)
+            if mode is not None:
+                os.chmod(tmp_name, mode)
+            os.replace(tmp_name, destination)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    # ------------------------------------------------------------------
+    # Reference counting
+    # ------------------------------------------------------------------
+
+    @contextlib.contextmanager
+    def locked(self) -> Iterator[None]:
+        """Holds the store's cross-process lock; re-entrant within a process."""
+        with self._thread_lock:
+            if self._lock_depth == 0:
+                handle = self._lock_path.open("a", encoding="utf-8")
+                try:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+                except BaseException:
+                    handle.close()
+                    raise
+                self._lock_handle = handle
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and self._lock_handle is not None:
+                    # Closing the descriptor releases the flock.
+                    self._lock_handle.close()
+                    self._lock_handle = None
+
+    def _load_refs(self) -> Counter[str]:
+        try:
+            payload = json.loads(self._refs_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return Counter()
+        except (OSError, ValueError) as exc:
+            logger.warning("Unreadable snapshot refcounts %s: %s", self._refs_path, exc)
+            return Counter()
+        return Counter({str(key): int(value) for key, value in payload.items() if int(value) > 0})
+
+    def _save_refs(self, refs: Counter[str]) -> None:
+        tmp_path = self._refs_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(dict(refs), sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self._refs_path)
+
+    def acquire(self, digests: Iterable[str]) -> None:
+        """Records one more snapshot referencing each distinct digest."""
+        wanted = {digest for digest in digests if digest}
+        with self.locked():
+            refs = self._load_refs()
+            refs.update(wanted)
+            self._save_refs(refs)
+
+    def release(self, digests: Iterable[str]) -> List[str]:
+        """Drops one snapshot's references; returns the digests that reached zero."""
+        released: List[str] = []
+        with self.locked():
+            refs = self._load_refs()
+            for digest in {digest for digest in digests if digest}:
+                remaining = refs.get(digest, 0) - 1
+                if remaining > 0:
+                    refs[digest] = remaining
+                elif refs.pop(digest, None) is not None:
+                    released.append(digest)
+            self._save_refs(refs)
+        return released
+
+    def refcount(self, digest: str) -> int:
+        with self.locked():
+            return self._load_refs().get(digest, 0)
+
+    def delete_blobs(self, digests: Iterable[str]) -> int:
+        """Deletes the given blobs unless referenced again; returns the count removed."""
+        removed = 0
+        with self.locked():
+            refs = self._load_refs()
+            for digest in digests:
+                if not digest or refs.get(digest, 0) > 0:
+                    continue
+                base = self._blob_base(digest)
+                for candidate in (base, base.with_name(f"{digest}.gz")):
+                    try:
+                        candidate.unlink()
+                    except FileNotFoundError:
+                        continue
+                    removed += 1
+        return removed
+
+    def collect_garbage(self) -> int:
+        """Sweeps every shard for unreferenced blobs and abandoned temp files.
+
+        This walks the whole store, so it is a maintenance operation; pruning a
+        single snapshot only needs `delete_blobs` on what `release` returned.
+        It holds the lock for the whole sweep, which also keeps other processes
+        from storing a snapshot meanwhile. Returns the count of blobs removed.
+        """
+        removed = 0
+        with self.locked():
+            refs = self._load_refs()
+            for shard in self.blob_root.iterdir():
+                if not shard.is_dir():
+                    if shard.name.startswith(".ingest-"):
+                        shard.unlink(missing_ok=True)
+                    continue
+                for blob in shard.iterdir():
+                    digest = blob.name.removesuffix(".gz")
+                    if refs.get(digest, 0) <= 0:
+                        blob.unlink(missing_ok=True)
+                        removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "referenced_blobs": len(self._load_refs()),
+            "blobs_written": self.blobs_written,
+            "bytes_written": self.bytes_written,
+        }
+
+
+__all__ = ["SnapshotBlobStore"]
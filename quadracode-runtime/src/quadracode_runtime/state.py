@@ -31,6 +31,7 @@ from typing import (
     Dict,
     Iterable,
     List,
+    NotRequired,
     Optional,
     TypedDict,
     cast,
@@ -166,6 +167,9 @@ class ContextSegment(TypedDict):
         compression_eligible: A boolean flag indicating if the segment can be summarized or compressed.
         restorable_reference: An optional reference (e.g., file path and line numbers)
                               allowing the full content to be reloaded from an external source.
+        token_hash: The content hash `token_count` was computed from. While it is
+                    set, `token_count` is trusted as is; code that rewrites
+                    `content` must drop it so the engine counts the new content.
     """
 
     id: str
@@ -177,6 +181,7 @@ class ContextSegment(TypedDict):
     decay_rate: float
     compression_eligible: bool
     restorable_reference: Optional[str]
+    token_hash: NotRequired[str]
 
 
 # ============================================================================
@@ -783,6 +788,10 @@ class ContextEngineState(RuntimeState):
         last_curation_summary: A summary of the last context curation action.
         recent_loads: A log of recently loaded context segments.
         recent_externalizations: A log of recently externalized context segments.
+        history_summary_watermark: Progress of incremental conversation summarization
+                                   (last folded message id and fold counters).
+        token_tallies: Running per-item token totals for segments and messages, so
+                       usage is only adjusted for items that changed.
         llm_stop_detected: Flag indicating if the LLM has signaled a stop condition (exhaustion).
         llm_resume_hint: Flag indicating the LLM should be hinted to resume from a stop.
     system_prompt_addendum: Supplemental system prompt text injected after reset.
@@ -829,6 +838,8 @@ class ContextEngineState(RuntimeState):
     recent_externalizations: List[Dict[str, Any]]
     recent_compressions: List[Dict[str, Any]]
     last_compression_event: Dict[str, Any]
+    history_summary_watermark: Dict[str, Any]
+    token_tallies: Dict[str, Dict[str, Any]]
     
     # LLM Stop/Resume Detection (for exhaustion handling)
     llm_stop_detected: bool
@@ -975,6 +986,8 @@ def make_initial_context_engine_state(
             "recent_externalizations": [],
             "recent_compressions": [],
             "last_compression_event": {},
+            "history_summary_watermark": {},
+            "token_tallies": {},
             "llm_stop_detected": False,
             "llm_resume_hint": False,
             "system_prompt_addendum": "",
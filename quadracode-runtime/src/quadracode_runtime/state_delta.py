@@ -0,0 +1,301 @@
+"""
+This module implements the versioned delta protocol used for the ``state``
+section of outgoing envelopes.
+
+Instead of attaching a full snapshot of the autonomous state to every response,
+the runtime keeps a fingerprint of the last snapshot it published to each
+``(thread, recipient)`` pair and only sends the keys whose values changed since
+*that recipient's* previous envelope. Every envelope carries:
+
+- ``state``: the changed keys (the complete snapshot when no base exists).
+- ``state_version``: a per-(thread, recipient), monotonically increasing version.
+- ``state_base_version``: the version the delta applies to, or ``None`` when
+  ``state`` is a complete snapshot.
+- ``state_removed``: keys present in the base but absent now (omitted if none).
+
+`StateDeltaReceiver` rebuilds the full state on the receiving side, per
+``(thread, sender)``. When a delta does not apply to the version it holds (a
+missed envelope, a restart), it rebuilds the base from the receiver's own
+checkpoint of the thread with `load_state_snapshot`.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_TRACKED_THREADS = 2048
+
+_TrackerKey = Tuple[str, str | None]
+
+
+def _fingerprint(value: Any) -> str:
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class _ThreadStateRecord:
+    version: int = 0
+    fingerprints: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class StateDelta:
+    """The delta of one thread's state against its previously published version."""
+
+    changed: Dict[str, Any]
+    removed: List[str]
+    version: int
+    base_version: int | None
+
+    def apply_to(self, payload: Dict[str, Any]) -> None:
+        """Writes the delta fields into an outgoing envelope payload."""
+        payload["state"] = self.changed
+        payload["state_version"] = self.version
+        payload["state_base_version"] = self.base_version
+        if self.removed:
+            payload["state_removed"] = self.removed
+
+
+class StateDeltaTracker:
+    """
+    Tracks the last state published to each recipient of a thread and
+    computes deltas.
+
+    Baselines are kept per ``(thread, recipient)`` because one thread's
+    responses fan out to different recipients, each of which only holds what
+    was sent to it. Only content fingerprints are retained, so the tracker's
+    memory does not grow with the size of the state. The least recently used
+    pairs are forgotten once ``max_threads`` is exceeded; their next envelope
+    then carries a complete snapshot again.
+    """
+
+    def __init__(self, max_threads: int = DEFAULT_MAX_TRACKED_THREADS) -> None:
+        self._max_threads = max(1, max_threads)
+        self._records: "OrderedDict[_TrackerKey, _ThreadStateRecord]" = OrderedDict()
+
+    def delta(
+        self,
+        thread_id: str,
+        snapshot: Mapping[str, Any],
+        *,
+        recipient: str | None = None,
+    ) -> StateDelta:
+        """
+        Computes the delta between ``snapshot`` and the state last published
+        to ``recipient``.
+
+        Args:
+            thread_id: The conversation thread the snapshot belongs to.
+            snapshot: The full JSON-serializable state snapshot.
+            recipient: The recipient the delta is addressed to.
+
+        Returns:
+            The `StateDelta` to publish; the tracker advances to its version.
+        """
+        key = (thread_id, recipient)
+        record = self._records.pop(key, None)
+        fingerprints = {key: _fingerprint(value) for key, value in snapshot.items()}
+        if record is None:
+            base_version: int | None = None
+            changed = dict(snapshot)
+            removed: List[str] = []
+            record = _ThreadStateRecord()
+        else:
+            base_version = record.version
+            changed = {
+                key: snapshot[key]
+                for key, digest in fingerprints.items()
+                if record.fingerprints.get(key) != digest
+            }
+            removed = sorted(set(record.fingerprints) - set(fingerprints))
+        record.version += 1
+        record.fingerprints = fingerprints
+        self._records[key] = record
+        while len(self._records) > self._max_threads:
+            self._records.popitem(last=False)
+        return StateDelta(
+            changed=changed,
+            removed=removed,
+            version=record.version,
+            base_version=base_version,
+        )
+
+    def forget(self, thread_id: str, recipient: str | None = None) -> None:
+        """
+        Drops tracked baselines so the next envelope carries a full snapshot;
+        every recipient of the thread is forgotten when ``recipient`` is ``None``.
+        """
+        if recipient is not None:
+            self._records.pop((thread_id, recipient), None)
+            return
+        for key in [key for key in self._records if key[0] == thread_id]:
+            del self._records[key]
+
+
+def apply_state_delta(
+    current: Mapping[str, Any] | None,
+    current_version: int | None,
+    payload: Mapping[str, Any],
+) -> Tuple[Dict[str, Any], int | None, bool]:
+    """
+    Applies the delta carried by an envelope payload to a receiver's copy.
+
+    Args:
+        current: The receiver's current copy of the state, if any.
+        current_version: The version of ``current``.
+        payload: The envelope payload carrying the delta fields.
+
+    Returns:
+        A ``(state, version, complete)`` tuple. ``complete`` is ``False`` when
+        the delta does not apply to ``current_version``; the receiver should
+        then fetch the full state with `load_state_snapshot`.
+    """
+    delta = payload.get("state")
+    if not isinstance(delta, dict):
+        return dict(current or {}), current_version, current is not None
+    version = payload.get("state_version")
+    base_version = payload.get("state_base_version")
+    if "state_version" not in payload or base_version is None:
+        # Legacy full snapshot or the first envelope of a thread.
+        return dict(delta), version if isinstance(version, int) else None, True
+    if current is None or current_version != base_version:
+        merged = dict(current or {})
+        merged.update(delta)
+        return merged, version, False
+    merged = dict(current)
+    merged.update(delta)
+    for key in payload.get("state_removed") or []:
+        merged.pop(key, None)
+    return merged, version, True
+
+
+def checkpoint_message_ids(checkpoint_tuple: Any) -> set[str]:
+    """Returns the ids of the messages stored in a checkpoint tuple, if any."""
+    if checkpoint_tuple is None:
+        return set()
+    channel_values = checkpoint_tuple.checkpoint.get("channel_values") or {}
+    return {
+        message.id
+        for message in channel_values.get("messages") or []
+        if getattr(message, "id", None)
+    }
+
+
+def new_messages(messages: Sequence[Any], prior_ids: set[str]) -> List[Any]:
+    """Returns the messages that were not part of the thread before this turn."""
+    if not prior_ids:
+        return list(messages)
+    return [message for message in messages if getattr(message, "id", None) not in prior_ids]
+
+
+async def load_state_snapshot(
+    checkpointer: Any,
+    thread_id: str,
+    keys: Tuple[str, ...] | None = None,
+) -> Dict[str, Any] | None:
+    """
+    Loads the latest persisted state of a thread from a LangGraph checkpointer.
+
+    Args:
+        checkpointer: Any `BaseCheckpointSaver` (Postgres or in-memory).
+        thread_id: The thread to load.
+        keys: Optional subset of state keys to return.
+
+    Returns:
+        The channel values of the latest checkpoint, or ``None`` if the thread
+        has no checkpoint.
+    """
+    checkpoint_tuple = await checkpointer.aget_tuple({"configurable": {"thread_id": thread_id}})
+    if checkpoint_tuple is None:
+        return None
+    values = dict(checkpoint_tuple.checkpoint.get("channel_values") or {})
+    if keys is not None:
+        values = {key: values[key] for key in keys if key in values}
+    return values
+
+
+class StateDeltaReceiver:
+    """
+    Rebuilds the full state each sender publishes for a thread from the
+    deltas it receives.
+
+    One copy of the state is kept per ``(thread, sender)``; the least recently
+    used copies are dropped once ``max_threads`` is exceeded, after which the
+    next delta is rebuilt from the checkpoint.
+    """
+
+    def __init__(self, max_threads: int = DEFAULT_MAX_TRACKED_THREADS) -> None:
+        self._max_threads = max(1, max_threads)
+        self._records: "OrderedDict[Tuple[str, str], Tuple[Dict[str, Any], int | None]]" = OrderedDict()
+
+    async def receive(
+        self,
+        thread_id: str,
+        sender: str,
+        payload: Mapping[str, Any],
+        checkpointer: Any | None,
+        *,
+        keys: Tuple[str, ...] | None = None,
+    ) -> Dict[str, Any] | None:
+        """
+        Applies the delta carried by ``payload`` and returns the full state.
+
+        Args:
+            thread_id: The thread the envelope belongs to.
+            sender: The envelope's sender.
+            payload: The envelope payload carrying the delta fields.
+            checkpointer: The receiver's checkpointer, used to rebuild the base
+                state when the delta does not apply to the held version.
+            keys: The state keys to take from the checkpoint (all by default).
+
+        Returns:
+            The sender's full state, or ``None`` when the payload carries none.
+        """
+        if not isinstance(payload.get("state"), dict):
+            return None
+        key = (thread_id, sender)
+        current, current_version = self._records.pop(key, (None, None))
+        state, version, complete = apply_state_delta(current, current_version, payload)
+        if not complete:
+            base = None
+            if checkpointer is not None:
+                base = await load_state_snapshot(checkpointer, thread_id, keys=keys)
+            if base is None:
+                LOGGER.warning(
+                    "[state] thread=%s sender=%s: delta base v%s unavailable and no checkpoint; "
+                    "continuing with the changed keys only",
+                    thread_id,
+                    sender,
+                    payload.get("state_base_version"),
+                )
+            state = {name: value for name, value in (base or {}).items() if name != "messages"}
+            state.update(payload["state"])
+            for removed in payload.get("state_removed") or []:
+                state.pop(removed, None)
+        self._records[key] = (state, version)
+        while len(self._records) > self._max_threads:
+            self._records.popitem(last=False)
+        return dict(state)
+
+    def forget(self, thread_id: str) -> None:
+        """Drops every sender's copy of the thread's state."""
+        for key in [key for key in self._records if key[0] == thread_id]:
+            del self._records[key]
+
+
+__all__ = [
+    "StateDelta",
+    "StateDeltaReceiver",
+    "StateDeltaTracker",
+    "apply_state_delta",
+    "checkpoint_message_ids",
+    "load_state_snapshot",
+    "new_messages",
+]
@@ -0,0 +1,364 @@
+"""
+This module provides the `SummaryStore`, a content-addressed cache of reducer
+outputs shared by every thread of a process and, through its persistent tier,
+across processes and restarts.
+
+Summaries are keyed by a hash of the reduced input, the focus hint, the version
+of the prompt templates and the reducer model, so a cached summary is reused only
+when the exact same reduction would have been requested again. Lookups go through
+two tiers:
+
+- an in-memory LRU, always enabled;
+- a persistent tier, selected by ``summary_cache_backend``: ``disk`` (JSON files
+  under ``summary_cache_path``), ``redis`` (``SET`` with a TTL), or ``memory`` /
+  ``none`` for no persistent tier.
+
+Both persistent tiers honor ``summary_cache_ttl_seconds``. The disk tier treats
+files older than the TTL as misses and deletes them on read, and a periodic
+sweep (on the first write of the process, then every few hundred writes)
+removes expired files and evicts the oldest ones beyond
+``summary_cache_disk_max_entries``.
+
+Persistent tier failures never fail a reduction; the tier is skipped and the
+reducer falls through to the LLM.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Protocol
+
+from .config import ContextEngineConfig
+
+LOGGER = logging.getLogger(__name__)
+
+_REDIS_KEY_PREFIX = "qc:summary:"
+
+
+@dataclass(frozen=True)
+class CachedSummary:
+    """A summary served from the cache, tagged with the tier that held it."""
+
+    summary: str
+    token_count: int
+    tier: str
+
+
+@dataclass
+class SummaryCacheStats:
+    """Running hit/miss counters of a `SummaryStore`."""
+
+    memory_hits: int = 0
+    persistent_hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    errors: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.persistent_hits
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SummaryBackend(Protocol):
+    """A persistent summary tier."""
+
+    name: str
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    async def put(self, key: str, record: Dict[str, Any]) -> None:
+        ...
+
+
+class DiskSummaryBackend:
+    """
+    Stores one JSON file per summary, sharded by the first key byte.
+
+    Attributes:
+        root: The cache directory.
+        ttl_seconds: Age (by file mtime) after which a summary is expired;
+            ``<= 0`` keeps summaries until the sweep evicts them.
+        max_entries: Files kept by the sweep, oldest evicted first; ``<= 0``
+            leaves the tier unbounded.
+        sweep_every: Writes between two sweeps.
+    """
+
+    name = "disk"
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        ttl_seconds: int = 0,
+        max_entries: int = 0,
+        sweep_every: int = 256,
+    ) -> None:
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.sweep_every = max(1, sweep_every)
+        self._writes_until_sweep = 0
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._read, self._path(key))
+
+    async def put(self, key: str, record: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._write, self._path(key), record)
+        self._writes_until_sweep -= 1
+        if self._writes_until_sweep <= 0:
+            self._writes_until_sweep = self.sweep_every
+            await asyncio.to_thread(self.sweep)
+
+    def _expired(self, mtime: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - mtime > self.ttl_seconds
+
+    def _read(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            if self._expired(path.stat().st_mtime, time.time()):
+                path.unlink(missing_ok=True)
+                return None
+            return json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def sweep(self) -> int:
+        """Deletes expired summaries and the oldest beyond ``max_entries``; returns the count."""
+        now = time.time()
+        live: list[tuple[float, str]] = []
+        removed = 0
+        try:
+            shards = [entry.path for entry in os.scandir(self.root) if entry.is_dir()]
+        except FileNotFoundError:
+            return 0
+        for shard in shards:
+            try:
+                entries = list(os.scandir(shard))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                try:
+                    mtime = entry.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                # Leftovers of interrupted writes are dropped after an hour.
+                stale_tmp = entry.name.startswith(".tmp-") and now - mtime > 3600
+                if stale_tmp or (entry.name.endswith(".json") and self._expired(mtime, now)):
+                    removed += self._unlink(entry.path)
+                elif entry.name.endswith(".json") and not entry.name.startswith(".tmp-"):
+                    live.append((mtime, entry.path))
+        if self.max_entries > 0 and len(live) > self.max_entries:
+            live.sort()
+            for _, path in live[: len(live) - self.max_entries]:
+                removed += self._unlink(path)
+        if removed:
+            LOGGER.debug("Summary cache sweep removed %d files from %s", removed, self.root)
+        return removed
+
+    @staticmethod
+    def _unlink(path: str) -> int:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            return 0
+        return 1
+
+    @staticmethod
+    def _write(path: Path, record: Dict[str, Any]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial file.
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(record, handle, ensure_ascii=False)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+
+class RedisSummaryBackend:
+    """Stores summaries as Redis strings with a TTL."""
+
+    name = "redis"
+
+    def __init__(self, url: str, ttl_seconds: int) -> None:
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self._redis = None
+        self._redis_loop: "weakref.ReferenceType[asyncio.AbstractEventLoop] | None" = None
+
+    async def _ensure_redis(self):
+        # Clients are bound to the loop that opened their connections. Loops are
+        # compared by identity: ids of collected loops are reused.
+        loop = asyncio.get_running_loop()
+        owner = self._redis_loop() if self._redis_loop is not None else None
+        if self._redis is None or owner is not loop:
+            from redis.asyncio import Redis  # type: ignore
+
+            previous, self._redis = self._redis, None
+            if previous is not None:
+                # Release the old pool; its loop may already be closed.
+                with contextlib.suppress(Exception):
+                    await previous.aclose()
+            self._redis = Redis.from_url(self.url, decode_responses=True)
+            self._redis_loop = weakref.ref(loop)
+        return self._redis
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        client = await self._ensure_redis()
+        raw = await client.get(f"{_REDIS_KEY_PREFIX}{key}")
+        return json.loads(raw) if raw else None
+
+    async def put(self, key: str, record: Dict[str, Any]) -> None:
+        client = await self._ensure_redis()
+        await client.set(
+            f"{_REDIS_KEY_PREFIX}{key}",
+            json.dumps(record, ensure_ascii=False),
+            ex=self.ttl_seconds if self.ttl_seconds > 0 else None,
+        )
+
+
+@dataclass
+class SummaryStore:
+    """
+    Two-tier, content-addressed cache of reducer summaries.
+
+    Attributes:
+        max_entries: Capacity of the in-memory LRU tier.
+        backend: The optional persistent tier.
+        stats: Running hit/miss counters.
+    """
+
+    max_entries: int = 1024
+    backend: Optional[SummaryBackend] = None
+    stats: SummaryCacheStats = field(default_factory=SummaryCacheStats)
+    _memory: "OrderedDict[str, CachedSummary]" = field(default_factory=OrderedDict, repr=False)
+
+    @staticmethod
+    def key(content: str, *, focus: str | None, template_version: str, model: str) -> str:
+        """Returns the cache key of one reduction request."""
+        digest = hashlib.sha256()
+        for part in (model, template_version, focus or "", content):
+            digest.update(part.encode("utf-8", "surrogatepass"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[CachedSummary]:
+        """Looks ``key`` up in memory, then in the persistent tier."""
+        cached = self._memory.get(key)
+        if cached is not None:
+            self._memory.move_to_end(key)
+            self.stats.memory_hits += 1
+            return cached
+        if self.backend is not None:
+            try:
+                record = await self.backend.get(key)
+            except Exception as exc:  # noqa: BLE001 - the persistent tier is best effort
+                self.stats.errors += 1
+                LOGGER.debug("Summary cache %s lookup failed: %s", self.backend.name, exc)
+                record = None
+            if record and isinstance(record.get("summary"), str):
+                cached = CachedSummary(
+                    summary=record["summary"],
+                    token_count=int(record.get("token_count") or 0),
+                    tier=self.backend.name,
+                )
+                self._remember(key, CachedSummary(cached.summary, cached.token_count, "memory"))
+                self.stats.persistent_hits += 1
+                return cached
+        self.stats.misses += 1
+        return None
+
+    async def put(self, key: str, summary: str, token_count: int) -> None:
+        """Stores a summary in both tiers."""
+        self._remember(key, CachedSummary(summary, token_count, "memory"))
+        self.stats.writes += 1
+        if self.backend is None:
+            return
+        try:
+            await self.backend.put(key, {"summary": summary, "token_count": token_count})
+        except Exception as exc:  # noqa: BLE001 - the persistent tier is best effort
+            self.stats.errors += 1
+            LOGGER.debug("Summary cache %s write failed: %s", self.backend.name, exc)
+
+    def _remember(self, key: str, entry: CachedSummary) -> None:
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+def _build_backend(config: ContextEngineConfig) -> Optional[SummaryBackend]:
+    backend = (config.summary_cache_backend or "none").strip().lower()
+    if backend == "disk":
+        root = config.summary_cache_path or os.path.join(config.external_memory_path, "summary_cache")
+        return DiskSummaryBackend(
+            Path(root),
+            ttl_seconds=config.summary_cache_ttl_seconds,
+            max_entries=config.summary_cache_disk_max_entries,
+        )
+    if backend == "redis":
+        return RedisSummaryBackend(
+            config.summary_cache_redis_url or config.metrics_redis_url,
+            config.summary_cache_ttl_seconds,
+        )
+    if backend not in {"memory", "none"}:
+        LOGGER.warning("Unknown summary cache backend %r; using memory only", backend)
+    return None
+
+
+_STORES: Dict[tuple, SummaryStore] = {}
+
+
+def get_summary_store(config: ContextEngineConfig) -> SummaryStore:
+    """Returns the process-wide `SummaryStore` for the configured backend."""
+    identity = (
+        (config.summary_cache_backend or "none").strip().lower(),
+        config.summary_cache_path or config.external_memory_path,
+        config.summary_cache_redis_url or config.metrics_redis_url,
+    )
+    store = _STORES.get(identity)
+    if store is None:
+        store = SummaryStore(
+            max_entries=config.summary_cache_entries,
+            backend=_build_backend(config),
+        )
+        _STORES[identity] = store
+    return store
+
+
+__all__ = [
+    "CachedSummary",
+    "DiskSummaryBackend",
+    "RedisSummaryBackend",
+    "SummaryCacheStats",
+    "SummaryStore",
+    "get_summary_store",
+]
@@ -0,0 +1,325 @@
+"""
+This module provides the token counting subsystem shared by the context engine,
+the reducer and the progressive loader.
+
+All budget decisions (compression triggers, loader headroom, reset thresholds)
+compare token counts against each other, so every component must count the same
+way. `TokenCounter` wraps a pluggable `Tokenizer` and memoizes counts by content
+hash. Context segments also carry their count so it is never recomputed:
+``token_count`` is stored together with ``token_hash`` (the hash of the content
+it was computed from), and code that rewrites a segment's content drops its
+``token_hash`` or calls `TokenCounter.annotate`. Chat messages are never
+written to; their counts live only in the memo. `tally_tokens` keeps the
+running totals the context engine reports, adjusting them only for the items
+that were added, removed or rewritten.
+
+Two tokenizers are built in:
+
+- ``bpe`` (default): an offline approximation of byte-level BPE encoders. Text is
+  pre-tokenized with the same split rules GPT-style BPE encoders use (words with
+  their leading space, digit groups of up to three, punctuation runs, whitespace
+  runs) and each piece is charged the number of merges a typical vocabulary
+  needs for it. It needs no vocabulary files and runs in linear time.
+- ``tiktoken[:<encoding>]``: exact counts via ``tiktoken`` when it is installed.
+
+Additional tokenizers can be added with `register_tokenizer`.
+
+Environment Variables:
+    QUADRACODE_TOKENIZER: The tokenizer spec to use (default ``bpe``).
+    QUADRACODE_TOKEN_CACHE_SIZE: Number of memoized counts kept (default 8192).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, MutableMapping, Protocol, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TOKENIZER = "bpe"
+DEFAULT_CACHE_SIZE = 8192
+# Role markers and separators the chat template adds around every message.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class Tokenizer(Protocol):
+    """Counts the tokens of a string."""
+
+    name: str
+
+    def count(self, text: str) -> int:
+        ...
+
+
+_PRETOKENIZE = re.compile(
+    r"""'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|_+|\s+(?!\S)|\s+""",
+    re.IGNORECASE,
+)
+
+
+class ApproximateBPETokenizer:
+    """
+    Offline approximation of a byte-level BPE tokenizer.
+
+    Common words (with their leading space) are single tokens in modern
+    vocabularies; longer words are split into sub-words of roughly five
+    characters. Punctuation runs merge in pairs, whitespace runs are a single
+    token per eight characters, and non-ASCII text is charged per UTF-8 byte
+    triple, which matches the per-character cost of CJK text.
+    """
+
+    name = "bpe"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        total = 0
+        for piece in _PRETOKENIZE.findall(text):
+            total += self._piece_cost(piece)
+        return total
+
+    @staticmethod
+    def _piece_cost(piece: str) -> int:
+        body = piece.lstrip(" ") or piece
+        if not body.isascii():
+            return max(1, -(-len(body.encode("utf-8")) // 3))
+        if body.isalpha():
+            return 1 if len(body) <= 7 else 1 + -(-(len(body) - 7) // 5)
+        if body.isdigit():
+            return 1
+        if body.isspace():
+            return max(1, -(-len(body) // 8))
+        return max(1, -(-len(body) // 2))
+
+
+class TiktokenTokenizer:
+    """Exact counts from a ``tiktoken`` encoding."""
+
+    def __init__(self, encoding: str = "cl100k_base") -> None:
+        import tiktoken  # optional dependency
+
+        self._encoding = tiktoken.get_encoding(encoding)
+        self.name = f"tiktoken:{encoding}"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+_TOKENIZERS: Dict[str, Callable[[str | None], Tokenizer]] = {
+    "bpe": lambda _arg: ApproximateBPETokenizer(),
+    "tiktoken": lambda arg: TiktokenTokenizer(arg or "cl100k_base"),
+}
+
+
+def register_tokenizer(name: str, factory: Callable[[str | None], Tokenizer]) -> None:
+    """
+    Registers a tokenizer factory under ``name``.
+
+    Args:
+        name: The spec prefix selecting the tokenizer (``name`` or ``name:arg``).
+        factory: Called with the optional ``arg`` part of the spec.
+    """
+    _TOKENIZERS[name.strip().lower()] = factory
+
+
+def create_tokenizer(spec: str | None = None) -> Tokenizer:
+    """
+    Builds the tokenizer described by ``spec``, falling back to ``bpe``.
+
+    Args:
+        spec: ``name`` or ``name:arg``; defaults to ``QUADRACODE_TOKENIZER``.
+    """
+    spec = (spec or os.environ.get("QUADRACODE_TOKENIZER") or DEFAULT_TOKENIZER).strip()
+    name, _, arg = spec.partition(":")
+    factory = _TOKENIZERS.get(name.lower())
+    if factory is None:
+        LOGGER.warning("Unknown tokenizer %r; using %s", spec, DEFAULT_TOKENIZER)
+        return ApproximateBPETokenizer()
+    try:
+        return factory(arg or None)
+    except Exception as exc:  # noqa: BLE001 - optional backends may be missing
+        LOGGER.warning("Tokenizer %r unavailable (%s); using %s", spec, exc, DEFAULT_TOKENIZER)
+        return ApproximateBPETokenizer()
+
+
+def content_hash(text: str) -> str:
+    """Returns the stable hash under which the token count of ``text`` is memoized."""
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=12).hexdigest()
+
+
+def message_text(message: Any) -> str:
+    """Renders the parts of a chat message that are sent to the model as text."""
+    content = getattr(message, "content", message)
+    if isinstance(content, str):
+        text = content
+    elif isinstance(content, list):
+        parts = []
+        for block in content:
+            if isinstance(block, dict):
+                parts.append(str(block.get("text", "")))
+            else:
+                parts.append(str(block))
+        text = "".join(parts)
+    else:
+        text = "" if content is None else str(content)
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        text += json.dumps(
+            [{"name": call.get("name"), "args": call.get("args")} for call in tool_calls],
+            default=str,
+        )
+    return text
+
+
+class TokenCounter:
+    """
+    Memoizing front end for a `Tokenizer`.
+
+    Attributes:
+        tokenizer: The underlying tokenizer.
+        cache_size: The number of memoized counts retained (LRU).
+    """
+
+    def __init__(self, tokenizer: Tokenizer | None = None, cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+        self.tokenizer = tokenizer or ApproximateBPETokenizer()
+        self.cache_size = max(1, cache_size)
+        self._memo: "OrderedDict[str, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def name(self) -> str:
+        return self.tokenizer.name
+
+    def count(self, text: str | None) -> int:
+        """Returns the token count of ``text``."""
+        if not text:
+            return 0
+        return self._count_hashed(text, content_hash(text))
+
+    def _count_hashed(self, text: str, digest: str) -> int:
+        cached = self._memo.get(digest)
+        if cached is not None:
+            self._memo.move_to_end(digest)
+            self.hits += 1
+            return cached
+        self.misses += 1
+        tokens = self.tokenizer.count(text)
+        self._memo[digest] = tokens
+        if len(self._memo) > self.cache_size:
+            self._memo.popitem(last=False)
+        return tokens
+
+    def segment_tokens(self, segment: MutableMapping[str, Any]) -> int:
+        """
+        Returns the token count of a context segment, counting it only once.
+
+        A ``token_count`` stamped together with a ``token_hash`` is trusted
+        without looking at the content. Otherwise the content is counted and
+        both fields are written back onto the segment; code that rewrites a
+        segment's content must therefore drop its ``token_hash`` (or call
+        `annotate`).
+        """
+        stored = segment.get("token_count")
+        if segment.get("token_hash") and isinstance(stored, int):
+            return max(stored, 0)
+        content = segment.get("content") or ""
+        if not isinstance(content, str):
+            content = str(content)
+        digest = content_hash(content)
+        tokens = self._count_hashed(content, digest) if content else 0
+        segment["token_count"] = tokens
+        segment["token_hash"] = digest
+        return tokens
+
+    def annotate(self, segment: MutableMapping[str, Any]) -> MutableMapping[str, Any]:
+        """Stamps ``token_count`` and ``token_hash`` onto ``segment`` and returns it."""
+        segment.pop("token_hash", None)
+        self.segment_tokens(segment)
+        return segment
+
+    def message_tokens(self, message: Any) -> int:
+        """
+        Returns the token count of a chat message, including per-message overhead.
+
+        The count is memoized by the hash of the message's rendered text, so a
+        message is tokenized once while it stays in the memo. The message itself
+        is not modified: it is shared with the caller, checkpoints and outgoing
+        envelopes.
+        """
+        return self.count(message_text(message)) + MESSAGE_OVERHEAD_TOKENS
+
+
+def tally_tokens(tally: MutableMapping[str, Any], entries: Iterable[Tuple[str, int]]) -> int:
+    """
+    Brings a running token total up to date with the current items.
+
+    Args:
+        tally: A plain dict (``{"counts": {key: tokens}, "total": int}``) that
+            persists between calls; an empty dict starts a new tally.
+        entries: ``(key, tokens)`` of every current item, with the items'
+            stored counts.
+
+    Returns:
+        The new total. Only items that were added, removed or whose count
+        changed adjust it; unchanged items cost a dictionary lookup.
+    """
+    previous = tally.get("counts")
+    if not isinstance(previous, dict):
+        previous = {}
+    total = int(tally.get("total") or 0) if previous else 0
+    current: Dict[str, int] = {}
+    for key, tokens in entries:
+        current[key] = current.get(key, 0) + tokens
+    for key, tokens in current.items():
+        delta = tokens - previous.pop(key, 0)
+        if delta:
+            total += delta
+    total -= sum(previous.values())
+    tally["counts"] = current
+    tally["total"] = total
+    return total
+
+
+_DEFAULT_COUNTER: TokenCounter | None = None
+
+
+def get_token_counter() -> TokenCounter:
+    """Returns the process-wide `TokenCounter`, creating it on first use."""
+    global _DEFAULT_COUNTER
+    if _DEFAULT_COUNTER is None:
+        raw_size = os.environ.get("QUADRACODE_TOKEN_CACHE_SIZE", "")
+        try:
+            cache_size = int(raw_size) if raw_size.strip() else DEFAULT_CACHE_SIZE
+        except ValueError:
+            LOGGER.warning("Invalid QUADRACODE_TOKEN_CACHE_SIZE=%s; using %d", raw_size, DEFAULT_CACHE_SIZE)
+            cache_size = DEFAULT_CACHE_SIZE
+        _DEFAULT_COUNTER = TokenCounter(create_tokenizer(), cache_size=cache_size)
+    return _DEFAULT_COUNTER
+
+
+def count_tokens(text: str | None) -> int:
+    """Counts ``text`` with the process-wide `TokenCounter`."""
+    return get_token_counter().count(text)
+
+
+__all__ = [
+    "ApproximateBPETokenizer",
+    "MESSAGE_OVERHEAD_TOKENS",
+    "TiktokenTokenizer",
+    "TokenCounter",
+    "Tokenizer",
+    "content_hash",
+    "count_tokens",
+    "create_tokenizer",
+    "get_token_counter",
+    "message_text",
+    "register_tokenizer",
+    "tally_tokens",
+]
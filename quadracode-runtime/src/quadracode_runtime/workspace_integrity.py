@@ -8,18 +8,27 @@ moments, validated against a known-good state, and restored if unexpected
 changes or corruption are detected.
 
 Key functionalities include:
-- **Snapshotting**: Creating a compressed tarball (`.tar.gz`) of the workspace
-  and generating a detailed manifest of its contents, including file paths,
-  sizes, and SHA256 checksums.
+- **Snapshotting**: Storing the workspace contents and generating a detailed
+  manifest of them, including file paths, sizes, and SHA256 checksums. By
+  default files go to a content-addressed blob store (`snapshot_store`), so a
+  snapshot after a small edit only writes the changed files; the legacy
+  compressed tarball (`.tar.gz`) per snapshot remains available.
 - **Checksumming**: Calculating an aggregate checksum of the entire manifest to
   provide a single, efficient identifier for the workspace's state.
-- **Diffing**: Generating a textual diff between the manifests of two snapshots,
-  highlighting changes to the workspace over time.
+- **Diffing**: Computing a structured diff (added, removed, modified and renamed
+  files with byte deltas) between the manifests of two snapshots with
+  `quadracode_contracts.diff_manifests`, persisted as JSON next to the snapshot.
 - **Validation**: Comparing the live state of a workspace against a reference
-  snapshot's checksum to detect any drift or unauthorized modifications.
+  snapshot's checksum to detect any drift or unauthorized modifications. The
+  live manifest is computed incrementally (see `workspace_manifest`): only files
+  whose size, mtime or inode changed since the last scan are rehashed, and no
+  archive is built.
 - **Restoration**: Automatically restoring a workspace to the state of a given
-  snapshot from its archive, either by clearing and extracting to a host path
-  or by managing a Docker volume.
+  snapshot. Blob snapshots also record directories, symlinks and hard links;
+  restoring one onto a host path only rewrites files whose digest differs,
+  deletes what the snapshot does not contain and recreates the rest of the
+  tree. Archives are extracted after clearing the directory, and Docker
+  volumes are replaced wholesale.
 
 The module is designed to be robust, using thread-safe operations and handling
 both local file systems and Docker environments. It integrates with the runtime
@@ -28,13 +37,11 @@ state (`QuadraCodeState`) to log its activities and respond to system-level even
 
 from __future__ import annotations
 
-import difflib
 import hashlib
 import json
 import logging
 import os
 import shutil
-import subprocess
 import tarfile
 import tempfile
 import uuid
@@ -44,12 +51,35 @@ from pathlib import Path
 from threading import Lock
 from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Optional
 
-from quadracode_contracts import WorkspaceSnapshotRecord
+from quadracode_contracts import WorkspaceManifestDiff, WorkspaceSnapshotRecord, diff_manifests
+from quadracode_tools.client.docker_backend import (
+    CLIDockerBackend,
+    DockerBackend,
+    DockerError,
+    get_docker_backend,
+)
 
+from .snapshot_store import SnapshotBlobStore
 from .state import ExhaustionMode, QuadraCodeState
+from .workspace_manifest import (
+    ManifestCache,
+    ManifestScanStats,
+    VolumeScanError,
+    aggregate_checksum,
+    default_hash_workers,
+    file_entries,
+    scan_host_manifest,
+    scan_volume_manifest,
+)
 
 logger = logging.getLogger(__name__)
 
+# Restore order of manifest entries: a link can only be created once its
+# directory (and, for hard links, its source file) exists.
+_RESTORE_ORDER = {"dir": 0, None: 1, "hardlink": 2, "symlink": 3}
+# Captures redone when another runtime deletes a blob before it is referenced.
+_BLOB_CAPTURE_ATTEMPTS = 3
+
 
 def _now_iso() -> str:
     """Returns the current UTC time as an ISO 8601 string."""
@@ -72,6 +102,9 @@ class WorkspaceValidationResult:
         expected_checksum: The reference checksum from the snapshot.
         restored: A boolean indicating if a restoration was attempted and successful.
         error: An optional error message if validation or restoration failed.
+        files_scanned: Number of files in the live manifest.
+        files_rehashed: Number of those files whose content had to be hashed again.
+        drift: Diff summary of the live workspace against the reference, when it drifted.
         timestamp: The ISO 8601 timestamp of when the validation was performed.
     """
 
@@ -80,6 +113,9 @@ class WorkspaceValidationResult:
     expected_checksum: Optional[str]
     restored: bool = False
     error: Optional[str] = None
+    files_scanned: int = 0
+    files_rehashed: int = 0
+    drift: Optional[Dict[str, int]] = None
     timestamp: str = _now_iso()
 
 
@@ -94,12 +130,17 @@ class WorkspaceIntegrityManager:
     interfere with each other.
 
     Configuration can be provided during instantiation or via environment variables
-    like `QUADRACODE_WORKSPACE_SNAPSHOT_ROOT` and `QUADRACODE_DOCKER_BIN`.
+    like `QUADRACODE_WORKSPACE_SNAPSHOT_ROOT`, `QUADRACODE_WORKSPACE_SNAPSHOT_STORAGE`
+    (``blobs`` or ``archive``), `QUADRACODE_DOCKER_BACKEND` and
+    `QUADRACODE_MANIFEST_HASH_WORKERS`.
 
     Attributes:
         snapshot_root: The base directory where all snapshot artifacts are stored.
-        docker_bin: The path to the Docker executable.
+        docker_bin: An explicit Docker executable; forces the CLI backend.
         snapshot_image: The Docker image used for volume operations (e.g., 'alpine').
+        hash_workers: Threads used to hash changed files of host workspaces.
+        storage: ``"blobs"`` for content-addressed snapshots, ``"archive"`` for tarballs.
+        blob_store: The `SnapshotBlobStore` shared by every workspace under `snapshot_root`.
     """
 
     SNAPSHOT_LIMIT = 5
@@ -110,6 +151,10 @@ class WorkspaceIntegrityManager:
         snapshot_root: str | Path | None = None,
         docker_bin: Optional[str] = None,
         snapshot_image: Optional[str] = None,
+        docker_backend: Optional[DockerBackend] = None,
+        hash_workers: Optional[int] = None,
+        storage: Optional[str] = None,
+        blob_compression: Optional[str] = None,
     ) -> None:
         root = snapshot_root or os.environ.get(
             "QUADRACODE_WORKSPACE_SNAPSHOT_ROOT",
@@ -117,11 +162,20 @@ class WorkspaceIntegrityManager:
         )
         self.snapshot_root = Path(root).expanduser().resolve()
         self.snapshot_root.mkdir(parents=True, exist_ok=True)
-        self.docker_bin = docker_bin or os.environ.get("QUADRACODE_DOCKER_BIN", "docker")
+        self.docker_bin = docker_bin
+        self._docker_backend = docker_backend or (CLIDockerBackend(docker_bin) if docker_bin else None)
         self.snapshot_image = snapshot_image or os.environ.get(
             "QUADRACODE_WORKSPACE_SNAPSHOT_IMAGE",
             "alpine:3.19",
         )
+        self.hash_workers = hash_workers or default_hash_workers()
+        self.storage = (
+            storage or os.environ.get("QUADRACODE_WORKSPACE_SNAPSHOT_STORAGE", "blobs")
+        ).lower()
+        if self.storage not in {"blobs", "archive"}:
+            raise WorkspaceIntegrityError(f"unknown snapshot storage {self.storage!r}")
+        self.blob_store = SnapshotBlobStore(self.snapshot_root, compression=blob_compression)
+        self._manifest_caches: Dict[str, ManifestCache] = {}
         self._lock = Lock()
 
     def capture_snapshot(
@@ -162,25 +216,31 @@ class WorkspaceIntegrityManager:
             workspace_id = self._coerce_workspace_id(descriptor)
             workspace_dir = self._prepare_workspace_dir(workspace_id)
             prefix = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
-            archive_path, manifest, checksum = self._collect_workspace_state(
-                descriptor,
-                workspace_dir=workspace_dir,
-                prefix=prefix,
-                persist_archive=True,
-            )
+            if self.storage == "blobs":
+                manifest = self._capture_blobs(descriptor, workspace_id)
+                checksum = self._aggregate_checksum(manifest)
+                archive_path = self.blob_store.blob_root
+            else:
+                archive_path, manifest, checksum = self._collect_workspace_state(
+                    descriptor,
+                    workspace_dir=workspace_dir,
+                    prefix=prefix,
+                )
             manifest_path = workspace_dir / f"{prefix}-manifest.json"
             self._write_manifest(manifest_path, manifest)
             diff_path = None
+            snapshot_metadata = dict(metadata or {})
             if previous_snapshot:
                 try:
                     previous_manifest = self._read_manifest(Path(previous_snapshot.manifest_path))
-                    diff_text = self._generate_manifest_diff(previous_manifest, manifest)
-                except FileNotFoundError:
-                    diff_text = ""
-                if diff_text.strip():
-                    diff_path_obj = workspace_dir / f"{prefix}-diff.patch"
-                    diff_path_obj.write_text(diff_text, encoding="utf-8")
-                    diff_path = diff_path_obj
+                except (FileNotFoundError, ValueError):
+                    previous_manifest = None
+                if previous_manifest is not None:
+                    diff = diff_manifests(file_entries(previous_manifest), file_entries(manifest))
+                    snapshot_metadata["diff_summary"] = diff.summary()
+                    if diff.changed:
+                        diff_path = workspace_dir / f"{prefix}-diff.json"
+                        self._write_manifest_diff(diff_path, diff)
             snapshot = WorkspaceSnapshotRecord(
                 snapshot_id=f"{workspace_id}-{prefix}",
                 workspace_id=workspace_id,
@@ -189,13 +249,14 @@ class WorkspaceIntegrityManager:
                 checksum=checksum,
                 manifest_path=str(manifest_path),
                 archive_path=str(archive_path),
+                storage="blobs" if self.storage == "blobs" else "archive",
                 diff_path=str(diff_path) if diff_path else None,
                 exhaustion_mode=(
                     exhaustion_mode.value
                     if isinstance(exhaustion_mode, ExhaustionMode)
                     else exhaustion_mode
                 ),
-                metadata=metadata or {},
+                metadata=snapshot_metadata,
             )
             return snapshot
 
@@ -226,14 +287,18 @@ class WorkspaceIntegrityManager:
         """
 
         with self._lock:
-            workspace_dir = self._prepare_workspace_dir(reference.workspace_id)
-            _, manifest, checksum = self._collect_workspace_state(
-                descriptor,
-                workspace_dir=workspace_dir,
-                prefix=f"validation-{uuid.uuid4().hex[:6]}",
-                persist_archive=False,
-            )
+            stats = ManifestScanStats()
+            manifest = self._scan_workspace(descriptor, reference.workspace_id, stats)
+            checksum = aggregate_checksum(manifest)
             valid = checksum == reference.checksum
+            drift: Optional[Dict[str, int]] = None
+            if not valid:
+                try:
+                    reference_manifest = self._read_manifest(Path(reference.manifest_path))
+                except (FileNotFoundError, ValueError):
+                    reference_manifest = None
+                if reference_manifest is not None:
+                    drift = diff_manifests(file_entries(reference_manifest), manifest).summary()
             restored = False
             error: Optional[str] = None
             if not valid and auto_restore:
@@ -248,8 +313,35 @@ class WorkspaceIntegrityManager:
                 expected_checksum=reference.checksum,
                 restored=restored,
                 error=error,
+                files_scanned=stats.files,
+                files_rehashed=stats.rehashed,
+                drift=drift,
             )
 
+    def release_snapshot(self, snapshot: WorkspaceSnapshotRecord) -> int:
+        """
+        Drops a snapshot that is no longer retained.
+
+        For content-addressed snapshots this releases the blob references held by
+        the manifest, deletes the manifest and diff, and deletes the blobs no
+        other snapshot references. Archive snapshots are left on disk.
+
+        Returns:
+            The number of blobs deleted.
+        """
+        if snapshot.storage != "blobs":
+            return 0
+        with self._lock:
+            try:
+                manifest = self._read_manifest(Path(snapshot.manifest_path))
+            except (FileNotFoundError, ValueError):
+                return 0
+            released = self.blob_store.release(entry["sha256"] for entry in file_entries(manifest))
+            for artifact in (snapshot.manifest_path, snapshot.diff_path):
+                if artifact:
+                    Path(artifact).unlink(missing_ok=True)
+            return self.blob_store.delete_blobs(released)
+
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
@@ -271,34 +363,158 @@ class WorkspaceIntegrityManager:
         *,
         workspace_dir: Path,
         prefix: str,
-        persist_archive: bool,
     ) -> tuple[Path, List[Dict[str, Any]], str]:
-        if persist_archive:
-            archive_path = workspace_dir / f"{prefix}.tar.gz"
-        else:
-            tmp_fd, tmp_path = tempfile.mkstemp(suffix=".tar.gz")
-            os.close(tmp_fd)
-            archive_path = Path(tmp_path)
+        # The manifest is read back from the archive so that it describes exactly
+        # what a restore would bring back.
+        archive_path = workspace_dir / f"{prefix}.tar.gz"
+        self._export_workspace(descriptor, archive_path)
+        manifest = self._manifest_from_archive(archive_path)
+        checksum = self._aggregate_checksum(manifest)
+        return archive_path, manifest, checksum
+
+    def _host_root(self, descriptor: Mapping[str, Any]) -> Optional[Path]:
+        host_path = descriptor.get("host_path")
+        if isinstance(host_path, str) and host_path.strip():
+            return Path(host_path.strip())
+        return None
+
+    def _manifest_cache(self, workspace_id: str) -> ManifestCache:
+        cache = self._manifest_caches.get(workspace_id)
+        if cache is None:
+            cache = ManifestCache(self._prepare_workspace_dir(workspace_id) / "manifest-cache.json")
+            self._manifest_caches[workspace_id] = cache
+        return cache
+
+    def _scan_workspace(
+        self,
+        descriptor: Mapping[str, Any],
+        workspace_id: str,
+        stats: ManifestScanStats,
+    ) -> List[Dict[str, Any]]:
+        """Computes the live manifest without archiving, rehashing only changed files."""
+        cache = self._manifest_cache(workspace_id)
+        root = self._host_root(descriptor)
+        if root is not None:
+            if not root.exists():
+                raise WorkspaceIntegrityError(f"host workspace path {root} does not exist")
+            return scan_host_manifest(root, cache, max_workers=self.hash_workers, stats=stats)
+        volume = descriptor.get("volume")
+        if not isinstance(volume, str) or not volume.strip():
+            raise WorkspaceIntegrityError("workspace descriptor missing volume")
+        try:
+            return scan_volume_manifest(
+                self._docker(), volume.strip(), cache, image=self.snapshot_image, stats=stats
+            )
+        except (DockerError, VolumeScanError) as exc:
+            raise WorkspaceIntegrityError(f"Failed to scan workspace volume {volume}: {exc}") from exc
+
+    def _capture_blobs(self, descriptor: Mapping[str, Any], workspace_id: str) -> List[Dict[str, Any]]:
+        """Stores the workspace's blobs and takes a reference on each of them.
+
+        The store's lock is only held while the references are recorded, so
+        another runtime pruning the shared store can delete a blob that was
+        found present before this capture references it. Such a capture is
+        released and redone; the lost blobs are then written again.
+        """
+        for _ in range(_BLOB_CAPTURE_ATTEMPTS):
+            manifest = self._store_workspace_blobs(descriptor, workspace_id)
+            digests = {entry["sha256"] for entry in file_entries(manifest)}
+            self.blob_store.acquire(digests)
+            # Referenced blobs are never deleted, so this check cannot go stale.
+            if all(self.blob_store.has(digest) for digest in digests):
+                return manifest
+            self.blob_store.release(digests)
+        raise WorkspaceIntegrityError(
+            f"snapshot blobs of workspace {workspace_id} kept being deleted while capturing"
+        )
+
+    def _store_workspace_blobs(
+        self,
+        descriptor: Mapping[str, Any],
+        workspace_id: str,
+    ) -> List[Dict[str, Any]]:
+        """Writes the workspace files missing from the blob store and returns the manifest.
+
+        Besides the files, the manifest records directories, symlinks and hard
+        links as layout entries so that a restore can rebuild the whole tree.
+        """
+        root = self._host_root(descriptor)
+        if root is None:
+            return self._store_volume_blobs(descriptor)
+        if not root.exists():
+            raise WorkspaceIntegrityError(f"host workspace path {root} does not exist")
+        layout: List[Dict[str, Any]] = []
+        ingested: Dict[Path, int] = {}
+
+        def _ingest(path: Path) -> str:
+            # Changed files are stored while they are hashed, so each is read once
+            # and the manifest describes the stored bytes.
+            digest, ingested[path] = self.blob_store.ingest_file(path)
+            return digest
 
         try:
-            self._export_workspace(descriptor, archive_path)
-            manifest = self._manifest_from_archive(archive_path)
-            checksum = self._aggregate_checksum(manifest)
-        finally:
-            if not persist_archive:
+            manifest = scan_host_manifest(
+                root,
+                self._manifest_cache(workspace_id),
+                max_workers=self.hash_workers,
+                layout=layout,
+                hasher=_ingest,
+            )
+        except OSError as exc:
+            raise WorkspaceIntegrityError(f"Failed to store workspace {workspace_id}: {exc}") from exc
+        stored: List[Dict[str, Any]] = []
+        for entry in manifest:
+            path = root / entry["path"]
+            digest, size = entry["sha256"], ingested.get(path)
+            if size is None:
+                # Unchanged file: only read if its blob has gone missing.
                 try:
-                    archive_path.unlink()
+                    digest, size = self.blob_store.ingest_file(path, known_digest=digest)
                 except FileNotFoundError:
-                    pass
-        if not persist_archive:
-            # ensure callers don't rely on deleted archives
-            archive_path = workspace_dir / f"{prefix}-transient"
-        return archive_path, manifest, checksum
+                    continue  # deleted since the scan
+                except OSError as exc:
+                    raise WorkspaceIntegrityError(f"Failed to store {entry['path']}: {exc}") from exc
+            stored.append({**entry, "sha256": digest, "size": size})
+        stored.extend(layout)
+        stored.sort(key=lambda item: item["path"])
+        return stored
+
+    def _store_volume_blobs(self, descriptor: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        volume = descriptor.get("volume")
+        if not isinstance(volume, str) or not volume.strip():
+            raise WorkspaceIntegrityError("workspace descriptor missing volume")
+        manifest: List[Dict[str, Any]] = []
+        with tempfile.TemporaryFile() as archive:
+            try:
+                self._docker().export_volume(volume.strip(), archive, image=self.snapshot_image)
+            except DockerError as exc:
+                raise WorkspaceIntegrityError(f"Failed to archive workspace volume {volume}: {exc}") from exc
+            archive.seek(0)
+            with tarfile.open(fileobj=archive, mode="r:gz") as tar:
+                for member in tar:
+                    if member.isdir():
+                        manifest.append({"path": member.name, "type": "dir", "mode": member.mode})
+                        continue
+                    if member.issym() or member.islnk():
+                        kind = "symlink" if member.issym() else "hardlink"
+                        manifest.append({"path": member.name, "type": kind, "target": member.linkname})
+                        continue
+                    if not member.isfile():
+                        continue
+                    extracted = tar.extractfile(member)
+                    if extracted is None:
+                        continue
+                    digest, size = self.blob_store.ingest_stream(extracted)
+                    manifest.append(
+                        {"path": member.name, "size": size, "sha256": digest, "mode": member.mode}
+                    )
+        manifest.sort(key=lambda item: item["path"])
+        return manifest
 
     def _export_workspace(self, descriptor: Mapping[str, Any], archive_path: Path) -> None:
-        host_path = descriptor.get("host_path")
-        if isinstance(host_path, str) and host_path.strip():
-            self._archive_host_path(Path(host_path.strip()), archive_path)
+        host_root = self._host_root(descriptor)
+        if host_root is not None:
+            self._archive_host_path(host_root, archive_path)
             return
         volume = descriptor.get("volume")
         if not isinstance(volume, str) or not volume.strip():
@@ -311,24 +527,16 @@ class WorkspaceIntegrityManager:
         with tarfile.open(archive_path, "w:gz") as tar:
             tar.add(root, arcname=".")
 
+    def _docker(self) -> DockerBackend:
+        return self._docker_backend or get_docker_backend()
+
     def _archive_volume(self, volume: str, archive_path: Path) -> None:
-        command = [
-            "run",
-            "--rm",
-            "--mount",
-            f"type=volume,source={volume},target=/snapshot",
-            self.snapshot_image,
-            "sh",
-            "-c",
-            "cd /snapshot && tar czf - .",
-        ]
         archive_path.parent.mkdir(parents=True, exist_ok=True)
-        with archive_path.open("wb") as stdout:
-            result = self._run_docker(command, stdout=stdout)
-        if result.returncode != 0:
-            raise WorkspaceIntegrityError(
-                f"Failed to archive workspace volume {volume}: {result.stderr.decode().strip()}"
-            )
+        try:
+            with archive_path.open("wb") as handle:
+                self._docker().export_volume(volume, handle, image=self.snapshot_image)
+        except DockerError as exc:
+            raise WorkspaceIntegrityError(f"Failed to archive workspace volume {volume}: {exc}") from exc
 
     def _manifest_from_archive(self, archive_path: Path) -> List[Dict[str, Any]]:
         manifest: List[Dict[str, Any]] = []
@@ -356,12 +564,7 @@ class WorkspaceIntegrityManager:
         return manifest
 
     def _aggregate_checksum(self, manifest: Iterable[Dict[str, Any]]) -> str:
-        digest = hashlib.sha256()
-        for entry in manifest:
-            digest.update(entry.get("path", "").encode("utf-8"))
-            digest.update(str(entry.get("size", 0)).encode("utf-8"))
-            digest.update(entry.get("sha256", "").encode("utf-8"))
-        return digest.hexdigest()
+        return aggregate_checksum(manifest)
 
     def _write_manifest(self, manifest_path: Path, manifest: List[Dict[str, Any]]) -> None:
         manifest_path.parent.mkdir(parents=True, exist_ok=True)
@@ -377,35 +580,20 @@ class WorkspaceIntegrityManager:
             raise ValueError("manifest payload malformed")
         return [dict(entry) for entry in payload]
 
-    def _generate_manifest_diff(
-        self,
-        previous: Iterable[Mapping[str, Any]],
-        current: Iterable[Mapping[str, Any]],
-    ) -> str:
-        def _to_lines(entries: Iterable[Mapping[str, Any]]) -> List[str]:
-            lines: List[str] = []
-            for entry in entries:
-                lines.append(
-                    f"{entry.get('path','')}|{entry.get('size',0)}|{entry.get('sha256','')}"
-                )
-            return lines
-
-        previous_lines = _to_lines(previous)
-        current_lines = _to_lines(current)
-        diff = difflib.unified_diff(
-            previous_lines,
-            current_lines,
-            fromfile="previous",
-            tofile="current",
-            lineterm="",
+    def _write_manifest_diff(self, diff_path: Path, diff: WorkspaceManifestDiff) -> None:
+        diff_path.write_text(
+            json.dumps(diff.model_dump(), indent=2, sort_keys=True),
+            encoding="utf-8",
         )
-        return "\n".join(diff)
 
     def _restore_from_snapshot(
         self,
         descriptor: Mapping[str, Any],
         snapshot: WorkspaceSnapshotRecord,
     ) -> None:
+        if snapshot.storage == "blobs":
+            self._restore_from_blobs(descriptor, snapshot)
+            return
         archive_path = Path(snapshot.archive_path)
         if not archive_path.exists():
             raise WorkspaceIntegrityError(f"snapshot archive missing: {archive_path}")
@@ -418,6 +606,171 @@ class WorkspaceIntegrityManager:
             raise WorkspaceIntegrityError("workspace descriptor missing volume for restore")
         self._restore_volume(volume.strip(), archive_path)
 
+    def _restore_from_blobs(
+        self,
+        descriptor: Mapping[str, Any],
+        snapshot: WorkspaceSnapshotRecord,
+    ) -> None:
+        try:
+            manifest = self._read_manifest(Path(snapshot.manifest_path))
+        except (FileNotFoundError, ValueError) as exc:
+            raise WorkspaceIntegrityError(f"snapshot manifest unavailable: {exc}") from exc
+        missing = [
+            entry["path"] for entry in file_entries(manifest) if not self.blob_store.has(entry["sha256"])
+        ]
+        if missing:
+            raise WorkspaceIntegrityError(f"snapshot blobs missing for {len(missing)} file(s)")
+        root = self._host_root(descriptor)
+        if root is not None:
+            self._restore_host_from_blobs(root, snapshot.workspace_id, manifest)
+            return
+        volume = descriptor.get("volume")
+        if not isinstance(volume, str) or not volume.strip():
+            raise WorkspaceIntegrityError("workspace descriptor missing volume for restore")
+        with tempfile.TemporaryFile() as archive:
+            with tarfile.open(fileobj=archive, mode="w:gz") as tar:
+                # Directories first, and links only once the files they name exist.
+                for entry in sorted(manifest, key=lambda item: (_RESTORE_ORDER[item.get("type")], item["path"])):
+                    info = tarfile.TarInfo(entry["path"])
+                    kind = entry.get("type")
+                    if kind == "dir":
+                        info.type = tarfile.DIRTYPE
+                        info.mode = int(entry.get("mode", 0o755))
+                        tar.addfile(info)
+                    elif kind in ("symlink", "hardlink"):
+                        info.type = tarfile.SYMTYPE if kind == "symlink" else tarfile.LNKTYPE
+                        info.linkname = entry["target"]
+                        tar.addfile(info)
+                    else:
+                        info.size = int(entry["size"])
+                        info.mode = int(entry.get("mode", 0o644))
+                        with self.blob_store.open_blob(entry["sha256"]) as blob:
+                            tar.addfile(info, blob)
+            archive.seek(0)
+            try:
+                self._docker().import_volume(volume.strip(), archive, image=self.snapshot_image)
+            except DockerError as exc:
+                raise WorkspaceIntegrityError(f"Failed to restore workspace volume {volume}: {exc}") from exc
+
+    def _restore_host_from_blobs(
+        self,
+        root: Path,
+        workspace_id: str,
+        manifest: List[Dict[str, Any]],
+    ) -> None:
+        root.mkdir(parents=True, exist_ok=True)
+        cache = self._manifest_cache(workspace_id)
+        live_layout: List[Dict[str, Any]] = []
+        live = scan_host_manifest(root, cache, max_workers=self.hash_workers, layout=live_layout)
+        live_entries = {entry["path"]: entry for entry in live}
+        files = file_entries(manifest)
+        wanted = {entry["path"] for entry in files}
+        layout = {entry["path"]: entry for entry in manifest if "type" in entry}
+        # Snapshots taken before layout entries were recorded only describe
+        # files; for those, links and directories are left alone.
+        complete = "." in layout
+
+        removed = 0
+        for path in live_entries.keys() - wanted:
+            target = root / path
+            target.unlink(missing_ok=True)
+            removed += 1
+            if not complete:
+                self._prune_empty_parents(target.parent, root)
+        if complete:
+            for entry in live_layout:
+                expected = layout.get(entry["path"])
+                target = root / entry["path"]
+                if entry["type"] == "dir":
+                    # Directory modes are applied after the files are written.
+                    if expected is None or expected["type"] != "dir":
+                        if target.is_dir() and not target.is_symlink():
+                            shutil.rmtree(target)
+                            removed += 1
+                elif expected != entry:
+                    target.unlink(missing_ok=True)
+                    removed += 1
+            for entry in sorted(layout.values(), key=lambda item: item["path"]):
+                if entry["type"] == "dir":
+                    target = root / entry["path"]
+                    if target.is_symlink() or target.is_file():
+                        target.unlink()
+                    target.mkdir(parents=True, exist_ok=True)
+
+        rewritten = 0
+        for entry in files:
+            target = root / entry["path"]
+            mode = entry.get("mode")
+            current = live_entries.get(entry["path"])
+            if current is not None and current["sha256"] == entry["sha256"]:
+                if mode is not None and current.get("mode") != mode:
+                    os.chmod(target, mode)
+                continue
+            if target.is_symlink() or target.is_file():
+                target.unlink()
+            elif target.is_dir():
+                shutil.rmtree(target)
+            for parent in target.relative_to(root).parents:
+                # A file (or link) may occupy a directory the snapshot needs.
+                candidate = root / parent
+                if candidate != root and (candidate.is_symlink() or candidate.is_file()):
+                    candidate.unlink()
+            try:
+                self.blob_store.restore_file(entry["sha256"], target, mode=mode)
+            except OSError as exc:
+                raise WorkspaceIntegrityError(f"Failed to restore {entry['path']}: {exc}") from exc
+            rewritten += 1
+        if complete:
+            try:
+                self._restore_host_layout(root, layout.values())
+            except OSError as exc:
+                raise WorkspaceIntegrityError(f"Failed to restore workspace layout: {exc}") from exc
+        logger.debug(
+            "restored %s from blobs: %d rewritten, %d unchanged, %d removed",
+            root,
+            rewritten,
+            len(files) - rewritten,
+            removed,
+        )
+
+    def _restore_host_layout(self, root: Path, layout: Iterable[Dict[str, Any]]) -> None:
+        """Recreates hard links and symlinks, then applies directory modes deepest first."""
+        directories: List[Dict[str, Any]] = []
+        for entry in sorted(layout, key=lambda item: (_RESTORE_ORDER[item["type"]], item["path"])):
+            target = root / entry["path"]
+            kind = entry["type"]
+            if kind == "dir":
+                directories.append(entry)
+                continue
+            if kind == "hardlink":
+                source = root / entry["target"]
+                if not source.is_file() or source.is_symlink():
+                    logger.warning("hard link source %s missing; skipping %s", source, target)
+                    continue
+                if target.is_file() and not target.is_symlink() and os.path.samefile(source, target):
+                    continue
+            elif target.is_symlink() and os.readlink(target) == entry["target"]:
+                continue
+            if target.is_dir() and not target.is_symlink():
+                shutil.rmtree(target)
+            else:
+                target.unlink(missing_ok=True)
+            if kind == "hardlink":
+                os.link(source, target)
+            else:
+                os.symlink(entry["target"], target)
+        for entry in reversed(directories):
+            if "mode" in entry:
+                os.chmod(root / entry["path"], int(entry["mode"]))
+
+    def _prune_empty_parents(self, directory: Path, root: Path) -> None:
+        while directory != root and root in directory.parents:
+            try:
+                directory.rmdir()
+            except OSError:
+                return
+            directory = directory.parent
+
     def _restore_host_path(self, root: Path, archive_path: Path) -> None:
         root.mkdir(parents=True, exist_ok=True)
         self._clear_directory(root)
@@ -425,23 +778,11 @@ class WorkspaceIntegrityManager:
             tar.extractall(path=root, filter="data")
 
     def _restore_volume(self, volume: str, archive_path: Path) -> None:
-        command = [
-            "run",
-            "--rm",
-            "--mount",
-            f"type=volume,source={volume},target=/restore",
-            "-i",
-            self.snapshot_image,
-            "sh",
-            "-c",
-            "cd /restore && find . -mindepth 1 -delete && tar xzf -",
-        ]
-        with archive_path.open("rb") as stdin:
-            result = self._run_docker(command, stdin=stdin)
-        if result.returncode != 0:
-            raise WorkspaceIntegrityError(
-                f"Failed to restore workspace volume {volume}: {result.stderr.decode().strip()}"
-            )
+        try:
+            with archive_path.open("rb") as handle:
+                self._docker().import_volume(volume, handle, image=self.snapshot_image)
+        except DockerError as exc:
+            raise WorkspaceIntegrityError(f"Failed to restore workspace volume {volume}: {exc}") from exc
 
     def _clear_directory(self, root: Path) -> None:
         for entry in list(root.iterdir()):
@@ -453,26 +794,6 @@ class WorkspaceIntegrityManager:
             except FileNotFoundError:
                 continue
 
-    def _run_docker(
-        self,
-        args: List[str],
-        *,
-        stdout: Optional[Any] = None,
-        stdin: Optional[Any] = None,
-    ) -> subprocess.CompletedProcess[bytes]:
-        command = [self.docker_bin, *args]
-        try:
-            result = subprocess.run(
-                command,
-                stdout=stdout or subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                stdin=stdin,
-                check=False,
-            )
-            return result
-        except FileNotFoundError as exc:  # pragma: no cover - depends on env
-            raise WorkspaceIntegrityError(f"Docker binary not found at '{self.docker_bin}'") from exc
-
 
 _MANAGER: WorkspaceIntegrityManager | None = None
 _MANAGER_LOCK = Lock()
@@ -575,6 +896,15 @@ def capture_workspace_snapshot(
     snapshots.append(snapshot)
     limit = max_snapshots or WorkspaceIntegrityManager.SNAPSHOT_LIMIT
     if limit > 0 and len(snapshots) > limit:
+        for dropped in snapshots[:-limit]:
+            record = dropped if isinstance(dropped, WorkspaceSnapshotRecord) else None
+            if record is None and isinstance(dropped, Mapping):
+                try:
+                    record = WorkspaceSnapshotRecord(**dropped)
+                except Exception:  # noqa: BLE001
+                    record = None
+            if record is not None:
+                manager.release_snapshot(record)
         del snapshots[:-limit]
     _record_workspace_metric(
         state,
@@ -585,6 +915,10 @@ def capture_workspace_snapshot(
             "stage": stage,
             "exhaustion_mode": snapshot.exhaustion_mode,
             "archive_path": snapshot.archive_path,
+            "storage": snapshot.storage,
+            "diff_path": snapshot.diff_path,
+            "diff_summary": snapshot.metadata.get("diff_summary"),
+            **{f"blob_{key}": value for key, value in manager.blob_store.stats().items()},
         },
     )
     return snapshot
@@ -658,7 +992,11 @@ def validate_workspace_integrity(
         "restored": result.restored,
         "expected_checksum": result.expected_checksum,
         "actual_checksum": result.actual_checksum,
+        "files_scanned": result.files_scanned,
+        "files_rehashed": result.files_rehashed,
     }
+    if result.drift is not None:
+        payload["drift"] = result.drift
     if result.error:
         payload["error"] = result.error
     _record_workspace_metric(state, "workspace_validation", payload)
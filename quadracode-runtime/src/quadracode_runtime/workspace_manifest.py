@@ -0,0 +1,451 @@
+"""
+Incremental manifests of workspace contents for integrity validation.
+
+A manifest lists every regular file of a workspace as ``{"path", "size",
+"sha256"}`` (plus ``"mode"`` where known) with ``./``-relative paths, exactly as
+the manifest read back from a snapshot archive, so checksums computed either way
+are interchangeable. Blob snapshots additionally record layout entries, which
+carry a ``"type"`` of ``dir``, ``symlink`` or ``hardlink``; `file_entries`
+drops them wherever only file contents matter (checksums and diffs).
+
+Rather than archiving the workspace and rehashing every byte, the scanners here
+read file metadata first and consult a `ManifestCache` keyed by ``(path, size,
+mtime, inode)``; only files whose stamp changed since the previous scan are
+hashed again. Host directories are walked directly and hashed on a thread pool
+(``hashlib`` releases the GIL, so hashing uses every core). Docker volumes are
+listed with one throwaway container, and the changed files are hashed inside a
+second one with ``xargs -P`` so their contents never leave the Docker host.
+
+Environment Variables:
+    QUADRACODE_MANIFEST_HASH_WORKERS: Threads used to hash host files
+        (default: CPU count).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shlex
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from quadracode_tools.client.docker_backend import ContainerSpec, DockerBackend
+
+logger = logging.getLogger(__name__)
+
+FileStamp = Tuple[int, int, int]
+"""``(size, mtime, inode)`` of a file; any difference means it must be rehashed."""
+
+_HASH_CHUNK = 1024 * 1024
+_VOLUME_MOUNT = "/snapshot"
+_VOLUME_ARGS_BUDGET = 96 * 1024
+# Whole-second mtimes are the coarsest granularity either scanner has to expect.
+_RACY_WINDOW_NS = 1_000_000_000
+
+
+def default_hash_workers() -> int:
+    raw = os.environ.get("QUADRACODE_MANIFEST_HASH_WORKERS")
+    if raw:
+        try:
+            return max(1, int(raw))
+        except ValueError:
+            logger.warning("Ignoring invalid QUADRACODE_MANIFEST_HASH_WORKERS=%r", raw)
+    return os.cpu_count() or 1
+
+
+def file_entries(manifest: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Returns the regular-file entries of a manifest, without layout entries."""
+    return [entry for entry in manifest if "type" not in entry]
+
+
+def aggregate_checksum(manifest: Iterable[Dict[str, Any]]) -> str:
+    """Returns the single checksum identifying a workspace state.
+
+    Layout entries are skipped, since live scans only list regular files.
+    """
+    digest = hashlib.sha256()
+    for entry in manifest:
+        if "type" in entry:
+            continue
+        digest.update(entry.get("path", "").encode("utf-8"))
+        digest.update(str(entry.get("size", 0)).encode("utf-8"))
+        digest.update(entry.get("sha256", "").encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass
+class ManifestScanStats:
+    """What the last scan had to do: files seen, and files actually hashed."""
+
+    files: int = 0
+    rehashed: int = 0
+    bytes_rehashed: int = 0
+
+
+class ManifestCache:
+    """
+    File digests of one workspace, keyed by path and validated by stamp.
+
+    The cache is persisted as JSON (when a path is given) so that a restarted
+    runtime does not have to rehash an unchanged workspace.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path
+        self._entries: Dict[str, Tuple[FileStamp, str]] = {}
+        self._dirty = False
+        self._lock = Lock()
+        if path is not None:
+            self._load(path)
+
+    def _load(self, path: Path) -> None:
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            logger.warning("Discarding unreadable manifest cache %s: %s", path, exc)
+            return
+        if not isinstance(payload, dict):
+            return
+        for name, record in payload.items():
+            try:
+                size, mtime, inode, digest = record
+                self._entries[name] = ((int(size), int(mtime), int(inode)), str(digest))
+            except (TypeError, ValueError):
+                continue
+
+    def lookup(self, path: str, stamp: FileStamp) -> Optional[str]:
+        record = self._entries.get(path)
+        if record is None or record[0] != stamp:
+            return None
+        return record[1]
+
+    def update(self, path: str, stamp: FileStamp, digest: str) -> None:
+        with self._lock:
+            self._entries[path] = (stamp, digest)
+            self._dirty = True
+
+    def retain(self, paths: Iterable[str]) -> None:
+        """Forgets files that no longer exist."""
+        keep = set(paths)
+        with self._lock:
+            stale = [name for name in self._entries if name not in keep]
+            for name in stale:
+                del self._entries[name]
+            self._dirty = self._dirty or bool(stale)
+
+    def save(self) -> None:
+        if self.path is None or not self._dirty:
+            return
+        payload = {
+            name: [stamp[0], stamp[1], stamp[2], digest]
+            for name, (stamp, digest) in self._entries.items()
+        }
+        tmp_path = self.path.with_suffix(".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(payload), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as exc:
+            logger.warning("Unable to persist manifest cache %s: %s", self.path, exc)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(_HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _walk_host_files(
+    root: Path,
+    layout: Optional[List[Dict[str, Any]]] = None,
+) -> List[Tuple[str, Path, os.stat_result]]:
+    """Lists regular files in the order `tarfile.add` archives them.
+
+    Symlinks are not followed, and a file hard-linked several times is listed
+    once (the archive stores later links as link members, not files). When
+    ``layout`` is given it receives what the file list leaves out: one entry
+    per directory (including ``.``) with its mode, per symlink with its target,
+    and per later name of a hard-linked file with the first name as target.
+    """
+    files: List[Tuple[str, Path, os.stat_result]] = []
+    seen_links: Dict[Tuple[int, int], str] = {}
+    if layout is not None:
+        layout.append({"path": ".", "type": "dir", "mode": stat.S_IMODE(root.lstat().st_mode)})
+
+    def _visit(directory: Path, arcname: str) -> None:
+        for name in sorted(os.listdir(directory)):
+            path = directory / name
+            member = f"{arcname}/{name}"
+            try:
+                info = path.lstat()
+            except FileNotFoundError:
+                continue
+            if stat.S_ISDIR(info.st_mode):
+                if layout is not None:
+                    layout.append({"path": member, "type": "dir", "mode": stat.S_IMODE(info.st_mode)})
+                _visit(path, member)
+            elif stat.S_ISLNK(info.st_mode):
+                if layout is not None:
+                    layout.append({"path": member, "type": "symlink", "target": os.readlink(path)})
+            elif stat.S_ISREG(info.st_mode):
+                if info.st_nlink > 1:
+                    key = (info.st_dev, info.st_ino)
+                    first = seen_links.get(key)
+                    if first is not None:
+                        if layout is not None:
+                            layout.append({"path": member, "type": "hardlink", "target": first})
+                        continue
+                    seen_links[key] = member
+                files.append((member, path, info))
+
+    _visit(root, ".")
+    return files
+
+
+def scan_host_manifest(
+    root: Path,
+    cache: ManifestCache,
+    *,
+    max_workers: Optional[int] = None,
+    stats: Optional[ManifestScanStats] = None,
+    layout: Optional[List[Dict[str, Any]]] = None,
+    hasher: Optional[Callable[[Path], str]] = None,
+) -> List[Dict[str, Any]]:
+    """Builds the manifest of a host directory, hashing only changed files.
+
+    As for volumes, files modified within `_RACY_WINDOW_NS` of the scan are
+    hashed but never cached: filesystems with coarse timestamps keep the stamp
+    of a same-size rewrite in that window. ``layout``, when given, is filled
+    with the directory, symlink and hard-link entries described in
+    `_walk_host_files`. ``hasher`` replaces the plain SHA-256 of a changed
+    file, e.g. to store the file while hashing it; it runs on the worker
+    threads.
+    """
+    racy_after = time.time_ns() - _RACY_WINDOW_NS
+    files = _walk_host_files(root, layout)
+    digests: Dict[str, str] = {}
+    pending: List[Tuple[str, Path, FileStamp]] = []
+    for member, path, info in files:
+        stamp = (info.st_size, info.st_mtime_ns, info.st_ino)
+        cached = None if stamp[1] >= racy_after else cache.lookup(member, stamp)
+        if cached is None:
+            pending.append((member, path, stamp))
+        else:
+            digests[member] = cached
+
+    if pending:
+        hash_file = hasher or _hash_file
+        workers = min(max_workers or default_hash_workers(), len(pending))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qc-manifest") as pool:
+                hashed = list(pool.map(lambda item: hash_file(item[1]), pending))
+        else:
+            hashed = [hash_file(path) for _, path, _ in pending]
+        for (member, _, stamp), digest in zip(pending, hashed):
+            digests[member] = digest
+            if stamp[1] < racy_after:
+                cache.update(member, stamp, digest)
+
+    cache.retain(member for member, _, info in files if info.st_mtime_ns < racy_after)
+    cache.save()
+    if stats is not None:
+        stats.files = len(files)
+        stats.rehashed = len(pending)
+        stats.bytes_rehashed = sum(stamp[0] for _, _, stamp in pending)
+    manifest = [
+        {
+            "path": member,
+            "size": info.st_size,
+            "sha256": digests[member],
+            "mode": stat.S_IMODE(info.st_mode),
+        }
+        for member, _, info in files
+    ]
+    manifest.sort(key=lambda item: item["path"])
+    return manifest
+
+
+class VolumeScanError(RuntimeError):
+    """Raised when the in-container listing or hashing of a volume fails."""
+
+
+def _run_in_volume(
+    docker: DockerBackend,
+    volume: str,
+    image: str,
+    script: str,
+    args: Sequence[str] = (),
+) -> str:
+    spec = ContainerSpec(
+        image=image,
+        command=["sh", "-c", script, "sh", *args],
+        volume=volume,
+        mount_target=_VOLUME_MOUNT,
+    )
+    result = docker.run_once(spec)
+    if result.returncode != 0:
+        raise VolumeScanError(result.stderr.strip() or f"exit code {result.returncode}")
+    return result.stdout
+
+
+def _parse_mtime_ns(value: str) -> int:
+    seconds, _, fraction = value.partition(".")
+    return int(seconds) * 1_000_000_000 + int((fraction + "000000000")[:9])
+
+
+def _list_volume_files(docker: DockerBackend, volume: str, image: str) -> Tuple[int, List[Tuple[str, FileStamp]]]:
+    """Lists ``(path, stamp)`` for every volume file plus the container clock in nanoseconds.
+
+    GNU ``stat`` reports nanosecond mtimes via ``%.9Y``; busybox and other
+    variants fall back to whole seconds, so callers must treat files modified
+    within the last second of the clock as unstable. With GNU ``stat`` records
+    are NUL-terminated, so names may contain newlines; the fallback prints one
+    record per line.
+
+    ``find`` reports every name of a hard-linked file, while the volume archive
+    stores later names as link members, so only the first path per inode is
+    kept (the volume is a single filesystem, so the inode alone identifies the
+    file). Both walk directories in the same order, as `_walk_host_files` does.
+    """
+    script = (
+        f"cd {_VOLUME_MOUNT} && date +%s && "
+        "if stat -c '%.9Y' . >/dev/null 2>&1; then opt=--printf; fmt='%s %.9Y %i %n\\0'; "
+        "else opt=-c; fmt='%s %Y %i %n'; fi && "
+        "find . -type f -exec stat \"$opt\" \"$fmt\" {} +"
+    )
+    clock, _, body = _run_in_volume(docker, volume, image, script).partition("\n")
+    try:
+        clock_ns = int(clock.strip()) * 1_000_000_000 if clock.strip() else 0
+    except ValueError:
+        raise VolumeScanError(f"unexpected clock line {clock!r}") from None
+    records = body.split("\0") if "\0" in body else body.split("\n")
+    files: List[Tuple[str, FileStamp]] = []
+    seen_inodes: set[int] = set()
+    for record in records:
+        parts = record.split(" ", 3)
+        if len(parts) != 4:
+            continue
+        try:
+            stamp = (int(parts[0]), _parse_mtime_ns(parts[1]), int(parts[2]))
+        except ValueError:
+            continue
+        if stamp[2] in seen_inodes:
+            continue
+        seen_inodes.add(stamp[2])
+        files.append((parts[3], stamp))
+    return clock_ns, files
+
+
+_CHECKSUM_ESCAPES = {"n": "\n", "r": "\r"}
+
+
+def _unescape_checksum_name(name: str) -> str:
+    return re.sub(r"\\(.)", lambda match: _CHECKSUM_ESCAPES.get(match.group(1), match.group(1)), name)
+
+
+def _hash_volume_files(
+    docker: DockerBackend,
+    volume: str,
+    image: str,
+    paths: Sequence[str],
+) -> Dict[str, str]:
+    script = (
+        f"cd {_VOLUME_MOUNT} && "
+        "printf '%s\\0' \"$@\" | xargs -0 -r -P \"$(nproc)\" -n 64 sha256sum"
+    )
+    digests: Dict[str, str] = {}
+    batch: List[str] = []
+    budget = 0
+
+    def _flush() -> None:
+        for line in _run_in_volume(docker, volume, image, script, batch).split("\n"):
+            # GNU sha256sum escapes backslashes, newlines and carriage returns
+            # in names and flags such lines with a leading backslash.
+            escaped = line.startswith("\\")
+            digest, _, name = (line[1:] if escaped else line).partition("  ")
+            if name:
+                digests[_unescape_checksum_name(name) if escaped else name] = digest
+
+    for path in paths:
+        cost = len(path.encode("utf-8")) + 1
+        if batch and budget + cost > _VOLUME_ARGS_BUDGET:
+            _flush()
+            batch, budget = [], 0
+        batch.append(path)
+        budget += cost
+    if batch:
+        _flush()
+    return digests
+
+
+def scan_volume_manifest(
+    docker: DockerBackend,
+    volume: str,
+    cache: ManifestCache,
+    *,
+    image: str,
+    stats: Optional[ManifestScanStats] = None,
+) -> List[Dict[str, Any]]:
+    """Builds the manifest of a Docker volume, hashing only changed files in-container.
+
+    Files modified within a second of the listing are hashed but never cached:
+    with whole-second mtimes a same-size rewrite in that window would keep its
+    stamp, and the stale digest would hide the change on the next scan.
+    """
+    clock_ns, files = _list_volume_files(docker, volume, image)
+    racy_after = clock_ns - _RACY_WINDOW_NS
+    pending = [
+        (path, stamp)
+        for path, stamp in files
+        if stamp[1] >= racy_after or cache.lookup(path, stamp) is None
+    ]
+    digests: Dict[str, str] = {}
+    if pending:
+        digests = _hash_volume_files(docker, volume, image, [path for path, _ in pending])
+        missing = [path for path, _ in pending if path not in digests]
+        if missing:
+            raise VolumeScanError(f"unable to hash {len(missing)} file(s), e.g. {shlex.quote(missing[0])}")
+        for path, stamp in pending:
+            if stamp[1] < racy_after:
+                cache.update(path, stamp, digests[path])
+    cache.retain(path for path, stamp in files if stamp[1] < racy_after)
+    cache.save()
+    if stats is not None:
+        stats.files = len(files)
+        stats.rehashed = len(pending)
+        stats.bytes_rehashed = sum(stamp[0] for _, stamp in pending)
+    manifest = []
+    for path, stamp in files:
+        digest = digests.get(path) or cache.lookup(path, stamp)
+        manifest.append({"path": path, "size": stamp[0], "sha256": digest or ""})
+    manifest.sort(key=lambda item: item["path"])
+    return manifest
+
+
+__all__ = [
+    "FileStamp",
+    "ManifestCache",
+    "ManifestScanStats",
+    "VolumeScanError",
+    "aggregate_checksum",
+    "default_hash_workers",
+    "file_entries",
+    "scan_host_manifest",
+    "scan_volume_manifest",
+]
@@ -36,6 +36,7 @@ from quadracode_runtime.runtime import (
     _apply_autonomous_limits,
 )
 from quadracode_runtime.state import ExhaustionMode
+from quadracode_runtime.state_delta import StateDeltaTracker
 
 
 def _make_envelope(sender: str, recipient: str, message: str = "msg") -> MessageEnvelope:
@@ -131,6 +132,7 @@ def test_emergency_stop_routes_to_human(monkeypatch):
     runner = object.__new__(RuntimeRunner)
     runner._identity = ORCHESTRATOR_RECIPIENT  # type: ignore[attr-defined]
     runner._profile = profiles_module.load_profile("orchestrator")  # type: ignore[attr-defined]
+    runner._state_tracker = StateDeltaTracker()  # type: ignore[attr-defined]
 
     state = {
         "autonomous_mode": True,
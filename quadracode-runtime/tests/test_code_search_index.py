@@ -0,0 +1,90 @@
+import os
+
+from quadracode_runtime.code_search_index import CodeSearchIndex, line_tokens
+from quadracode_runtime.config.context_engine import ContextEngineConfig
+from quadracode_runtime.nodes.progressive_loader import ProgressiveContextLoader
+
+
+def _index(tmp_path, root):
+    return CodeSearchIndex(
+        tmp_path / "index.sqlite3",
+        [root],
+        extensions=[".py", ".md"],
+        exclude_dirs=["node_modules"],
+        refresh_interval=0,
+    )
+
+
+def test_line_tokens_split_identifiers() -> None:
+    tokens = line_tokens("loader = ProgressiveContextLoader(max_results=3)")
+    assert {"progressivecontextloader", "progressive", "context", "loader"} <= tokens
+    assert {"max_results", "max", "results"} <= tokens
+
+
+def test_index_ranks_by_frequency_and_proximity(tmp_path) -> None:
+    root = tmp_path / "src"
+    root.mkdir()
+    (root / "mention.py").write_text("# cache\n" + "x = 1\n" * 40 + "# token budget\n")
+    (root / "focused.py").write_text("def token_cache():\n    return cache_token_budget\n")
+    (root / "other.md").write_text("Nothing relevant here.\n")
+    (root / "node_modules").mkdir()
+    (root / "node_modules" / "vendor.py").write_text("token_cache = token_cache\n" * 5)
+
+    index = _index(tmp_path, root)
+    hits = index.search({"token", "cache"}, limit=5)
+
+    assert [hit.path.name for hit in hits] == ["focused.py", "mention.py"]
+    assert hits[0].line == 1
+    assert hits[0].snippet == "def token_cache():"
+    assert hits[0].score > hits[1].score
+
+    # Prefix matching: "budg" finds "budget" tokens.
+    assert {hit.path.name for hit in index.search({"budg"}, limit=5)} == {"focused.py", "mention.py"}
+
+
+def test_index_refresh_is_incremental_and_persistent(tmp_path) -> None:
+    root = tmp_path / "src"
+    root.mkdir()
+    stable = root / "stable.py"
+    edited = root / "edited.py"
+    stable.write_text("class Widget:\n    pass\n")
+    edited.write_text("def helper():\n    pass\n")
+
+    index = _index(tmp_path, root)
+    assert index.refresh().reindexed == 2
+    assert index.refresh().reindexed == 0
+
+    edited.write_text("def gadget_factory():\n    pass\n")
+    os.utime(edited, ns=(edited.stat().st_atime_ns, edited.stat().st_mtime_ns + 10**9))
+    (root / "added.py").write_text("GADGET = 1\n")
+    stable.unlink()
+    stats = index.refresh()
+    assert (stats.files, stats.reindexed, stats.removed) == (2, 2, 1)
+    assert index.search({"helper"}, limit=3) == []
+    assert index.search({"widget"}, limit=3) == []
+    assert {hit.path.name for hit in index.search({"gadget"}, limit=3)} == {"edited.py", "added.py"}
+    index.close()
+
+    reopened = _index(tmp_path, root)
+    assert reopened.refresh().reindexed == 0
+    assert reopened.search({"gadget"}, limit=1)[0].path.name in {"edited.py", "added.py"}
+
+
+def test_loader_searches_active_workspace(tmp_path) -> None:
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    (workspace / "billing.py").write_text("def reconcile_invoices():\n    return []\n")
+    config = ContextEngineConfig(
+        project_root=str(tmp_path),
+        external_memory_path=str(tmp_path / "memory"),
+        code_search_extensions=[".py"],
+    )
+    loader = ProgressiveContextLoader(config)
+
+    roots = loader._code_search_roots({"workspace": {"host_path": str(workspace)}})
+    matches = loader._perform_code_search({"invoices"}, roots)
+
+    assert roots == [workspace]
+    assert matches[0]["path"] == "workspace/billing.py"
+    assert matches[0]["line"] == 1
+    assert (tmp_path / "memory" / "code_search_index").is_dir()
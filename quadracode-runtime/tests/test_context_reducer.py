@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from quadracode_runtime.config.context_engine import ContextEngineConfig
+from quadracode_runtime.nodes.context_reducer import ContextReducer
+from quadracode_runtime.summary_cache import SummaryStore
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class _FakeLLM:
+    def __init__(self, delay: float = 0.01, hang_on: str | None = None) -> None:
+        self.delay = delay
+        self.hang_on = hang_on
+        self.prompts: list[str] = []
+        self.active = 0
+        self.peak = 0
+
+    async def ainvoke(self, messages):
+        prompt = messages[-1].content
+        self.prompts.append(prompt)
+        call = len(self.prompts)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            if self.hang_on and self.hang_on in prompt:
+                await asyncio.sleep(60)
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return SimpleNamespace(content=f"summary-{call}")
+
+
+def _reducer(llm: _FakeLLM, **overrides) -> ContextReducer:
+    options = {"reducer_chunk_tokens": 50, "reducer_target_tokens": 20, **overrides}
+    config = ContextEngineConfig(metrics_enabled=False, **options)
+    reducer = ContextReducer(config)
+    reducer._llm = llm
+    reducer.summary_store = SummaryStore()
+    return reducer
+
+
+def _content(chunks: int, *, distinct: bool = True) -> str:
+    words = []
+    for index in range(chunks):
+        label = f"chunk{index}" if distinct else "chunk"
+        words.extend(f"{label}-w{position}" for position in range(50))
+    return " ".join(words)
+
+
+@pytest.mark.anyio
+async def test_chunks_are_summarized_concurrently_within_limit() -> None:
+    llm = _FakeLLM(delay=0.05)
+    reducer = _reducer(llm, reducer_max_concurrency=3, reducer_combine_fanout=8)
+
+    result = await reducer.reduce(_content(6))
+
+    assert result.content
+    assert llm.peak == 3
+    # Six chunk calls plus a single combine (fanout 8).
+    assert len(llm.prompts) == 7
+
+
+@pytest.mark.anyio
+async def test_many_chunks_are_combined_as_a_tree() -> None:
+    llm = _FakeLLM()
+    reducer = _reducer(llm, reducer_combine_fanout=2)
+
+    await reducer.reduce(_content(5))
+
+    combine_calls = len(llm.prompts) - 5
+    # 5 -> 3 -> 2 -> 1 requires 2 + 1 + 1 combine calls.
+    assert combine_calls == 4
+
+
+@pytest.mark.anyio
+async def test_identical_chunks_are_summarized_once() -> None:
+    llm = _FakeLLM()
+    reducer = _reducer(llm, reducer_combine_fanout=8)
+
+    await reducer.reduce(_content(4, distinct=False))
+    first_calls = len(llm.prompts)
+    reducer.summary_store = SummaryStore()  # bypass the whole-input summary cache
+    await reducer.reduce(_content(4, distinct=False))
+
+    # One chunk summary shared by four identical chunks, plus one combine.
+    assert first_calls == 2
+    assert len(llm.prompts) == first_calls
+    assert reducer.cache_hits > 0
+
+
+@pytest.mark.anyio
+async def test_timed_out_chunk_falls_back_to_excerpt() -> None:
+    llm = _FakeLLM(hang_on="chunk1-w0")
+    reducer = _reducer(llm, reducer_call_timeout=0.2, reducer_combine_fanout=8)
+
+    result = await asyncio.wait_for(reducer.reduce(_content(3)), timeout=5)
+
+    assert result.content.startswith("summary-")
+    combine_prompt = llm.prompts[-1]
+    assert "chunk1-w0" in combine_prompt
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        " ".join(f"word{index}" for index in range(2_000)),
+        "x" * 20_000,
+        "\n".join(" ".join(f"line{row}-{col}" for col in range(40)) for row in range(30)),
+    ],
+    ids=["single-line", "single-word", "multi-line"],
+)
+def test_fallback_summary_stays_within_target_tokens(text: str) -> None:
+    reducer = _reducer(_FakeLLM(), reducer_target_tokens=200)
+
+    excerpt = reducer._fallback_summary(text)
+
+    assert reducer.token_counter.count(excerpt) <= reducer.target_tokens
+    assert "omitted" in excerpt
+    assert excerpt.splitlines()[0] and text.startswith(excerpt.splitlines()[0][:5])
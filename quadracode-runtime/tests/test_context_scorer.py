@@ -99,3 +99,22 @@ def test_relevance_scores_reflect_goal_alignment() -> None:
     state["context_segments"][1]["priority"] = 1
     relevance_lower = asyncio.run(scorer._score_relevance(state["context_segments"], state))  # type: ignore[attr-defined]
     assert relevance_lower < relevance
+
+
+def test_segment_indexes_are_kept_per_thread() -> None:
+    config = ContextEngineConfig()
+    scorer = ContextScorer(config)
+
+    for thread_id in ("thread-a", "thread-b"):
+        state = make_initial_context_engine_state(context_window_max=config.context_window_max)
+        state["thread_id"] = thread_id
+        state["task_goal"] = "Implement progressive context loader"
+        state["context_segments"] = [
+            _make_segment(f"{thread_id}-s1", priority=7, token_count=100, segment_type="tool_outputs")
+        ]
+        asyncio.run(scorer.evaluate(state))
+
+    # Scoring thread-b did not evict the vectors of thread-a's segments.
+    assert set(scorer.segment_indexes) == {"thread-a", "thread-b"}
+    assert len(scorer.segment_indexes["thread-a"]) == 1
+    assert len(scorer.segment_indexes["thread-b"]) == 1
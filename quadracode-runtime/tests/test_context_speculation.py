@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from quadracode_runtime.config.context_engine import ContextEngineConfig
+from quadracode_runtime.nodes.context_engine import ContextEngine
+from quadracode_runtime.nodes.context_reducer import ReducerResult
+from quadracode_runtime.nodes.context_speculation import SpeculativeCuration, apply_speculation
+from quadracode_runtime.state import make_initial_context_engine_state
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+def _segment(segment_id: str, content: str) -> dict:
+    return {
+        "id": segment_id,
+        "content": content,
+        "type": "tool_output",
+        "priority": 5,
+        "token_count": len(content.split()),
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "decay_rate": 0.1,
+        "compression_eligible": True,
+        "restorable_reference": None,
+    }
+
+
+def _conversation(count: int) -> list:
+    return [
+        (HumanMessage if index % 2 == 0 else AIMessage)(content=f"turn {index}", id=f"m{index}")
+        for index in range(count)
+    ]
+
+
+async def _compress_first_segment(snapshot):
+    snapshot["context_segments"][0]["content"] = "compressed"
+    snapshot["messages"] = snapshot["messages"][2:]
+    snapshot["history_summary_watermark"] = {"last_message_id": "m1", "folds": 1}
+    return snapshot
+
+
+async def _speculate(state) -> SpeculativeCuration:
+    speculation = SpeculativeCuration()
+    assert speculation.schedule("t1", state, _compress_first_segment)
+    while speculation.pending("t1"):
+        await asyncio.sleep(0)
+    return speculation
+
+
+@pytest.mark.anyio
+async def test_valid_speculation_is_merged_with_newer_segments() -> None:
+    state = {
+        "context_segments": [_segment("a", "long tool output"), _segment("b", "notes")],
+        "messages": _conversation(4),
+    }
+    speculation = await _speculate(state)
+    # The original state is untouched by the background compaction.
+    assert state["context_segments"][0]["content"] == "long tool output"
+
+    state["context_segments"].append(_segment("c", "new output"))
+    state["messages"].append(HumanMessage(content="turn 4", id="m4"))
+    result = speculation.take("t1")
+
+    assert apply_speculation(state, result)
+    assert [seg["id"] for seg in state["context_segments"]] == ["a", "b", "c"]
+    assert state["context_segments"][0]["content"] == "compressed"
+    assert [msg.id for msg in state["messages"]] == ["m2", "m3", "m4"]
+    assert state["history_summary_watermark"]["folds"] == 1
+
+
+@pytest.mark.anyio
+async def test_stale_speculation_is_discarded() -> None:
+    state = {
+        "context_segments": [_segment("a", "long tool output")],
+        "messages": _conversation(4),
+    }
+    speculation = await _speculate(state)
+    state["context_segments"][0]["content"] = "rewritten by a tool"
+    result = speculation.take("t1")
+
+    assert not apply_speculation(state, result)
+    speculation.record(False)
+    assert state["context_segments"][0]["content"] == "rewritten by a tool"
+    assert len(state["messages"]) == 4
+    assert speculation.stats()["discarded"] == 1
+    assert speculation.take("t1") is None
+
+
+class _RecordingReducer:
+    def __init__(self, summary_store) -> None:
+        self.summary_store = summary_store
+        self.calls = 0
+
+    async def reduce(self, content: str, *, focus: str | None = None) -> ReducerResult:
+        self.calls += 1
+        return ReducerResult(content=f"summary #{self.calls}", token_count=3)
+
+
+@pytest.mark.anyio
+async def test_engine_commits_history_fold_prepared_after_post_process() -> None:
+    config = ContextEngineConfig(
+        metrics_enabled=False,
+        min_message_count_to_compress=8,
+        message_retention_count=4,
+        optimal_context_size=100_000,
+    )
+    engine = ContextEngine(config)
+    engine.reducer = _RecordingReducer(engine.reducer.summary_store)
+    state = make_initial_context_engine_state(context_window_max=200_000)
+    state["thread_id"] = "t1"
+    state["messages"] = _conversation(10)
+
+    engine._schedule_speculation("t1", engine._ensure_state_defaults(state))
+    while engine.speculation.pending("t1"):
+        await asyncio.sleep(0)
+    assert engine.reducer.calls == 1
+
+    state = engine._recompute_context_usage(state)
+    state, committed = await engine._commit_speculation(state, "t1")
+
+    assert committed
+    assert [msg.id for msg in state["messages"]] == ["m6", "m7", "m8", "m9"]
+    assert state["history_summary_watermark"]["last_message_id"] == "m5"
+    assert engine.speculation.stats()["committed"] == 1
@@ -4,7 +4,7 @@ from langchain_core.messages import ToolMessage
 
 from quadracode_runtime.config.context_engine import ContextEngineConfig
 from quadracode_runtime.nodes.context_engine import ContextEngine
-from quadracode_runtime.state import ContextSegment, make_initial_context_engine_state
+from quadracode_runtime.state import ContextSegment, QuadraCodeState, make_initial_context_engine_state
 
 
 def _make_segment(segment_id: str, tokens: int) -> ContextSegment:
@@ -56,3 +56,17 @@ def test_tool_response_updates_context_window_used() -> None:
 
     total_tokens = sum(segment["token_count"] for segment in result["context_segments"])
     assert result["context_window_used"] == total_tokens
+
+
+def test_token_tallies_live_in_a_declared_state_key() -> None:
+    config = ContextEngineConfig(metrics_enabled=False)
+    engine = ContextEngine(config)
+
+    state = make_initial_context_engine_state(context_window_max=config.context_window_max)
+    state["context_segments"] = [_make_segment("s1", 120)]
+
+    result = engine.pre_process_sync(state)
+
+    assert "token_tallies" in QuadraCodeState.__annotations__
+    segment_tokens = sum(segment["token_count"] for segment in result["context_segments"])
+    assert result["token_tallies"]["segments"]["total"] == segment_tokens
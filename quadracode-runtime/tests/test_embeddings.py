@@ -0,0 +1,79 @@
+import numpy as np
+
+from quadracode_runtime.config.context_engine import ContextEngineConfig
+from quadracode_runtime.embeddings import (
+    CachedEmbedder,
+    HashedNgramEmbedder,
+    VectorIndex,
+    get_embedder,
+    jaccard_similarities,
+    register_embedder,
+)
+
+
+def test_hashed_embedder_rows_are_normalized_and_comparable() -> None:
+    embedder = HashedNgramEmbedder(256)
+    matrix = embedder.embed(
+        [
+            "retry the flaky database migration",
+            "database migration retries are flaky",
+            "update the marketing copy",
+            "",
+        ]
+    )
+
+    assert matrix.shape == (4, 256)
+    np.testing.assert_allclose(np.linalg.norm(matrix[:3], axis=1), 1.0, rtol=1e-5)
+    assert not matrix[3].any()
+    similarities = matrix @ matrix[0]
+    assert similarities[1] > similarities[2]
+
+
+def test_cached_embedder_embeds_each_content_once() -> None:
+    calls = []
+
+    class CountingEmbedder(HashedNgramEmbedder):
+        def embed(self, texts):
+            calls.append(list(texts))
+            return super().embed(texts)
+
+    embedder = CachedEmbedder(CountingEmbedder(64), max_entries=2)
+    first = embedder.embed(["alpha beta", "gamma delta", "alpha beta"])
+    second = embedder.embed(["gamma delta"])
+
+    assert calls == [["alpha beta", "gamma delta"]]
+    np.testing.assert_array_equal(first[0], first[2])
+    np.testing.assert_array_equal(second[0], first[1])
+    assert (embedder.hits, embedder.misses) == (1, 2)
+
+
+def test_vector_index_queries_remove_and_grow() -> None:
+    index = VectorIndex(4)
+    vectors = np.eye(4, dtype=np.float32)
+    index.upsert(["a", "b", "c"], vectors[:3])
+    index.remove("a")
+    index.upsert([f"k{i}" for i in range(20)], np.tile(vectors[3], (20, 1)))
+
+    assert len(index) == 22
+    assert index.nearest(vectors[1], 1) == [("b", 1.0)]
+    np.testing.assert_array_equal(index.similarities(vectors[2], ["c", "b"]), [1.0, 0.0])
+    index.retain(["b"])
+    assert index.keys == ["b"]
+
+
+def test_jaccard_similarities_match_set_arithmetic() -> None:
+    query = {"fix", "cache", "timeout"}
+    candidates = [{"fix", "cache", "timeout"}, {"cache", "eviction"}, set(), {"unrelated"}]
+
+    result = jaccard_similarities(query, candidates)
+
+    expected = [len(query & c) / len(query | c) if c else 0.0 for c in candidates]
+    np.testing.assert_allclose(result, expected)
+
+
+def test_get_embedder_uses_registered_backends() -> None:
+    register_embedder("tiny", lambda config: HashedNgramEmbedder(16))
+    embedder = get_embedder(ContextEngineConfig(embedding_backend="tiny"))
+
+    assert embedder.dimension == 16
+    assert get_embedder(ContextEngineConfig(embedding_backend="tiny")) is embedder
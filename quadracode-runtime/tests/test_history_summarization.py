@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import pytest
+
+from quadracode_runtime.config.context_engine import ContextEngineConfig
+from quadracode_runtime.nodes.context_engine import ContextEngine
+from quadracode_runtime.nodes.context_reducer import ReducerResult
+from quadracode_runtime.state import get_segment_content, make_initial_context_engine_state
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class _RecordingReducer:
+    def __init__(self, summary_store) -> None:
+        self.summary_store = summary_store
+        self.prompts: list[str] = []
+
+    async def reduce(self, content: str, *, focus: str | None = None) -> ReducerResult:
+        self.prompts.append(content)
+        return ReducerResult(content=f"summary #{len(self.prompts)}", token_count=3)
+
+
+def _engine(**overrides) -> ContextEngine:
+    config = ContextEngineConfig(
+        metrics_enabled=False,
+        min_message_count_to_compress=8,
+        message_retention_count=4,
+        optimal_context_size=100_000,
+        **overrides,
+    )
+    engine = ContextEngine(config)
+    engine.reducer = _RecordingReducer(engine.reducer.summary_store)
+    return engine
+
+
+def _conversation(start: int, count: int) -> list:
+    messages = []
+    for index in range(start, start + count):
+        cls = HumanMessage if index % 2 == 0 else AIMessage
+        messages.append(cls(content=f"turn {index}", id=f"m{index}"))
+    return messages
+
+
+async def _manage(engine: ContextEngine, state) -> dict:
+    state = engine._recompute_context_usage(state)
+    return await engine._manage_conversation_history(state, engine.config.optimal_context_size)
+
+
+@pytest.mark.anyio
+async def test_folding_is_batched_between_water_marks() -> None:
+    engine = _engine()
+    state = make_initial_context_engine_state(context_window_max=200_000)
+
+    state["messages"] = _conversation(0, 8)
+    assert await _manage(engine, state) == {}
+    assert engine.reducer.prompts == []
+
+    state["messages"] = _conversation(0, 9)
+    updates = await _manage(engine, state)
+
+    assert len(engine.reducer.prompts) == 1
+    assert [update.id for update in updates["messages"]] == [f"m{i}" for i in range(5)]
+    assert [msg.id for msg in state["messages"]] == ["m5", "m6", "m7", "m8"]
+    assert state["history_summary_watermark"]["last_message_id"] == "m4"
+
+    # The next few turns stay under the high water mark: no reducer calls.
+    state["messages"] = state["messages"] + _conversation(9, 4)
+    assert await _manage(engine, state) == {}
+    assert len(engine.reducer.prompts) == 1
+
+
+@pytest.mark.anyio
+async def test_only_newly_evicted_messages_are_folded() -> None:
+    engine = _engine()
+    state = make_initial_context_engine_state(context_window_max=200_000)
+    state["messages"] = _conversation(0, 9)
+    await _manage(engine, state)
+
+    # The checkpointer has not applied the removals yet: the folded prefix is
+    # still present alongside new turns.
+    state["messages"] = _conversation(0, 18)
+    updates = await _manage(engine, state)
+
+    second_prompt = engine.reducer.prompts[-1]
+    assert "summary #1" in second_prompt
+    assert "turn 5" in second_prompt
+    assert "turn 4" not in second_prompt
+    assert {update.id for update in updates["messages"]} == {f"m{i}" for i in range(14)}
+    assert get_segment_content(state, "conversation-summary") == "summary #2"
+    assert state["history_summary_watermark"]["folds"] == 2
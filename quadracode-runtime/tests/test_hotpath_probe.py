@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from quadracode_runtime.hotpath_probe import HotpathProbe
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _probe(handler, clock: _Clock, **overrides) -> HotpathProbe:
+    options = dict(ttl=10.0, failure_threshold=2, cooldown=30.0)
+    options.update(overrides)
+    return HotpathProbe(
+        "http://registry",
+        clock=clock,
+        transport=httpx.MockTransport(handler),
+        **options,
+    )
+
+
+@pytest.mark.anyio
+async def test_results_are_cached_until_ttl_then_refreshed_in_background():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(200, json={"agents": [{"agent_id": f"a{calls}"}]})
+
+    clock = _Clock()
+    probe = _probe(handler, clock)
+
+    assert await probe.agents() == [{"agent_id": "a1"}]
+    assert await probe.agents() == [{"agent_id": "a1"}]
+    assert calls == 1
+
+    clock.now = 11.0
+    # Stale value is served immediately while the refresh runs.
+    assert await probe.agents() == [{"agent_id": "a1"}]
+    await asyncio.sleep(0.01)
+    assert calls == 2
+    assert await probe.agents() == [{"agent_id": "a2"}]
+    await probe.aclose()
+
+
+@pytest.mark.anyio
+async def test_breaker_opens_after_failures_and_skips_network():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(503)
+
+    clock = _Clock()
+    probe = _probe(handler, clock)
+
+    assert await probe.agents() == []
+    assert await probe.agents() == []
+    assert probe.breaker_open
+    assert await probe.agents() == []
+    assert calls == 2
+
+    clock.now = 31.0
+    assert not probe.breaker_open
+    await probe.agents()
+    assert calls == 3
+    await probe.aclose()
+
+
+@pytest.mark.anyio
+async def test_invalidate_forces_refresh():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(200, json=[{"agent_id": "a"}])
+
+    probe = _probe(handler, _Clock())
+    await probe.agents()
+    probe.invalidate()
+    await probe.agents()
+    await asyncio.sleep(0.01)
+
+    assert calls == 2
+    await probe.aclose()
+
+
+def test_loop_switch_closes_the_previous_client():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=[{"agent_id": "a"}])
+
+    probe = _probe(handler, _Clock())
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        asyncio.run_coroutine_threadsafe(probe.agents(), other_loop).result(5)
+        first_client = probe._client
+
+        async def _call_from_this_loop():
+            probe._agents = None  # cold cache: fetch inline
+            await probe.agents()
+            second_client = probe._client
+            await probe.aclose()
+            return second_client
+
+        second_client = asyncio.run(_call_from_this_loop())
+        # The first client is closed on the loop that owns its connections.
+        for _ in range(100):
+            if first_client.is_closed:
+                break
+            time.sleep(0.01)
+        assert first_client.is_closed
+        assert second_client is not first_client and second_client.is_closed
+        assert probe._client is None
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join(5)
+        other_loop.close()
+
+
+def test_short_lived_loops_do_not_leak_clients():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=[{"agent_id": "a"}])
+
+    probe = _probe(handler, _Clock())
+    clients = []
+
+    async def _call():
+        probe._agents = None  # cold cache: fetch inline
+        await probe.agents()
+        clients.append(probe._client)
+        await probe.aclose()
+
+    asyncio.run(_call())
+    asyncio.run(_call())
+
+    assert len(clients) == 2 and all(client.is_closed for client in clients)
+    assert probe._client is None
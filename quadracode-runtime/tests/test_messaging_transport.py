@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fakeredis import aioredis
+
+from quadracode_contracts import MessageEnvelope, mailbox_key
+
+from quadracode_runtime import messaging as messaging_module
+from quadracode_runtime.messaging import (
+    RedisMCPMessaging,
+    RedisStreamMessaging,
+    create_messaging,
+)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _envelope(recipient: str, message: str) -> MessageEnvelope:
+    return MessageEnvelope(
+        sender="human",
+        recipient=recipient,
+        message=message,
+        payload={"chat_id": "chat-1"},
+    )
+
+
+@pytest.mark.anyio
+async def test_native_transport_reads_through_consumer_group_and_acks():
+    client = aioredis.FakeRedis(decode_responses=True)
+    transport = RedisStreamMessaging(client, consumer="c1", block_ms=0)
+
+    await transport.publish("orchestrator", _envelope("orchestrator", "hello"))
+    entries = await transport.read("orchestrator", batch_size=5)
+
+    assert [envelope.message for _, envelope in entries] == ["hello"]
+    assert await transport.read("orchestrator", batch_size=5) == []
+
+    entry_id = entries[0][0]
+    reply = _envelope("human", "reply")
+    await transport.publish_and_ack("orchestrator", entry_id, [reply])
+
+    pending = await client.xpending(mailbox_key("orchestrator"), "orchestrator")
+    assert pending["pending"] == 0
+    # Handled entries are deleted, not left to accumulate up to MAXLEN.
+    assert await client.xlen(mailbox_key("orchestrator")) == 0
+    human_entries = await client.xrange(mailbox_key("human"))
+    assert human_entries[0][1]["message"] == "reply"
+
+
+@pytest.mark.anyio
+async def test_native_transport_replays_unacked_entries_after_restart():
+    client = aioredis.FakeRedis(decode_responses=True)
+    first = RedisStreamMessaging(client, consumer="c1", block_ms=0)
+    await first.publish("agent-1", _envelope("agent-1", "one"))
+    await first.publish("agent-1", _envelope("agent-1", "two"))
+    delivered = await first.read("agent-1", batch_size=5)
+    assert len(delivered) == 2
+    await first.ack("agent-1", delivered[0][0])
+
+    restarted = RedisStreamMessaging(client, consumer="c1", block_ms=0)
+    replayed = await restarted.read("agent-1", batch_size=5)
+
+    assert [envelope.message for _, envelope in replayed] == ["two"]
+    await restarted.ack("agent-1", replayed[0][0])
+    assert await restarted.read("agent-1", batch_size=5) == []
+
+
+@pytest.mark.anyio
+async def test_native_transport_claims_entries_left_by_a_dead_consumer():
+    client = aioredis.FakeRedis(decode_responses=True)
+    crashed = RedisStreamMessaging(client, consumer="host-a-1", block_ms=0)
+    await crashed.publish("agent-1", _envelope("agent-1", "orphaned"))
+    assert len(await crashed.read("agent-1", batch_size=5)) == 1
+
+    # The replacement container comes back under a different consumer name.
+    replacement = RedisStreamMessaging(
+        client, consumer="host-b-1", block_ms=0, claim_idle_ms=1, claim_interval_ms=60_000
+    )
+    await asyncio.sleep(0.01)
+    claimed = await replacement.read("agent-1", batch_size=5)
+
+    assert [envelope.message for _, envelope in claimed] == ["orphaned"]
+    await replacement.ack("agent-1", claimed[0][0])
+    assert await replacement.read("agent-1", batch_size=5) == []
+    assert await client.xlen(mailbox_key("agent-1")) == 0
+
+
+@pytest.mark.anyio
+async def test_create_messaging_falls_back_to_mcp(monkeypatch):
+    monkeypatch.delenv("QUADRACODE_MOCK_MODE", raising=False)
+    monkeypatch.setenv("QUADRACODE_MESSAGING_TRANSPORT", "native")
+
+    async def _unreachable(cls, url=None):
+        raise ConnectionError("redis down")
+
+    sentinel = object.__new__(RedisMCPMessaging)
+
+    async def _mcp_create(cls):
+        return sentinel
+
+    monkeypatch.setattr(RedisStreamMessaging, "create", classmethod(_unreachable))
+    monkeypatch.setattr(RedisMCPMessaging, "create", classmethod(_mcp_create))
+
+    assert await create_messaging() is sentinel
+
+
+def test_redis_url_defaults_to_redis_host(monkeypatch):
+    monkeypatch.delenv("QUADRACODE_REDIS_URL", raising=False)
+    monkeypatch.setenv("REDIS_HOST", "cache")
+    monkeypatch.setenv("REDIS_PORT", "6380")
+
+    assert messaging_module._redis_url_from_env() == "redis://cache:6380/0"
@@ -0,0 +1,61 @@
+import asyncio
+import os
+
+from quadracode_runtime.config.context_engine import ContextEngineConfig
+from quadracode_runtime.nodes.progressive_loader import ProgressiveContextLoader
+from quadracode_runtime.segment_cache import StaticSegmentCache
+from quadracode_runtime.state import make_initial_context_engine_state
+
+
+def _touch_later(path) -> None:
+    info = path.stat()
+    os.utime(path, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+
+
+def _loader(tmp_path) -> ProgressiveContextLoader:
+    loader = ProgressiveContextLoader(ContextEngineConfig(project_root=str(tmp_path)))
+    loader.segment_cache = StaticSegmentCache()
+    return loader
+
+
+def test_static_segments_are_memoized_until_inputs_change(tmp_path) -> None:
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text('[project]\nname = "demo"\nversion = "1.0.0"\n')
+    loader = _loader(tmp_path)
+    state = make_initial_context_engine_state(context_window_max=10_000)
+
+    first = asyncio.run(loader._load_code_context(state))
+    second = asyncio.run(loader._load_code_context(state))
+    assert "Project: demo v1.0.0" in first["content"]
+    assert second["content"] == first["content"]
+    assert (loader.segment_cache.stats.misses, loader.segment_cache.stats.hits) == (1, 1)
+
+    pyproject.write_text('[project]\nname = "demo"\nversion = "2.0.0"\n')
+    _touch_later(pyproject)
+    third = asyncio.run(loader._load_code_context(state))
+    assert "Project: demo v2.0.0" in third["content"]
+    assert loader.segment_cache.stats.misses == 2
+
+    stats = loader.segment_cache.stats.as_dict()
+    assert stats["hit_rate"] == round(1 / 3, 4)
+    assert stats["avg_build_ms"] >= 0
+
+
+def test_test_suite_segment_sees_new_test_files(tmp_path) -> None:
+    tests_dir = tmp_path / "tests" / "unit"
+    tests_dir.mkdir(parents=True)
+    (tests_dir / "test_alpha.py").write_text("")
+    loader = _loader(tmp_path)
+    state = make_initial_context_engine_state(context_window_max=10_000)
+
+    first = asyncio.run(loader._load_test_suite(state))
+    assert "tests/unit/test_alpha.py" in first["content"]
+
+    (tests_dir / "test_beta.py").write_text("")
+    _touch_later(tests_dir)
+    second = asyncio.run(loader._load_test_suite(state))
+    assert "tests/unit/test_beta.py" in second["content"]
+    assert loader.segment_cache.stats.hits == 0
+
+    asyncio.run(loader._load_test_suite(state))
+    assert loader.segment_cache.stats.hits == 1
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from quadracode_runtime.segment_features import (
+    SegmentFeatureTable,
+    _loop_curation_scores,
+    coherence_score,
+    curation_scores,
+    diversity_score,
+    freshness_score,
+    parse_timestamp,
+    relevance_weights,
+    run_benchmark,
+    synthetic_segments,
+)
+
+
+def test_curation_scores_match_per_segment_loop() -> None:
+    now = datetime.now(timezone.utc)
+    segments = synthetic_segments(500, now=now)
+    segments[3]["timestamp"] = "not-a-timestamp"
+    segments[4]["timestamp"] = None
+    del segments[5]["priority"]
+
+    table = SegmentFeatureTable.from_segments(segments)
+
+    np.testing.assert_allclose(curation_scores(table, now), _loop_curation_scores(segments, now))
+
+
+def test_table_scores_follow_priorities_times_and_types() -> None:
+    now = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+    segments = [
+        {"type": "conversation", "priority": 4, "timestamp": now.isoformat()},
+        {"type": "skill:debugging", "priority": 4, "timestamp": (now - timedelta(hours=6)).isoformat()},
+        {"type": "skill:review", "timestamp": "garbage"},
+    ]
+    table = SegmentFeatureTable.from_segments(segments)
+
+    assert table.type_names == ["conversation", "skill"]
+    assert np.isneginf(table.timestamp[2])
+    np.testing.assert_allclose(relevance_weights(table, {"skill": 7}), [4.0, 7.0, 7.0])
+    # 6h apart -> time gap capped at 1.0; then priority gap 0.1 with unknown time gap 0.5.
+    assert coherence_score(table) == np.mean([0.5, 1.0 - 0.3])
+    assert freshness_score(table, now) == np.mean([1.0, 0.5, 0.5])
+    assert diversity_score(table) == 2 / 3
+    assert parse_timestamp("2025-01-01T12:00:00Z") == now.timestamp()
+
+
+def test_empty_table_scores_are_neutral() -> None:
+    table = SegmentFeatureTable.from_segments([])
+
+    assert curation_scores(table).shape == (0,)
+    assert coherence_score(table) == freshness_score(table) == diversity_score(table) == 1.0
+
+
+def test_benchmark_reports_throughput() -> None:
+    (row,) = run_benchmark((200,), repeat=1)
+
+    assert row["segments"] == 200
+    assert row["loop_segments_per_s"] > 0 and row["table_segments_per_s"] > 0
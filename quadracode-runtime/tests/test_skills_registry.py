@@ -0,0 +1,64 @@
+import os
+
+from quadracode_runtime.skills_registry import SkillsRegistry
+
+
+def _write_skill(root, directory: str, front_matter: str, body: str = "Body"):
+    skill_dir = root / directory
+    skill_dir.mkdir(parents=True, exist_ok=True)
+    path = skill_dir / "SKILL.md"
+    path.write_text(f"---\n{front_matter}\n---\n{body}\n", encoding="utf-8")
+    return path
+
+
+def test_registry_selects_by_tags_triggers_and_auto(tmp_path) -> None:
+    _write_skill(tmp_path, "a-debug", "name: Debugging\ntags: debug,errors")
+    _write_skill(tmp_path, "b-deploy", "name: Deploys\ntriggers:\n  - release rollout\nkeywords: kubernetes")
+    _write_skill(tmp_path, "c-style", "name: Style Guide\ntags: auto")
+    registry = SkillsRegistry([tmp_path], refresh_interval=0)
+    registry.refresh()
+
+    assert [meta["slug"] for meta in registry.catalog()] == ["debugging", "deploys", "style-guide"]
+    assert list(registry.select({"errors"})) == ["debugging", "style-guide"]
+    assert list(registry.select({"Rollout", "kubernetes"})) == ["deploys", "style-guide"]
+    assert list(registry.select({"unrelated"})) == ["style-guide"]
+
+
+def test_registry_hot_reloads_only_changed_skills(tmp_path) -> None:
+    first = _write_skill(tmp_path, "first", "name: First\ntags: alpha")
+    registry = SkillsRegistry([tmp_path], refresh_interval=0)
+    assert registry.refresh() is True
+    assert registry.refresh() is False
+
+    _write_skill(tmp_path, "second", "name: Second\ntags: beta")
+    first.write_text("---\nname: First\ntags: gamma\n---\nBody\n", encoding="utf-8")
+    info = first.stat()
+    os.utime(first, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+    parsed_before = registry.stats.parsed
+    assert registry.refresh() is True
+
+    assert registry.stats.parsed == parsed_before + 2
+    assert list(registry.select({"beta"})) == ["second"]
+    assert list(registry.select({"gamma"})) == ["first"]
+    assert registry.select({"alpha"}) == {}
+
+    (tmp_path / "second" / "SKILL.md").unlink()
+    registry.refresh()
+    assert [meta["slug"] for meta in registry.catalog()] == ["first"]
+
+
+def test_registry_caches_bodies_per_file_version(tmp_path) -> None:
+    path = _write_skill(tmp_path, "notes", "name: Notes", body="Version one")
+    registry = SkillsRegistry([tmp_path], refresh_interval=0, body_cache_entries=1)
+    registry.refresh()
+
+    assert registry.body("notes") == "Version one"
+    assert registry.body("notes") == "Version one"
+    assert (registry.stats.body_misses, registry.stats.body_hits) == (1, 1)
+
+    path.write_text("---\nname: Notes\n---\nVersion two\n", encoding="utf-8")
+    info = path.stat()
+    os.utime(path, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+    registry.refresh()
+    assert registry.body("notes") == "Version two"
+    assert registry.body("missing") == ""
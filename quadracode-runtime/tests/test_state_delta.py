@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import types
+from typing import Annotated, TypedDict
+
+os.environ.setdefault("SHARED_PATH", "/tmp")
+
+_mcp_stub = types.ModuleType("quadracode_runtime.tools.mcp_loader")
+_mcp_stub.load_mcp_tools_sync = lambda: []
+
+
+async def _aget_mcp_tools_stub():  # pragma: no cover - simple coroutine stub
+    return []
+
+
+_mcp_stub.aget_mcp_tools = _aget_mcp_tools_stub
+sys.modules.setdefault("quadracode_runtime.tools.mcp_loader", _mcp_stub)
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import START, MessagesState, StateGraph
+from langgraph.graph.message import add_messages
+from quadracode_contracts import ORCHESTRATOR_RECIPIENT, MessageEnvelope
+
+from quadracode_runtime import profiles as profiles_module
+from quadracode_runtime.runtime import RuntimeRunner
+from quadracode_runtime.state_delta import (
+    StateDeltaReceiver,
+    StateDeltaTracker,
+    apply_state_delta,
+    checkpoint_message_ids,
+    load_state_snapshot,
+    new_messages,
+)
+
+
+def test_first_delta_is_full_snapshot_then_only_changes():
+    tracker = StateDeltaTracker()
+    first = tracker.delta("chat", {"iteration_count": 1, "milestones": [{"m": 1}]})
+    assert first.base_version is None
+    assert first.changed == {"iteration_count": 1, "milestones": [{"m": 1}]}
+
+    second = tracker.delta("chat", {"iteration_count": 2, "milestones": [{"m": 1}]})
+    assert second.base_version == first.version
+    assert second.changed == {"iteration_count": 2}
+    assert second.removed == []
+
+    third = tracker.delta("chat", {"iteration_count": 2})
+    assert third.changed == {}
+    assert third.removed == ["milestones"]
+
+
+def test_tracker_keeps_a_baseline_per_recipient():
+    tracker = StateDeltaTracker()
+    tracker.delta("chat", {"x": 1}, recipient="a")
+    tracker.delta("chat", {"x": 2}, recipient="a")
+
+    first_for_b = tracker.delta("chat", {"x": 2}, recipient="b")
+    assert first_for_b.base_version is None
+    assert first_for_b.changed == {"x": 2}
+
+    tracker.forget("chat")
+    assert tracker.delta("chat", {"x": 2}, recipient="a").base_version is None
+
+
+def test_tracker_evicts_least_recent_threads():
+    tracker = StateDeltaTracker(max_threads=1)
+    tracker.delta("a", {"x": 1})
+    tracker.delta("b", {"x": 1})
+
+    assert tracker.delta("a", {"x": 1}).base_version is None
+
+
+def test_receiver_applies_deltas_and_detects_gaps():
+    tracker = StateDeltaTracker()
+    payloads = []
+    for count in (1, 2, 3):
+        payload: dict = {}
+        tracker.delta("chat", {"iteration_count": count, "task_goal": "g"}).apply_to(payload)
+        payloads.append(payload)
+
+    state, version, complete = apply_state_delta(None, None, payloads[0])
+    assert complete and state == {"iteration_count": 1, "task_goal": "g"}
+
+    state, version, complete = apply_state_delta(state, version, payloads[1])
+    assert complete and state["iteration_count"] == 2
+
+    _, _, complete = apply_state_delta({"task_goal": "g"}, 0, payloads[2])
+    assert complete is False
+
+
+def test_new_messages_and_snapshot_come_from_checkpointer():
+    def _respond(state: MessagesState):
+        return {"messages": [AIMessage(content=f"reply-{len(state['messages'])}")]}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("respond", _respond)
+    builder.add_edge(START, "respond")
+    checkpointer = MemorySaver()
+    graph = builder.compile(checkpointer=checkpointer)
+    config = {"configurable": {"thread_id": "chat"}}
+
+    async def _run():
+        await graph.ainvoke({"messages": [HumanMessage(content="one")]}, config)
+        prior = checkpoint_message_ids(await checkpointer.aget_tuple(config))
+        result = await graph.ainvoke({"messages": [HumanMessage(content="two")]}, config)
+        snapshot = await load_state_snapshot(checkpointer, "chat", keys=("messages",))
+        return prior, result, snapshot
+
+    prior, result, snapshot = asyncio.run(_run())
+
+    fresh = new_messages(result["messages"], prior)
+    assert [message.content for message in fresh] == ["two", "reply-3"]
+    assert len(snapshot["messages"]) == 4
+
+
+class _GraphState(TypedDict, total=False):
+    messages: Annotated[list, add_messages]
+    task_goal: str
+    milestones: list
+    iteration_count: int
+    autonomous_mode: bool
+    thread_id: str
+
+
+class _RecordingGraph:
+    """Compiled one-node graph that records the input of every invocation."""
+
+    def __init__(self, checkpointer) -> None:
+        def _step(state: _GraphState):
+            return {
+                "messages": [AIMessage(content=f"turn-{len(state['messages'])}")],
+                "iteration_count": state.get("iteration_count", 0) + 1,
+            }
+
+        builder = StateGraph(_GraphState)
+        builder.add_node("step", _step)
+        builder.add_edge(START, "step")
+        self._graph = builder.compile(checkpointer=checkpointer)
+        self.inputs: list[dict] = []
+
+    async def ainvoke(self, state, config):
+        self.inputs.append(state)
+        return await self._graph.ainvoke(state, config)
+
+
+def _agent_runner(identity: str) -> RuntimeRunner:
+    runner = object.__new__(RuntimeRunner)
+    runner._identity = identity  # type: ignore[attr-defined]
+    runner._profile = profiles_module.load_profile("agent")  # type: ignore[attr-defined]
+    runner._state_tracker = StateDeltaTracker()  # type: ignore[attr-defined]
+    runner._state_receiver = StateDeltaReceiver()  # type: ignore[attr-defined]
+    runner._checkpointer = MemorySaver()  # type: ignore[attr-defined]
+    runner._graph = _RecordingGraph(runner._checkpointer)  # type: ignore[attr-defined]
+    return runner
+
+
+def test_envelopes_round_trip_from_sender_to_receiver():
+    sender = _agent_runner("agent-a")
+    receiver = _agent_runner("agent-b")
+
+    def _to_sender(message: str, **payload) -> MessageEnvelope:
+        return MessageEnvelope(
+            sender=ORCHESTRATOR_RECIPIENT,
+            recipient="agent-a",
+            message=message,
+            payload={"chat_id": "chat", **payload},
+        )
+
+    def _forward(envelope: MessageEnvelope) -> MessageEnvelope:
+        return MessageEnvelope(
+            sender=envelope.sender,
+            recipient="agent-b",
+            message=envelope.message,
+            payload=envelope.payload,
+        )
+
+    async def _run():
+        first = await sender._process_envelope(
+            _to_sender("start", state={"task_goal": "ship", "milestones": [{"m": 1}]})
+        )
+        (first_reply,) = first
+        assert first_reply.payload["state_base_version"] is None
+        assert len(first_reply.payload["messages"]) == 2
+        await receiver._process_envelope(_forward(first_reply))
+        received = receiver._graph.inputs[-1]
+        assert len(received["messages"]) == 2
+        assert received["task_goal"] == "ship"
+        assert received["milestones"] is not first_reply.payload["state"]["milestones"]
+
+        second = await sender._process_envelope(_to_sender("next", reply_to=["agent-c"]))
+        by_recipient = {envelope.recipient: envelope for envelope in second}
+        delta = by_recipient[ORCHESTRATOR_RECIPIENT].payload
+        assert delta["state_base_version"] == first_reply.payload["state_version"]
+        assert "task_goal" not in delta["state"]
+        assert [m["data"]["content"] for m in delta["messages"]] == ["next", "turn-3"]
+        fresh = by_recipient["agent-c"].payload
+        assert fresh["state_base_version"] is None
+        assert len(fresh["messages"]) == 4
+
+        await receiver._process_envelope(_forward(by_recipient[ORCHESTRATOR_RECIPIENT]))
+        received = receiver._graph.inputs[-1]
+        assert received["task_goal"] == "ship"
+        assert received["iteration_count"] == 2
+
+        # A receiver that lost its copy (restart, eviction) rebuilds the base
+        # from its checkpoint.
+        receiver._state_receiver = StateDeltaReceiver()
+        (third,) = await sender._process_envelope(_to_sender("again"))
+        await receiver._process_envelope(_forward(third))
+        received = receiver._graph.inputs[-1]
+        assert received["task_goal"] == "ship"
+        assert received["milestones"] == [{"m": 1}]
+        assert received["iteration_count"] == 3
+
+    asyncio.run(_run())
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from quadracode_runtime.config.context_engine import ContextEngineConfig
+from quadracode_runtime.nodes.context_reducer import ContextReducer
+from quadracode_runtime.summary_cache import DiskSummaryBackend, RedisSummaryBackend, SummaryStore
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class _FakeLLM:
+    def __init__(self, *, fail: bool = False) -> None:
+        self.calls = 0
+        self.fail = fail
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("provider unavailable")
+        return SimpleNamespace(content=f"summary {self.calls}")
+
+
+def _reducer(llm: _FakeLLM, store: SummaryStore) -> ContextReducer:
+    reducer = ContextReducer(ContextEngineConfig(metrics_enabled=False))
+    reducer._llm = llm
+    reducer.summary_store = store
+    return reducer
+
+
+def test_key_depends_on_every_input() -> None:
+    base = SummaryStore.key("text", focus="code", template_version="v1", model="m")
+
+    assert base == SummaryStore.key("text", focus="code", template_version="v1", model="m")
+    assert base != SummaryStore.key("text!", focus="code", template_version="v1", model="m")
+    assert base != SummaryStore.key("text", focus="docs", template_version="v1", model="m")
+    assert base != SummaryStore.key("text", focus="code", template_version="v2", model="m")
+    assert base != SummaryStore.key("text", focus="code", template_version="v1", model="n")
+
+
+@pytest.mark.anyio
+async def test_memory_tier_serves_repeated_reductions() -> None:
+    llm = _FakeLLM()
+    store = SummaryStore()
+    reducer = _reducer(llm, store)
+
+    first = await reducer.reduce("pytest failed: AssertionError in test_x", focus="test_results")
+    second = await reducer.reduce("pytest failed: AssertionError in test_x", focus="test_results")
+
+    assert llm.calls == 1
+    assert first.cache_tier is None
+    assert second.cache_tier == "memory"
+    assert second.content == first.content
+    assert store.stats.memory_hits == 1
+    assert store.stats.misses == 1
+
+
+@pytest.mark.anyio
+async def test_disk_tier_survives_restart(tmp_path) -> None:
+    first_llm = _FakeLLM()
+    await _reducer(first_llm, SummaryStore(backend=DiskSummaryBackend(tmp_path))).reduce(
+        "README contents", focus="documentation"
+    )
+
+    restarted_llm = _FakeLLM()
+    restarted = SummaryStore(backend=DiskSummaryBackend(tmp_path))
+    result = await _reducer(restarted_llm, restarted).reduce("README contents", focus="documentation")
+
+    assert restarted_llm.calls == 0
+    assert result.cache_tier == "disk"
+    assert result.content == "summary 1"
+    assert restarted.stats.persistent_hits == 1
+
+
+@pytest.mark.anyio
+async def test_fallback_reductions_are_not_cached() -> None:
+    store = SummaryStore()
+    reducer = _reducer(_FakeLLM(fail=True), store)
+
+    result = await reducer.reduce("line one\nline two", focus="tool_output")
+
+    assert result.cache_tier is None
+    assert store.stats.writes == 0
+
+
+@pytest.mark.anyio
+async def test_unwritable_persistent_tier_is_skipped(tmp_path) -> None:
+    blocker = tmp_path / "blocker"
+    blocker.write_text("not a directory")
+    store = SummaryStore(backend=DiskSummaryBackend(blocker / "cache"))
+
+    await store.put("ab" * 32, "summary", 3)
+    cached = await store.get("ab" * 32)
+
+    assert cached is not None and cached.tier == "memory"
+    assert store.stats.errors == 1
+
+
+@pytest.mark.anyio
+async def test_disk_tier_honors_ttl_and_sweeps_to_its_bound(tmp_path) -> None:
+    backend = DiskSummaryBackend(tmp_path, ttl_seconds=60, max_entries=3, sweep_every=1000)
+    for index in range(5):
+        await backend.put(f"{index:02d}" * 32, {"summary": f"s{index}", "token_count": 1})
+    paths = sorted(tmp_path.glob("*/*.json"))
+    for age, path in enumerate(reversed(paths)):
+        os.utime(path, (time.time() - age * 10, time.time() - age * 10))
+
+    expired = "00" * 32
+    os.utime(backend._path(expired), (time.time() - 120, time.time() - 120))
+    assert await backend.get(expired) is None
+    assert not backend._path(expired).exists()
+
+    assert backend.sweep() == 1
+    assert sorted(path.name[:2] for path in tmp_path.glob("*/*.json")) == ["02", "03", "04"]
+
+
+def test_redis_tier_closes_the_client_of_a_previous_loop(monkeypatch) -> None:
+    redis_asyncio = pytest.importorskip("redis.asyncio")
+
+    class _FakeRedis:
+        def __init__(self) -> None:
+            self.closed = False
+
+        async def get(self, key):
+            return None
+
+        async def aclose(self) -> None:
+            self.closed = True
+
+    clients: list[_FakeRedis] = []
+
+    def _from_url(*_args, **_kwargs) -> _FakeRedis:
+        clients.append(_FakeRedis())
+        return clients[-1]
+
+    monkeypatch.setattr(redis_asyncio.Redis, "from_url", staticmethod(_from_url))
+    backend = RedisSummaryBackend("redis://localhost:6379/0", ttl_seconds=60)
+
+    # Both loops stay alive, so neither can be mistaken for the other.
+    loops = [asyncio.new_event_loop(), asyncio.new_event_loop()]
+    try:
+        for loop in loops:
+            loop.run_until_complete(backend.get("ab" * 32))
+            loop.run_until_complete(backend.get("cd" * 32))
+    finally:
+        for loop in loops:
+            loop.close()
+
+    assert len(clients) == 2
+    assert clients[0].closed and not clients[1].closed
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from quadracode_runtime.scheduler import ThreadScheduler
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_jobs_within_a_thread_run_in_order():
+    scheduler = ThreadScheduler(max_concurrency=4)
+    seen: list[int] = []
+
+    def _job(index: int):
+        async def _run() -> None:
+            await asyncio.sleep(0.01 * (5 - index))
+            seen.append(index)
+
+        return _run
+
+    for index in range(5):
+        await scheduler.submit("chat-a", _job(index))
+    await scheduler.join()
+
+    assert seen == [0, 1, 2, 3, 4]
+    assert scheduler.in_flight == 0
+    assert scheduler.active_threads == 0
+
+
+@pytest.mark.anyio
+async def test_different_threads_run_concurrently_up_to_limit():
+    scheduler = ThreadScheduler(max_concurrency=2)
+    running = 0
+    peak = 0
+    release = asyncio.Event()
+
+    async def _job() -> None:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await release.wait()
+        running -= 1
+
+    for key in ("a", "b", "c"):
+        await scheduler.submit(key, _job)
+    await asyncio.sleep(0.05)
+    assert peak == 2
+
+    release.set()
+    await scheduler.join()
+    assert peak == 2
+
+
+@pytest.mark.anyio
+async def test_submit_applies_backpressure_when_in_flight_limit_reached():
+    scheduler = ThreadScheduler(max_concurrency=1, max_in_flight=2)
+    release = asyncio.Event()
+
+    async def _blocked() -> None:
+        await release.wait()
+
+    await scheduler.submit("a", _blocked)
+    await scheduler.submit("b", _blocked)
+
+    third = asyncio.create_task(scheduler.submit("c", _blocked))
+    await asyncio.sleep(0.05)
+    assert not third.done()
+
+    release.set()
+    await asyncio.wait_for(third, timeout=1)
+    await scheduler.join()
+
+
+@pytest.mark.anyio
+async def test_failing_job_does_not_stall_its_thread():
+    scheduler = ThreadScheduler(max_concurrency=1)
+    seen: list[str] = []
+
+    async def _boom() -> None:
+        raise RuntimeError("boom")
+
+    async def _after() -> None:
+        seen.append("after")
+
+    await scheduler.submit("a", _boom)
+    await scheduler.submit("a", _after)
+    await scheduler.join()
+
+    assert seen == ["after"]
+    assert scheduler.in_flight == 0
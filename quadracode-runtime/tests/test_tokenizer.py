@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from quadracode_runtime.config.context_engine import ContextEngineConfig
+from quadracode_runtime.nodes.context_engine import ContextEngine
+from quadracode_runtime.state import make_initial_context_engine_state
+from quadracode_runtime.tokenizer import (
+    ApproximateBPETokenizer,
+    MESSAGE_OVERHEAD_TOKENS,
+    TokenCounter,
+    content_hash,
+    create_tokenizer,
+    register_tokenizer,
+    tally_tokens,
+)
+
+
+class _CountingTokenizer:
+    name = "counting"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def count(self, text: str) -> int:
+        self.calls += 1
+        return len(text.split())
+
+
+def test_bpe_tokenizer_tracks_word_and_symbol_structure() -> None:
+    tokenizer = ApproximateBPETokenizer()
+
+    assert tokenizer.count("") == 0
+    assert tokenizer.count("hello world") == 2
+    assert tokenizer.count("word " * 50) == 51  # trailing whitespace run
+    # Long identifiers and punctuation cost more than a whitespace split suggests.
+    code = "def compute_context_window_usage(self, state): return {'used': 1234567}"
+    assert tokenizer.count(code) > len(code.split())
+    # Non-ASCII text is not collapsed into a single "word".
+    assert tokenizer.count("上下文窗口") >= 5
+
+
+def test_counter_memoizes_by_content_hash() -> None:
+    backend = _CountingTokenizer()
+    counter = TokenCounter(backend, cache_size=2)
+
+    assert counter.count("alpha beta") == 2
+    assert counter.count("alpha" + " beta") == 2
+    assert backend.calls == 1
+    assert counter.hits == 1
+
+    counter.count("one")
+    counter.count("two")
+    counter.count("alpha beta")  # evicted by the LRU bound
+    assert backend.calls == 4
+
+
+def test_segment_counts_are_stamped_once_and_refreshed_when_invalidated() -> None:
+    backend = _CountingTokenizer()
+    counter = TokenCounter(backend)
+    segment = {"id": "s1", "content": "one two three", "token_count": 999}
+
+    assert counter.segment_tokens(segment) == 3
+    assert segment["token_count"] == 3
+    assert segment["token_hash"] == content_hash("one two three")
+
+    # A stamped count is trusted without rehashing or recounting the content.
+    counter.segment_tokens(segment)
+    assert backend.calls == 1
+    assert counter.hits == 0
+
+    segment["content"] = "one two"
+    assert counter.annotate(segment)["token_count"] == 2
+    assert segment["token_hash"] == content_hash("one two")
+
+
+def test_message_counts_are_memoized_without_touching_the_message() -> None:
+    backend = _CountingTokenizer()
+    counter = TokenCounter(backend)
+    message = HumanMessage(content="alpha beta")
+
+    assert counter.message_tokens(message) == 2 + MESSAGE_OVERHEAD_TOKENS
+    assert counter.message_tokens(HumanMessage(content="alpha beta")) == 2 + MESSAGE_OVERHEAD_TOKENS
+    assert backend.calls == 1
+    assert message.response_metadata == {}
+
+    assert TokenCounter(ApproximateBPETokenizer()).message_tokens(message) == 2 + MESSAGE_OVERHEAD_TOKENS
+
+
+def test_tally_adjusts_only_for_changed_entries() -> None:
+    tally: dict = {}
+
+    assert tally_tokens(tally, [("a", 3), ("b", 4)]) == 7
+    assert tally_tokens(tally, [("a", 3), ("b", 4), ("c", 5)]) == 12
+    assert tally_tokens(tally, [("a", 1), ("c", 5)]) == 6
+    assert tally_tokens(tally, []) == 0
+
+
+def test_message_tokens_include_tool_calls_and_overhead() -> None:
+    counter = TokenCounter(_CountingTokenizer())
+    plain = AIMessage(content="hi there")
+    with_tools = AIMessage(
+        content="hi there",
+        tool_calls=[{"name": "read_file", "args": {"path": "a.py"}, "id": "call-1"}],
+    )
+
+    assert counter.message_tokens(plain) == 2 + MESSAGE_OVERHEAD_TOKENS
+    assert counter.message_tokens(with_tools) > counter.message_tokens(plain)
+
+
+def test_create_tokenizer_resolves_registered_and_unknown_specs() -> None:
+    register_tokenizer("counting-test", lambda _arg: _CountingTokenizer())
+
+    assert create_tokenizer("counting-test").name == "counting"
+    assert create_tokenizer("does-not-exist").name == "bpe"
+
+
+def test_engine_usage_is_consistent_across_segments_and_messages() -> None:
+    config = ContextEngineConfig(metrics_enabled=False)
+    engine = ContextEngine(config)
+    state = make_initial_context_engine_state(context_window_max=config.context_window_max)
+    state["context_segments"] = [
+        {
+            "id": "seg",
+            "content": "alpha beta gamma",
+            "type": "conversation",
+            "priority": 5,
+            "token_count": 10_000,
+            "timestamp": "2024-01-01T00:00:00+00:00",
+            "decay_rate": 0.1,
+            "compression_eligible": True,
+            "restorable_reference": None,
+        }
+    ]
+    state["messages"] = [HumanMessage(content="alpha beta gamma")]
+
+    result = engine._recompute_context_usage(state)
+
+    breakdown = result["_context_breakdown"]
+    assert breakdown["segment_tokens"] == 3
+    assert breakdown["message_tokens"] == 3 + MESSAGE_OVERHEAD_TOKENS
+    assert result["context_window_used"] == (
+        breakdown["system_prompt_tokens"]
+        + breakdown["system_prompt_addendum_tokens"]
+        + breakdown["segment_tokens"]
+        + breakdown["message_tokens"]
+    )
+
+
+def test_engine_usage_totals_follow_added_and_removed_items() -> None:
+    config = ContextEngineConfig(metrics_enabled=False)
+    engine = ContextEngine(config)
+    state = make_initial_context_engine_state(context_window_max=config.context_window_max)
+    segment = {
+        "id": "seg",
+        "content": "alpha beta gamma",
+        "type": "conversation",
+        "priority": 5,
+        "token_count": 0,
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "decay_rate": 0.1,
+        "compression_eligible": True,
+        "restorable_reference": None,
+    }
+    state["context_segments"] = [segment]
+    state["messages"] = [HumanMessage(content="one two", id="m1")]
+    engine._recompute_context_usage(state)
+
+    state["context_segments"] = [segment, {**segment, "id": "seg-2", "token_hash": "", "content": "x"}]
+    state["messages"] = []
+    breakdown = engine._recompute_context_usage(state)["_context_breakdown"]
+
+    assert breakdown["segment_tokens"] == 3 + 1
+    assert breakdown["message_tokens"] == 0
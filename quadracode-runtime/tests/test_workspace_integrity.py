@@ -1,13 +1,31 @@
 from __future__ import annotations
 
+import hashlib
+import io
 import json
+import os
+import subprocess
+import tarfile
+import time
 from pathlib import Path
 
+from quadracode_contracts import WorkspaceSnapshotRecord
+from quadracode_tools.client.docker_backend import ExecResult, FakeDockerBackend
+
+from quadracode_runtime.snapshot_store import SnapshotBlobStore
 from quadracode_runtime.state import make_initial_context_engine_state
 from quadracode_runtime.workspace_integrity import (
+    WorkspaceIntegrityManager,
     capture_workspace_snapshot,
     validate_workspace_integrity,
 )
+from quadracode_runtime.workspace_manifest import (
+    ManifestCache,
+    ManifestScanStats,
+    aggregate_checksum,
+    scan_host_manifest,
+    scan_volume_manifest,
+)
 
 
 def _make_state(workspace_path: Path) -> dict:
@@ -47,9 +65,13 @@ def test_capture_workspace_snapshot_records_manifest_and_diff(tmp_path) -> None:
     )
     assert second_snapshot is not None
     assert second_snapshot.diff_path is not None
-    diff_text = Path(second_snapshot.diff_path).read_text(encoding="utf-8")
-    assert "alpha.txt" in diff_text
-    assert "beta.txt" in diff_text
+    assert second_snapshot.diff_path.endswith("-diff.json")
+    diff = json.loads(Path(second_snapshot.diff_path).read_text(encoding="utf-8"))
+    assert [change["path"] for change in diff["modified"]] == ["./alpha.txt"]
+    assert [change["path"] for change in diff["added"]] == ["./beta.txt"]
+    summary = second_snapshot.metadata["diff_summary"]
+    assert (summary["added_count"], summary["modified_count"]) == (1, 1)
+    assert summary["net_byte_delta"] == 2
 
 
 def test_validate_and_restore_workspace_detects_drift(tmp_path) -> None:
@@ -72,3 +94,408 @@ def test_validate_and_restore_workspace_detects_drift(tmp_path) -> None:
     assert result.restored
     assert target_file.read_text(encoding="utf-8") == "v1"
     assert not extra_file.exists()
+
+
+def test_validation_rehashes_only_changed_files(tmp_path) -> None:
+    workspace = tmp_path / "ws-incremental"
+    (workspace / "pkg").mkdir(parents=True)
+    (workspace / "pkg" / "mod.py").write_text("x = 1\n", encoding="utf-8")
+    (workspace / "README.md").write_text("readme", encoding="utf-8")
+    os.link(workspace / "README.md", workspace / "README.link")
+    (workspace / "alias.md").symlink_to("README.md")
+    # Files modified within the last second are never cached.
+    settled = time.time() - 60
+    for path in (workspace / "pkg" / "mod.py", workspace / "README.md"):
+        os.utime(path, (settled, settled))
+    descriptor = {"workspace_id": "ws-incremental", "host_path": str(workspace)}
+    manager = WorkspaceIntegrityManager(
+        snapshot_root=tmp_path / "snapshots", hash_workers=4, storage="archive"
+    )
+    snapshot = manager.capture_snapshot(descriptor=descriptor, reason="baseline")
+
+    first = manager.validate_workspace(descriptor=descriptor, reference=snapshot)
+    second = manager.validate_workspace(descriptor=descriptor, reference=snapshot)
+    # Checksums match the archive-derived manifest of the snapshot.
+    assert first.valid and second.valid
+    assert (first.files_scanned, first.files_rehashed) == (2, 2)
+    assert second.files_rehashed == 0
+
+    (workspace / "pkg" / "mod.py").write_text("x = 2\n", encoding="utf-8")
+    os.utime(workspace / "pkg" / "mod.py", (settled + 1, settled + 1))
+    drifted = manager.validate_workspace(descriptor=descriptor, reference=snapshot)
+    assert not drifted.valid
+    assert drifted.files_rehashed == 1
+    assert drifted.drift is not None and drifted.drift["modified_count"] == 1
+
+    # A fresh manager reuses the persisted cache.
+    restarted = WorkspaceIntegrityManager(snapshot_root=tmp_path / "snapshots", storage="archive")
+    assert restarted.validate_workspace(descriptor=descriptor, reference=snapshot).files_rehashed == 0
+
+
+def test_volume_validation_hashes_changed_files_in_container(tmp_path) -> None:
+    files = {"./a.txt": (b"alpha", 100, 1), "./dir/b.txt": (b"beta", 100, 2)}
+    hashed: list[list[str]] = []
+
+    def _handler(_container, command, _workdir, _env):
+        script, args = command[2], list(command[4:])
+        if "find" in script:
+            lines = ["1000"] + [f"{len(data)} {mtime} {inode} {path}" for path, (data, mtime, inode) in files.items()]
+            return ExecResult(0, "\n".join(lines) + "\n", "")
+        hashed.append(args)
+        lines = [f"{hashlib.sha256(files[path][0]).hexdigest()}  {path}" for path in args]
+        return ExecResult(0, "\n".join(lines) + "\n", "")
+
+    manager = WorkspaceIntegrityManager(
+        snapshot_root=tmp_path / "snapshots",
+        docker_backend=FakeDockerBackend(exec_handler=_handler),
+    )
+    manifest = [
+        {"path": path, "size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+        for path, (data, _, _) in sorted(files.items())
+    ]
+    reference = WorkspaceSnapshotRecord(
+        snapshot_id="ws-vol-1",
+        workspace_id="ws-vol",
+        created_at="2024-01-01T00:00:00+00:00",
+        reason="baseline",
+        checksum=aggregate_checksum(manifest),
+        manifest_path=str(tmp_path / "m.json"),
+        archive_path=str(tmp_path / "a.tar.gz"),
+    )
+    descriptor = {"workspace_id": "ws-vol", "volume": "qc-ws-vol"}
+
+    assert manager.validate_workspace(descriptor=descriptor, reference=reference).valid
+    files["./a.txt"] = (b"ALPHA", 101, 1)
+    result = manager.validate_workspace(descriptor=descriptor, reference=reference)
+
+    assert not result.valid
+    assert hashed == [["./a.txt", "./dir/b.txt"], ["./a.txt"]]
+
+
+def test_volume_files_modified_within_the_last_second_are_never_cached(tmp_path) -> None:
+    # Whole-second mtimes: a same-size rewrite within the second keeps the stamp.
+    files = {"./a.txt": (b"alpha", "1000", 1), "./b.txt": (b"beta", "998.5", 2)}
+    hashed: list[list[str]] = []
+
+    def _handler(_container, command, _workdir, _env):
+        script, args = command[2], list(command[4:])
+        if "find" in script:
+            lines = ["1000"] + [f"{len(data)} {mtime} {inode} {path}" for path, (data, mtime, inode) in files.items()]
+            return ExecResult(0, "\n".join(lines) + "\n", "")
+        hashed.append(args)
+        lines = [f"{hashlib.sha256(files[path][0]).hexdigest()}  {path}" for path in args]
+        return ExecResult(0, "\n".join(lines) + "\n", "")
+
+    docker = FakeDockerBackend(exec_handler=_handler)
+    cache = ManifestCache(tmp_path / "cache.json")
+    scan_volume_manifest(docker, "qc-ws-vol", cache, image="busybox")
+    files["./a.txt"] = (b"ALPHA", "1000", 1)
+    manifest = scan_volume_manifest(docker, "qc-ws-vol", cache, image="busybox")
+
+    assert hashed == [["./a.txt", "./b.txt"], ["./a.txt"]]
+    assert manifest[0]["sha256"] == hashlib.sha256(b"ALPHA").hexdigest()
+    assert ManifestCache(tmp_path / "cache.json").lookup("./b.txt", (4, 998_500_000_000, 2))
+
+
+def test_volume_hard_links_are_listed_once(tmp_path) -> None:
+    def _handler(_container, command, _workdir, _env):
+        script, args = command[2], list(command[4:])
+        if "find" in script:
+            return ExecResult(0, "1000\n5 900 7 ./a.txt\n5 900 7 ./b.link\n4 900 8 ./c.txt\n", "")
+        lines = [f"{hashlib.sha256(path.encode()).hexdigest()}  {path}" for path in args]
+        return ExecResult(0, "\n".join(lines) + "\n", "")
+
+    docker = FakeDockerBackend(exec_handler=_handler)
+    manifest = scan_volume_manifest(docker, "qc-ws-vol", ManifestCache(), image="busybox")
+
+    # The archive stores ./b.link as a link member, not as a second file.
+    assert [entry["path"] for entry in manifest] == ["./a.txt", "./c.txt"]
+
+
+def test_volume_scan_handles_names_with_newlines_and_backslashes(tmp_path) -> None:
+    volume = tmp_path / "volume"
+    volume.mkdir()
+    contents = {"./plain.txt": b"plain", "./new\nline.txt": b"newline", "./back\\slash.txt": b"backslash"}
+    for path, data in contents.items():
+        (volume / path).write_bytes(data)
+
+    def _handler(_container, command, _workdir, _env):
+        # Runs the real in-container scripts against a local directory.
+        script = command[2].replace("/snapshot", str(volume))
+        completed = subprocess.run(["sh", "-c", script, *command[3:]], capture_output=True, text=True)
+        return ExecResult(completed.returncode, completed.stdout, completed.stderr)
+
+    manifest = scan_volume_manifest(
+        FakeDockerBackend(exec_handler=_handler), "qc-ws-vol", ManifestCache(), image="debian"
+    )
+
+    assert {entry["path"]: entry["sha256"] for entry in manifest} == {
+        path: hashlib.sha256(data).hexdigest() for path, data in contents.items()
+    }
+
+
+def test_host_files_modified_within_the_last_second_are_never_cached(tmp_path) -> None:
+    workspace = tmp_path / "ws-racy"
+    workspace.mkdir()
+    fresh = workspace / "fresh.txt"
+    settled = workspace / "settled.txt"
+    fresh.write_text("alpha", encoding="utf-8")
+    settled.write_text("beta", encoding="utf-8")
+    os.utime(settled, (time.time() - 60, time.time() - 60))
+    # Coarse timestamps: a same-size rewrite within the second keeps the stamp.
+    stamp_ns = time.time_ns()
+    os.utime(fresh, ns=(stamp_ns, stamp_ns))
+    cache = ManifestCache(tmp_path / "cache.json")
+    scan_host_manifest(workspace, cache)
+
+    with fresh.open("r+", encoding="utf-8") as handle:
+        handle.write("ALPHA")
+    os.utime(fresh, ns=(stamp_ns, stamp_ns))
+    stats = ManifestScanStats()
+    manifest = scan_host_manifest(workspace, cache, stats=stats)
+
+    assert stats.rehashed == 1
+    assert manifest[0]["sha256"] == hashlib.sha256(b"ALPHA").hexdigest()
+    info = settled.stat()
+    persisted = ManifestCache(tmp_path / "cache.json")
+    assert persisted.lookup("./settled.txt", (info.st_size, info.st_mtime_ns, info.st_ino))
+    assert len(persisted) == 1
+
+
+def test_blob_snapshots_store_and_restore_only_changed_files(tmp_path) -> None:
+    workspace = tmp_path / "ws-blobs"
+    (workspace / "src").mkdir(parents=True)
+    (workspace / "src" / "app.py").write_text("print('v1')\n" * 100, encoding="utf-8")
+    (workspace / "run.sh").write_text("#!/bin/sh\n", encoding="utf-8")
+    (workspace / "run.sh").chmod(0o755)
+    (workspace / "static.txt").write_text("unchanged", encoding="utf-8")
+    descriptor = {"workspace_id": "ws-blobs", "host_path": str(workspace)}
+    manager = WorkspaceIntegrityManager(snapshot_root=tmp_path / "snapshots", storage="blobs")
+    store = manager.blob_store
+
+    baseline = manager.capture_snapshot(descriptor=descriptor, reason="baseline")
+    assert baseline.storage == "blobs"
+    assert store.blobs_written == 3
+
+    (workspace / "src" / "app.py").write_text("print('v2')\n", encoding="utf-8")
+    second = manager.capture_snapshot(descriptor=descriptor, reason="edit", previous_snapshot=baseline)
+    # Only the edited file produced a new blob.
+    assert store.blobs_written == 4
+    assert manager.validate_workspace(descriptor=descriptor, reference=second).valid
+
+    static_inode = (workspace / "static.txt").stat().st_ino
+    (workspace / "src" / "extra.py").write_text("x", encoding="utf-8")
+    (workspace / "run.sh").unlink()
+    result = manager.validate_workspace(descriptor=descriptor, reference=baseline, auto_restore=True)
+
+    assert result.restored
+    assert (workspace / "src" / "app.py").read_text(encoding="utf-8").count("v1") == 100
+    assert not (workspace / "src" / "extra.py").exists()
+    assert (workspace / "run.sh").stat().st_mode & 0o777 == 0o755
+    assert (workspace / "static.txt").stat().st_ino == static_inode
+    assert manager.validate_workspace(descriptor=descriptor, reference=baseline).valid
+
+
+def test_blob_snapshots_restore_symlinks_directories_and_hard_links(tmp_path) -> None:
+    workspace = tmp_path / "ws-layout"
+    (workspace / "bin").mkdir(parents=True)
+    (workspace / "empty").mkdir()
+    (workspace / "tool.py").write_text("print(1)", encoding="utf-8")
+    (workspace / "bin" / "tool").symlink_to("../tool.py")
+    (workspace / "data.txt").write_text("data", encoding="utf-8")
+    os.link(workspace / "data.txt", workspace / "data.link")
+    (workspace / "bin").chmod(0o700)
+    descriptor = {"workspace_id": "ws-layout", "host_path": str(workspace)}
+    manager = WorkspaceIntegrityManager(snapshot_root=tmp_path / "snapshots", storage="blobs")
+    snapshot = manager.capture_snapshot(descriptor=descriptor, reason="baseline")
+
+    (workspace / "bin" / "tool").unlink()
+    (workspace / "empty").rmdir()
+    (workspace / "data.txt").write_text("DATA", encoding="utf-8")
+    (workspace / "stray").mkdir()
+    (workspace / "stray.link").symlink_to("tool.py")
+    result = manager.validate_workspace(descriptor=descriptor, reference=snapshot, auto_restore=True)
+
+    assert result.restored
+    assert os.readlink(workspace / "bin" / "tool") == "../tool.py"
+    assert (workspace / "empty").is_dir()
+    assert (workspace / "bin").stat().st_mode & 0o777 == 0o700
+    assert (workspace / "data.link").read_text(encoding="utf-8") == "data"
+    assert os.path.samefile(workspace / "data.txt", workspace / "data.link")
+    assert not (workspace / "stray").exists()
+    assert not os.path.lexists(workspace / "stray.link")
+    assert manager.validate_workspace(descriptor=descriptor, reference=snapshot).valid
+
+
+def test_released_blob_snapshots_are_garbage_collected(tmp_path) -> None:
+    workspace = tmp_path / "ws-gc"
+    workspace.mkdir()
+    (workspace / "shared.txt").write_text("shared", encoding="utf-8")
+    (workspace / "draft.txt").write_text("draft 1", encoding="utf-8")
+    descriptor = {"workspace_id": "ws-gc", "host_path": str(workspace)}
+    manager = WorkspaceIntegrityManager(snapshot_root=tmp_path / "snapshots", storage="blobs")
+
+    first = manager.capture_snapshot(descriptor=descriptor, reason="one")
+    (workspace / "draft.txt").write_text("draft 2", encoding="utf-8")
+    manager.capture_snapshot(descriptor=descriptor, reason="two")
+    shared = hashlib.sha256(b"shared").hexdigest()
+    assert manager.blob_store.refcount(shared) == 2
+    orphan = tmp_path / "orphan.txt"
+    orphan.write_text("orphan", encoding="utf-8")
+    orphan_digest, _ = manager.blob_store.ingest_file(orphan)
+
+    removed = manager.release_snapshot(first)
+
+    assert removed == 1
+    assert not manager.blob_store.has(hashlib.sha256(b"draft 1").hexdigest())
+    assert manager.blob_store.refcount(shared) == 1
+    assert not Path(first.manifest_path).exists()
+    # Pruning only touches released blobs; orphans wait for the maintenance sweep.
+    assert manager.blob_store.has(orphan_digest)
+    assert manager.blob_store.collect_garbage() == 1
+    assert not manager.blob_store.has(orphan_digest)
+
+
+def test_blob_refcounts_are_shared_between_stores_on_one_root(tmp_path) -> None:
+    source = tmp_path / "shared.txt"
+    source.write_text("shared", encoding="utf-8")
+    first = SnapshotBlobStore(tmp_path / "snapshots")
+    second = SnapshotBlobStore(tmp_path / "snapshots")
+    digest, _ = first.ingest_file(source)
+
+    first.acquire([digest])
+    second.acquire([digest])
+    released = first.release([digest])
+
+    # The second process's reference survives the first one's release.
+    assert released == []
+    assert second.refcount(digest) == 1
+    assert first.delete_blobs([digest]) == 0
+    assert second.has(digest)
+    assert second.release([digest]) == [digest]
+    assert first.delete_blobs([digest]) == 1
+
+
+def test_blob_capture_reads_changed_files_once(tmp_path, monkeypatch) -> None:
+    workspace = tmp_path / "ws-once"
+    workspace.mkdir()
+    (workspace / "data.bin").write_bytes(b"payload" * 1000)
+    descriptor = {"workspace_id": "ws-once", "host_path": str(workspace)}
+    manager = WorkspaceIntegrityManager(snapshot_root=tmp_path / "snapshots", storage="blobs")
+    reads: list[str] = []
+    original = SnapshotBlobStore.ingest_stream
+
+    def _counting_ingest(self, stream):
+        reads.append(stream.name)
+        return original(self, stream)
+
+    monkeypatch.setattr(SnapshotBlobStore, "ingest_stream", _counting_ingest)
+    monkeypatch.setattr(
+        "quadracode_runtime.workspace_manifest._hash_file",
+        lambda path: (_ for _ in ()).throw(AssertionError(f"{path} hashed separately")),
+    )
+
+    snapshot = manager.capture_snapshot(descriptor=descriptor, reason="once")
+
+    assert reads == [str(workspace / "data.bin")]
+    digest = hashlib.sha256(b"payload" * 1000).hexdigest()
+    assert manager.blob_store.refcount(digest) == 1
+    assert snapshot.checksum
+
+
+def test_blob_capture_is_redone_when_a_blob_is_pruned_before_it_is_referenced(tmp_path) -> None:
+    workspace = tmp_path / "ws-race"
+    workspace.mkdir()
+    (workspace / "kept.txt").write_text("kept", encoding="utf-8")
+    descriptor = {"workspace_id": "ws-race", "host_path": str(workspace)}
+    manager = WorkspaceIntegrityManager(snapshot_root=tmp_path / "snapshots", storage="blobs")
+    store = manager.blob_store
+    digest = hashlib.sha256(b"kept").hexdigest()
+    original_acquire = store.acquire
+    calls: list[int] = []
+
+    def _acquire_after_prune(digests) -> None:
+        digests = list(digests)
+        if not calls:
+            # Another runtime prunes the unreferenced blob just before this one references it.
+            assert store.delete_blobs([digest]) == 1
+        calls.append(len(digests))
+        original_acquire(digests)
+
+    store.acquire = _acquire_after_prune  # type: ignore[method-assign]
+
+    snapshot = manager.capture_snapshot(descriptor=descriptor, reason="race")
+
+    assert calls == [1, 1]
+    assert store.has(digest)
+    assert store.refcount(digest) == 1
+    assert manager.validate_workspace(descriptor=descriptor, reference=snapshot).valid
+
+
+class _LayoutVolumeBackend(FakeDockerBackend):
+    """Exports prepared tar members and records the members it imports."""
+
+    def __init__(self, members: list[tarfile.TarInfo]) -> None:
+        super().__init__()
+        self.members = members
+        self.imported: list[tuple[str, bytes, str]] = []
+
+    def export_volume(self, volume, fileobj, *, image) -> None:
+        with tarfile.open(fileobj=fileobj, mode="w:gz") as tar:
+            for member in self.members:
+                tar.addfile(member, io.BytesIO(b"x" * member.size) if member.isfile() else None)
+
+    def import_volume(self, volume, fileobj, *, image) -> None:
+        with tarfile.open(fileobj=fileobj, mode="r:*") as tar:
+            self.imported = [(member.name, member.type, member.linkname) for member in tar]
+
+
+def test_blob_snapshot_of_volume_keeps_links_and_empty_directories(tmp_path) -> None:
+    def _member(name: str, kind: bytes, *, linkname: str = "", size: int = 0) -> tarfile.TarInfo:
+        info = tarfile.TarInfo(name)
+        info.type, info.linkname, info.size = kind, linkname, size
+        return info
+
+    docker = _LayoutVolumeBackend(
+        [
+            _member(".", tarfile.DIRTYPE),
+            _member("./venv", tarfile.DIRTYPE),
+            _member("./venv/python3", tarfile.REGTYPE, size=3),
+            _member("./venv/python", tarfile.SYMTYPE, linkname="python3"),
+            _member("./copy", tarfile.LNKTYPE, linkname="./venv/python3"),
+            _member("./empty", tarfile.DIRTYPE),
+        ]
+    )
+    descriptor = {"workspace_id": "ws-vol-layout", "volume": "qc-ws-vol"}
+    manager = WorkspaceIntegrityManager(
+        snapshot_root=tmp_path / "snapshots", storage="blobs", docker_backend=docker
+    )
+
+    snapshot = manager.capture_snapshot(descriptor=descriptor, reason="baseline")
+    manager._restore_from_snapshot(descriptor, snapshot)
+
+    assert docker.imported == [
+        (".", tarfile.DIRTYPE, ""),
+        ("./empty", tarfile.DIRTYPE, ""),
+        ("./venv", tarfile.DIRTYPE, ""),
+        ("./venv/python3", tarfile.REGTYPE, ""),
+        ("./copy", tarfile.LNKTYPE, "./venv/python3"),
+        ("./venv/python", tarfile.SYMTYPE, "python3"),
+    ]
+
+
+def test_blob_snapshot_round_trips_docker_volume(tmp_path) -> None:
+    docker = FakeDockerBackend()
+    docker.volumes["qc-ws-vol"] = {"a.txt": b"A" * 1000, "dir/b.txt": b"B"}
+    descriptor = {"workspace_id": "ws-vol-blobs", "volume": "qc-ws-vol"}
+    manager = WorkspaceIntegrityManager(
+        snapshot_root=tmp_path / "snapshots", storage="blobs", docker_backend=docker
+    )
+
+    snapshot = manager.capture_snapshot(descriptor=descriptor, reason="baseline")
+    docker.volumes["qc-ws-vol"] = {"a.txt": b"changed"}
+    manager._restore_from_snapshot(descriptor, snapshot)
+
+    assert docker.volumes["qc-ws-vol"] == {"a.txt": b"A" * 1000, "dir/b.txt": b"B"}
+    # The 1000-byte blob compresses, the 1-byte one is stored raw.
+    assert manager.blob_store.blob_path(hashlib.sha256(b"A" * 1000).hexdigest()).suffix == ".gz"
@@ -0,0 +1,178 @@
+"""Tar-stream helpers for copying many files to or from a workspace at once.
+
+`workspace_copy_to` and `workspace_copy_from` move one path per Docker call.
+The batch variants instead pack every selected file into a single (optionally
+gzip-compressed) tar stream, so pushing or pulling hundreds of small files
+costs one transfer. While an archive is written or extracted each regular
+file is hashed in the same pass, so callers get per-file SHA-256 checksums
+without reading anything twice.
+"""
+from __future__ import annotations
+
+import glob
+import hashlib
+import os
+import posixpath
+import tarfile
+from collections.abc import Iterable
+from pathlib import Path
+from typing import IO, Any
+
+_COPY_CHUNK = 1024 * 1024
+
+
+class ArchiveLimitError(ValueError):
+    """Raised when the selected files exceed the caller's size limit."""
+
+
+class _HashingReader:
+    """File wrapper that feeds everything read through a hash."""
+
+    def __init__(self, handle: IO[bytes], digest: "hashlib._Hash") -> None:
+        self._handle = handle
+        self._digest = digest
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._handle.read(size)
+        self._digest.update(chunk)
+        return chunk
+
+
+def expand_host_sources(
+    patterns: Iterable[str],
+    base_dir: Path | None = None,
+) -> tuple[list[tuple[Path, str]], list[str]]:
+    """Resolves host paths and glob patterns (``**`` recurses) to archive members.
+
+    With ``base_dir``, patterns are relative to it and matches keep their
+    relative path in the archive; otherwise each match is archived under its
+    own name, like ``docker cp``.
+
+    Returns:
+        ``([(host_path, arcname), ...], unmatched_patterns)``.
+    """
+    sources: list[tuple[Path, str]] = []
+    unmatched: list[str] = []
+    seen: set[str] = set()
+    for pattern in patterns:
+        if base_dir is not None:
+            matches = sorted(glob.glob(pattern, root_dir=base_dir, recursive=True))
+            resolved = [(base_dir / match, posixpath.normpath(Path(match).as_posix())) for match in matches]
+        else:
+            matches = sorted(glob.glob(os.path.expanduser(pattern), recursive=True))
+            resolved = [(Path(match), Path(match).name) for match in matches]
+        if not resolved:
+            unmatched.append(pattern)
+        for path, arcname in resolved:
+            if arcname not in seen:
+                seen.add(arcname)
+                sources.append((path, arcname))
+    return sources, unmatched
+
+
+def _iter_tree(path: Path, arcname: str) -> Iterable[tuple[Path, str]]:
+    yield path, arcname
+    if path.is_dir() and not path.is_symlink():
+        for child in sorted(path.iterdir()):
+            yield from _iter_tree(child, f"{arcname}/{child.name}")
+
+
+def host_sources_size(sources: Iterable[tuple[Path, str]]) -> int:
+    """Total size of the regular files the sources expand to."""
+    total = 0
+    for root, arcname in sources:
+        for path, _ in _iter_tree(root, arcname):
+            if path.is_file() and not path.is_symlink():
+                total += path.stat().st_size
+    return total
+
+
+def write_archive(
+    sources: Iterable[tuple[Path, str]],
+    fileobj: IO[bytes],
+    *,
+    prefix: str = "",
+    compress: bool = False,
+) -> list[dict[str, Any]]:
+    """Writes ``sources`` (directories recursively) as one tar stream.
+
+    Member names are ``prefix/arcname`` so the archive can be unpacked at the
+    filesystem root and land anywhere without creating the target first.
+
+    Returns:
+        ``{"path", "size", "sha256"}`` for every regular file, with ``path``
+        being the member name rooted at ``/`` when a prefix is used.
+    """
+    entries: list[dict[str, Any]] = []
+    prefix = prefix.strip("/")
+    with tarfile.open(fileobj=fileobj, mode="w:gz" if compress else "w") as tar:
+        for root, root_arcname in sources:
+            for path, arcname in _iter_tree(root, root_arcname):
+                member = f"{prefix}/{arcname}" if prefix else arcname
+                info = tar.gettarinfo(str(path), arcname=member)
+                if not info.isreg():
+                    tar.addfile(info)
+                    continue
+                digest = hashlib.sha256()
+                with path.open("rb") as handle:
+                    tar.addfile(info, _HashingReader(handle, digest))
+                entries.append(
+                    {
+                        "path": f"/{member}" if prefix else member,
+                        "size": info.size,
+                        "sha256": digest.hexdigest(),
+                    }
+                )
+    fileobj.seek(0)
+    return entries
+
+
+def extract_archive(
+    fileobj: IO[bytes],
+    destination: Path,
+    *,
+    max_bytes: int | None = None,
+) -> list[dict[str, Any]]:
+    """Extracts a (possibly compressed) tar stream into ``destination``.
+
+    Members go through tarfile's ``data`` filter, so absolute paths, ``..``
+    components and links escaping ``destination`` are rejected. Regular files
+    are written and hashed in one pass.
+
+    Raises:
+        ArchiveLimitError: If the regular files exceed ``max_bytes``.
+        tarfile.TarError: If the stream is not a valid archive or a member is unsafe.
+    """
+    destination.mkdir(parents=True, exist_ok=True)
+    entries: list[dict[str, Any]] = []
+    total = 0
+    with tarfile.open(fileobj=fileobj, mode="r|*") as tar:
+        for member in tar:
+            safe = tarfile.data_filter(member, str(destination))
+            if not safe.isreg():
+                tar.extract(safe, path=destination, filter="fully_trusted")
+                continue
+            total += safe.size
+            if max_bytes is not None and total > max_bytes:
+                raise ArchiveLimitError(f"archive contents exceed the {max_bytes} byte limit")
+            target = destination / safe.name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            source = tar.extractfile(safe)
+            digest = hashlib.sha256()
+            with target.open("wb") as handle:
+                while source is not None and (chunk := source.read(_COPY_CHUNK)):
+                    digest.update(chunk)
+                    handle.write(chunk)
+            os.chmod(target, safe.mode)
+            os.utime(target, (safe.mtime, safe.mtime))
+            entries.append({"path": str(target), "size": safe.size, "sha256": digest.hexdigest()})
+    return entries
+
+
+__all__ = [
+    "ArchiveLimitError",
+    "expand_host_sources",
+    "extract_archive",
+    "host_sources_size",
+    "write_archive",
+]
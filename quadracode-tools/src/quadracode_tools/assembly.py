@@ -31,6 +31,8 @@ from .tools.workspace import (
     workspace_exec,
     workspace_copy_to,
     workspace_copy_from,
+    workspace_copy_to_batch,
+    workspace_copy_from_batch,
     workspace_destroy,
     workspace_info,
 )
@@ -67,6 +69,8 @@ def get_tools() -> list[BaseTool]:
         workspace_exec,
         workspace_copy_to,
         workspace_copy_from,
+        workspace_copy_to_batch,
+        workspace_copy_from_batch,
         workspace_destroy,
         workspace_info,
         agent_registry_tool,
@@ -1,4 +1,4 @@
+from .docker_backend import get_docker_backend
 from .mcp_client import get_mcp_client
 
-__all__ = ["get_mcp_client"]
-
+__all__ = ["get_docker_backend", "get_mcp_client"]
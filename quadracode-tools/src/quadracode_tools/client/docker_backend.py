@@ -0,0 +1,1211 @@
+"""Pluggable Docker backends for workspace operations.
+
+Workspace tools and the runtime's workspace integrity manager talk to Docker
+through the `DockerBackend` interface instead of spawning the ``docker`` CLI for
+every call. Three implementations are provided:
+
+- ``EngineAPIDockerBackend`` speaks the Docker Engine HTTP API over the unix
+  socket with a persistent ``httpx.Client`` (connection pooling, no fork/exec).
+  Exec output is streamed from the attach endpoint and copies use the
+  ``put_archive``/``get_archive`` endpoints.
+- ``CLIDockerBackend`` wraps the ``docker`` binary. It is the fallback when the
+  socket is not reachable (remote ``DOCKER_HOST``, rootless setups, etc.).
+- ``FakeDockerBackend`` keeps volumes and containers in memory for tests.
+
+`get_docker_backend()` returns a process-wide backend selected from the
+environment and is safe to call from any thread.
+
+Environment Variables:
+    QUADRACODE_DOCKER_BACKEND: ``auto`` (default), ``api``, ``cli`` or ``fake``.
+        ``auto`` uses the Engine API when the socket answers a ping.
+    QUADRACODE_DOCKER_SOCKET: Engine API socket path. Defaults to the unix path
+        of ``DOCKER_HOST`` or ``/var/run/docker.sock``.
+    QUADRACODE_DOCKER_API_VERSION: Engine API version used in request paths
+        (default ``1.41``).
+    QUADRACODE_DOCKER_BIN: The ``docker`` binary used by the CLI backend.
+"""
+from __future__ import annotations
+
+import base64
+import io
+import json
+import logging
+import os
+import posixpath
+import stat
+import struct
+import subprocess
+import tarfile
+import tempfile
+import threading
+import uuid
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path, PurePosixPath
+from typing import IO, Any, Protocol
+
+import httpx
+
+from ..output_capture import BoundedOutput, stream_process
+
+logger = logging.getLogger(__name__)
+
+DOCKER_BIN = os.environ.get("QUADRACODE_DOCKER_BIN", "docker")
+DEFAULT_DOCKER_SOCKET = "/var/run/docker.sock"
+DEFAULT_API_VERSION = os.environ.get("QUADRACODE_DOCKER_API_VERSION", "1.41")
+
+_DEFAULT_TIMEOUT: float = 60.0
+_DEFAULT_CONNECT_TIMEOUT: float = 5.0
+_COPY_CHUNK_SIZE = 1024 * 1024
+_SPOOL_LIMIT = 8 * 1024 * 1024
+# Go's os.ModeDir, as reported in X-Docker-Container-Path-Stat.
+_GO_MODE_DIR = 1 << 31
+# Exported to every exec run with a timeout so its processes can be found again.
+_EXEC_TOKEN_VAR = "QUADRACODE_EXEC_TOKEN"
+_KILL_EXEC_TIMEOUT: float = 30.0
+# Signals every process whose environment carries the token ($1): SIGTERM,
+# then SIGKILL for whatever is left after five seconds.
+_KILL_EXEC_SCRIPT = r"""
+pids() {
+    for env in /proc/[0-9]*/environ; do
+        tr '\0' '\n' 2>/dev/null < "$env" | grep -qxF "QUADRACODE_EXEC_TOKEN=$1" || continue
+        pid=${env#/proc/}
+        echo "${pid%/environ}"
+    done
+}
+kill -TERM $(pids "$1") 2>/dev/null
+i=0
+while [ $i -lt 50 ] && [ -n "$(pids "$1")" ]; do sleep 0.1; i=$((i + 1)); done
+kill -KILL $(pids "$1") 2>/dev/null
+exit 0
+"""
+
+
+class DockerError(RuntimeError):
+    """Raised when a Docker operation fails."""
+
+    def __init__(self, message: str, *, status_code: int | None = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class DockerNotFoundError(DockerError):
+    """Raised when a referenced container, volume, image or path does not exist."""
+
+
+class ContainerUnavailableError(DockerError):
+    """Raised when a container is missing or not running."""
+
+
+class DockerTimeoutError(DockerError):
+    """Raised when a Docker operation exceeds its timeout."""
+
+
+@dataclass(frozen=True)
+class ExecResult:
+    """The outcome of a command run inside a container."""
+
+    returncode: int
+    stdout: str
+    stderr: str
+
+
+@dataclass
+class ContainerSpec:
+    """The subset of container configuration used by workspace operations."""
+
+    image: str
+    command: list[str]
+    name: str | None = None
+    volume: str | None = None
+    mount_target: str | None = None
+    environment: dict[str, str] = field(default_factory=dict)
+    network: str | None = None
+    restart_policy: str | None = None
+
+
+OutputCallback = Callable[[int, bytes], None]
+
+
+class DockerBackend(Protocol):
+    """Docker operations used by workspaces, independent of the transport."""
+
+    name: str
+
+    def inspect_container(self, name: str) -> dict[str, Any] | None:
+        """Returns the container's inspect data, or ``None`` if it does not exist."""
+
+    def inspect_volume(self, name: str) -> dict[str, Any] | None:
+        """Returns the volume's inspect data, or ``None`` if it does not exist."""
+
+    def create_volume(self, name: str) -> None:
+        ...
+
+    def remove_volume(self, name: str) -> None:
+        ...
+
+    def run_container(self, spec: ContainerSpec) -> str:
+        """Creates and starts a detached container; returns its id."""
+
+    def start_container(self, name: str) -> None:
+        ...
+
+    def remove_container(self, name: str, *, force: bool = True) -> None:
+        ...
+
+    def exec(
+        self,
+        container: str,
+        command: Sequence[str],
+        *,
+        workdir: str | None = None,
+        environment: dict[str, str] | None = None,
+        timeout: float | None = None,
+        on_output: OutputCallback | None = None,
+    ) -> ExecResult:
+        """Runs ``command`` in a running container.
+
+        When ``on_output`` is given, output is streamed to it as
+        ``(stream, chunk)`` pairs (1 = stdout, 2 = stderr) while the command
+        runs and the returned `ExecResult` carries empty ``stdout``/``stderr``.
+
+        When ``timeout`` elapses, the processes started by the command are
+        stopped (SIGTERM, then SIGKILL) before `DockerTimeoutError` is raised;
+        ending the exec session alone would leave them running.
+
+        Raises:
+            ContainerUnavailableError: If the container is missing or stopped.
+            DockerTimeoutError: If ``timeout`` elapses first.
+        """
+
+    def copy_to(self, container: str, host_path: Path, destination: str) -> None:
+        """Copies a host file or directory into a container (``docker cp`` semantics)."""
+
+    def put_archive(self, container: str, path: str, fileobj: IO[bytes]) -> None:
+        """Extracts a tar stream (plain or gzip) into the existing directory ``path``."""
+
+    def copy_from(self, container: str, source: str, host_path: Path) -> None:
+        """Copies a container file or directory to the host (``docker cp`` semantics)."""
+
+    def run_once(self, spec: ContainerSpec, *, timeout: float | None = None) -> ExecResult:
+        """Runs a throwaway container to completion and returns its output."""
+
+    def export_volume(self, volume: str, fileobj: IO[bytes], *, image: str) -> None:
+        """Writes the volume contents to ``fileobj`` as a gzip tarball of ``./`` paths."""
+
+    def import_volume(self, volume: str, fileobj: IO[bytes], *, image: str) -> None:
+        """Replaces the volume contents with a gzip tarball produced by `export_volume`."""
+
+
+# ---------------------------------------------------------------------------
+# Shared helpers
+# ---------------------------------------------------------------------------
+
+
+def demux_stream(chunks: Iterable[bytes]) -> Iterator[tuple[int, bytes]]:
+    """Splits Docker's multiplexed attach stream into ``(stream, payload)`` frames.
+
+    Each frame has an 8-byte header: the stream type (1 = stdout, 2 = stderr)
+    followed by three padding bytes and a big-endian payload length.
+    """
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer.extend(chunk)
+        while len(buffer) >= 8:
+            stream_type = buffer[0]
+            (length,) = struct.unpack(">I", bytes(buffer[4:8]))
+            if len(buffer) < 8 + length:
+                break
+            payload = bytes(buffer[8 : 8 + length])
+            del buffer[: 8 + length]
+            yield stream_type, payload
+
+
+def _exec_killing_on_timeout(
+    run: Callable[..., ExecResult],
+    container: str,
+    command: Sequence[str],
+    *,
+    workdir: str | None,
+    environment: dict[str, str] | None,
+    timeout: float | None,
+    on_output: OutputCallback | None,
+) -> ExecResult:
+    """Runs a backend's raw exec and stops the command's processes if it times out.
+
+    The command runs with a token in its environment, which every process it
+    starts inherits; on timeout a second exec finds them by that token.
+    Processes that clear their environment are not found.
+    """
+    if timeout is None:
+        return run(container, command, workdir=workdir, environment=environment, timeout=None, on_output=on_output)
+    token = uuid.uuid4().hex
+    try:
+        return run(
+            container,
+            command,
+            workdir=workdir,
+            environment={**(environment or {}), _EXEC_TOKEN_VAR: token},
+            timeout=timeout,
+            on_output=on_output,
+        )
+    except DockerTimeoutError:
+        try:
+            run(
+                container,
+                ["sh", "-c", _KILL_EXEC_SCRIPT, "sh", token],
+                workdir=None,
+                environment=None,
+                timeout=_KILL_EXEC_TIMEOUT,
+                on_output=None,
+            )
+        except DockerError as exc:
+            logger.warning("Unable to stop the timed-out exec in %s: %s", container, exc)
+        raise
+
+
+def _decode(data: bytes | bytearray) -> str:
+    return bytes(data).decode("utf-8", errors="replace")
+
+
+def _build_tar(host_path: Path, arcname: str, fileobj: IO[bytes]) -> None:
+    with tarfile.open(fileobj=fileobj, mode="w") as tar:
+        tar.add(host_path, arcname=arcname)
+    fileobj.seek(0)
+
+
+def extract_copied_archive(fileobj: IO[bytes], destination: Path) -> None:
+    """Extracts a ``get_archive`` tarball to ``destination`` like ``docker cp`` does.
+
+    The archive holds a single top-level entry (the copied file or directory).
+    It is placed inside ``destination`` if that is an existing directory, and is
+    renamed to ``destination`` otherwise.
+    """
+    with tarfile.open(fileobj=fileobj, mode="r:*") as tar:
+        members = tar.getmembers()
+        if not members:
+            return
+        root = members[0].name.split("/", 1)[0]
+        if destination.is_dir():
+            tar.extractall(path=destination, members=members, filter="data")
+            return
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        for member in members:
+            relative = member.name[len(root) :].lstrip("/")
+            member.name = posixpath.join(destination.name, relative) if relative else destination.name
+        tar.extractall(path=destination.parent, members=members, filter="data")
+
+
+def _relocate_archive(source: IO[bytes], target: IO[bytes]) -> None:
+    """Rewrites a ``get_archive`` tarball of a directory as a gzip tarball of ``./`` paths.
+
+    This matches the layout of ``tar czf - .`` so manifests and checksums of
+    snapshots do not depend on the backend that produced them.
+    """
+
+    def _rename(name: str) -> str:
+        relative = name.split("/", 1)[1] if "/" in name else ""
+        return f"./{relative}" if relative else "."
+
+    with tarfile.open(fileobj=source, mode="r:*") as src, tarfile.open(
+        fileobj=target, mode="w:gz"
+    ) as dst:
+        for member in src:
+            member.name = _rename(member.name)
+            if member.islnk():
+                member.linkname = _rename(member.linkname)
+            dst.addfile(member, src.extractfile(member) if member.isfile() else None)
+
+
+def _iter_file(fileobj: IO[bytes]) -> Iterator[bytes]:
+    while True:
+        chunk = fileobj.read(_COPY_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _split_image(image: str) -> tuple[str, str]:
+    name, _, digest = image.partition("@")
+    if digest:
+        return name, digest
+    last = name.rsplit("/", 1)[-1]
+    if ":" in last:
+        repo, _, tag = name.rpartition(":")
+        return repo, tag
+    return name, "latest"
+
+
+# ---------------------------------------------------------------------------
+# Docker Engine API backend
+# ---------------------------------------------------------------------------
+
+
+class EngineAPIDockerBackend:
+    """Talks to the Docker Engine HTTP API over a unix socket.
+
+    A single ``httpx.Client`` is shared by all calls, so requests reuse pooled
+    connections instead of paying CLI start-up and a new socket per operation.
+    """
+
+    name = "api"
+
+    def __init__(
+        self,
+        socket_path: str,
+        *,
+        api_version: str = DEFAULT_API_VERSION,
+        timeout: float = _DEFAULT_TIMEOUT,
+        transport: httpx.BaseTransport | None = None,
+    ) -> None:
+        self.socket_path = socket_path
+        self._timeout = httpx.Timeout(timeout, connect=_DEFAULT_CONNECT_TIMEOUT)
+        self._client = httpx.Client(
+            transport=transport or httpx.HTTPTransport(uds=socket_path),
+            base_url=f"http://docker/v{api_version.lstrip('v')}",
+            timeout=self._timeout,
+        )
+
+    def close(self) -> None:
+        self._client.close()
+
+    # -- transport ---------------------------------------------------------
+
+    @staticmethod
+    def _error_message(response: httpx.Response) -> str:
+        try:
+            payload = response.json()
+        except ValueError:
+            return response.text.strip() or f"HTTP {response.status_code}"
+        if isinstance(payload, dict) and payload.get("message"):
+            return str(payload["message"])
+        return response.text.strip() or f"HTTP {response.status_code}"
+
+    def _raise_for_status(self, response: httpx.Response) -> None:
+        if response.status_code < 400:
+            return
+        if not response.is_stream_consumed:
+            response.read()
+        message = self._error_message(response)
+        if response.status_code == 404:
+            raise DockerNotFoundError(message, status_code=404)
+        raise DockerError(message, status_code=response.status_code)
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: dict[str, Any] | None = None,
+        json_body: Any = None,
+        content: Any = None,
+        headers: dict[str, str] | None = None,
+        timeout: float | None | httpx.Timeout = None,
+    ) -> httpx.Response:
+        try:
+            response = self._client.request(
+                method,
+                path,
+                params=params,
+                json=json_body,
+                content=content,
+                headers=headers,
+                timeout=timeout if timeout is not None else self._timeout,
+            )
+        except httpx.TimeoutException as exc:
+            raise DockerTimeoutError(f"Docker API request timed out: {method} {path}") from exc
+        except httpx.HTTPError as exc:
+            raise DockerError(f"Docker API request failed: {exc}") from exc
+        self._raise_for_status(response)
+        return response
+
+    def ping(self) -> None:
+        self._request("GET", "/_ping", timeout=httpx.Timeout(_DEFAULT_CONNECT_TIMEOUT))
+
+    # -- volumes -----------------------------------------------------------
+
+    def inspect_volume(self, name: str) -> dict[str, Any] | None:
+        try:
+            return self._request("GET", f"/volumes/{name}").json()
+        except DockerNotFoundError:
+            return None
+
+    def create_volume(self, name: str) -> None:
+        self._request("POST", "/volumes/create", json_body={"Name": name})
+
+    def remove_volume(self, name: str) -> None:
+        self._request("DELETE", f"/volumes/{name}")
+
+    # -- containers --------------------------------------------------------
+
+    def inspect_container(self, name: str) -> dict[str, Any] | None:
+        try:
+            return self._request("GET", f"/containers/{name}/json").json()
+        except DockerNotFoundError:
+            return None
+
+    @staticmethod
+    def _container_body(spec: ContainerSpec) -> dict[str, Any]:
+        host_config: dict[str, Any] = {}
+        if spec.volume and spec.mount_target:
+            host_config["Mounts"] = [
+                {"Type": "volume", "Source": spec.volume, "Target": spec.mount_target}
+            ]
+        if spec.network:
+            host_config["NetworkMode"] = spec.network
+        if spec.restart_policy:
+            host_config["RestartPolicy"] = {"Name": spec.restart_policy}
+        return {
+            "Image": spec.image,
+            "Cmd": list(spec.command),
+            "Env": [f"{key}={value}" for key, value in spec.environment.items()],
+            "AttachStdout": False,
+            "AttachStderr": False,
+            "HostConfig": host_config,
+        }
+
+    def _pull_image(self, image: str) -> None:
+        repo, tag = _split_image(image)
+        response = self._request(
+            "POST",
+            "/images/create",
+            params={"fromImage": repo, "tag": tag},
+            timeout=httpx.Timeout(None, connect=_DEFAULT_CONNECT_TIMEOUT),
+        )
+        # Pull progress is streamed as JSON lines; failures arrive in-band.
+        for line in response.text.splitlines():
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(event, dict) and event.get("error"):
+                raise DockerError(f"Failed to pull image {image}: {event['error']}")
+
+    def _create_container(self, spec: ContainerSpec) -> str:
+        params = {"name": spec.name} if spec.name else None
+        body = self._container_body(spec)
+        try:
+            response = self._request("POST", "/containers/create", params=params, json_body=body)
+        except DockerNotFoundError:
+            # Like `docker run`, pull a missing image and try again.
+            self._pull_image(spec.image)
+            response = self._request("POST", "/containers/create", params=params, json_body=body)
+        return str(response.json()["Id"])
+
+    def run_container(self, spec: ContainerSpec) -> str:
+        container_id = self._create_container(spec)
+        self.start_container(container_id)
+        return container_id
+
+    def start_container(self, name: str) -> None:
+        self._request("POST", f"/containers/{name}/start")
+
+    def remove_container(self, name: str, *, force: bool = True) -> None:
+        self._request("DELETE", f"/containers/{name}", params={"force": "1" if force else "0"})
+
+    def _wait_container(self, container_id: str, timeout: float | None) -> int:
+        response = self._request(
+            "POST",
+            f"/containers/{container_id}/wait",
+            timeout=httpx.Timeout(self._timeout.connect, connect=_DEFAULT_CONNECT_TIMEOUT, read=timeout),
+        )
+        payload = response.json()
+        if payload.get("Error"):
+            raise DockerError(str(payload["Error"].get("Message") or payload["Error"]))
+        return int(payload.get("StatusCode", 1))
+
+    def _container_logs(self, container_id: str) -> tuple[str, str]:
+        response = self._request(
+            "GET",
+            f"/containers/{container_id}/logs",
+            params={"stdout": "1", "stderr": "1"},
+        )
+        stdout, stderr = bytearray(), bytearray()
+        for stream_type, payload in demux_stream([response.content]):
+            (stderr if stream_type == 2 else stdout).extend(payload)
+        return _decode(stdout), _decode(stderr)
+
+    # -- exec --------------------------------------------------------------
+
+    def exec(
+        self,
+        container: str,
+        command: Sequence[str],
+        *,
+        workdir: str | None = None,
+        environment: dict[str, str] | None = None,
+        timeout: float | None = None,
+        on_output: OutputCallback | None = None,
+    ) -> ExecResult:
+        return _exec_killing_on_timeout(
+            self._exec_once,
+            container,
+            command,
+            workdir=workdir,
+            environment=environment,
+            timeout=timeout,
+            on_output=on_output,
+        )
+
+    def _exec_once(
+        self,
+        container: str,
+        command: Sequence[str],
+        *,
+        workdir: str | None = None,
+        environment: dict[str, str] | None = None,
+        timeout: float | None = None,
+        on_output: OutputCallback | None = None,
+    ) -> ExecResult:
+        body: dict[str, Any] = {
+            "AttachStdout": True,
+            "AttachStderr": True,
+            "Tty": False,
+            "Cmd": list(command),
+        }
+        if workdir:
+            body["WorkingDir"] = workdir
+        if environment:
+            body["Env"] = [f"{key}={value}" for key, value in environment.items()]
+        try:
+            exec_id = self._request("POST", f"/containers/{container}/exec", json_body=body).json()["Id"]
+        except DockerError as exc:
+            if exc.status_code in {404, 409}:
+                raise ContainerUnavailableError(str(exc), status_code=exc.status_code) from exc
+            raise
+
+        stdout, stderr = bytearray(), bytearray()
+        stream_timeout = httpx.Timeout(self._timeout.connect, connect=_DEFAULT_CONNECT_TIMEOUT, read=timeout)
+        try:
+            with self._client.stream(
+                "POST",
+                f"/exec/{exec_id}/start",
+                json={"Detach": False, "Tty": False},
+                timeout=stream_timeout,
+            ) as response:
+                self._raise_for_status(response)
+                for stream_type, payload in demux_stream(response.iter_bytes()):
+                    if on_output is not None:
+                        on_output(stream_type, payload)
+                    else:
+                        (stderr if stream_type == 2 else stdout).extend(payload)
+        except httpx.TimeoutException as exc:
+            raise DockerTimeoutError(f"Docker exec timed out after {timeout}s in {container}") from exc
+        except httpx.HTTPError as exc:
+            raise DockerError(f"Docker exec failed: {exc}") from exc
+
+        info = self._request("GET", f"/exec/{exec_id}/json").json()
+        exit_code = info.get("ExitCode")
+        return ExecResult(
+            returncode=int(exit_code) if exit_code is not None else -1,
+            stdout=_decode(stdout),
+            stderr=_decode(stderr),
+        )
+
+    # -- archives ----------------------------------------------------------
+
+    def _path_is_dir(self, container: str, path: str) -> bool | None:
+        """Returns whether ``path`` is a directory, or ``None`` if it does not exist."""
+        try:
+            response = self._request("HEAD", f"/containers/{container}/archive", params={"path": path})
+        except DockerNotFoundError:
+            return None
+        raw = response.headers.get("X-Docker-Container-Path-Stat")
+        if not raw:
+            return None
+        info = json.loads(base64.b64decode(raw))
+        return bool(int(info.get("mode", 0)) & _GO_MODE_DIR)
+
+    def _put_archive(self, container: str, path: str, fileobj: IO[bytes]) -> None:
+        self._request(
+            "PUT",
+            f"/containers/{container}/archive",
+            params={"path": path},
+            content=_iter_file(fileobj),
+            headers={"Content-Type": "application/x-tar"},
+            timeout=httpx.Timeout(None, connect=_DEFAULT_CONNECT_TIMEOUT),
+        )
+
+    def _get_archive(self, container: str, path: str, target: IO[bytes]) -> None:
+        try:
+            with self._client.stream(
+                "GET",
+                f"/containers/{container}/archive",
+                params={"path": path},
+                timeout=httpx.Timeout(None, connect=_DEFAULT_CONNECT_TIMEOUT),
+            ) as response:
+                self._raise_for_status(response)
+                for chunk in response.iter_bytes(_COPY_CHUNK_SIZE):
+                    target.write(chunk)
+        except httpx.HTTPError as exc:
+            raise DockerError(f"Docker archive download failed: {exc}") from exc
+        target.seek(0)
+
+    def copy_to(self, container: str, host_path: Path, destination: str) -> None:
+        if self.inspect_container(container) is None:
+            raise ContainerUnavailableError(f"No such container: {container}", status_code=404)
+        if self._path_is_dir(container, destination):
+            target_dir, arcname = destination, host_path.name
+        else:
+            target_dir = posixpath.dirname(destination.rstrip("/")) or "/"
+            arcname = posixpath.basename(destination.rstrip("/"))
+        with tempfile.SpooledTemporaryFile(max_size=_SPOOL_LIMIT) as buffer:
+            _build_tar(host_path, arcname, buffer)
+            self._put_archive(container, target_dir, buffer)
+
+    def put_archive(self, container: str, path: str, fileobj: IO[bytes]) -> None:
+        if self.inspect_container(container) is None:
+            raise ContainerUnavailableError(f"No such container: {container}", status_code=404)
+        self._put_archive(container, path, fileobj)
+
+    def copy_from(self, container: str, source: str, host_path: Path) -> None:
+        with tempfile.SpooledTemporaryFile(max_size=_SPOOL_LIMIT) as buffer:
+            self._get_archive(container, source, buffer)
+            extract_copied_archive(buffer, host_path)
+
+    # -- throwaway containers ----------------------------------------------
+
+    def run_once(self, spec: ContainerSpec, *, timeout: float | None = None) -> ExecResult:
+        container_id = self._create_container(spec)
+        try:
+            self.start_container(container_id)
+            returncode = self._wait_container(container_id, timeout)
+            stdout, stderr = self._container_logs(container_id)
+            return ExecResult(returncode=returncode, stdout=stdout, stderr=stderr)
+        finally:
+            self._remove_quietly(container_id)
+
+    def _remove_quietly(self, container_id: str) -> None:
+        try:
+            self.remove_container(container_id, force=True)
+        except DockerError as exc:
+            logger.debug("Failed to remove helper container %s: %s", container_id, exc)
+
+    def export_volume(self, volume: str, fileobj: IO[bytes], *, image: str) -> None:
+        spec = ContainerSpec(image=image, command=["true"], volume=volume, mount_target="/snapshot")
+        container_id = self._create_container(spec)
+        try:
+            with tempfile.TemporaryFile() as raw:
+                self._get_archive(container_id, "/snapshot", raw)
+                _relocate_archive(raw, fileobj)
+        finally:
+            self._remove_quietly(container_id)
+
+    def import_volume(self, volume: str, fileobj: IO[bytes], *, image: str) -> None:
+        spec = ContainerSpec(
+            image=image,
+            command=["sh", "-c", "find /restore -mindepth 1 -delete"],
+            volume=volume,
+            mount_target="/restore",
+        )
+        container_id = self._create_container(spec)
+        try:
+            self.start_container(container_id)
+            returncode = self._wait_container(container_id, None)
+            if returncode != 0:
+                _, stderr = self._container_logs(container_id)
+                raise DockerError(stderr.strip() or f"clearing volume {volume} exited with {returncode}")
+            # The archive endpoint accepts gzip-compressed tarballs as-is.
+            self._put_archive(container_id, "/restore", fileobj)
+        finally:
+            self._remove_quietly(container_id)
+
+
+# ---------------------------------------------------------------------------
+# docker CLI backend
+# ---------------------------------------------------------------------------
+
+
+class CLIDockerBackend:
+    """Runs every operation through the ``docker`` binary."""
+
+    name = "cli"
+
+    # `docker exec` reports daemon-side failures on a single stderr line.
+    _UNAVAILABLE_PREFIXES = ("Error response from daemon:", "Error: No such container:")
+    _UNAVAILABLE_TOKENS = ("No such container", "is not running", "is paused")
+
+    def __init__(self, docker_bin: str | None = None) -> None:
+        self.docker_bin = docker_bin or DOCKER_BIN
+
+    def _run(
+        self,
+        args: Sequence[str],
+        *,
+        timeout: float | None = None,
+    ) -> subprocess.CompletedProcess[str]:
+        command = [self.docker_bin, *args]
+        try:
+            return subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+        except FileNotFoundError as exc:  # pragma: no cover - depends on environment
+            raise DockerError(f"Docker binary not found at '{self.docker_bin}'") from exc
+        except subprocess.TimeoutExpired as exc:
+            raise DockerTimeoutError(f"Docker command timed out: {' '.join(command)}") from exc
+
+    def _run_checked(self, args: Sequence[str], *, timeout: float | None = None) -> str:
+        result = self._run(args, timeout=timeout)
+        if result.returncode != 0:
+            raise DockerError(result.stderr.strip() or "unknown docker error")
+        return result.stdout
+
+    def _run_binary(self, args: Sequence[str], *, stdin: IO[bytes] | None = None, stdout: IO[bytes] | None = None) -> None:
+        command = [self.docker_bin, *args]
+        try:
+            result = subprocess.run(
+                command,
+                stdin=stdin,
+                stdout=stdout or subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                check=False,
+            )
+        except FileNotFoundError as exc:  # pragma: no cover - depends on environment
+            raise DockerError(f"Docker binary not found at '{self.docker_bin}'") from exc
+        if result.returncode != 0:
+            raise DockerError(result.stderr.decode(errors="replace").strip() or "unknown docker error")
+
+    def _inspect(self, kind: str, name: str) -> dict[str, Any] | None:
+        result = self._run([kind, "inspect", name])
+        if result.returncode != 0:
+            return None
+        try:
+            data = json.loads(result.stdout or "[]")
+        except json.JSONDecodeError as exc:
+            raise DockerError(f"Failed to parse docker output as JSON: {exc}") from exc
+        return data[0] if data else None
+
+    def inspect_container(self, name: str) -> dict[str, Any] | None:
+        return self._inspect("container", name)
+
+    def inspect_volume(self, name: str) -> dict[str, Any] | None:
+        return self._inspect("volume", name)
+
+    def create_volume(self, name: str) -> None:
+        self._run_checked(["volume", "create", name])
+
+    def remove_volume(self, name: str) -> None:
+        self._run_checked(["volume", "rm", name])
+
+    @staticmethod
+    def _run_args(spec: ContainerSpec) -> list[str]:
+        args: list[str] = []
+        if spec.name:
+            args.extend(["--name", spec.name])
+        if spec.volume and spec.mount_target:
+            args.extend(["--mount", f"type=volume,source={spec.volume},target={spec.mount_target}"])
+        for key, value in spec.environment.items():
+            args.extend(["-e", f"{key}={value}"])
+        if spec.restart_policy:
+            args.extend(["--restart", spec.restart_policy])
+        if spec.network:
+            args.extend(["--network", spec.network])
+        args.append(spec.image)
+        args.extend(spec.command)
+        return args
+
+    def run_container(self, spec: ContainerSpec) -> str:
+        return self._run_checked(["run", "-d", *self._run_args(spec)]).strip()
+
+    def start_container(self, name: str) -> None:
+        self._run_checked(["container", "start", name])
+
+    def remove_container(self, name: str, *, force: bool = True) -> None:
+        self._run_checked(["container", "rm", *(["-f"] if force else []), name])
+
+    def exec(
+        self,
+        container: str,
+        command: Sequence[str],
+        *,
+        workdir: str | None = None,
+        environment: dict[str, str] | None = None,
+        timeout: float | None = None,
+        on_output: OutputCallback | None = None,
+    ) -> ExecResult:
+        return _exec_killing_on_timeout(
+            self._exec_once,
+            container,
+            command,
+            workdir=workdir,
+            environment=environment,
+            timeout=timeout,
+            on_output=on_output,
+        )
+
+    def _exec_once(
+        self,
+        container: str,
+        command: Sequence[str],
+        *,
+        workdir: str | None = None,
+        environment: dict[str, str] | None = None,
+        timeout: float | None = None,
+        on_output: OutputCallback | None = None,
+    ) -> ExecResult:
+        args: list[str] = ["exec", "-i"]
+        if workdir:
+            args.extend(["-w", workdir])
+        for key, value in (environment or {}).items():
+            args.extend(["-e", f"{key}={value}"])
+        args.append(container)
+        args.extend(command)
+        if on_output is None:
+            result = self._run(args, timeout=timeout)
+            self._raise_if_unavailable(result.returncode, result.stderr or "")
+            return ExecResult(returncode=result.returncode, stdout=result.stdout or "", stderr=result.stderr or "")
+
+        stderr_head = BoundedOutput(head_bytes=512, tail_bytes=0)
+
+        def _on_stderr(chunk: bytes) -> None:
+            stderr_head.write(chunk)
+            on_output(2, chunk)
+
+        try:
+            returncode = stream_process(
+                [self.docker_bin, *args],
+                on_stdout=lambda chunk: on_output(1, chunk),
+                on_stderr=_on_stderr,
+                timeout=timeout,
+            )
+        except FileNotFoundError as exc:  # pragma: no cover - depends on environment
+            raise DockerError(f"Docker binary not found at '{self.docker_bin}'") from exc
+        except subprocess.TimeoutExpired as exc:
+            raise DockerTimeoutError(f"Docker exec timed out after {timeout}s in {container}") from exc
+        if not stderr_head.truncated:
+            self._raise_if_unavailable(returncode, stderr_head.render())
+        return ExecResult(returncode=returncode, stdout="", stderr="")
+
+    def _raise_if_unavailable(self, returncode: int, stderr: str) -> None:
+        if returncode == 0 or stderr.count("\n") > 1:
+            return
+        line = stderr.strip()
+        if line.startswith(self._UNAVAILABLE_PREFIXES) and any(
+            token in line for token in self._UNAVAILABLE_TOKENS
+        ):
+            raise ContainerUnavailableError(line)
+
+    def copy_to(self, container: str, host_path: Path, destination: str) -> None:
+        self._run_checked(["cp", str(host_path), f"{container}:{destination}"])
+
+    def put_archive(self, container: str, path: str, fileobj: IO[bytes]) -> None:
+        self._run_binary(["cp", "-", f"{container}:{path}"], stdin=fileobj)
+
+    def copy_from(self, container: str, source: str, host_path: Path) -> None:
+        self._run_checked(["cp", f"{container}:{source}", str(host_path)])
+
+    def run_once(self, spec: ContainerSpec, *, timeout: float | None = None) -> ExecResult:
+        result = self._run(["run", "--rm", *self._run_args(spec)], timeout=timeout)
+        return ExecResult(returncode=result.returncode, stdout=result.stdout or "", stderr=result.stderr or "")
+
+    def export_volume(self, volume: str, fileobj: IO[bytes], *, image: str) -> None:
+        spec = ContainerSpec(
+            image=image,
+            command=["sh", "-c", "cd /snapshot && tar czf - ."],
+            volume=volume,
+            mount_target="/snapshot",
+        )
+        self._run_binary(["run", "--rm", *self._run_args(spec)], stdout=fileobj)
+
+    def import_volume(self, volume: str, fileobj: IO[bytes], *, image: str) -> None:
+        spec = ContainerSpec(
+            image=image,
+            command=["sh", "-c", "cd /restore && find . -mindepth 1 -delete && tar xzf -"],
+            volume=volume,
+            mount_target="/restore",
+        )
+        self._run_binary(["run", "--rm", "-i", *self._run_args(spec)], stdin=fileobj)
+
+
+# ---------------------------------------------------------------------------
+# In-memory backend for tests
+# ---------------------------------------------------------------------------
+
+
+ExecHandler = Callable[[str | None, Sequence[str], str | None, dict[str, str]], ExecResult]
+
+
+class FakeDockerBackend:
+    """An in-memory Docker double: volumes are dicts of ``path -> bytes``.
+
+    Commands are not executed; ``exec`` and ``run_once`` delegate to
+    ``exec_handler`` (``container`` is ``None`` for ``run_once``) and succeed
+    with empty output by default. Every call is recorded in ``calls``.
+    Persistent exec sessions use ``session_spawner`` (``(container, argv)`` to
+    a ``Popen``-like process); without one the fake offers no sessions.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        exec_handler: ExecHandler | None = None,
+        *,
+        session_spawner: Callable[[str, Sequence[str]], Any] | None = None,
+    ) -> None:
+        self.exec_handler = exec_handler
+        self.session_spawner = session_spawner
+        self.volumes: dict[str, dict[str, bytes]] = {}
+        self.containers: dict[str, dict[str, Any]] = {}
+        self.calls: list[tuple[Any, ...]] = []
+        self._lock = threading.Lock()
+
+    def _now(self) -> str:
+        return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    def _container(self, name: str) -> dict[str, Any]:
+        for data in self.containers.values():
+            if data["Id"] == name or data["Name"] == f"/{name}":
+                return data
+        raise ContainerUnavailableError(f"No such container: {name}", status_code=404)
+
+    def _volume_path(self, container: str, path: str) -> tuple[dict[str, bytes], str]:
+        data = self._container(container)
+        for mount in data["Mounts"]:
+            target = mount["Destination"].rstrip("/")
+            normalized = posixpath.normpath(path)
+            if normalized == target or normalized.startswith(f"{target}/"):
+                relative = normalized[len(target) :].lstrip("/")
+                return self.volumes.setdefault(mount["Name"], {}), relative
+        raise DockerError(f"{path} is not on a mounted volume of {container}")
+
+    def inspect_container(self, name: str) -> dict[str, Any] | None:
+        self.calls.append(("inspect_container", name))
+        try:
+            return json.loads(json.dumps(self._container(name)))
+        except ContainerUnavailableError:
+            return None
+
+    def inspect_volume(self, name: str) -> dict[str, Any] | None:
+        self.calls.append(("inspect_volume", name))
+        if name not in self.volumes:
+            return None
+        return {"Name": name, "Driver": "local", "Mountpoint": f"/fake/volumes/{name}", "CreatedAt": self._now()}
+
+    def create_volume(self, name: str) -> None:
+        self.calls.append(("create_volume", name))
+        self.volumes.setdefault(name, {})
+
+    def remove_volume(self, name: str) -> None:
+        self.calls.append(("remove_volume", name))
+        if self.volumes.pop(name, None) is None:
+            raise DockerNotFoundError(f"get {name}: no such volume", status_code=404)
+
+    def run_container(self, spec: ContainerSpec) -> str:
+        self.calls.append(("run_container", spec.name, spec.image))
+        with self._lock:
+            container_id = uuid.uuid4().hex
+            name = spec.name or container_id[:12]
+            mounts = []
+            if spec.volume and spec.mount_target:
+                self.volumes.setdefault(spec.volume, {})
+                mounts.append({"Type": "volume", "Name": spec.volume, "Destination": spec.mount_target})
+            self.containers[name] = {
+                "Id": container_id,
+                "Name": f"/{name}",
+                "Created": self._now(),
+                "Config": {"Image": spec.image, "Env": [f"{k}={v}" for k, v in spec.environment.items()]},
+                "Mounts": mounts,
+                "State": {"Status": "running", "Running": True},
+            }
+        return container_id
+
+    def start_container(self, name: str) -> None:
+        self.calls.append(("start_container", name))
+        self._container(name)["State"] = {"Status": "running", "Running": True}
+
+    def stop_container(self, name: str) -> None:
+        """Marks a container as stopped (test helper)."""
+        self._container(name)["State"] = {"Status": "exited", "Running": False}
+
+    def remove_container(self, name: str, *, force: bool = True) -> None:
+        self.calls.append(("remove_container", name))
+        data = self._container(name)
+        self.containers.pop(data["Name"].lstrip("/"), None)
+
+    def exec(
+        self,
+        container: str,
+        command: Sequence[str],
+        *,
+        workdir: str | None = None,
+        environment: dict[str, str] | None = None,
+        timeout: float | None = None,
+        on_output: OutputCallback | None = None,
+    ) -> ExecResult:
+        self.calls.append(("exec", container, tuple(command)))
+        data = self._container(container)
+        if not data["State"].get("Running"):
+            raise ContainerUnavailableError(f"container {container} is not running", status_code=409)
+        result = ExecResult(returncode=0, stdout="", stderr="")
+        if self.exec_handler is not None:
+            result = self.exec_handler(container, command, workdir, dict(environment or {}))
+        if on_output is None:
+            return result
+        for stream_type, text in ((1, result.stdout), (2, result.stderr)):
+            if text:
+                on_output(stream_type, text.encode("utf-8"))
+        return ExecResult(returncode=result.returncode, stdout="", stderr="")
+
+    def copy_to(self, container: str, host_path: Path, destination: str) -> None:
+        self.calls.append(("copy_to", container, str(host_path), destination))
+        files, relative = self._volume_path(container, destination)
+        prefix = f"{relative}/" if relative else ""
+        is_dir = relative == "" or any(path.startswith(prefix) for path in files)
+        base = posixpath.join(relative, host_path.name) if is_dir else relative
+        if host_path.is_file():
+            files[base] = host_path.read_bytes()
+            return
+        for item in sorted(host_path.rglob("*")):
+            if item.is_file():
+                files[posixpath.join(base, item.relative_to(host_path).as_posix())] = item.read_bytes()
+
+    def put_archive(self, container: str, path: str, fileobj: IO[bytes]) -> None:
+        self.calls.append(("put_archive", container, path))
+        with tarfile.open(fileobj=fileobj, mode="r:*") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                extracted = tar.extractfile(member)
+                if extracted is None:
+                    continue
+                files, relative = self._volume_path(container, posixpath.join(path, member.name))
+                files[relative] = extracted.read()
+
+    def copy_from(self, container: str, source: str, host_path: Path) -> None:
+        self.calls.append(("copy_from", container, source, str(host_path)))
+        files, relative = self._volume_path(container, source)
+        name = PurePosixPath(source.rstrip("/")).name or "."
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            if relative in files:
+                self._add_bytes(tar, name, files[relative])
+            else:
+                prefix = f"{relative}/" if relative else ""
+                matched = [path for path in files if path.startswith(prefix)]
+                if not matched:
+                    raise DockerNotFoundError(f"Could not find the file {source} in container {container}")
+                for path in sorted(matched):
+                    self._add_bytes(tar, posixpath.join(name, path[len(prefix) :]), files[path])
+        buffer.seek(0)
+        extract_copied_archive(buffer, host_path)
+
+    @staticmethod
+    def _add_bytes(tar: tarfile.TarFile, name: str, payload: bytes) -> None:
+        info = tarfile.TarInfo(name)
+        info.size = len(payload)
+        info.mode = stat.S_IFREG | 0o644
+        tar.addfile(info, io.BytesIO(payload))
+
+    def run_once(self, spec: ContainerSpec, *, timeout: float | None = None) -> ExecResult:
+        self.calls.append(("run_once", spec.image, tuple(spec.command)))
+        if self.exec_handler is None:
+            return ExecResult(returncode=0, stdout="", stderr="")
+        return self.exec_handler(None, spec.command, None, dict(spec.environment))
+
+    def export_volume(self, volume: str, fileobj: IO[bytes], *, image: str) -> None:
+        self.calls.append(("export_volume", volume))
+        files = self.volumes.get(volume)
+        if files is None:
+            raise DockerNotFoundError(f"get {volume}: no such volume", status_code=404)
+        with tarfile.open(fileobj=fileobj, mode="w:gz") as tar:
+            for path in sorted(files):
+                self._add_bytes(tar, f"./{path}", files[path])
+
+    def import_volume(self, volume: str, fileobj: IO[bytes], *, image: str) -> None:
+        self.calls.append(("import_volume", volume))
+        files: dict[str, bytes] = {}
+        with tarfile.open(fileobj=fileobj, mode="r:*") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                extracted = tar.extractfile(member)
+                if extracted is not None:
+                    files[posixpath.normpath(member.name)] = extracted.read()
+        self.volumes[volume] = files
+
+
+# ---------------------------------------------------------------------------
+# Selection
+# ---------------------------------------------------------------------------
+
+
+def _socket_path() -> str | None:
+    explicit = os.environ.get("QUADRACODE_DOCKER_SOCKET")
+    if explicit:
+        return explicit
+    docker_host = os.environ.get("DOCKER_HOST", "")
+    if docker_host.startswith("unix://"):
+        return docker_host[len("unix://") :]
+    if docker_host:
+        # Remote daemons (tcp://, ssh://) are left to the CLI and its contexts.
+        return None
+    return DEFAULT_DOCKER_SOCKET
+
+
+def create_docker_backend(kind: str | None = None) -> DockerBackend:
+    """Builds the backend named by ``kind`` or ``QUADRACODE_DOCKER_BACKEND``.
+
+    ``auto`` and ``api`` use the Engine API when the socket exists and answers a
+    ping, and fall back to the CLI otherwise.
+    """
+    selected = (kind or os.environ.get("QUADRACODE_DOCKER_BACKEND", "auto")).strip().lower()
+    if selected == "cli":
+        return CLIDockerBackend()
+    if selected == "fake":
+        return FakeDockerBackend()
+    if selected not in {"auto", "api"}:
+        logger.warning("Unknown Docker backend %r; using auto detection", selected)
+    socket_path = _socket_path()
+    if socket_path and Path(socket_path).is_socket():
+        backend = EngineAPIDockerBackend(socket_path)
+        try:
+            backend.ping()
+            return backend
+        except DockerError as exc:
+            backend.close()
+            logger.info("Docker Engine API at %s unavailable (%s); using the docker CLI", socket_path, exc)
+    elif selected == "api":
+        logger.warning("Docker socket %s not found; using the docker CLI", socket_path)
+    return CLIDockerBackend()
+
+
+_BACKEND: DockerBackend | None = None
+_BACKEND_LOCK = threading.Lock()
+
+
+def get_docker_backend() -> DockerBackend:
+    """Returns the process-wide Docker backend, creating it on first use."""
+    global _BACKEND
+    if _BACKEND is None:
+        with _BACKEND_LOCK:
+            if _BACKEND is None:
+                _BACKEND = create_docker_backend()
+    return _BACKEND
+
+
+def set_docker_backend(backend: DockerBackend | None) -> None:
+    """Replaces the process-wide backend (``None`` re-runs selection on next use)."""
+    global _BACKEND
+    with _BACKEND_LOCK:
+        previous, _BACKEND = _BACKEND, backend
+    if isinstance(previous, EngineAPIDockerBackend) and previous is not backend:
+        previous.close()
+
+
+__all__ = [
+    "CLIDockerBackend",
+    "ContainerSpec",
+    "ContainerUnavailableError",
+    "DockerBackend",
+    "DockerError",
+    "DockerNotFoundError",
+    "DockerTimeoutError",
+    "EngineAPIDockerBackend",
+    "ExecResult",
+    "FakeDockerBackend",
+    "create_docker_backend",
+    "demux_stream",
+    "extract_copied_archive",
+    "get_docker_backend",
+    "set_docker_backend",
+]
@@ -0,0 +1,567 @@
+"""Persistent shell sessions for running many small commands in a workspace.
+
+Each `workspace_exec` call normally starts a fresh ``bash`` through ``docker
+exec``, paying process startup every time and forgetting ``cd``/``export``
+between calls. A `ShellSession` instead keeps one ``bash`` running inside the
+container with its stdin, stdout and stderr attached to pipes. Commands are
+written to its stdin wrapped in ``eval`` and followed by a per-command random
+sentinel printed on both streams (with the exit status on stdout), so output
+can be split between commands without closing anything. A command then costs a
+pipe round trip instead of a new exec.
+
+`ExecSessionPool` keeps named sessions per container: calls naming the same
+session share its working directory and environment and are serialized, while
+different names run concurrently. Idle sessions are health-checked before
+reuse, recycled after a while, and a session whose command times out (or that
+the command itself exits) is killed and replaced on next use.
+
+Sessions need a process whose stdio stays attached, so the spawner is picked
+from the active `DockerBackend` (see `backend_session_spawner`): the CLI
+backend runs ``docker exec -i`` with its own binary, the Engine API backend
+does the same against its socket when a ``docker`` binary is installed, and
+other backends (including `FakeDockerBackend`) supply their own
+``session_spawner`` or none at all. Without a spawner the pool raises
+`ExecSessionError` and callers fall back to one-shot execs.
+
+Environment Variables:
+    QUADRACODE_EXEC_SESSION_POOL_SIZE: Live sessions kept per workspace
+        (default 4); the least recently used idle one is closed beyond that.
+    QUADRACODE_EXEC_SESSION_IDLE_TIMEOUT: Seconds after which an idle session
+        is recycled (default 900).
+    QUADRACODE_EXEC_SESSION_HEALTH_INTERVAL: Seconds of idleness after which a
+        session is pinged before being reused (default 30).
+"""
+from __future__ import annotations
+
+import atexit
+import os
+import re
+import selectors
+import shlex
+import shutil
+import subprocess
+import time
+import uuid
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass
+from functools import partial
+from threading import Lock
+
+from .client.docker_backend import (
+    DOCKER_BIN,
+    CLIDockerBackend,
+    DockerBackend,
+    EngineAPIDockerBackend,
+    OutputCallback,
+    get_docker_backend,
+)
+
+SESSION_POOL_SIZE = int(os.environ.get("QUADRACODE_EXEC_SESSION_POOL_SIZE", "4"))
+SESSION_IDLE_TIMEOUT = float(os.environ.get("QUADRACODE_EXEC_SESSION_IDLE_TIMEOUT", "900"))
+SESSION_HEALTH_INTERVAL = float(os.environ.get("QUADRACODE_EXEC_SESSION_HEALTH_INTERVAL", "30"))
+
+_SHELL_ARGV = ["bash", "--noprofile", "--norc"]
+_READY_MARKER = b"__QC_SESSION_READY__"
+_START_TIMEOUT = 15.0
+_PING_TIMEOUT = 5.0
+_KILL_TIMEOUT = 10.0
+_READ_CHUNK = 64 * 1024
+_ENV_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# Stops the shell first so it cannot start anything new, then kills its
+# descendants depth-first and finally the shell itself.
+_KILL_TREE_SCRIPT = r"""
+kill_tree() {
+    kill -STOP "$1" 2>/dev/null
+    children=$(cat /proc/"$1"/task/*/children 2>/dev/null)
+    [ -n "$children" ] || children=$(pgrep -P "$1" 2>/dev/null)
+    for child in $children; do
+        kill_tree "$child"
+    done
+    kill -KILL "$1" 2>/dev/null
+}
+kill_tree "$1"
+"""
+
+SessionSpawner = Callable[[str, Sequence[str]], "subprocess.Popen[bytes]"]
+"""Starts ``argv`` inside ``container`` with piped stdin, stdout and stderr."""
+
+
+class ExecSessionError(RuntimeError):
+    """Raised when a session cannot be started or used."""
+
+
+class SessionTimeoutError(ExecSessionError):
+    """Raised when a command outlives its timeout; the session has been killed."""
+
+
+def docker_exec_spawner(
+    container: str,
+    argv: Sequence[str],
+    *,
+    docker_bin: str = DOCKER_BIN,
+    host: str | None = None,
+) -> "subprocess.Popen[bytes]":
+    """Spawns ``argv`` with ``docker exec -i`` so its stdio stays attached."""
+    target = ["-H", host] if host else []
+    try:
+        return subprocess.Popen(
+            [docker_bin, *target, "exec", "-i", container, *argv],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+        )
+    except OSError as exc:
+        raise ExecSessionError(f"Unable to start a shell session: {exc}") from exc
+
+
+def backend_session_spawner(backend: DockerBackend) -> SessionSpawner | None:
+    """Returns the spawner matching ``backend``, or ``None`` if it cannot attach stdin."""
+    if isinstance(backend, CLIDockerBackend):
+        return partial(docker_exec_spawner, docker_bin=backend.docker_bin)
+    if isinstance(backend, EngineAPIDockerBackend):
+        # Attaching stdin over the Engine API needs a hijacked connection the
+        # pipe-based sessions cannot use; drive the same daemon through the CLI.
+        docker_bin = shutil.which(DOCKER_BIN)
+        if docker_bin is None:
+            return None
+        return partial(docker_exec_spawner, docker_bin=docker_bin, host=f"unix://{backend.socket_path}")
+    return getattr(backend, "session_spawner", None)
+
+
+class _Framer:
+    """Forwards a stream until the sentinel, holding back bytes that may start it."""
+
+    def __init__(self, marker: bytes, consumer: Callable[[bytes], None]) -> None:
+        self.marker = marker
+        self.consumer = consumer
+        self.pending = b""
+        self.trailer: bytes | None = None
+
+    def feed(self, chunk: bytes) -> None:
+        if self.trailer is not None:
+            self.trailer += chunk
+            return
+        data = self.pending + chunk
+        index = data.find(self.marker)
+        if index >= 0:
+            self.pending = b""
+            if index:
+                self.consumer(data[:index])
+            self.trailer = data[index + len(self.marker) :]
+            return
+        keep = len(self.marker) - 1
+        if len(data) > keep:
+            self.consumer(data[:-keep])
+            data = data[-keep:]
+        self.pending = data
+
+    def flush(self) -> None:
+        if self.pending:
+            self.consumer(self.pending)
+            self.pending = b""
+
+    @property
+    def complete(self) -> bool:
+        return self.trailer is not None and b"\n" in self.trailer
+
+
+def _session_script(
+    command: str,
+    marker: str,
+    working_dir: str | None,
+    environment: Mapping[str, str] | None,
+) -> bytes:
+    assignments = []
+    for key, value in (environment or {}).items():
+        if not _ENV_NAME.match(key):
+            raise ValueError(f"invalid environment variable name: {key!r}")
+        assignments.append(f"{key}={shlex.quote(value)}")
+    run = " ".join([*assignments, "eval", shlex.quote(command), "< /dev/null"])
+    if working_dir:
+        run = f"cd -- {shlex.quote(working_dir)} && {run}"
+    return (
+        f"{run}\n"
+        "__qc_rc=$?\n"
+        f"printf '%s %d %s\\n' '{marker}' \"$__qc_rc\" \"$PWD\"\n"
+        f"printf '%s\\n' '{marker}' >&2\n"
+    ).encode("utf-8")
+
+
+class ShellSession:
+    """One long-lived ``bash`` inside a container.
+
+    Not thread-safe on its own: callers hold `lock` around `run` (the pool does).
+    """
+
+    def __init__(
+        self,
+        container: str,
+        name: str,
+        spawner: SessionSpawner,
+        *,
+        workdir: str | None = None,
+    ) -> None:
+        self.container = container
+        self.name = name
+        self.lock = Lock()
+        self.commands_run = 0
+        self.cwd = workdir
+        self._spawner = spawner
+        self._process = spawner(container, _SHELL_ARGV)
+        self.pid = self._handshake(workdir)
+        self.last_used = time.monotonic()
+
+    def _handshake(self, workdir: str | None) -> int:
+        cd = f"cd -- {shlex.quote(workdir)} 2>/dev/null; " if workdir else ""
+        self._write(f"{cd}printf '%s %d\\n' '{_READY_MARKER.decode()}' \"$$\"\n".encode("utf-8"))
+        banner = bytearray()
+        stderr = bytearray()
+        deadline = time.monotonic() + _START_TIMEOUT
+        while b"\n" not in banner.partition(_READY_MARKER)[2]:
+            if not self._pump(deadline, banner.extend, stderr.extend):
+                self.close()
+                message = stderr.decode("utf-8", errors="replace").strip()
+                raise ExecSessionError(message or f"shell session in {self.container} did not start")
+        try:
+            return int(banner.partition(_READY_MARKER)[2].split()[0])
+        except (IndexError, ValueError) as exc:
+            self.close()
+            raise ExecSessionError(f"unexpected session banner: {bytes(banner)!r}") from exc
+
+    def _write(self, payload: bytes) -> None:
+        assert self._process.stdin is not None
+        try:
+            self._process.stdin.write(payload)
+            self._process.stdin.flush()
+        except (BrokenPipeError, ValueError) as exc:
+            raise ExecSessionError(f"shell session {self.name} is closed") from exc
+
+    def _pump(
+        self,
+        deadline: float | None,
+        on_stdout: Callable[[bytes], None],
+        on_stderr: Callable[[bytes], None],
+    ) -> bool:
+        """Reads whatever is available; returns False on EOF or when the deadline passed."""
+        streams = {self._process.stdout: on_stdout, self._process.stderr: on_stderr}
+        with selectors.DefaultSelector() as selector:
+            for stream in streams:
+                if stream is not None and not stream.closed:
+                    selector.register(stream, selectors.EVENT_READ)
+            if not selector.get_map():
+                return False
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            events = selector.select(remaining)
+            if not events:
+                return False
+            for key, _ in events:
+                chunk = os.read(key.fileobj.fileno(), _READ_CHUNK)  # type: ignore[union-attr]
+                if not chunk:
+                    return False
+                streams[key.fileobj](chunk)  # type: ignore[index]
+        return True
+
+    @property
+    def alive(self) -> bool:
+        return self._process.poll() is None
+
+    def run(
+        self,
+        command: str,
+        *,
+        on_output: OutputCallback,
+        timeout: float | None = None,
+        working_dir: str | None = None,
+        environment: Mapping[str, str] | None = None,
+    ) -> int:
+        """Runs ``command`` in the session and returns its exit status.
+
+        `cwd` is updated to the shell's working directory once it completes.
+
+        Output is handed to ``on_output`` as ``(stream, chunk)`` pairs
+        (1 = stdout, 2 = stderr). ``working_dir`` changes the session's current
+        directory for this and later commands; ``environment`` only applies to
+        this command.
+
+        Raises:
+            SessionTimeoutError: If ``timeout`` elapses; the session is killed.
+            ExecSessionError: If the session is already closed.
+        """
+        marker = f"__QC_DONE_{uuid.uuid4().hex}__"
+        script = _session_script(command, marker, working_dir, environment)
+        stdout = _Framer(marker.encode(), lambda chunk: on_output(1, chunk))
+        stderr = _Framer(marker.encode(), lambda chunk: on_output(2, chunk))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._write(script)
+        self.commands_run += 1
+        try:
+            while not (stdout.complete and stderr.complete):
+                if self._pump(deadline, stdout.feed, stderr.feed):
+                    continue
+                if deadline is not None and time.monotonic() >= deadline:
+                    self.kill()
+                    raise SessionTimeoutError(
+                        f"Command timed out after {timeout}s in session {self.name}"
+                    )
+                # The command ended the shell (``exit``, ``exec``, a fatal signal).
+                stdout.flush()
+                stderr.flush()
+                self.close()
+                return self._process.returncode
+        finally:
+            self.last_used = time.monotonic()
+        assert stdout.trailer is not None
+        status, _, cwd = stdout.trailer.partition(b"\n")[0].strip().partition(b" ")
+        self.cwd = cwd.decode("utf-8", errors="replace") or self.cwd
+        return int(status)
+
+    def ping(self) -> bool:
+        """Checks that the session still answers within a few seconds."""
+        try:
+            return self.run(":", on_output=lambda *_: None, timeout=_PING_TIMEOUT) == 0 and self.alive
+        except ExecSessionError:
+            return False
+
+    def terminate(self) -> None:
+        """Kills the shell and everything it started inside the container.
+
+        Safe to call from another thread while `run` is waiting: it then sees
+        the shell exit and returns.
+        """
+        try:
+            killer = self._spawner(self.container, ["sh", "-c", _KILL_TREE_SCRIPT, "sh", str(self.pid)])
+            killer.communicate(timeout=_KILL_TIMEOUT)
+        except (ExecSessionError, subprocess.TimeoutExpired):
+            pass
+        if self._process.poll() is None:
+            self._process.kill()
+
+    def kill(self) -> None:
+        self.terminate()
+        self.close()
+
+    def close(self) -> None:
+        process = self._process
+        if process.stdin is not None and not process.stdin.closed:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+        try:
+            process.wait(timeout=1.0)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        for stream in (process.stdout, process.stderr):
+            if stream is not None:
+                stream.close()
+
+
+@dataclass
+class SessionRun:
+    """Outcome of `ExecSessionPool.run`."""
+
+    returncode: int
+    cwd: str | None
+    started_session: bool
+    session_closed: bool
+
+
+class ExecSessionPool:
+    """Named `ShellSession` objects per container, created on demand.
+
+    Without an explicit ``spawner`` new sessions use `backend_session_spawner`
+    of the backend passed to `run` (the process-wide one by default).
+    """
+
+    def __init__(
+        self,
+        spawner: SessionSpawner | None = None,
+        *,
+        max_sessions: int = SESSION_POOL_SIZE,
+        idle_timeout: float = SESSION_IDLE_TIMEOUT,
+        health_interval: float = SESSION_HEALTH_INTERVAL,
+    ) -> None:
+        self.spawner = spawner
+        self.max_sessions = max(1, max_sessions)
+        self.idle_timeout = idle_timeout
+        self.health_interval = health_interval
+        self._sessions: dict[tuple[str, str], ShellSession] = {}
+        self._lock = Lock()
+
+    def _checkout(
+        self,
+        container: str,
+        name: str,
+        workdir: str | None,
+        backend: DockerBackend | None,
+    ) -> tuple[ShellSession, bool]:
+        with self._lock:
+            session = self._sessions.get((container, name))
+            if session is not None:
+                return session, False
+            evicted = self._evict(container)
+        # Closing waits for each shell to exit, so it happens outside the pool lock.
+        for stale in evicted:
+            stale.close()
+        spawner = self.spawner
+        if spawner is None:
+            backend = backend or get_docker_backend()
+            spawner = backend_session_spawner(backend)
+            if spawner is None:
+                raise ExecSessionError(
+                    f"the {type(backend).__name__} backend cannot attach a shell session"
+                )
+        # Start outside the pool lock; a concurrent starter for the same name wins.
+        session = ShellSession(container, name, spawner, workdir=workdir)
+        with self._lock:
+            existing = self._sessions.setdefault((container, name), session)
+        if existing is not session:
+            session.close()
+            return existing, False
+        return session, True
+
+    def _evict(self, container: str) -> list[ShellSession]:
+        """Removes expired idle sessions and, beyond the cap, the least recently used.
+
+        Called with the pool lock held; returns the removed sessions for the
+        caller to close once the lock is released.
+        """
+        now = time.monotonic()
+        idle = sorted(
+            (
+                (key, session)
+                for key, session in self._sessions.items()
+                if key[0] == container and not session.lock.locked()
+            ),
+            key=lambda item: item[1].last_used,
+        )
+        live = sum(1 for key in self._sessions if key[0] == container)
+        evicted: list[ShellSession] = []
+        for key, session in idle:
+            if live < self.max_sessions and now - session.last_used < self.idle_timeout:
+                break
+            del self._sessions[key]
+            evicted.append(session)
+            live -= 1
+        return evicted
+
+    def _drop(self, session: ShellSession) -> None:
+        with self._lock:
+            if self._sessions.get((session.container, session.name)) is session:
+                del self._sessions[(session.container, session.name)]
+
+    def run(
+        self,
+        container: str,
+        name: str,
+        command: str,
+        *,
+        on_output: OutputCallback,
+        timeout: float | None = None,
+        working_dir: str | None = None,
+        environment: Mapping[str, str] | None = None,
+        workdir: str | None = None,
+        backend: DockerBackend | None = None,
+    ) -> SessionRun:
+        """Runs ``command`` in session ``name`` of ``container``, starting it if needed.
+
+        ``workdir`` is where a newly started session begins; ``backend`` picks
+        its spawner unless the pool was given one.
+
+        Raises:
+            ExecSessionError: If no session can be started, e.g. because the
+                backend cannot attach to a shell's stdin.
+        """
+        while True:
+            session, started = self._checkout(container, name, workdir, backend)
+            with session.lock:
+                if not started:
+                    stale = time.monotonic() - session.last_used
+                    healthy = session.alive and (stale < self.health_interval or session.ping())
+                    if not healthy or stale >= self.idle_timeout:
+                        self._drop(session)
+                        session.kill()
+                        continue
+                try:
+                    returncode = session.run(
+                        command,
+                        on_output=on_output,
+                        timeout=timeout,
+                        working_dir=working_dir,
+                        environment=environment,
+                    )
+                except ExecSessionError:
+                    self._drop(session)
+                    raise
+                closed = not session.alive
+                if closed:
+                    self._drop(session)
+                return SessionRun(returncode, session.cwd, started, closed)
+
+    def discard(self, container: str, name: str | None = None) -> None:
+        """Kills the sessions of ``container`` (only ``name`` if given).
+
+        Safe to call while a command is running: the command returns as if the
+        shell had exited.
+        """
+        with self._lock:
+            doomed = [
+                self._sessions.pop(key)
+                for key in list(self._sessions)
+                if key[0] == container and (name is None or key[1] == name)
+            ]
+        for session in doomed:
+            if session.lock.acquire(blocking=False):
+                try:
+                    session.kill()
+                finally:
+                    session.lock.release()
+            else:
+                session.terminate()
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+_POOL: ExecSessionPool | None = None
+_POOL_LOCK = Lock()
+
+
+def get_exec_session_pool() -> ExecSessionPool:
+    """Returns the process-wide session pool, creating it on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ExecSessionPool()
+            atexit.register(_POOL.close)
+        return _POOL
+
+
+def discard_exec_sessions(container: str) -> None:
+    """Kills a container's sessions, if a pool exists at all."""
+    if _POOL is not None:
+        _POOL.discard(container)
+
+
+__all__ = [
+    "ExecSessionError",
+    "ExecSessionPool",
+    "SessionRun",
+    "SessionTimeoutError",
+    "ShellSession",
+    "backend_session_spawner",
+    "discard_exec_sessions",
+    "docker_exec_spawner",
+    "get_exec_session_pool",
+]
@@ -0,0 +1,156 @@
+"""Bounded, streaming capture of command output.
+
+Agents regularly run commands whose output nobody will read in full (verbose
+test runs, build logs). `BoundedOutput` consumes a stream chunk by chunk, keeps
+only the first ``head_bytes`` and the last ``tail_bytes`` in memory, counts
+every byte, and can mirror the complete stream to a sink as it arrives.
+`stream_process` runs a subprocess and feeds its pipes to such consumers
+without ever buffering a whole stream.
+
+Environment Variables:
+    QUADRACODE_OUTPUT_HEAD_BYTES: Bytes kept from the start of each stream
+        (default 20000).
+    QUADRACODE_OUTPUT_TAIL_BYTES: Bytes kept from the end of each stream
+        (default 80000).
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+from collections.abc import Callable, Sequence
+from typing import IO
+
+DEFAULT_HEAD_BYTES = int(os.environ.get("QUADRACODE_OUTPUT_HEAD_BYTES", "20000"))
+DEFAULT_TAIL_BYTES = int(os.environ.get("QUADRACODE_OUTPUT_TAIL_BYTES", "80000"))
+_READ_CHUNK = 64 * 1024
+
+
+def format_truncated(head: bytes, tail: bytes, omitted: int) -> str:
+    """Renders a head/tail excerpt, marking the omitted middle section."""
+    if omitted <= 0:
+        return (head + tail).decode("utf-8", errors="replace")
+    return (
+        f"{head.decode('utf-8', errors='replace')}"
+        f"\n[... truncated {omitted} bytes ...]\n"
+        f"{tail.decode('utf-8', errors='replace')}"
+    )
+
+
+class BoundedOutput:
+    """Keeps the head and tail of a byte stream and the exact total size.
+
+    Args:
+        head_bytes: Bytes kept from the start of the stream.
+        tail_bytes: Bytes kept from the end of the stream.
+        sink: Optional binary file that receives the complete stream.
+    """
+
+    def __init__(
+        self,
+        head_bytes: int = DEFAULT_HEAD_BYTES,
+        tail_bytes: int = DEFAULT_TAIL_BYTES,
+        sink: IO[bytes] | None = None,
+    ) -> None:
+        self.head_bytes = max(0, head_bytes)
+        self.tail_bytes = max(0, tail_bytes)
+        self.sink = sink
+        self.total_bytes = 0
+        self._head = bytearray()
+        self._tail = bytearray()
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        self.total_bytes += len(chunk)
+        if self.sink is not None:
+            self.sink.write(chunk)
+        room = self.head_bytes - len(self._head)
+        if room > 0:
+            self._head += chunk[:room]
+            chunk = chunk[room:]
+        if chunk and self.tail_bytes:
+            self._tail += chunk
+            # Trim lazily so long streams cost amortized O(1) per byte.
+            if len(self._tail) > 2 * self.tail_bytes:
+                del self._tail[: -self.tail_bytes]
+
+    @property
+    def tail(self) -> bytes:
+        if not self.tail_bytes:
+            return b""
+        return bytes(self._tail[-self.tail_bytes :])
+
+    def omitted_bytes(self, total_bytes: int | None = None) -> int:
+        """Bytes not retained, out of ``total_bytes`` (defaults to the bytes seen)."""
+        total = self.total_bytes if total_bytes is None else total_bytes
+        return max(0, total - len(self._head) - len(self.tail))
+
+    @property
+    def truncated(self) -> bool:
+        return self.omitted_bytes() > 0
+
+    def render(self, total_bytes: int | None = None) -> str:
+        """Returns the retained output as text, marking any omitted middle.
+
+        ``total_bytes`` is the size of the original stream when this buffer was
+        fed an excerpt of it (for instance a head/tail produced remotely).
+        """
+        return format_truncated(bytes(self._head), self.tail, self.omitted_bytes(total_bytes))
+
+
+def _pump(pipe: IO[bytes], consumer: Callable[[bytes], None]) -> None:
+    try:
+        while True:
+            chunk = pipe.read1(_READ_CHUNK)  # type: ignore[attr-defined]
+            if not chunk:
+                return
+            consumer(chunk)
+    finally:
+        pipe.close()
+
+
+def stream_process(
+    args: Sequence[str],
+    *,
+    on_stdout: Callable[[bytes], None],
+    on_stderr: Callable[[bytes], None],
+    timeout: float | None = None,
+) -> int:
+    """Runs ``args`` and hands each stdout/stderr chunk to the consumers as it arrives.
+
+    Returns:
+        The process exit code.
+
+    Raises:
+        subprocess.TimeoutExpired: If ``timeout`` elapses; the process is killed
+            and everything it printed before has already been consumed.
+    """
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    readers = [
+        threading.Thread(target=_pump, args=(process.stdout, on_stdout), daemon=True),
+        threading.Thread(target=_pump, args=(process.stderr, on_stderr), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    try:
+        returncode = process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        # Grandchildren may keep the pipes open; do not wait on them forever.
+        for reader in readers:
+            reader.join(timeout=5.0)
+        raise
+    for reader in readers:
+        reader.join()
+    return returncode
+
+
+__all__ = [
+    "BoundedOutput",
+    "DEFAULT_HEAD_BYTES",
+    "DEFAULT_TAIL_BYTES",
+    "format_truncated",
+    "stream_process",
+]
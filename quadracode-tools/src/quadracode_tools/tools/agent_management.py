@@ -23,6 +23,7 @@ from langchain_core.tools import tool
 from pydantic import BaseModel, Field, model_validator
 from quadracode_contracts import DEFAULT_WORKSPACE_MOUNT
 from .agent_registry import _registry_base_url, DEFAULT_TIMEOUT
+from ..workspace_context import get_active_workspace_descriptor
 
 
 class AgentManagementRequest(BaseModel):
@@ -232,20 +233,11 @@ def agent_management_tool(
         workspace_volume = params.workspace_volume
         workspace_mount = params.workspace_mount
 
-        descriptor_env: dict[str, Any] | None = None
-        descriptor_raw = os.environ.get("QUADRACODE_ACTIVE_WORKSPACE_DESCRIPTOR")
-        if descriptor_raw:
-            try:
-                parsed = json.loads(descriptor_raw)
-                if isinstance(parsed, dict):
-                    descriptor_env = parsed
-            except json.JSONDecodeError:
-                descriptor_env = None
-
-        if descriptor_env:
-            workspace_id = workspace_id or descriptor_env.get("workspace_id")
-            workspace_volume = workspace_volume or descriptor_env.get("volume")
-            workspace_mount = workspace_mount or descriptor_env.get("mount_path")
+        active_descriptor = get_active_workspace_descriptor()
+        if active_descriptor:
+            workspace_id = workspace_id or active_descriptor.get("workspace_id")
+            workspace_volume = workspace_volume or active_descriptor.get("volume")
+            workspace_mount = workspace_mount or active_descriptor.get("mount_path")
 
         if workspace_mount is None:
             workspace_mount = DEFAULT_WORKSPACE_MOUNT
@@ -9,8 +9,9 @@ structured JSON object.
 Production hardening:
 - Configurable per-invocation **timeout** (default 120 s) prevents hung commands
   from blocking the agent indefinitely.
-- **Output truncation** (default 100 KB per stream) prevents memory exhaustion
-  when a command emits unbounded output.
+- **Bounded streaming capture** keeps only the head and tail of each stream
+  (default 20 KB + 80 KB) in memory while the command runs, so a command that
+  emits unbounded output cannot exhaust memory; exact byte counts are reported.
 - All error paths (timeout, unexpected exception) return structured JSON so that
   the agent can always parse the result.
 """
@@ -24,10 +25,11 @@ from typing import Any
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field
 
+from ..output_capture import BoundedOutput, stream_process
+
 logger = logging.getLogger(__name__)
 
 _DEFAULT_TIMEOUT_SECONDS: float = 120.0
-_MAX_OUTPUT_BYTES: int = 100_000  # 100 KB per stream
 
 
 class BashShellRequest(BaseModel):
@@ -46,38 +48,27 @@ class BashShellRequest(BaseModel):
     )
 
 
-def _truncate_output(text: str, max_bytes: int = _MAX_OUTPUT_BYTES) -> str:
-    """Truncate output to *max_bytes*, keeping the **tail** (most recent output).
-
-    Args:
-        text: Raw output string from the subprocess.
-        max_bytes: Maximum size in bytes after truncation.
-
-    Returns:
-        The (possibly truncated) output string.
-    """
-    if not text:
-        return ""
-    encoded = text.encode("utf-8", errors="replace")
-    if len(encoded) <= max_bytes:
-        return text
-    kept = encoded[-max_bytes:]
-    trimmed_count = len(encoded) - max_bytes
-    return f"[truncated {trimmed_count} bytes]\n{kept.decode('utf-8', errors='replace')}"
-
-
 def _build_response(
     returncode: int,
-    stdout: str,
-    stderr: str,
+    stdout: BoundedOutput,
+    stderr: BoundedOutput,
+    *,
+    note: str | None = None,
     **extra: Any,
 ) -> str:
     """Build a deterministic JSON response string."""
+    stderr_text = stderr.render()
+    if note:
+        stderr_text = f"{stderr_text}\n{note}"
     payload: dict[str, Any] = {
         "returncode": returncode,
-        "stdout": _truncate_output(stdout),
-        "stderr": _truncate_output(stderr),
+        "stdout": stdout.render(),
+        "stderr": stderr_text,
+        "stdout_bytes": stdout.total_bytes,
+        "stderr_bytes": stderr.total_bytes,
     }
+    if stdout.truncated or stderr.truncated:
+        payload["truncated"] = True
     payload.update(extra)
     return json.dumps(payload)
 
@@ -93,8 +84,10 @@ def bash_shell(command: str, timeout: float = _DEFAULT_TIMEOUT_SECONDS) -> str:
 
     The result is a JSON string containing:
     - ``returncode``: The integer exit code of the command.
-    - ``stdout``: The standard output (truncated to ~100 KB).
-    - ``stderr``: The standard error (truncated to ~100 KB).
+    - ``stdout``: The standard output (head and tail, ~100 KB at most).
+    - ``stderr``: The standard error (head and tail, ~100 KB at most).
+    - ``stdout_bytes`` / ``stderr_bytes``: Exact sizes of the full streams.
+    - ``truncated``: Boolean flag present when either stream was cut.
     - ``timed_out``: Boolean flag present when the command exceeded its timeout.
 
     Usage notes:
@@ -104,33 +97,33 @@ def bash_shell(command: str, timeout: float = _DEFAULT_TIMEOUT_SECONDS) -> str:
     - Agents should be careful to handle commands that might produce a large
       amount of output, potentially by piping to ``head`` or ``tail``.
     """
+    stdout = BoundedOutput()
+    stderr = BoundedOutput()
     try:
-        result = subprocess.run(
+        returncode = stream_process(
             ["bash", "-lc", command],
-            capture_output=True,
-            text=True,
-            check=False,
+            on_stdout=stdout.write,
+            on_stderr=stderr.write,
             timeout=timeout,
         )
-        return _build_response(result.returncode, result.stdout, result.stderr)
+        return _build_response(returncode, stdout, stderr)
 
-    except subprocess.TimeoutExpired as exc:
+    except subprocess.TimeoutExpired:
         logger.warning(
             "bash_shell timed out after %.1fs: %.200s", timeout, command,
         )
-        partial_stdout = (exc.stdout or b"").decode("utf-8", errors="replace") if isinstance(exc.stdout, bytes) else (exc.stdout or "")
-        partial_stderr = (exc.stderr or b"").decode("utf-8", errors="replace") if isinstance(exc.stderr, bytes) else (exc.stderr or "")
         return _build_response(
             -1,
-            partial_stdout,
-            partial_stderr + f"\n[quadracode] Command timed out after {timeout}s",
+            stdout,
+            stderr,
+            note=f"[quadracode] Command timed out after {timeout}s",
             timed_out=True,
         )
 
     except Exception as exc:
         logger.exception("bash_shell unexpected error: %.200s", command)
         return _build_response(
-            -1, "", str(exc), error=type(exc).__name__,
+            -1, stdout, stderr, note=str(exc), error=type(exc).__name__,
         )
 
 
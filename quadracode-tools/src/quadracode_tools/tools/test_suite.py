@@ -7,14 +7,18 @@ commands from repository metadata (e.g., `pyproject.toml`, `package.json`,
 results. It records pass/fail status, timings, output streams, and code coverage.
 In the event of test failures, it can autonomously spawn a specialized debugger
 agent to diagnose the root cause, creating a closed loop of test execution and
-remediation.
+remediation. Awaiting the tool (`ainvoke`) runs the commands as asyncio
+subprocesses, so long suites do not block the event loop; a timeout or
+cancellation kills each command's whole process group.
 """
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import re
 import secrets
+import signal
 import subprocess
 import time
 from dataclasses import dataclass
@@ -29,6 +33,8 @@ from pydantic import BaseModel, Field
 from quadracode_contracts import DEFAULT_WORKSPACE_MOUNT
 
 from .agent_management import _run_script
+from ..output_capture import BoundedOutput
+from ..workspace_context import get_active_workspace_descriptor
 
 
 @dataclass(frozen=True)
@@ -165,18 +171,12 @@ def execute_full_test_suite(
 or timed_out, the tool will try to spawn a debugger agent.
     """
 
-    root_path = Path(workspace_root or os.environ.get("WORKSPACE_ROOT") or os.getcwd()).resolve()
+    root_path = _resolve_root(workspace_root)
     commands = discover_test_commands(root_path, include_e2e=include_e2e)
     started_at = datetime.now(timezone.utc)
     command_results: list[dict[str, Any]] = []
-    pass_count = 0
-    fail_count = 0
-    coverage_values: list[float] = []
 
     for spec in commands:
-        command_env = os.environ.copy()
-        if spec.environment:
-            command_env.update(spec.environment)
         start = time.perf_counter()
         stdout = ""
         stderr = ""
@@ -188,7 +188,7 @@ or timed_out, the tool will try to spawn a debugger agent.
                 cwd=str(spec.cwd),
                 capture_output=True,
                 text=True,
-                env=command_env,
+                env=_command_environment(spec),
                 timeout=timeout_seconds,
                 check=False,
             )
@@ -197,38 +197,185 @@ or timed_out, the tool will try to spawn a debugger agent.
             returncode = completed.returncode
         except subprocess.TimeoutExpired as exc:  # pragma: no cover - rare
             timed_out = True
-            stdout = (exc.stdout or "") + "\n[quadracode] command timed out"
-            stderr = exc.stderr or ""
+            stdout = _decode(exc.stdout) + "\n[quadracode] command timed out"
+            stderr = _decode(exc.stderr)
         except FileNotFoundError as exc:  # pragma: no cover - environment issue
             stderr = str(exc)
-        duration = time.perf_counter() - start
+        command_results.append(
+            _command_result(
+                spec,
+                returncode=returncode,
+                timed_out=timed_out,
+                duration=time.perf_counter() - start,
+                stdout=stdout,
+                stderr=stderr,
+                max_output_chars=max_output_chars,
+            )
+        )
+
+    response = _suite_report(root_path, commands, command_results, started_at, include_e2e)
+    if response["overall_status"] == "failed":
+        response["remediation"] = _spawn_debugger_agent(root_path)
+    return response
 
-        status = "passed" if returncode == 0 and not timed_out else "failed"
-        pass_count += 1 if status == "passed" else 0
-        fail_count += 1 if status == "failed" else 0
-        coverage = _extract_coverage(stdout, stderr)
-        if coverage is not None:
-            coverage_values.append(coverage)
 
+async def aexecute_full_test_suite(
+    *,
+    workspace_root: str | None = None,
+    include_e2e: bool = True,
+    timeout_seconds: int = 1800,
+    max_output_chars: int = 6000,
+) -> dict[str, Any]:
+    """Async counterpart of `execute_full_test_suite`.
+
+    Commands run through `asyncio.create_subprocess_exec` in their own session;
+    output is drained incrementally into bounded buffers. On timeout, and when
+    the awaiting task is cancelled, the command's process group is killed.
+    """
+
+    root_path = _resolve_root(workspace_root)
+    commands = await asyncio.to_thread(discover_test_commands, root_path, include_e2e=include_e2e)
+    started_at = datetime.now(timezone.utc)
+    command_results: list[dict[str, Any]] = []
+
+    for spec in commands:
+        start = time.perf_counter()
+        stdout = BoundedOutput(head_bytes=0, tail_bytes=max_output_chars * 4)
+        stderr = BoundedOutput(head_bytes=0, tail_bytes=max_output_chars * 4)
+        returncode = -1
+        timed_out = False
+        try:
+            returncode, timed_out = await _stream_command(spec, stdout, stderr, timeout_seconds)
+        except FileNotFoundError as exc:  # pragma: no cover - environment issue
+            stderr.write(str(exc).encode("utf-8"))
+        stdout_text = _decode(stdout.tail)
+        if timed_out:
+            stdout_text += "\n[quadracode] command timed out"
         command_results.append(
-            {
-                "command": " ".join(spec.command),
-                "cwd": str(spec.cwd),
-                "description": spec.description,
-                "status": status,
-                "returncode": returncode,
-                "duration_seconds": round(duration, 3),
-                "stdout": _truncate_output(stdout, max_output_chars),
-                "stderr": _truncate_output(stderr, max_output_chars),
-                "coverage_percent": coverage,
-            }
+            _command_result(
+                spec,
+                returncode=returncode,
+                timed_out=timed_out,
+                duration=time.perf_counter() - start,
+                stdout=stdout_text,
+                stderr=_decode(stderr.tail),
+                max_output_chars=max_output_chars,
+            )
         )
 
+    response = _suite_report(root_path, commands, command_results, started_at, include_e2e)
+    if response["overall_status"] == "failed":
+        response["remediation"] = await asyncio.to_thread(_spawn_debugger_agent, root_path)
+    return response
+
+
+async def _stream_command(
+    spec: DiscoveredTestCommand,
+    stdout: BoundedOutput,
+    stderr: BoundedOutput,
+    timeout_seconds: float,
+) -> tuple[int, bool]:
+    """Runs one command, draining its pipes; returns ``(returncode, timed_out)``."""
+    process = await asyncio.create_subprocess_exec(
+        *spec.command,
+        cwd=str(spec.cwd),
+        env=_command_environment(spec),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+
+    async def _drain(stream: asyncio.StreamReader | None, sink: BoundedOutput) -> None:
+        if stream is None:
+            return
+        while chunk := await stream.read(64 * 1024):
+            sink.write(chunk)
+
+    async def _run() -> int:
+        await asyncio.gather(_drain(process.stdout, stdout), _drain(process.stderr, stderr))
+        return await process.wait()
+
+    try:
+        return await asyncio.wait_for(_run(), timeout=timeout_seconds), False
+    except asyncio.TimeoutError:
+        await _kill_process_group(process)
+        return -1, True
+    except asyncio.CancelledError:
+        await asyncio.shield(_kill_process_group(process))
+        raise
+
+
+async def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    if process.returncode is None:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    await process.wait()
+
+
+def _resolve_root(workspace_root: str | None) -> Path:
+    return Path(workspace_root or os.environ.get("WORKSPACE_ROOT") or os.getcwd()).resolve()
+
+
+def _command_environment(spec: DiscoveredTestCommand) -> dict[str, str]:
+    command_env = os.environ.copy()
+    if spec.environment:
+        command_env.update(spec.environment)
+    return command_env
+
+
+def _decode(value: bytes | str | None) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return value
+
+
+def _command_result(
+    spec: DiscoveredTestCommand,
+    *,
+    returncode: int,
+    timed_out: bool,
+    duration: float,
+    stdout: str,
+    stderr: str,
+    max_output_chars: int,
+) -> dict[str, Any]:
+    """Builds the per-command entry of the suite report."""
+    status = "passed" if returncode == 0 and not timed_out else "failed"
+    return {
+        "command": " ".join(spec.command),
+        "cwd": str(spec.cwd),
+        "description": spec.description,
+        "status": status,
+        "returncode": returncode,
+        "duration_seconds": round(duration, 3),
+        "stdout": _truncate_output(stdout, max_output_chars),
+        "stderr": _truncate_output(stderr, max_output_chars),
+        "coverage_percent": _extract_coverage(stdout, stderr),
+    }
+
+
+def _suite_report(
+    root_path: Path,
+    commands: Sequence[DiscoveredTestCommand],
+    command_results: list[dict[str, Any]],
+    started_at: datetime,
+    include_e2e: bool,
+) -> dict[str, Any]:
+    """Aggregates per-command results; remediation for failures is added by the caller."""
     completed_at = datetime.now(timezone.utc)
+    pass_count = sum(1 for result in command_results if result["status"] == "passed")
+    fail_count = len(command_results) - pass_count
     overall_status = "skipped"
     if command_results:
         overall_status = "passed" if fail_count == 0 else "failed"
 
+    coverage_values = [
+        result["coverage_percent"] for result in command_results if result["coverage_percent"] is not None
+    ]
     coverage_summary: dict[str, float] | None = None
     if coverage_values:
         coverage_summary = {
@@ -253,15 +400,11 @@ or timed_out, the tool will try to spawn a debugger agent.
         "coverage": coverage_summary,
         "commands": command_results,
     }
-
-    if overall_status == "failed":
-        response["remediation"] = _spawn_debugger_agent(root_path)
-    elif overall_status == "skipped":
+    if overall_status == "skipped":
         response["remediation"] = {
             "action": "noop",
             "reason": "No test commands discovered",
         }
-
     return response
 
 
@@ -347,22 +490,13 @@ def _spawn_debugger_agent(root: Path) -> dict[str, Any]:
 
 
 def _active_workspace_descriptor() -> dict[str, Any] | None:
-    """Retrieves the active workspace descriptor from environment variables.
+    """Retrieves the workspace descriptor bound to the current thread's invocation.
 
-    The workspace descriptor is a JSON string containing metadata about the current
-    execution environment, such as the workspace ID and volume information. This
-    is used to ensure that the debugger agent is spawned with the correct context.
+    The workspace descriptor contains metadata about the current execution
+    environment, such as the workspace ID and volume information. This is used
+    to ensure that the debugger agent is spawned with the correct context.
     """
-    descriptor_raw = os.environ.get("QUADRACODE_ACTIVE_WORKSPACE_DESCRIPTOR")
-    if not descriptor_raw:
-        return None
-    try:
-        payload = json.loads(descriptor_raw)
-    except json.JSONDecodeError:
-        return None
-    if isinstance(payload, dict):
-        return payload
-    return None
+    return get_active_workspace_descriptor()
 
 
 @tool(args_schema=RunFullTestSuiteRequest)
@@ -396,5 +530,22 @@ def run_full_test_suite(
     return json.dumps(result, indent=2, sort_keys=True)
 
 
+async def _arun_full_test_suite(
+    workspace_root: str | None = None,
+    include_e2e: bool = True,
+    timeout_seconds: int = 1800,
+    max_output_chars: int = 6000,
+) -> str:
+    result = await aexecute_full_test_suite(
+        workspace_root=workspace_root,
+        include_e2e=include_e2e,
+        timeout_seconds=timeout_seconds,
+        max_output_chars=max_output_chars,
+    )
+    return json.dumps(result, indent=2, sort_keys=True)
+
+
+run_full_test_suite.coroutine = _arun_full_test_suite
+
 # Stable tool naming for LangGraph registrations
 run_full_test_suite.name = "run_full_test_suite"
@@ -8,26 +8,41 @@ This abstraction allows agents to work on file systems, run arbitrary shell
 commands, and manage project state without interfering with the host system or
 other agents. All significant workspace events are published to a Redis stream for
 observability and auditing.
+
+The tools can be awaited (`ainvoke`) without blocking the event loop: Docker calls
+run on worker threads, and cancelling a `workspace_exec` call, like hitting its
+timeout, terminates the command's process group inside the container.
+
+Environment Variables:
+    QUADRACODE_WORKSPACE_EXEC_SESSIONS: When true, `workspace_exec` calls that
+        name no session run in a shared persistent shell (see `exec_sessions`).
 """
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import os
-import subprocess
+import posixpath
+import re
+import shlex
+import tarfile
 import tempfile
+import time
 import uuid
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from threading import Lock
-from collections.abc import Sequence
-from typing import Any
+from collections.abc import Callable
+from typing import IO, Any
 
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field, field_validator
 
 from quadracode_contracts import (
     DEFAULT_WORKSPACE_MOUNT,
+    WorkspaceBatchCopyResult,
     WorkspaceCommandResult,
     WorkspaceCopyResult,
     WorkspaceDescriptor,
@@ -35,13 +50,35 @@ from quadracode_contracts import (
     normalize_workspace_name,
 )
 
+from ..archive_transfer import (
+    ArchiveLimitError,
+    expand_host_sources,
+    extract_archive,
+    host_sources_size,
+    write_archive,
+)
+from ..exec_sessions import (
+    ExecSessionError,
+    SessionTimeoutError,
+    discard_exec_sessions,
+    get_exec_session_pool,
+)
+from ..output_capture import DEFAULT_HEAD_BYTES, DEFAULT_TAIL_BYTES, BoundedOutput
+from ..client.docker_backend import (
+    ContainerSpec,
+    ContainerUnavailableError,
+    DockerError,
+    DockerTimeoutError,
+    get_docker_backend,
+)
+
 try:
     import redis  # type: ignore
 except Exception:  # pragma: no cover - redis presence depends on environment
     redis = None
 
+logger = logging.getLogger(__name__)
 
-DOCKER_BIN = os.environ.get("QUADRACODE_DOCKER_BIN", "docker")
 DEFAULT_IMAGE = os.environ.get("QUADRACODE_WORKSPACE_IMAGE", "quadracode-workspace:latest")
 DEFAULT_NETWORK = os.environ.get("QUADRACODE_WORKSPACE_NETWORK", "quadracode_default")
 LOGS_DIR = f"{DEFAULT_WORKSPACE_MOUNT}/logs"
@@ -53,6 +90,18 @@ WORKSPACE_REDIS_URL = os.environ.get(
 _WORKSPACE_EVENTS_DISABLED = False
 _WORKSPACE_REDIS_CLIENT: "redis.Redis" | None = None  # type: ignore[name-defined]
 _WORKSPACE_EVENTS_LOCK = Lock()
+WORKSPACE_READY_TTL = float(os.environ.get("QUADRACODE_WORKSPACE_READY_TTL", "300"))
+_READY_WORKSPACES: dict[str, tuple[WorkspaceDescriptor, float]] = {}
+_READY_WORKSPACES_LOCK = Lock()
+WORKSPACE_PROGRESS_INTERVAL = float(os.environ.get("QUADRACODE_WORKSPACE_PROGRESS_INTERVAL", "0"))
+_PROGRESS_MARKER = b"__QC_PROGRESS__"
+_RESULT_MARKER = b"__QC_RESULT__"
+_RAW_MARKER = b"__QC_RAW__"
+_PREAMBLE_LIMIT = 4096
+_TERMINATE_GRACE_SECONDS = 5
+_BATCH_SPOOL_LIMIT = 8 * 1024 * 1024
+WORKSPACE_EXEC_SESSIONS = os.environ.get("QUADRACODE_WORKSPACE_EXEC_SESSIONS", "").lower() in {"1", "true", "yes"}
+DEFAULT_EXEC_SESSION = "default"
 
 
 class WorkspaceError(RuntimeError):
@@ -98,6 +147,14 @@ class WorkspaceExecRequest(WorkspaceBaseRequest):
         default=None,
         description="Optional timeout in seconds for the command.",
     )
+    session: str | None = Field(
+        default=None,
+        description=(
+            "Run in this named persistent shell: the working directory and exported "
+            "variables carry over between calls that use the same session name. "
+            "No log files are written, so only the head and tail of long output are returned."
+        ),
+    )
 
     @field_validator("command")
     @classmethod
@@ -122,6 +179,38 @@ class WorkspaceCopyFromRequest(WorkspaceBaseRequest):
     destination_path: str = Field(..., description="Destination path on the host.")
 
 
+class WorkspaceBatchCopyRequest(WorkspaceBaseRequest):
+    """Shared options of the multi-path copy tools."""
+    source_paths: list[str] = Field(
+        ...,
+        min_length=1,
+        description="Paths or glob patterns to copy (`*`, `?`, `[...]`, and `**` for any depth).",
+    )
+    base_dir: str | None = Field(
+        default=None,
+        description="Directory the patterns are relative to; matches keep their path below it.",
+    )
+    compress: bool = Field(default=False, description="Gzip the tar stream in transit.")
+    max_bytes: int | None = Field(
+        default=None,
+        gt=0,
+        description="Refuse the copy if the selected files add up to more than this many bytes.",
+    )
+
+
+class WorkspaceCopyToBatchRequest(WorkspaceBatchCopyRequest):
+    """Schema for pushing many host files into the workspace as one tar stream."""
+    destination_path: str = Field(
+        default=DEFAULT_WORKSPACE_MOUNT,
+        description="Directory inside the workspace to copy into (created if missing).",
+    )
+
+
+class WorkspaceCopyFromBatchRequest(WorkspaceBatchCopyRequest):
+    """Schema for pulling many workspace files to the host as one tar stream."""
+    destination_path: str = Field(..., description="Directory on the host to copy into.")
+
+
 class WorkspaceDestroyRequest(WorkspaceBaseRequest):
     """Schema for destroying a workspace, with an option to preserve the volume."""
     delete_volume: bool = Field(
@@ -236,12 +325,13 @@ def ensure_workspace(
         return False, None, "Workspace image not provided"
     selected_network = network or DEFAULT_NETWORK
 
+    docker = get_docker_backend()
     volume_preexists = _volume_exists(resources.volume)
     if not volume_preexists:
-        result = _run_docker(["volume", "create", resources.volume])
-        if result.returncode != 0:
-            stderr = result.stderr.strip() or "unknown docker error"
-            return False, None, f"Failed to create volume {resources.volume}: {stderr}"
+        try:
+            docker.create_volume(resources.volume)
+        except DockerError as exc:
+            return False, None, f"Failed to create volume {resources.volume}: {exc}"
 
     container_preexists = _container_exists(resources.container)
     container_was_running = False
@@ -251,10 +341,10 @@ def ensure_workspace(
         container_data = _inspect_container(resources.container)
         container_was_running = _container_running(container_data)
         if not container_was_running:
-            start_result = _run_docker(["container", "start", resources.container])
-            if start_result.returncode != 0:
-                stderr = start_result.stderr.strip() or "unknown docker error"
-                return False, None, f"Failed to start existing container {resources.container}: {stderr}"
+            try:
+                docker.start_container(resources.container)
+            except DockerError as exc:
+                return False, None, f"Failed to start existing container {resources.container}: {exc}"
     else:
         try:
             _start_container(resources, selected_image, selected_network)
@@ -271,6 +361,7 @@ def ensure_workspace(
     elif not container_was_running:
         event_name = "workspace_started"
 
+    _remember_ready_workspace(descriptor)
     _publish_workspace_event(
         workspace_id,
         event_name,
@@ -285,62 +376,73 @@ def ensure_workspace(
     return True, descriptor, None
 
 
-def _run_docker(
-    args: Sequence[str],
+async def aensure_workspace(
+    workspace_id: str,
     *,
-    timeout: float | None = None,
-    check: bool = False,
-) -> subprocess.CompletedProcess[str]:
-    """A wrapper around `subprocess.run` for executing Docker CLI commands.
+    image: str | None = None,
+    network: str | None = None,
+) -> tuple[bool, WorkspaceDescriptor | None, str | None]:
+    """Awaitable `ensure_workspace` that runs the Docker calls on a worker thread."""
+    return await asyncio.to_thread(ensure_workspace, workspace_id, image=image, network=network)
+
+
+def _remember_ready_workspace(descriptor: WorkspaceDescriptor) -> None:
+    """Records that a workspace's container was verified to be running."""
+    if WORKSPACE_READY_TTL <= 0:
+        return
+    with _READY_WORKSPACES_LOCK:
+        _READY_WORKSPACES[descriptor.container] = (descriptor, time.monotonic() + WORKSPACE_READY_TTL)
+
 
-    This helper function centralizes Docker command execution, providing consistent
-    error handling, timeout management, and exception wrapping.
+def invalidate_workspace(workspace_id: str) -> None:
+    """Forgets the cached readiness of a workspace so the next call re-checks Docker."""
+    container = _workspace_resources(workspace_id).container
+    with _READY_WORKSPACES_LOCK:
+        _READY_WORKSPACES.pop(container, None)
+    discard_exec_sessions(container)
+
+
+def _ready_workspace(workspace_id: str) -> tuple[bool, WorkspaceDescriptor | None, str | None]:
+    """Returns the workspace descriptor, skipping Docker inspection when recently verified.
+
+    Tool calls that only need a running container go through this helper instead of
+    `ensure_workspace`. Entries expire after `QUADRACODE_WORKSPACE_READY_TTL` seconds
+    and are dropped when the workspace is destroyed or a Docker call reports the
+    container missing.
     """
-    command = [DOCKER_BIN, *args]
-    try:
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            check=check,
-            timeout=timeout,
-        )
-        return result
-    except FileNotFoundError as exc:  # pragma: no cover - depends on environment
-        raise WorkspaceError(f"Docker binary not found at '{DOCKER_BIN}'") from exc
-    except subprocess.TimeoutExpired as exc:
-        raise WorkspaceError(f"Docker command timed out: {' '.join(command)}") from exc
-    except subprocess.CalledProcessError as exc:
-        stderr = exc.stderr.strip() if exc.stderr else "unknown docker error"
-        raise WorkspaceError(f"Docker command failed: {stderr}") from exc
-
-
-def _run_docker_json(
-    args: Sequence[str],
-    *,
-    timeout: float | None = None,
-) -> Any:
-    """Executes a Docker command and parses its stdout as a JSON object."""
-    result = _run_docker(args, timeout=timeout)
-    if result.returncode != 0:
-        stderr = result.stderr.strip() or "unknown docker error"
-        raise WorkspaceError(f"Docker command failed: {stderr}")
-    try:
-        return json.loads(result.stdout or "[]")
-    except json.JSONDecodeError as exc:
-        raise WorkspaceError(f"Failed to parse docker output as JSON: {exc}") from exc
+    container = _workspace_resources(workspace_id).container
+    with _READY_WORKSPACES_LOCK:
+        cached = _READY_WORKSPACES.get(container)
+        if cached is not None and cached[1] > time.monotonic():
+            return True, cached[0], None
+        _READY_WORKSPACES.pop(container, None)
+    return ensure_workspace(workspace_id)
 
 
 def _volume_exists(name: str) -> bool:
     """Checks if a Docker volume with the given name exists."""
-    result = _run_docker(["volume", "inspect", name])
-    return result.returncode == 0
+    return _inspect_volume_data(name) is not None
 
 
 def _container_exists(name: str) -> bool:
     """Checks if a Docker container with the given name exists."""
-    result = _run_docker(["container", "inspect", name])
-    return result.returncode == 0
+    return _inspect_container_data(name) is not None
+
+
+def _inspect_container_data(name: str) -> dict[str, Any] | None:
+    """Returns a container's inspection data, or `None` if it does not exist."""
+    try:
+        return get_docker_backend().inspect_container(name)
+    except DockerError as exc:
+        raise WorkspaceError(f"Docker command failed: {exc}") from exc
+
+
+def _inspect_volume_data(name: str) -> dict[str, Any] | None:
+    """Returns a volume's inspection data, or `None` if it does not exist."""
+    try:
+        return get_docker_backend().inspect_volume(name)
+    except DockerError as exc:
+        raise WorkspaceError(f"Docker command failed: {exc}") from exc
 
 
 def _container_running(data: dict[str, Any]) -> bool:
@@ -351,18 +453,18 @@ def _container_running(data: dict[str, Any]) -> bool:
 
 def _inspect_container(name: str) -> dict[str, Any]:
     """Returns the `docker inspect` output for a container."""
-    data = _run_docker_json(["container", "inspect", name])
+    data = _inspect_container_data(name)
     if not data:
         raise WorkspaceError(f"Container {name} not found")
-    return data[0]
+    return data
 
 
 def _inspect_volume(name: str) -> dict[str, Any]:
     """Returns the `docker inspect` output for a volume."""
-    data = _run_docker_json(["volume", "inspect", name])
+    data = _inspect_volume_data(name)
     if not data:
         raise WorkspaceError(f"Volume {name} not found")
-    return data[0]
+    return data
 
 
 def _format_timestamp(raw: str | None) -> str:
@@ -411,82 +513,65 @@ def _workspace_descriptor(
 
 def _start_container(resources: WorkspaceResources, image: str, network: str | None) -> None:
     """Starts a new Docker container for a workspace with the correct volume mounts and environment."""
-    command = [
-        "run",
-        "-d",
-        "--name",
-        resources.container,
-        "--mount",
-        f"type=volume,source={resources.volume},target={DEFAULT_WORKSPACE_MOUNT}",
-        "-e",
-        f"WORKSPACE_ID={resources.workspace_id}",
-        "-e",
-        f"WORKSPACE_MOUNT={DEFAULT_WORKSPACE_MOUNT}",
-        "--restart",
-        "unless-stopped",
-    ]
-    if network:
-        command.extend(["--network", network])
-    command.append(image)
-    command.extend(["sleep", "infinity"])
-    result = _run_docker(command)
-    if result.returncode != 0:
-        stderr = result.stderr.strip() or "unknown docker error"
-        raise WorkspaceError(f"Failed to start workspace container: {stderr}")
+    spec = ContainerSpec(
+        image=image,
+        command=["sleep", "infinity"],
+        name=resources.container,
+        volume=resources.volume,
+        mount_target=DEFAULT_WORKSPACE_MOUNT,
+        environment={
+            "WORKSPACE_ID": resources.workspace_id,
+            "WORKSPACE_MOUNT": DEFAULT_WORKSPACE_MOUNT,
+        },
+        network=network,
+        restart_policy="unless-stopped",
+    )
+    try:
+        get_docker_backend().run_container(spec)
+    except DockerError as exc:
+        raise WorkspaceError(f"Failed to start workspace container: {exc}") from exc
 
 
-def _prepare_logs_directory(resources: WorkspaceResources) -> None:
-    """Ensures the logs directory exists inside the workspace container."""
-    _run_docker(["exec", resources.container, "mkdir", "-p", LOGS_DIR], check=True)
+def _log_paths(log_prefix: str) -> tuple[str, str, str]:
+    """Returns the stdout, stderr and bundle log paths of a command execution."""
+    return (
+        f"{LOGS_DIR}/{log_prefix}.stdout",
+        f"{LOGS_DIR}/{log_prefix}.stderr",
+        f"{LOGS_DIR}/{log_prefix}.log",
+    )
 
 
-def _write_logs_to_workspace(
-    resources: WorkspaceResources,
-    stdout_text: str,
-    stderr_text: str,
-    log_prefix: str,
-) -> tuple[str, str, str | None]:
-    """Copies stdout and stderr from a command execution into the workspace's log directory.
+def _pid_path(log_prefix: str) -> str:
+    """Returns the file holding the process group id of a running command."""
+    return f"{LOGS_DIR}/{log_prefix}.pid"
 
-    This function first writes the output streams to temporary files on the host,
-    then uses `docker cp` to transfer them into the `/workspace/logs` directory
-    inside the container. This makes command history accessible for later analysis.
-    """
-    stdout_log = f"{LOGS_DIR}/{log_prefix}.stdout"
-    stderr_log = f"{LOGS_DIR}/{log_prefix}.stderr"
-    bundle_path = f"{LOGS_DIR}/{log_prefix}.log"
-    with tempfile.NamedTemporaryFile(delete=False) as stdout_file:
-        stdout_file.write(stdout_text.encode("utf-8"))
-        stdout_tmp = Path(stdout_file.name)
-    with tempfile.NamedTemporaryFile(delete=False) as stderr_file:
-        stderr_file.write(stderr_text.encode("utf-8"))
-        stderr_tmp = Path(stderr_file.name)
-
-    combined_tmp: Path | None
-    try:
-        with tempfile.NamedTemporaryFile(
-            delete=False, prefix="qc-workspace-", suffix=".log", mode="w", encoding="utf-8"
-        ) as combined_file:
-            combined_file.write("COMMAND STDOUT\n")
-            combined_file.write(stdout_text)
-            combined_file.write("\n\nCOMMAND STDERR\n")
-            combined_file.write(stderr_text)
-            combined_tmp = Path(combined_file.name)
-    except Exception:
-        combined_tmp = None
 
-    try:
-        _run_docker(["cp", str(stdout_tmp), f"{resources.container}:{stdout_log}"], check=True)
-        _run_docker(["cp", str(stderr_tmp), f"{resources.container}:{stderr_log}"], check=True)
-        if combined_tmp:
-            _run_docker(["cp", str(combined_tmp), f"{resources.container}:{bundle_path}"], check=True)
-    finally:
-        stdout_tmp.unlink(missing_ok=True)
-        stderr_tmp.unlink(missing_ok=True)
-        if combined_tmp:
-            combined_tmp.unlink(missing_ok=True)
+def _new_log_prefix() -> str:
+    return f"exec-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
 
-    return stdout_log, stderr_log, bundle_path if combined_tmp else None
+def _terminate_remote_command(container: str, log_prefix: str) -> None:
+    """Stops a command started by `workspace_exec` that is still running in the container.
+
+    Ending a `docker exec` session on the client side leaves the process running,
+    so the command's process group is signalled explicitly: SIGTERM first, then
+    SIGKILL once the grace period expires.
+    """
+    pid_file = shlex.quote(_pid_path(log_prefix))
+    script = (
+        f"pid=$(cat {pid_file} 2>/dev/null) || exit 0; "
+        'kill -TERM -- "-$pid" 2>/dev/null || exit 0; '
+        f"i=0; while [ $i -lt {_TERMINATE_GRACE_SECONDS * 10} ] && kill -0 -- \"-$pid\" 2>/dev/null; "
+        "do sleep 0.1; i=$((i + 1)); done; "
+        'kill -KILL -- "-$pid" 2>/dev/null; '
+        f"rm -f {pid_file}"
+    )
+    try:
+        get_docker_backend().exec(
+            container, ["bash", "-c", script], timeout=_TERMINATE_GRACE_SECONDS + 10
+        )
+    except DockerError as exc:
+        logger.warning("Unable to terminate %s in %s: %s", log_prefix, container, exc)
 
 
 def _json_success(**payload: Any) -> str:
@@ -519,9 +604,155 @@ def workspace_create(workspace_id: str, image: str | None = None, network: str |
     return _json_success(workspace=descriptor.model_dump(), message="workspace_ready")
 
 
-def _build_exec_command(command: str) -> list[str]:
-    """Wraps a shell command to ensure it runs in a login shell with pipefail semantics."""
-    return ["bash", "-lc", f"set -o pipefail; {command}"]
+def _build_exec_command(
+    command: str,
+    log_prefix: str | None = None,
+    *,
+    progress_interval: float = 0.0,
+) -> list[str]:
+    """Wraps a shell command to ensure it runs in a login shell with pipefail semantics.
+
+    When `log_prefix` is given, the command's output goes straight to the stdout and
+    stderr log files in the workspace's log directory as it runs, and the wrapper
+    writes the bundle log from within the same `docker exec`. Only a framed excerpt
+    travels back: optional ``__QC_PROGRESS__ <stdout> <stderr>`` lines every
+    `progress_interval` seconds, then ``__QC_RESULT__ <stdout> <stderr>`` with the
+    exact byte counts, followed by the head and tail of each stream on stdout and
+    stderr. If the log directory is not writable the wrapper prints ``__QC_RAW__``
+    and lets the output through unchanged.
+    """
+    if log_prefix is None:
+        return ["bash", "-lc", f"set -o pipefail; {command}"]
+    stdout_log, stderr_log, bundle_log = (shlex.quote(path) for path in _log_paths(log_prefix))
+    pid_file = shlex.quote(_pid_path(log_prefix))
+    excerpt_limit = DEFAULT_HEAD_BYTES + DEFAULT_TAIL_BYTES
+    lines = [
+        "__qc_command() {",
+        "set -o pipefail",
+        command,
+        "}",
+        "__qc_excerpt() {",
+        '  if [ "$(( $(wc -c < "$1") ))" -le ' + str(excerpt_limit) + ' ]; then cat "$1"; else',
+        f'    head -c {DEFAULT_HEAD_BYTES} "$1"; tail -c {DEFAULT_TAIL_BYTES} "$1"',
+        "  fi",
+        "}",
+        f"if mkdir -p {shlex.quote(LOGS_DIR)} 2>/dev/null && : > {stdout_log} 2>/dev/null; then",
+        f"  : > {stderr_log}",
+    ]
+    if progress_interval > 0:
+        lines.extend(
+            [
+                f"  ( while sleep {progress_interval:g} >/dev/null 2>&1; do",
+                f"      printf '{_PROGRESS_MARKER.decode()} %s %s\\n' \"$(( $(wc -c < {stdout_log}) ))\" \"$(( $(wc -c < {stderr_log}) ))\"",
+                "    done ) &",
+                "  __qc_monitor=$!",
+            ]
+        )
+    lines.extend(
+        [
+            # A new session gives the command its own process group, which is what
+            # `_terminate_remote_command` signals on timeout or cancellation.
+            "  export -f __qc_command",
+            f"  setsid bash -c __qc_command > {stdout_log} 2> {stderr_log} &",
+            "  __qc_pid=$!",
+            f"  echo $__qc_pid > {pid_file}",
+            "  wait $__qc_pid",
+            "  __qc_rc=$?",
+            f"  rm -f {pid_file}",
+        ]
+    )
+    if progress_interval > 0:
+        lines.append("  kill $__qc_monitor 2>/dev/null; wait $__qc_monitor 2>/dev/null")
+    lines.extend(
+        [
+            f"  {{ printf 'COMMAND STDOUT\\n'; cat {stdout_log}; printf '\\n\\nCOMMAND STDERR\\n'; cat {stderr_log}; }} > {bundle_log}",
+            f"  printf '{_RESULT_MARKER.decode()} %s %s\\n' \"$(( $(wc -c < {stdout_log}) ))\" \"$(( $(wc -c < {stderr_log}) ))\"",
+            f"  __qc_excerpt {stdout_log}",
+            f"  __qc_excerpt {stderr_log} >&2",
+            "  exit $__qc_rc",
+            "fi",
+            f"echo {_RAW_MARKER.decode()}",
+            "( __qc_command )",
+        ]
+    )
+    return ["bash", "-lc", "\n".join(lines)]
+
+
+class _ExecOutputCapture:
+    """Consumes the exec wrapper's framed output while the command streams.
+
+    Memory stays bounded: each stream is held in a `BoundedOutput`, and the
+    preamble (progress and result lines) is parsed line by line.
+    """
+
+    def __init__(self, on_progress: Callable[[int, int], None] | None = None) -> None:
+        self.stdout = BoundedOutput()
+        self.stderr = BoundedOutput()
+        self.on_progress = on_progress
+        self.reported_bytes: tuple[int, int] | None = None
+        self.logs_written = False
+        self._preamble: bytearray | None = bytearray()
+
+    def __call__(self, stream: int, chunk: bytes) -> None:
+        if stream == 2:
+            self.stderr.write(chunk)
+            return
+        if self._preamble is None:
+            self.stdout.write(chunk)
+            return
+        self._preamble += chunk
+        while self._preamble is not None:
+            newline = self._preamble.find(b"\n")
+            if newline < 0:
+                if len(self._preamble) > _PREAMBLE_LIMIT:
+                    self._end_preamble()
+                return
+            line = bytes(self._preamble[:newline])
+            if line.startswith(_PROGRESS_MARKER):
+                del self._preamble[: newline + 1]
+                sizes = self._sizes(line)
+                if sizes and self.on_progress is not None:
+                    self.on_progress(*sizes)
+            elif line.startswith(_RESULT_MARKER):
+                del self._preamble[: newline + 1]
+                self.reported_bytes = self._sizes(line)
+                self.logs_written = self.reported_bytes is not None
+                self._end_preamble()
+            elif line == _RAW_MARKER:
+                del self._preamble[: newline + 1]
+                self._end_preamble()
+            else:
+                # Not produced by the wrapper (e.g. the shell failed to start).
+                self._end_preamble()
+
+    @staticmethod
+    def _sizes(line: bytes) -> tuple[int, int] | None:
+        parts = line.split()
+        try:
+            return int(parts[1]), int(parts[2])
+        except (IndexError, ValueError):
+            return None
+
+    def _end_preamble(self) -> None:
+        pending, self._preamble = self._preamble, None
+        if pending:
+            self.stdout.write(bytes(pending))
+
+    def finish(self) -> None:
+        if self._preamble is not None:
+            self._end_preamble()
+
+    def results(self) -> tuple[str, str, int, int, bool, bool]:
+        """Returns stdout, stderr, their exact sizes and truncation flags."""
+        stdout_total, stderr_total = self.reported_bytes or (self.stdout.total_bytes, self.stderr.total_bytes)
+        return (
+            self.stdout.render(stdout_total),
+            self.stderr.render(stderr_total),
+            stdout_total,
+            stderr_total,
+            self.stdout.omitted_bytes(stdout_total) > 0,
+            self.stderr.omitted_bytes(stderr_total) > 0,
+        )
 
 
 @tool(args_schema=WorkspaceExecRequest)
@@ -531,6 +762,7 @@ def workspace_exec(
     working_dir: str | None = None,
     environment: dict[str, str] | None = None,
     timeout: float | None = None,
+    session: str | None = None,
 ) -> str:
     """Executes a shell command inside a specified workspace container.
 
@@ -538,94 +770,268 @@ def workspace_exec(
     commands within the sandboxed environment. It first ensures the workspace is
     running, then uses `docker exec` to run the command. It captures `stdout`,
     `stderr`, and the return code. For auditing and debugging, the output streams
-    are also written to log files within the workspace's `/workspace/logs` directory.
+    are written to log files within the workspace's `/workspace/logs` directory as
+    the command runs; the response carries the exact byte counts and the head and
+    tail of each stream, so unbounded output never has to fit in memory.
+
+    With `session`, the command runs in a long-lived shell of that name instead
+    of a fresh `docker exec`, which keeps `cd`/`export` state between calls and
+    cuts per-command latency to a pipe round trip (no log files are written).
     """
 
+    return _run_workspace_command(
+        workspace_id, command, working_dir, environment, timeout, _new_log_prefix(), session
+    )
+
+
+async def _aworkspace_exec(
+    workspace_id: str,
+    command: str,
+    working_dir: str | None = None,
+    environment: dict[str, str] | None = None,
+    timeout: float | None = None,
+    session: str | None = None,
+) -> str:
+    """Async `workspace_exec`; cancelling it also stops the command in the container."""
+    log_prefix = _new_log_prefix()
+    try:
+        return await asyncio.to_thread(
+            _run_workspace_command,
+            workspace_id,
+            command,
+            working_dir,
+            environment,
+            timeout,
+            log_prefix,
+            session,
+        )
+    except asyncio.CancelledError:
+        container = _workspace_resources(workspace_id).container
+        session_name = _session_name(session)
+        if session_name:
+            # Killing the session ends the running command along with it.
+            await asyncio.shield(
+                asyncio.to_thread(get_exec_session_pool().discard, container, session_name)
+            )
+        await asyncio.shield(asyncio.to_thread(_terminate_remote_command, container, log_prefix))
+        raise
+
+
+workspace_exec.coroutine = _aworkspace_exec
+
+
+def _session_name(session: str | None) -> str | None:
+    return session or (DEFAULT_EXEC_SESSION if WORKSPACE_EXEC_SESSIONS else None)
+
+
+def _run_session_command(
+    workspace_id: str,
+    descriptor: WorkspaceDescriptor,
+    command: str,
+    working_dir: str | None,
+    environment: dict[str, str] | None,
+    timeout: float | None,
+    session: str,
+) -> str | None:
+    """Runs a command in a persistent shell; returns ``None`` to fall back to a plain exec."""
+    stdout = BoundedOutput(DEFAULT_HEAD_BYTES, DEFAULT_TAIL_BYTES)
+    stderr = BoundedOutput(DEFAULT_HEAD_BYTES, DEFAULT_TAIL_BYTES)
+
+    def _on_output(stream: int, chunk: bytes) -> None:
+        (stdout if stream == 1 else stderr).write(chunk)
+
+    started_at = datetime.now(timezone.utc)
+    try:
+        outcome = get_exec_session_pool().run(
+            descriptor.container,
+            session,
+            command,
+            on_output=_on_output,
+            timeout=timeout,
+            working_dir=working_dir,
+            environment=environment,
+            workdir=DEFAULT_WORKSPACE_MOUNT,
+            backend=get_docker_backend(),
+        )
+    except SessionTimeoutError as exc:
+        return _json_error(str(exc), workspace=descriptor.model_dump(), timed_out=True, session=session)
+    except ValueError as exc:
+        return _json_error(str(exc), workspace_id=workspace_id)
+    except ExecSessionError as exc:
+        logger.warning("Session %s unavailable in %s, using a one-off exec: %s", session, workspace_id, exc)
+        return None
+    return _command_response(
+        workspace_id,
+        descriptor,
+        command=command,
+        working_dir=outcome.cwd or working_dir or DEFAULT_WORKSPACE_MOUNT,
+        environment=environment,
+        started_at=started_at,
+        returncode=outcome.returncode,
+        stdout=stdout.render(),
+        stderr=stderr.render(),
+        stdout_bytes=stdout.total_bytes,
+        stderr_bytes=stderr.total_bytes,
+        stdout_truncated=stdout.truncated,
+        stderr_truncated=stderr.truncated,
+        session=session,
+    )
+
+
+def _run_workspace_command(
+    workspace_id: str,
+    command: str,
+    working_dir: str | None,
+    environment: dict[str, str] | None,
+    timeout: float | None,
+    log_prefix: str,
+    session: str | None = None,
+) -> str:
     resources = _workspace_resources(workspace_id)
     exec_cwd = working_dir or DEFAULT_WORKSPACE_MOUNT
-    env_keys = collect_environment_keys(environment)
 
-    success, descriptor_obj, error = ensure_workspace(workspace_id)
+    success, descriptor_obj, error = _ready_workspace(workspace_id)
     if not success or descriptor_obj is None:
         return _json_error(error or f"Workspace {workspace_id} is unavailable", workspace_id=workspace_id)
     descriptor = descriptor_obj
 
-    exec_args: list[str] = ["exec", "-i"]
-    exec_args.extend(["-w", exec_cwd])
-    if environment:
-        for key, value in environment.items():
-            exec_args.extend(["-e", f"{key}={value}"])
-    exec_args.append(resources.container)
-    exec_args.extend(_build_exec_command(command))
+    session_name = _session_name(session)
+    if session_name:
+        response = _run_session_command(
+            workspace_id, descriptor, command, working_dir, environment, timeout, session_name
+        )
+        if response is not None:
+            return response
 
     started_at = datetime.now(timezone.utc)
+    exec_command = _build_exec_command(
+        command, log_prefix, progress_interval=WORKSPACE_PROGRESS_INTERVAL
+    )
+    docker = get_docker_backend()
+    capture = _ExecOutputCapture()
+
+    def _publish_progress(stdout_bytes: int, stderr_bytes: int) -> None:
+        _publish_workspace_event(
+            workspace_id,
+            "command_progress",
+            {
+                "command": command,
+                "log_prefix": log_prefix,
+                "elapsed_seconds": (datetime.now(timezone.utc) - started_at).total_seconds(),
+                "stdout_bytes": stdout_bytes,
+                "stderr_bytes": stderr_bytes,
+            },
+        )
+
+    if WORKSPACE_PROGRESS_INTERVAL > 0:
+        capture.on_progress = _publish_progress
+
+    def _exec():
+        return docker.exec(
+            resources.container,
+            exec_command,
+            workdir=exec_cwd,
+            environment=environment,
+            timeout=timeout,
+            on_output=capture,
+        )
+
     try:
-        result = _run_docker(exec_args, timeout=timeout)
-    except WorkspaceError as exc:
+        try:
+            result = _exec()
+        except ContainerUnavailableError:
+            # The cached readiness was stale (container removed or stopped elsewhere).
+            invalidate_workspace(workspace_id)
+            success, descriptor_obj, error = ensure_workspace(workspace_id)
+            if not success or descriptor_obj is None:
+                return _json_error(
+                    error or f"Workspace {workspace_id} is unavailable", workspace_id=workspace_id
+                )
+            descriptor = descriptor_obj
+            started_at = datetime.now(timezone.utc)
+            result = _exec()
+    except DockerTimeoutError as exc:
+        _terminate_remote_command(resources.container, log_prefix)
+        return _json_error(str(exc), workspace=descriptor.model_dump(), timed_out=True)
+    except DockerError as exc:
+        if isinstance(exc, ContainerUnavailableError):
+            invalidate_workspace(workspace_id)
         return _json_error(str(exc), workspace=descriptor.model_dump())
-    finished_at = datetime.now(timezone.utc)
-    duration = (finished_at - started_at).total_seconds()
 
-    stdout = result.stdout or ""
-    stderr = result.stderr or ""
-    stdout_bytes = len(stdout.encode("utf-8"))
-    stderr_bytes = len(stderr.encode("utf-8"))
+    capture.finish()
+    stdout, stderr, stdout_bytes, stderr_bytes, stdout_truncated, stderr_truncated = capture.results()
 
-    log_prefix = f"exec-{started_at.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
     stdout_log: str | None = None
     stderr_log: str | None = None
     bundle_log: str | None = None
-    try:
-        _prepare_logs_directory(resources)
-        stdout_log, stderr_log, bundle_log = _write_logs_to_workspace(
-            resources,
-            stdout,
-            stderr,
-            log_prefix,
-        )
-    except WorkspaceError:
-        pass
+    if capture.logs_written:
+        stdout_log, stderr_log, bundle_log = _log_paths(log_prefix)
 
-    command_result = WorkspaceCommandResult(
-        workspace=descriptor,
+    return _command_response(
+        workspace_id,
+        descriptor,
         command=command,
         working_dir=exec_cwd,
-        environment_keys=env_keys,
-        started_at=started_at.astimezone(timezone.utc).isoformat(timespec="seconds"),
-        finished_at=finished_at.astimezone(timezone.utc).isoformat(timespec="seconds"),
-        duration_seconds=duration,
+        environment=environment,
+        started_at=started_at,
         returncode=result.returncode,
         stdout=stdout,
         stderr=stderr,
         stdout_bytes=stdout_bytes,
         stderr_bytes=stderr_bytes,
+        stdout_truncated=stdout_truncated,
+        stderr_truncated=stderr_truncated,
         stdout_log_path=stdout_log,
         stderr_log_path=stderr_log,
         log_bundle_path=bundle_log,
     )
 
+
+def _command_response(
+    workspace_id: str,
+    descriptor: WorkspaceDescriptor,
+    *,
+    command: str,
+    working_dir: str,
+    environment: dict[str, str] | None,
+    started_at: datetime,
+    returncode: int,
+    **outputs: Any,
+) -> str:
+    """Builds the `workspace_exec` response and publishes its `command_executed` event."""
+    finished_at = datetime.now(timezone.utc)
+    env_keys = collect_environment_keys(environment)
+    command_result = WorkspaceCommandResult(
+        workspace=descriptor,
+        command=command,
+        working_dir=working_dir,
+        environment_keys=env_keys,
+        started_at=started_at.astimezone(timezone.utc).isoformat(timespec="seconds"),
+        finished_at=finished_at.astimezone(timezone.utc).isoformat(timespec="seconds"),
+        duration_seconds=(finished_at - started_at).total_seconds(),
+        returncode=returncode,
+        **outputs,
+    )
+
     event_payload: dict[str, Any] = {
         "command": command,
-        "working_dir": exec_cwd,
+        "working_dir": working_dir,
         "environment_keys": env_keys,
-        "returncode": result.returncode,
-        "duration_seconds": duration,
+        "returncode": returncode,
+        "duration_seconds": command_result.duration_seconds,
         "started_at": command_result.started_at,
         "finished_at": command_result.finished_at,
-        "stdout_bytes": stdout_bytes,
-        "stderr_bytes": stderr_bytes,
+        "stdout_bytes": command_result.stdout_bytes,
+        "stderr_bytes": command_result.stderr_bytes,
     }
-    if stdout_log:
-        event_payload["stdout_log_path"] = stdout_log
-    if stderr_log:
-        event_payload["stderr_log_path"] = stderr_log
-    if bundle_log:
-        event_payload["log_bundle_path"] = bundle_log
+    for key in ("stdout_log_path", "stderr_log_path", "log_bundle_path", "session"):
+        if getattr(command_result, key):
+            event_payload[key] = getattr(command_result, key)
     _publish_workspace_event(workspace_id, "command_executed", event_payload)
 
     return json.dumps(
         {
-            "success": result.returncode == 0,
+            "success": returncode == 0,
             "workspace_command": command_result.model_dump(),
         },
         indent=2,
@@ -654,15 +1060,17 @@ def workspace_copy_to(
     if host_path.is_file():
         bytes_transferred = host_path.stat().st_size
 
-    success, descriptor_obj, error = ensure_workspace(workspace_id)
+    success, descriptor_obj, error = _ready_workspace(workspace_id)
     if not success or descriptor_obj is None:
         return _json_error(error or f"Workspace {workspace_id} is unavailable", workspace_id=workspace_id)
     descriptor = descriptor_obj
 
     try:
-        _run_docker(["cp", str(host_path), f"{resources.container}:{target_path}"], check=True)
-    except WorkspaceError as exc:
-        return _json_error(str(exc), workspace_id=workspace_id)
+        get_docker_backend().copy_to(resources.container, host_path, target_path)
+    except DockerError as exc:
+        if isinstance(exc, ContainerUnavailableError):
+            invalidate_workspace(workspace_id)
+        return _json_error(f"Docker command failed: {exc}", workspace_id=workspace_id)
 
     result = WorkspaceCopyResult(
         workspace=descriptor,
@@ -698,14 +1106,16 @@ def workspace_copy_from(
     resources = _workspace_resources(workspace_id)
     destination = Path(destination_path)
     destination.parent.mkdir(parents=True, exist_ok=True)
-    success, descriptor_obj, error = ensure_workspace(workspace_id)
+    success, descriptor_obj, error = _ready_workspace(workspace_id)
     if not success or descriptor_obj is None:
         return _json_error(error or f"Workspace {workspace_id} is unavailable", workspace_id=workspace_id)
     descriptor = descriptor_obj
     try:
-        _run_docker(["cp", f"{resources.container}:{source_path}", str(destination)], check=True)
-    except WorkspaceError as exc:
-        return _json_error(str(exc), workspace_id=workspace_id)
+        get_docker_backend().copy_from(resources.container, source_path, destination)
+    except DockerError as exc:
+        if isinstance(exc, ContainerUnavailableError):
+            invalidate_workspace(workspace_id)
+        return _json_error(f"Docker command failed: {exc}", workspace_id=workspace_id)
 
     bytes_transferred: int | None = None
     if destination.exists() and destination.is_file():
@@ -729,6 +1139,213 @@ def workspace_copy_from(
     return json.dumps({"success": True, "workspace_copy": result.model_dump()}, indent=2)
 
 
+def _publish_batch_copy(workspace_id: str, event: str, result: WorkspaceBatchCopyResult) -> str:
+    _publish_workspace_event(
+        workspace_id,
+        event,
+        {
+            "sources": result.sources,
+            "destination": result.destination,
+            "file_count": len(result.files),
+            "total_bytes": result.total_bytes,
+            "archive_bytes": result.archive_bytes,
+            "compressed": result.compressed,
+        },
+    )
+    return json.dumps({"success": True, "workspace_batch_copy": result.model_dump()}, indent=2)
+
+
+@tool(args_schema=WorkspaceCopyToBatchRequest)
+def workspace_copy_to_batch(
+    workspace_id: str,
+    source_paths: list[str],
+    destination_path: str = DEFAULT_WORKSPACE_MOUNT,
+    base_dir: str | None = None,
+    compress: bool = False,
+    max_bytes: int | None = None,
+) -> str:
+    """Copies many host files or glob matches into the workspace in one transfer.
+
+    All matches are packed into a single tar stream (optionally gzip-compressed)
+    and unpacked by Docker at the destination, instead of one `docker cp` per
+    path. The result lists every file copied with its size and SHA-256.
+    """
+
+    resources = _workspace_resources(workspace_id)
+    sources, unmatched = expand_host_sources(
+        source_paths, Path(base_dir).expanduser() if base_dir else None
+    )
+    if not sources:
+        return _json_error("No source paths matched", source_paths=source_paths)
+    if max_bytes is not None:
+        total = host_sources_size(sources)
+        if total > max_bytes:
+            return _json_error(
+                f"Selected files total {total} bytes, over the {max_bytes} byte limit",
+                total_bytes=total,
+            )
+
+    success, descriptor_obj, error = _ready_workspace(workspace_id)
+    if not success or descriptor_obj is None:
+        return _json_error(error or f"Workspace {workspace_id} is unavailable", workspace_id=workspace_id)
+    descriptor = descriptor_obj
+
+    destination = posixpath.normpath(posixpath.join(DEFAULT_WORKSPACE_MOUNT, destination_path))
+    with tempfile.SpooledTemporaryFile(max_size=_BATCH_SPOOL_LIMIT) as buffer:
+        # Members are rooted at "/" so Docker creates the destination as needed.
+        entries = write_archive(sources, buffer, prefix=destination, compress=compress)
+        archive_bytes = buffer.seek(0, os.SEEK_END)
+        buffer.seek(0)
+        try:
+            get_docker_backend().put_archive(resources.container, "/", buffer)
+        except DockerError as exc:
+            if isinstance(exc, ContainerUnavailableError):
+                invalidate_workspace(workspace_id)
+            return _json_error(f"Docker command failed: {exc}", workspace_id=workspace_id)
+
+    result = WorkspaceBatchCopyResult(
+        workspace=descriptor,
+        sources=source_paths,
+        unmatched=unmatched,
+        destination=destination,
+        files=entries,
+        total_bytes=sum(entry["size"] for entry in entries),
+        archive_bytes=archive_bytes,
+        compressed=compress,
+    )
+    return _publish_batch_copy(workspace_id, "copy_to_batch", result)
+
+
+_PULL_ARCHIVE_SCRIPT = r"""
+cd "$1" || exit 2
+limit=$2 compress=$3
+shift 3
+shopt -s globstar nullglob dotglob
+IFS=
+matches=()
+for pattern in "$@"; do
+    # nullglob drops unmatched globs, but a literal path expands to itself.
+    found=0
+    for path in $pattern; do
+        if [ -e "$path" ] || [ -L "$path" ]; then
+            matches+=( "$path" )
+            found=1
+        fi
+    done
+    if [ $found -eq 0 ]; then
+        printf '__QC_UNMATCHED__ %s\n' "$pattern" >&2
+    fi
+done
+if [ ${#matches[@]} -eq 0 ]; then
+    echo "No source paths matched" >&2
+    exit 3
+fi
+if [ "$limit" -gt 0 ]; then
+    total=$(find "${matches[@]}" -type f -exec stat -c %s {} + | awk '{s += $1} END {print s + 0}')
+    if [ "$total" -gt "$limit" ]; then
+        echo "Selected files total $total bytes, over the $limit byte limit" >&2
+        exit 4
+    fi
+fi
+exec tar -c${compress:+z}f - -- "${matches[@]}"
+"""
+
+
+class _ArchiveSink:
+    """Spools the tar stream from stdout and keeps stderr for diagnostics."""
+
+    def __init__(self, buffer: IO[bytes]) -> None:
+        self.buffer = buffer
+        self.archive_bytes = 0
+        self.stderr = bytearray()
+
+    def __call__(self, stream: int, chunk: bytes) -> None:
+        if stream == 1:
+            self.buffer.write(chunk)
+            self.archive_bytes += len(chunk)
+        elif len(self.stderr) < _PREAMBLE_LIMIT:
+            self.stderr += chunk[: _PREAMBLE_LIMIT - len(self.stderr)]
+
+    def messages(self) -> tuple[list[str], str]:
+        unmatched: list[str] = []
+        errors: list[str] = []
+        for line in self.stderr.decode("utf-8", errors="replace").splitlines():
+            if line.startswith("__QC_UNMATCHED__ "):
+                unmatched.append(line[len("__QC_UNMATCHED__ ") :])
+            elif line.strip():
+                errors.append(line)
+        return unmatched, "\n".join(errors)
+
+
+@tool(args_schema=WorkspaceCopyFromBatchRequest)
+def workspace_copy_from_batch(
+    workspace_id: str,
+    source_paths: list[str],
+    destination_path: str,
+    base_dir: str | None = None,
+    compress: bool = False,
+    max_bytes: int | None = None,
+) -> str:
+    """Copies many workspace files or glob matches to the host in one transfer.
+
+    Patterns are expanded inside the container (relative to `base_dir`, by
+    default the workspace root) and the matches are streamed back as a single
+    tar archive, optionally gzip-compressed. The result lists every file
+    extracted on the host with its size and SHA-256.
+    """
+
+    resources = _workspace_resources(workspace_id)
+    success, descriptor_obj, error = _ready_workspace(workspace_id)
+    if not success or descriptor_obj is None:
+        return _json_error(error or f"Workspace {workspace_id} is unavailable", workspace_id=workspace_id)
+    descriptor = descriptor_obj
+
+    source_root = posixpath.join(DEFAULT_WORKSPACE_MOUNT, base_dir or "")
+    destination = Path(destination_path).expanduser()
+    command = [
+        "bash",
+        "-c",
+        _PULL_ARCHIVE_SCRIPT,
+        "bash",
+        source_root,
+        str(max_bytes or 0),
+        "1" if compress else "",
+        *source_paths,
+    ]
+    with tempfile.SpooledTemporaryFile(max_size=_BATCH_SPOOL_LIMIT) as buffer:
+        sink = _ArchiveSink(buffer)
+        try:
+            exec_result = get_docker_backend().exec(resources.container, command, on_output=sink)
+        except DockerError as exc:
+            if isinstance(exc, ContainerUnavailableError):
+                invalidate_workspace(workspace_id)
+            return _json_error(f"Docker command failed: {exc}", workspace_id=workspace_id)
+        unmatched, message = sink.messages()
+        if exec_result.returncode != 0:
+            return _json_error(
+                message or f"Archive command exited with code {exec_result.returncode}",
+                workspace_id=workspace_id,
+                unmatched=unmatched,
+            )
+        buffer.seek(0)
+        try:
+            entries = extract_archive(buffer, destination, max_bytes=max_bytes)
+        except (ArchiveLimitError, tarfile.TarError) as exc:
+            return _json_error(f"Unable to extract archive: {exc}", workspace_id=workspace_id)
+
+    result = WorkspaceBatchCopyResult(
+        workspace=descriptor,
+        sources=source_paths,
+        unmatched=unmatched,
+        destination=str(destination),
+        files=entries,
+        total_bytes=sum(entry["size"] for entry in entries),
+        archive_bytes=sink.archive_bytes,
+        compressed=compress,
+    )
+    return _publish_batch_copy(workspace_id, "copy_from_batch", result)
+
+
 @tool(args_schema=WorkspaceDestroyRequest)
 def workspace_destroy(
     workspace_id: str,
@@ -742,23 +1359,26 @@ def workspace_destroy(
     """
 
     resources = _workspace_resources(workspace_id)
+    invalidate_workspace(workspace_id)
     container_removed = False
     volume_removed = False
     errors: list[str] = []
 
+    docker = get_docker_backend()
+
     if _container_exists(resources.container):
-        result = _run_docker(["container", "rm", "-f", resources.container])
-        if result.returncode == 0:
+        try:
+            docker.remove_container(resources.container, force=True)
             container_removed = True
-        else:
-            errors.append(result.stderr.strip() or f"Failed to remove container {resources.container}")
+        except DockerError as exc:
+            errors.append(str(exc) or f"Failed to remove container {resources.container}")
 
     if delete_volume and _volume_exists(resources.volume):
-        result = _run_docker(["volume", "rm", resources.volume])
-        if result.returncode == 0:
+        try:
+            docker.remove_volume(resources.volume)
             volume_removed = True
-        else:
-            errors.append(result.stderr.strip() or f"Failed to remove volume {resources.volume}")
+        except DockerError as exc:
+            errors.append(str(exc) or f"Failed to remove volume {resources.volume}")
 
     payload = {
         "success": not errors,
@@ -832,6 +1452,116 @@ def workspace_info(
     return json.dumps(info, indent=2)
 
 
+_FILE_MANIFEST_SCRIPT = r"""
+root=$1
+tmp=$(mktemp -d)
+trap 'rm -rf "$tmp"' EXIT
+status=0
+find "$root" -type f -print0 > "$tmp/files" || status=$?
+xargs -0 -r stat -c 'S %s %Y %n' < "$tmp/files" || status=$?
+# Each batch appends to its own file; PIDs can repeat across batches.
+xargs -0 -r -n 64 -P "$(nproc 2>/dev/null || echo 2)" \
+    sh -c 'sha256sum "$@" >> "$0/sums.$$"' "$tmp" < "$tmp/files" || status=$?
+for sums in "$tmp"/sums.*; do
+    [ -f "$sums" ] && sed 's/^/H /' "$sums"
+done
+exit "$status"
+"""
+
+
+def _unescape_checksum_name(name: str) -> str:
+    # sha256sum escapes backslashes and newlines in names, flagging the line with "\".
+    return re.sub(r"\\(.)", lambda match: "\n" if match.group(1) == "n" else match.group(1), name)
+
+
+class _FileManifestParser:
+    """Joins the streamed ``S`` (stat) and ``H`` (hash) lines of a manifest listing."""
+
+    def __init__(self) -> None:
+        self.stats: dict[str, tuple[int, int]] = {}
+        self.digests: dict[str, str] = {}
+        self.stderr = bytearray()
+        self._pending = b""
+
+    def __call__(self, stream: int, chunk: bytes) -> None:
+        if stream != 1:
+            if len(self.stderr) < _PREAMBLE_LIMIT:
+                self.stderr += chunk[: _PREAMBLE_LIMIT - len(self.stderr)]
+            return
+        lines = (self._pending + chunk).split(b"\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._parse(line.decode("utf-8", errors="surrogateescape"))
+
+    def _parse(self, line: str) -> None:
+        kind, _, rest = line.partition(" ")
+        if kind == "S":
+            parts = rest.split(" ", 2)
+            if len(parts) == 3:
+                try:
+                    self.stats[parts[2]] = (int(parts[0]), int(parts[1]))
+                except ValueError:
+                    pass
+        elif kind == "H":
+            escaped = rest.startswith("\\")
+            digest, _, name = rest.lstrip("\\").partition("  ")
+            if name:
+                self.digests[_unescape_checksum_name(name) if escaped else name] = digest
+
+    def entries(self) -> list[dict[str, Any]]:
+        if self._pending:
+            self._parse(self._pending.decode("utf-8", errors="surrogateescape"))
+            self._pending = b""
+        entries = []
+        for path, (size, mtime) in self.stats.items():
+            digest = self.digests.get(path)
+            if digest is None:
+                continue  # unreadable, or removed while listing
+            entries.append({"path": path, "size": size, "mtime": mtime, "sha256": digest})
+        entries.sort(key=lambda entry: entry["path"])
+        return entries
+
+
+def scan_workspace_files(
+    workspace_id: str,
+    root: str = DEFAULT_WORKSPACE_MOUNT,
+    timeout: float | None = None,
+) -> tuple[bool, list[dict[str, Any]], str | None]:
+    """Lists every regular file under ``root`` with its size, mtime and SHA-256.
+
+    The listing is produced by a single exec inside the workspace container:
+    files are stat-ed in bulk and hashed in parallel batches there, so binary
+    files are hashed byte for byte and their contents never leave the
+    container. Output is streamed and parsed line by line instead of going
+    through the bounded capture of `workspace_exec`, so large workspaces are
+    listed completely.
+
+    Returns:
+        A tuple of (success, entries, error_message), where each entry holds
+        ``path`` (absolute), ``size``, ``mtime`` (epoch seconds) and ``sha256``.
+    """
+    resources = _workspace_resources(workspace_id)
+    success, _, error = _ready_workspace(workspace_id)
+    if not success:
+        return False, [], error or f"Workspace {workspace_id} is unavailable"
+    parser = _FileManifestParser()
+    try:
+        result = get_docker_backend().exec(
+            resources.container,
+            ["sh", "-c", _FILE_MANIFEST_SCRIPT, "sh", root],
+            timeout=timeout,
+            on_output=parser,
+        )
+    except DockerError as exc:
+        if isinstance(exc, ContainerUnavailableError):
+            invalidate_workspace(workspace_id)
+        return False, [], f"Docker command failed: {exc}"
+    if result.returncode != 0:
+        message = parser.stderr.decode("utf-8", errors="replace").strip()
+        return False, [], message or f"file listing exited with code {result.returncode}"
+    return True, parser.entries(), None
+
+
 def _estimate_volume_usage(volume: str) -> int | None:
     """Calculates the disk usage of a Docker volume in bytes.
 
@@ -839,20 +1569,17 @@ def _estimate_volume_usage(volume: str) -> int | None:
     volume mounted. It then executes the `du -sb` command within that container to
     get a precise byte count of the volume's contents.
     """
-    temp_container_name = f"qc-ws-usage-{uuid.uuid4().hex[:8]}"
-    command = [
-        "run",
-        "--rm",
-        "--name",
-        temp_container_name,
-        "--mount",
-        f"type=volume,source={volume},target=/workspace",
-        "alpine",
-        "du",
-        "-sb",
-        "/workspace",
-    ]
-    result = _run_docker(command)
+    spec = ContainerSpec(
+        image="alpine",
+        command=["du", "-sb", "/workspace"],
+        name=f"qc-ws-usage-{uuid.uuid4().hex[:8]}",
+        volume=volume,
+        mount_target="/workspace",
+    )
+    try:
+        result = get_docker_backend().run_once(spec)
+    except DockerError:
+        return None
     if result.returncode != 0:
         return None
     stdout = result.stdout.strip()
@@ -870,5 +1597,7 @@ workspace_create.name = "workspace_create"
 workspace_exec.name = "workspace_exec"
 workspace_copy_to.name = "workspace_copy_to"
 workspace_copy_from.name = "workspace_copy_from"
+workspace_copy_to_batch.name = "workspace_copy_to_batch"
+workspace_copy_from_batch.name = "workspace_copy_from_batch"
 workspace_destroy.name = "workspace_destroy"
 workspace_info.name = "workspace_info"
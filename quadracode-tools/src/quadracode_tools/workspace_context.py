@@ -0,0 +1,86 @@
+"""Per-invocation binding of the active workspace descriptor.
+
+The runtime processes several conversation threads in one process, so the
+workspace a tool should operate on cannot live in process-global state such as
+``os.environ``. Instead the runtime binds the descriptor of the thread being
+processed to a :class:`contextvars.ContextVar` (inherited by asyncio tasks and
+by the executor threads LangGraph uses for sync tools) and also places it in
+the LangGraph ``configurable`` mapping under ``"workspace"``. Tools call
+:func:`get_active_workspace_descriptor` to resolve the workspace of their own
+thread.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Iterator
+
+WORKSPACE_CONFIG_KEY = "workspace"
+
+_ACTIVE_WORKSPACE: ContextVar[dict[str, Any] | None] = ContextVar(
+    "quadracode_active_workspace", default=None
+)
+
+
+def bind_active_workspace(descriptor: dict[str, Any] | None) -> Token:
+    """Binds ``descriptor`` as the active workspace for the current context.
+
+    Returns:
+        A token that can be passed to :func:`reset_active_workspace`.
+    """
+    return _ACTIVE_WORKSPACE.set(dict(descriptor) if descriptor else None)
+
+
+def reset_active_workspace(token: Token) -> None:
+    """Restores the binding that was active before :func:`bind_active_workspace`."""
+    _ACTIVE_WORKSPACE.reset(token)
+
+
+@contextmanager
+def active_workspace(descriptor: dict[str, Any] | None) -> Iterator[None]:
+    """Context manager that binds ``descriptor`` for the duration of the block."""
+    token = bind_active_workspace(descriptor)
+    try:
+        yield
+    finally:
+        reset_active_workspace(token)
+
+
+def _descriptor_from_runnable_config() -> dict[str, Any] | None:
+    try:
+        from langchain_core.runnables.config import var_child_runnable_config
+    except Exception:  # pragma: no cover - langchain_core is a hard dependency
+        return None
+    config = var_child_runnable_config.get()
+    if not isinstance(config, dict):
+        return None
+    configurable = config.get("configurable")
+    if not isinstance(configurable, dict):
+        return None
+    descriptor = configurable.get(WORKSPACE_CONFIG_KEY)
+    return descriptor if isinstance(descriptor, dict) else None
+
+
+def get_active_workspace_descriptor() -> dict[str, Any] | None:
+    """Returns the workspace descriptor bound to the calling thread, if any.
+
+    The context variable set by the runtime takes precedence; otherwise the
+    ``workspace`` entry of the LangGraph ``configurable`` mapping for the
+    current run is used.
+    """
+    descriptor = _ACTIVE_WORKSPACE.get()
+    if descriptor:
+        return dict(descriptor)
+    descriptor = _descriptor_from_runnable_config()
+    if descriptor:
+        return dict(descriptor)
+    return None
+
+
+__all__ = [
+    "WORKSPACE_CONFIG_KEY",
+    "active_workspace",
+    "bind_active_workspace",
+    "get_active_workspace_descriptor",
+    "reset_active_workspace",
+]
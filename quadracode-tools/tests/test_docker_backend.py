@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import io
+import json
+import struct
+import tarfile
+from pathlib import Path
+
+import httpx
+import pytest
+
+from quadracode_tools.client.docker_backend import (
+    CLIDockerBackend,
+    ContainerSpec,
+    ContainerUnavailableError,
+    DockerTimeoutError,
+    EngineAPIDockerBackend,
+    FakeDockerBackend,
+    create_docker_backend,
+    demux_stream,
+)
+
+
+def _frame(stream: int, payload: bytes) -> bytes:
+    return bytes([stream, 0, 0, 0]) + struct.pack(">I", len(payload)) + payload
+
+
+def test_demux_stream_handles_frames_split_across_chunks() -> None:
+    raw = _frame(1, b"hello ") + _frame(2, b"oops") + _frame(1, b"world")
+    chunks = [raw[:3], raw[3:11], raw[11:]]
+
+    frames = list(demux_stream(chunks))
+
+    assert frames == [(1, b"hello "), (2, b"oops"), (1, b"world")]
+
+
+def test_engine_api_exec_streams_output_and_reads_exit_code() -> None:
+    requests: list[tuple[str, str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append((request.method, request.url.path))
+        if request.url.path.endswith("/containers/ws-ctr/exec"):
+            body = json.loads(request.content)
+            assert body["WorkingDir"] == "/workspace"
+            assert body["Env"] == ["A=1"]
+            return httpx.Response(201, json={"Id": "e1"})
+        if request.url.path.endswith("/exec/e1/start"):
+            return httpx.Response(200, content=_frame(1, b"out\n") + _frame(2, b"err\n"))
+        if request.url.path.endswith("/exec/e1/json"):
+            return httpx.Response(200, json={"ExitCode": 3})
+        return httpx.Response(404, json={"message": "not found"})
+
+    backend = EngineAPIDockerBackend("/unused.sock", transport=httpx.MockTransport(handler))
+    result = backend.exec("ws-ctr", ["ls"], workdir="/workspace", environment={"A": "1"})
+
+    assert (result.returncode, result.stdout, result.stderr) == (3, "out\n", "err\n")
+    assert all(path.startswith("/v1.41/") for _, path in requests)
+
+
+def test_engine_api_exec_reports_missing_container() -> None:
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(409, json={"message": "container ws-ctr is not running"})
+    )
+    backend = EngineAPIDockerBackend("/unused.sock", transport=transport)
+
+    with pytest.raises(ContainerUnavailableError, match="is not running"):
+        backend.exec("ws-ctr", ["ls"])
+
+
+def test_engine_api_exec_stops_the_command_on_timeout() -> None:
+    created: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/containers/ws-ctr/exec"):
+            created.append(json.loads(request.content))
+            return httpx.Response(201, json={"Id": f"e{len(created)}"})
+        if request.url.path.endswith("/exec/e1/start"):
+            raise httpx.ReadTimeout("timed out", request=request)
+        if request.url.path.endswith("/exec/e2/start"):
+            return httpx.Response(200, content=b"")
+        if request.url.path.endswith("/exec/e2/json"):
+            return httpx.Response(200, json={"ExitCode": 0})
+        return httpx.Response(404, json={"message": "not found"})
+
+    backend = EngineAPIDockerBackend("/unused.sock", transport=httpx.MockTransport(handler))
+    with pytest.raises(DockerTimeoutError):
+        backend.exec("ws-ctr", ["sleep", "600"], environment={"A": "1"}, timeout=1)
+
+    command, kill = created
+    token = next(item for item in command["Env"] if item.startswith("QUADRACODE_EXEC_TOKEN="))
+    assert "A=1" in command["Env"]
+    assert kill["Cmd"][:2] == ["sh", "-c"]
+    assert kill["Cmd"][-1] == token.split("=", 1)[1]
+    assert "Env" not in kill
+
+
+def test_fake_backend_copies_follow_docker_cp_semantics(tmp_path: Path) -> None:
+    docker = FakeDockerBackend()
+    docker.run_container(
+        ContainerSpec(image="img", command=["sleep"], name="c", volume="v", mount_target="/workspace")
+    )
+    source = tmp_path / "src"
+    (source / "pkg").mkdir(parents=True)
+    (source / "pkg" / "mod.py").write_text("x = 1\n")
+    (source / "README").write_text("hi")
+
+    docker.copy_to("c", source, "/workspace")
+    assert set(docker.volumes["v"]) == {"src/pkg/mod.py", "src/README"}
+
+    docker.copy_from("c", "/workspace/src", tmp_path / "out")
+    assert (tmp_path / "out" / "pkg" / "mod.py").read_text() == "x = 1\n"
+    docker.copy_from("c", "/workspace/src/README", tmp_path / "out")
+    assert (tmp_path / "out" / "README").read_text() == "hi"
+
+
+def test_fake_backend_volume_export_round_trips() -> None:
+    docker = FakeDockerBackend()
+    docker.volumes["v"] = {"a.txt": b"A", "dir/b.txt": b"B"}
+
+    archive = io.BytesIO()
+    docker.export_volume("v", archive, image="alpine")
+    archive.seek(0)
+    with tarfile.open(fileobj=archive, mode="r:gz") as tar:
+        assert sorted(tar.getnames()) == ["./a.txt", "./dir/b.txt"]
+
+    archive.seek(0)
+    docker.volumes["v"] = {"stale": b"x"}
+    docker.import_volume("v", archive, image="alpine")
+    assert docker.volumes["v"] == {"a.txt": b"A", "dir/b.txt": b"B"}
+
+
+def test_backend_selection_falls_back_to_cli_without_socket(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setenv("QUADRACODE_DOCKER_SOCKET", str(tmp_path / "missing.sock"))
+
+    assert isinstance(create_docker_backend("auto"), CLIDockerBackend)
+    assert isinstance(create_docker_backend("api"), CLIDockerBackend)
+    assert isinstance(create_docker_backend("fake"), FakeDockerBackend)
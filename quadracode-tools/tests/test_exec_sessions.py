@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import subprocess
+import time
+from collections.abc import Sequence
+
+import pytest
+
+from quadracode_tools.client.docker_backend import (
+    CLIDockerBackend,
+    EngineAPIDockerBackend,
+    FakeDockerBackend,
+)
+from quadracode_tools.exec_sessions import (
+    ExecSessionError,
+    ExecSessionPool,
+    SessionTimeoutError,
+    ShellSession,
+    _Framer,
+    backend_session_spawner,
+)
+
+
+def _local_spawner(container: str, argv: Sequence[str]) -> subprocess.Popen[bytes]:
+    return subprocess.Popen(
+        list(argv),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=0,
+    )
+
+
+class _Collector:
+    def __init__(self) -> None:
+        self.streams: dict[int, bytearray] = {1: bytearray(), 2: bytearray()}
+
+    def __call__(self, stream: int, chunk: bytes) -> None:
+        self.streams[stream] += chunk
+
+    def text(self, stream: int) -> str:
+        return self.streams[stream].decode()
+
+
+@pytest.fixture
+def pool():
+    sessions = ExecSessionPool(_local_spawner, max_sessions=2)
+    yield sessions
+    sessions.close()
+
+
+def test_framer_finds_sentinel_split_across_chunks() -> None:
+    received = bytearray()
+    framer = _Framer(b"__END__", received.extend)
+    for chunk in (b"out", b"put__E", b"N", b"D__ 0 /w", b"\n"):
+        framer.feed(chunk)
+    assert bytes(received) == b"output"
+    assert framer.complete and framer.trailer == b" 0 /w\n"
+
+
+def test_session_keeps_shell_state_between_commands(pool, tmp_path) -> None:
+    first = _Collector()
+    run = pool.run("ctr", "main", f"cd {tmp_path} && export GREETING=hi; echo err >&2", on_output=first)
+    assert run.started_session and run.returncode == 0
+    assert first.text(2) == "err\n"
+
+    second = _Collector()
+    run = pool.run("ctr", "main", "echo $GREETING $SCOPED; printf tail", on_output=second,
+                   environment={"SCOPED": "once"})
+    assert not run.started_session and run.cwd == str(tmp_path)
+    assert second.text(1) == "hi once\ntail"
+
+    third = _Collector()
+    pool.run("ctr", "main", "echo \"[$SCOPED]\"; echo 'unterminated", on_output=third)
+    assert third.text(1) == ""  # a syntax error fails the command, not the session
+    assert pool.run("ctr", "main", "echo \"[$SCOPED]\"", on_output=third).returncode == 0
+    assert third.text(1) == "[]\n"
+
+
+def test_timeout_kills_command_and_recycles_session(pool) -> None:
+    started = time.monotonic()
+    with pytest.raises(SessionTimeoutError):
+        pool.run("ctr", "main", "sleep 30 | cat", on_output=_Collector(), timeout=0.5)
+    assert time.monotonic() - started < 10
+    assert len(pool) == 0
+
+    run = pool.run("ctr", "main", "true", on_output=_Collector())
+    assert run.started_session and run.returncode == 0
+
+
+def test_exit_closes_session_and_pool_evicts_least_recently_used(pool) -> None:
+    run = pool.run("ctr", "main", "exit 7", on_output=_Collector())
+    assert run.returncode == 7 and run.session_closed and len(pool) == 0
+
+    for name in ("a", "b", "c"):
+        pool.run("ctr", name, "true", on_output=_Collector())
+    assert len(pool) == 2
+    assert not pool.run("ctr", "c", "true", on_output=_Collector()).started_session
+    assert pool.run("ctr", "a", "true", on_output=_Collector()).started_session
+
+
+def test_evicted_sessions_are_closed_outside_the_pool_lock(pool, monkeypatch) -> None:
+    for name in ("a", "b"):
+        pool.run("ctr", name, "true", on_output=_Collector())
+    lock_held: list[bool] = []
+    original_close = ShellSession.close
+
+    def _close(self: ShellSession) -> None:
+        lock_held.append(pool._lock.locked())
+        original_close(self)
+
+    monkeypatch.setattr(ShellSession, "close", _close)
+    pool.run("ctr", "c", "true", on_output=_Collector())
+
+    assert lock_held == [False]
+    assert len(pool) == 2
+
+
+def test_pool_picks_its_spawner_from_the_backend(monkeypatch) -> None:
+    pool = ExecSessionPool()
+    collector = _Collector()
+    try:
+        pool.run(
+            "box",
+            "main",
+            "echo hi",
+            on_output=collector,
+            backend=FakeDockerBackend(session_spawner=_local_spawner),
+        )
+        assert collector.text(1) == "hi\n"
+        with pytest.raises(ExecSessionError, match="FakeDockerBackend"):
+            pool.run("box", "other", "true", on_output=collector, backend=FakeDockerBackend())
+    finally:
+        pool.close()
+
+    assert backend_session_spawner(CLIDockerBackend("/opt/docker")).keywords == {"docker_bin": "/opt/docker"}
+    engine = EngineAPIDockerBackend("/run/alt.sock")
+    try:
+        monkeypatch.setattr("shutil.which", lambda _name: None)
+        assert backend_session_spawner(engine) is None
+        monkeypatch.setattr("shutil.which", lambda _name: "/usr/bin/docker")
+        assert backend_session_spawner(engine).keywords == {
+            "docker_bin": "/usr/bin/docker",
+            "host": "unix:///run/alt.sock",
+        }
+    finally:
+        engine.close()
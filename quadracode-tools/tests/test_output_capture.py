@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import io
+import sys
+
+from quadracode_tools.output_capture import BoundedOutput, stream_process
+
+
+def test_bounded_output_keeps_head_and_tail_of_long_stream() -> None:
+    sink = io.BytesIO()
+    capture = BoundedOutput(head_bytes=5, tail_bytes=5, sink=sink)
+    for index in range(1000):
+        capture.write(f"{index:04d}\n".encode())
+
+    assert capture.total_bytes == 5000
+    assert capture.truncated
+    assert capture.render() == "0000\n\n[... truncated 4990 bytes ...]\n0999\n"
+    assert len(sink.getvalue()) == 5000
+
+
+def test_bounded_output_renders_short_stream_verbatim() -> None:
+    capture = BoundedOutput(head_bytes=5, tail_bytes=10)
+    capture.write(b"hello world")
+
+    assert not capture.truncated
+    assert capture.render() == "hello world"
+    assert capture.render(total_bytes=100) == "hello\n[... truncated 89 bytes ...]\n world"
+
+
+def test_stream_process_feeds_both_pipes() -> None:
+    stdout = BoundedOutput(head_bytes=10, tail_bytes=10)
+    stderr = BoundedOutput()
+    script = "import sys; sys.stdout.write('x' * 100000); sys.stderr.write('done'); sys.exit(4)"
+
+    returncode = stream_process(
+        [sys.executable, "-c", script], on_stdout=stdout.write, on_stderr=stderr.write
+    )
+
+    assert returncode == 4
+    assert stdout.total_bytes == 100000
+    assert stderr.render() == "done"
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import sys
+import time
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 from quadracode_tools.tools.test_suite import (
     DiscoveredTestCommand,
+    aexecute_full_test_suite,
     discover_test_commands,
     execute_full_test_suite,
+    run_full_test_suite,
 )
 
 
@@ -59,3 +64,47 @@ def test_execute_full_test_suite_spawns_debugger_on_failure(
     mock_spawn.assert_called_once()
     assert "remediation" in result
     assert result["remediation"]["agent_id"] == "debugger-abc"
+
+
+@patch("quadracode_tools.tools.test_suite.discover_test_commands")
+def test_async_suite_kills_command_on_timeout_without_blocking_loop(
+    mock_discover: MagicMock,
+    tmp_path: Path,
+) -> None:
+    script = "import time; print('started', flush=True); time.sleep(30)"
+    mock_discover.return_value = [
+        DiscoveredTestCommand(command=(sys.executable, "-c", script), cwd=tmp_path, description="slow")
+    ]
+    ticks = 0
+
+    async def _heartbeat() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.05)
+
+    async def _main() -> dict:
+        heartbeat = asyncio.create_task(_heartbeat())
+        try:
+            return await aexecute_full_test_suite(workspace_root=str(tmp_path), timeout_seconds=1)
+        finally:
+            heartbeat.cancel()
+
+    with patch("quadracode_tools.tools.test_suite._spawn_debugger_agent", return_value={}):
+        start = time.perf_counter()
+        result = asyncio.run(_main())
+
+    assert time.perf_counter() - start < 10
+    assert ticks >= 5
+    command = result["commands"][0]
+    assert command["status"] == "failed"
+    assert command["stdout"].startswith("started")
+    assert command["stdout"].endswith("[quadracode] command timed out")
+
+
+@patch("quadracode_tools.tools.test_suite.discover_test_commands", return_value=[])
+def test_run_full_test_suite_is_awaitable(mock_discover: MagicMock, tmp_path: Path) -> None:
+    payload = json.loads(asyncio.run(run_full_test_suite.ainvoke({"workspace_root": str(tmp_path)})))
+
+    assert payload["overall_status"] == "skipped"
+    assert payload["remediation"]["action"] == "noop"
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import asyncio
+
+from langchain_core.runnables import RunnableLambda
+
+from quadracode_tools.tools.test_suite import _active_workspace_descriptor
+from quadracode_tools.workspace_context import (
+    active_workspace,
+    bind_active_workspace,
+    get_active_workspace_descriptor,
+    reset_active_workspace,
+)
+
+
+def test_binding_is_scoped_and_restored() -> None:
+    assert get_active_workspace_descriptor() is None
+    with active_workspace({"workspace_id": "ws-a"}):
+        assert _active_workspace_descriptor() == {"workspace_id": "ws-a"}
+    assert get_active_workspace_descriptor() is None
+
+
+def test_concurrent_tasks_resolve_their_own_workspace() -> None:
+    async def _worker(workspace_id: str) -> str | None:
+        token = bind_active_workspace({"workspace_id": workspace_id})
+        try:
+            await asyncio.sleep(0.01)
+            # Sync tools run in executor threads; the binding must follow them.
+            descriptor = await asyncio.to_thread(get_active_workspace_descriptor)
+        finally:
+            reset_active_workspace(token)
+        return descriptor["workspace_id"] if descriptor else None
+
+    async def _main() -> list[str | None]:
+        return await asyncio.gather(*(_worker(f"ws-{index}") for index in range(5)))
+
+    assert asyncio.run(_main()) == [f"ws-{index}" for index in range(5)]
+
+
+def test_falls_back_to_langgraph_configurable() -> None:
+    probe = RunnableLambda(lambda _: get_active_workspace_descriptor())
+
+    descriptor = probe.invoke(
+        None, config={"configurable": {"workspace": {"workspace_id": "ws-config"}}}
+    )
+
+    assert descriptor == {"workspace_id": "ws-config"}
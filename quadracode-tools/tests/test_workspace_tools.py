@@ -1,9 +1,21 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
+import subprocess
+import threading
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
-from quadracode_tools.tools.workspace import ensure_workspace, workspace_create
+import pytest
+
+from quadracode_contracts import WorkspaceDescriptor
+
+from quadracode_tools.client.docker_backend import DockerError, ExecResult, FakeDockerBackend
+from quadracode_tools.exec_sessions import ExecSessionPool
+from quadracode_tools.tools import workspace as workspace_module
+from quadracode_tools.tools.workspace import ensure_workspace, workspace_create, workspace_exec
 
 @patch("quadracode_tools.tools.workspace._publish_workspace_event")
 @patch("quadracode_tools.tools.workspace._workspace_descriptor")
@@ -28,9 +40,9 @@ def test_ensure_workspace_creates_new_environment(
     fake_descriptor = MagicMock()
     mock_workspace_descriptor.return_value = fake_descriptor
 
-    with patch("quadracode_tools.tools.workspace._run_docker") as mock_run_docker:
-        mock_run_docker.return_value = MagicMock(returncode=0, stdout="")
+    with patch("quadracode_tools.tools.workspace.get_docker_backend") as mock_backend:
         success, result_descriptor, error = ensure_workspace("chat-123")
+        mock_backend.return_value.create_volume.assert_called_once_with("qc-ws-chat-123")
 
     assert success
     assert error is None
@@ -83,11 +95,9 @@ def test_ensure_workspace_handles_existing_stopped_container(
     fake_descriptor = MagicMock()
     mock_workspace_descriptor.return_value = fake_descriptor
 
-    with patch("quadracode_tools.tools.workspace._run_docker") as mock_run_docker:
-        mock_run_docker.side_effect = [
-            MagicMock(returncode=0, stdout=""),
-        ]
+    with patch("quadracode_tools.tools.workspace.get_docker_backend") as mock_backend:
         success, descriptor, error = ensure_workspace("chat-existing")
+        mock_backend.return_value.start_container.assert_called_once()
 
     assert success
     assert error is None
@@ -119,15 +129,354 @@ def test_ensure_workspace_returns_error_when_docker_fails(
     mock_container_running.return_value = False
     mock_workspace_descriptor.return_value = MagicMock()
 
-    failure_process = MagicMock()
-    failure_process.returncode = 1
-    failure_process.stderr = "boom"
-
-    with patch("quadracode_tools.tools.workspace._run_docker") as mock_run_docker:
-        mock_run_docker.side_effect = [failure_process]
+    with patch("quadracode_tools.tools.workspace.get_docker_backend") as mock_backend:
+        mock_backend.return_value.create_volume.side_effect = DockerError("boom")
         success, descriptor, error = ensure_workspace("chat-fail")
 
     assert not success
     assert descriptor is None
     assert error is not None
     mock_publish_event.assert_not_called()
+
+
+def _ready_descriptor(workspace_id: str) -> WorkspaceDescriptor:
+    resources = workspace_module._workspace_resources(workspace_id)
+    return WorkspaceDescriptor(
+        workspace_id=workspace_id,
+        volume=resources.volume,
+        container=resources.container,
+        mount_path="/workspace",
+        image="quadracode-workspace:latest",
+        created_at="2024-01-01T00:00:00+00:00",
+    )
+
+
+@patch("quadracode_tools.tools.workspace._publish_workspace_event")
+def test_workspace_exec_uses_cached_readiness_and_one_docker_call(
+    mock_publish_event: MagicMock,
+) -> None:
+    workspace_module.invalidate_workspace("chat-fast")
+    docker = FakeDockerBackend(exec_handler=lambda *_: ExecResult(0, "__QC_RESULT__ 3 0\nok\n", ""))
+    with patch("quadracode_tools.tools.workspace.get_docker_backend", return_value=docker):
+        assert ensure_workspace("chat-fast")[0]
+        docker.calls.clear()
+        first = json.loads(workspace_exec.invoke({"workspace_id": "chat-fast", "command": "ls"}))
+        second = json.loads(workspace_exec.invoke({"workspace_id": "chat-fast", "command": "pwd"}))
+
+    assert first["success"] and second["success"]
+    assert [call[0] for call in docker.calls] == ["exec", "exec"]
+    assert "pwd" in docker.calls[-1][2][-1]
+    command = second["workspace_command"]
+    assert command["stdout"] == "ok\n"
+    assert command["log_bundle_path"].startswith("/workspace/logs/exec-")
+    workspace_module.invalidate_workspace("chat-fast")
+
+
+@patch("quadracode_tools.tools.workspace._publish_workspace_event")
+def test_workspace_exec_revalidates_when_container_disappears(
+    mock_publish_event: MagicMock,
+) -> None:
+    workspace_module.invalidate_workspace("chat-gone")
+    docker = FakeDockerBackend(
+        exec_handler=lambda *_: ExecResult(0, "__QC_RAW__\n", "late\n")
+    )
+    with patch("quadracode_tools.tools.workspace.get_docker_backend", return_value=docker):
+        assert ensure_workspace("chat-gone")[0]
+        docker.stop_container("qc-ws-chat-gone-ctr")
+        payload = json.loads(workspace_exec.invoke({"workspace_id": "chat-gone", "command": "true"}))
+
+    assert ("start_container", "qc-ws-chat-gone-ctr") in docker.calls
+    command = payload["workspace_command"]
+    assert command["stderr"] == "late\n"
+    assert command["stdout_log_path"] is None
+    workspace_module.invalidate_workspace("chat-gone")
+
+
+@patch("quadracode_tools.tools.workspace._publish_workspace_event")
+def test_workspace_exec_reports_full_sizes_of_truncated_output(
+    mock_publish_event: MagicMock,
+) -> None:
+    workspace_module.invalidate_workspace("chat-big")
+    head = "h" * workspace_module.DEFAULT_HEAD_BYTES
+    tail = "t" * workspace_module.DEFAULT_TAIL_BYTES
+    stdout = f"__QC_PROGRESS__ 10 0\n__QC_RESULT__ 1000000 2\n{head}{tail}"
+    docker = FakeDockerBackend(exec_handler=lambda *_: ExecResult(0, stdout, "e\n"))
+    with patch("quadracode_tools.tools.workspace.get_docker_backend", return_value=docker):
+        assert ensure_workspace("chat-big")[0]
+        payload = json.loads(workspace_exec.invoke({"workspace_id": "chat-big", "command": "yes"}))
+
+    command = payload["workspace_command"]
+    omitted = 1_000_000 - len(head) - len(tail)
+    assert command["stdout"] == f"{head}\n[... truncated {omitted} bytes ...]\n{tail}"
+    assert command["stdout_bytes"] == 1_000_000
+    assert command["stdout_truncated"] and not command["stderr_truncated"]
+    assert command["stderr"] == "e\n"
+    workspace_module.invalidate_workspace("chat-big")
+
+
+def test_exec_wrapper_spills_logs_and_returns_excerpts(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(workspace_module, "LOGS_DIR", str(tmp_path / "logs"))
+    monkeypatch.setattr(workspace_module, "DEFAULT_HEAD_BYTES", 4)
+    monkeypatch.setattr(workspace_module, "DEFAULT_TAIL_BYTES", 4)
+    args = workspace_module._build_exec_command("printf 0123456789; echo oops >&2; exit 3", "run")
+
+    completed = subprocess.run(args, capture_output=True)
+
+    assert completed.returncode == 3
+    assert completed.stdout == b"__QC_RESULT__ 10 5\n01236789"
+    assert completed.stderr.endswith(b"oops\n")
+    assert (tmp_path / "logs" / "run.stdout").read_text() == "0123456789"
+    assert "COMMAND STDERR\noops" in (tmp_path / "logs" / "run.log").read_text()
+
+
+@patch("quadracode_tools.tools.workspace._publish_workspace_event")
+def test_cancelled_async_exec_terminates_remote_command(
+    mock_publish_event: MagicMock,
+) -> None:
+    workspace_module.invalidate_workspace("chat-cancel")
+    release = threading.Event()
+    started = threading.Event()
+
+    def _handler(container, command, *_):
+        if command[1] == "-c":
+            release.set()
+            return ExecResult(0, "", "")
+        started.set()
+        release.wait(5)
+        return ExecResult(143, "__QC_RESULT__ 0 0\n", "")
+
+    docker = FakeDockerBackend(exec_handler=_handler)
+
+    async def _main() -> None:
+        task = asyncio.create_task(
+            workspace_exec.ainvoke({"workspace_id": "chat-cancel", "command": "sleep 600"})
+        )
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    with patch("quadracode_tools.tools.workspace.get_docker_backend", return_value=docker):
+        assert ensure_workspace("chat-cancel")[0]
+        asyncio.run(_main())
+
+    kill_calls = [call for call in docker.calls if call[0] == "exec" and call[2][1] == "-c"]
+    assert len(kill_calls) == 1
+    assert "kill -TERM" in kill_calls[0][2][-1]
+    assert ".pid" in kill_calls[0][2][-1]
+    workspace_module.invalidate_workspace("chat-cancel")
+
+
+@patch("quadracode_tools.tools.workspace._publish_workspace_event")
+def test_scan_workspace_files_hashes_every_file_in_one_exec(
+    mock_publish_event: MagicMock, tmp_path: Path
+) -> None:
+    workspace_module.invalidate_workspace("chat-scan")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "main.py").write_text("print('hi')\n", encoding="utf-8")
+    blob = bytes(range(256)) * 4
+    (tmp_path / "image name.bin").write_bytes(blob)
+
+    def _run_locally(container, command, *_):
+        completed = subprocess.run(
+            [*command[:-1], str(tmp_path)], capture_output=True, text=True
+        )
+        return ExecResult(completed.returncode, completed.stdout, completed.stderr)
+
+    docker = FakeDockerBackend(exec_handler=_run_locally)
+    with patch("quadracode_tools.tools.workspace.get_docker_backend", return_value=docker):
+        assert ensure_workspace("chat-scan")[0]
+        docker.calls.clear()
+        ok, entries, error = workspace_module.scan_workspace_files("chat-scan")
+
+    assert ok and error is None
+    assert [call[0] for call in docker.calls] == ["exec"]
+    assert [entry["path"] for entry in entries] == [
+        f"{tmp_path}/image name.bin",
+        f"{tmp_path}/src/main.py",
+    ]
+    assert entries[0]["size"] == len(blob)
+    assert entries[0]["sha256"] == hashlib.sha256(blob).hexdigest()
+    workspace_module.invalidate_workspace("chat-scan")
+
+
+@patch("quadracode_tools.tools.workspace._publish_workspace_event")
+def test_scan_workspace_files_keeps_every_batch_and_reports_failures(
+    mock_publish_event: MagicMock, tmp_path: Path
+) -> None:
+    workspace_module.invalidate_workspace("chat-scan-batches")
+    for index in range(300):
+        (tmp_path / f"f{index}.txt").write_text(f"{index}\n", encoding="utf-8")
+    target = {"root": str(tmp_path)}
+
+    def _run_locally(container, command, *_):
+        completed = subprocess.run(
+            [*command[:-1], target["root"]], capture_output=True, text=True
+        )
+        return ExecResult(completed.returncode, completed.stdout, completed.stderr)
+
+    docker = FakeDockerBackend(exec_handler=_run_locally)
+    with patch("quadracode_tools.tools.workspace.get_docker_backend", return_value=docker):
+        assert ensure_workspace("chat-scan-batches")[0]
+        ok, entries, error = workspace_module.scan_workspace_files("chat-scan-batches")
+        assert ok and error is None
+        assert len(entries) == 300
+
+        target["root"] = str(tmp_path / "missing")
+        ok, entries, error = workspace_module.scan_workspace_files("chat-scan-batches")
+
+    assert not ok and entries == []
+    assert error and "missing" in error
+    workspace_module.invalidate_workspace("chat-scan-batches")
+
+
+@patch("quadracode_tools.tools.workspace._publish_workspace_event")
+def test_copy_to_batch_streams_glob_matches_as_one_archive(
+    mock_publish_event: MagicMock, tmp_path: Path
+) -> None:
+    workspace_module.invalidate_workspace("chat-push")
+    (tmp_path / "fixtures" / "nested").mkdir(parents=True)
+    for index in range(5):
+        (tmp_path / "fixtures" / f"case{index}.txt").write_text(f"case {index}\n", encoding="utf-8")
+    (tmp_path / "fixtures" / "nested" / "deep.txt").write_text("deep\n", encoding="utf-8")
+    (tmp_path / "fixtures" / "skip.log").write_text("ignored\n", encoding="utf-8")
+
+    docker = FakeDockerBackend()
+    with patch("quadracode_tools.tools.workspace.get_docker_backend", return_value=docker):
+        assert ensure_workspace("chat-push")[0]
+        docker.calls.clear()
+        payload = json.loads(
+            workspace_module.workspace_copy_to_batch.invoke(
+                {
+                    "workspace_id": "chat-push",
+                    "source_paths": ["fixtures/**/*.txt", "missing/*.bin"],
+                    "base_dir": str(tmp_path),
+                    "destination_path": "inputs",
+                    "compress": True,
+                }
+            )
+        )
+
+    assert payload["success"]
+    assert [call[0] for call in docker.calls] == ["put_archive"]
+    copy = payload["workspace_batch_copy"]
+    assert copy["destination"] == "/workspace/inputs"
+    assert copy["unmatched"] == ["missing/*.bin"] and copy["compressed"]
+    files = docker.volumes["qc-ws-chat-push"]
+    assert files["inputs/fixtures/nested/deep.txt"] == b"deep\n"
+    assert "inputs/fixtures/skip.log" not in files
+    assert len(copy["files"]) == 6
+    deep = next(entry for entry in copy["files"] if entry["path"].endswith("deep.txt"))
+    assert deep == {
+        "path": "/workspace/inputs/fixtures/nested/deep.txt",
+        "size": 5,
+        "sha256": hashlib.sha256(b"deep\n").hexdigest(),
+    }
+    workspace_module.invalidate_workspace("chat-push")
+
+
+@patch("quadracode_tools.tools.workspace._publish_workspace_event")
+def test_copy_from_batch_pulls_matches_in_one_exec(
+    mock_publish_event: MagicMock, tmp_path: Path
+) -> None:
+    workspace_module.invalidate_workspace("chat-pull")
+    remote = tmp_path / "remote"
+    (remote / "build" / "reports").mkdir(parents=True)
+    (remote / "build" / "reports" / "junit.xml").write_text("<ok/>\n", encoding="utf-8")
+    (remote / "build" / "coverage.txt").write_text("91%\n", encoding="utf-8")
+    (remote / "src.py").write_text("pass\n", encoding="utf-8")
+
+    def _run_locally(container, command, *_):
+        args = list(command)
+        args[4] = str(remote)  # the workspace root inside the container
+        completed = subprocess.run(args, capture_output=True, text=True)
+        return ExecResult(completed.returncode, completed.stdout, completed.stderr)
+
+    docker = FakeDockerBackend(exec_handler=_run_locally)
+    request = {
+        "workspace_id": "chat-pull",
+        "source_paths": ["build/**/*.xml", "build/*.txt", "dist/*", "missing.txt"],
+        "destination_path": str(tmp_path / "out"),
+    }
+    with patch("quadracode_tools.tools.workspace.get_docker_backend", return_value=docker):
+        assert ensure_workspace("chat-pull")[0]
+        docker.calls.clear()
+        payload = json.loads(workspace_module.workspace_copy_from_batch.invoke(request))
+        refused = json.loads(
+            workspace_module.workspace_copy_from_batch.invoke({**request, "max_bytes": 4})
+        )
+
+    assert payload["success"]
+    assert [call[0] for call in docker.calls] == ["exec", "exec"]
+    copy = payload["workspace_batch_copy"]
+    assert copy["unmatched"] == ["dist/*", "missing.txt"]
+    assert (tmp_path / "out" / "build" / "reports" / "junit.xml").read_text() == "<ok/>\n"
+    assert not (tmp_path / "out" / "src.py").exists()
+    assert sorted(entry["sha256"] for entry in copy["files"]) == sorted(
+        hashlib.sha256(data).hexdigest() for data in (b"<ok/>\n", b"91%\n")
+    )
+    assert copy["total_bytes"] == 10
+    assert not refused["success"]
+    assert "over the 4 byte limit" in refused["error"]
+    workspace_module.invalidate_workspace("chat-pull")
+
+
+@patch("quadracode_tools.tools.workspace._publish_workspace_event")
+def test_workspace_exec_session_falls_back_to_backend_exec(mock_publish_event: MagicMock) -> None:
+    workspace_module.invalidate_workspace("chat-no-session")
+
+    def _handler(container, command, *_):
+        return ExecResult(0, "one-shot\n", "")
+
+    pool = ExecSessionPool()
+    docker = FakeDockerBackend(exec_handler=_handler)
+    with patch("quadracode_tools.tools.workspace.get_docker_backend", return_value=docker), patch(
+        "quadracode_tools.tools.workspace.get_exec_session_pool", return_value=pool
+    ):
+        assert ensure_workspace("chat-no-session")[0]
+        docker.calls.clear()
+        payload = json.loads(
+            workspace_exec.invoke({"workspace_id": "chat-no-session", "command": "echo hi", "session": "build"})
+        )
+
+    assert len(pool) == 0
+    assert payload["success"]
+    assert payload["workspace_command"]["stdout"] == "one-shot\n"
+    assert [call[0] for call in docker.calls if call[0] == "exec"]
+    workspace_module.invalidate_workspace("chat-no-session")
+
+
+@patch("quadracode_tools.tools.workspace._publish_workspace_event")
+def test_workspace_exec_session_reuses_one_shell(mock_publish_event: MagicMock, tmp_path: Path) -> None:
+    workspace_module.invalidate_workspace("chat-session")
+
+    def _local_shell(container, argv):
+        return subprocess.Popen(
+            list(argv), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0
+        )
+
+    pool = ExecSessionPool(_local_shell)
+    docker = FakeDockerBackend()
+    with patch("quadracode_tools.tools.workspace.get_docker_backend", return_value=docker), patch(
+        "quadracode_tools.tools.workspace.get_exec_session_pool", return_value=pool
+    ):
+        assert ensure_workspace("chat-session")[0]
+        docker.calls.clear()
+        base = {"workspace_id": "chat-session", "session": "build"}
+        first = json.loads(
+            workspace_exec.invoke({**base, "command": f"cd {tmp_path} && export STAGE=compile"})
+        )
+        second = json.loads(workspace_exec.invoke({**base, "command": "echo $STAGE; exit 3"}))
+    pool.close()
+
+    assert docker.calls == []
+    assert first["success"]
+    assert first["workspace_command"]["working_dir"] == str(tmp_path)
+    command = second["workspace_command"]
+    assert not second["success"] and command["returncode"] == 3
+    assert command["stdout"] == "compile\n" and command["session"] == "build"
+    assert command["log_bundle_path"] is None
+    workspace_module.invalidate_workspace("chat-session")
@@ -456,6 +456,11 @@ with snapshot_tab:
                 if "error" in comparison:
                     st.error(comparison["error"])
                 else:
+                    if not comparison.get("checksums_compared", True):
+                        st.info(
+                            "This snapshot predates binary-safe checksums; "
+                            "files are compared by size only."
+                        )
                     # Display comparison summary
                     col1, col2, col3, col4 = st.columns(4)
                     with col1:
@@ -487,6 +492,11 @@ with snapshot_tab:
                             for file in comparison['modified']:
                                 st.text(f"  ~ {file}")
                     
+                    if comparison['summary'].get('renamed_count', 0) > 0:
+                        with st.expander(f"↪️ Renamed Files ({comparison['summary']['renamed_count']})", expanded=True):
+                            for move in comparison['renamed']:
+                                st.text(f"  {move['from']} → {move['to']}")
+
                     # Clear comparison button
                     if st.button("❌ Clear Comparison", type="secondary"):
                         del st.session_state[f"compare_mode_{workspace_id}"]
@@ -4,7 +4,6 @@ Workspace management utilities for Quadracode UI.
 Provides functions for workspace lifecycle operations and file access.
 """
 
-import hashlib
 import json
 import logging
 import shlex
@@ -14,10 +13,12 @@ from typing import Any
 
 import redis
 import streamlit as st
+from quadracode_contracts import diff_manifests
 
 logger = logging.getLogger(__name__)
 
 from quadracode_tools.tools.workspace import (
+    scan_workspace_files,
     workspace_copy_from,
     workspace_create,
     workspace_destroy,
@@ -30,6 +31,13 @@ from quadracode_ui.config import (
     WORKSPACE_STREAM_PREFIX,
 )
 
+SNAPSHOT_HASH_SCHEME = "sha256-bytes"
+"""Checksum scheme of new snapshots: SHA-256 of each file's raw bytes.
+
+Snapshots saved without a ``hash_scheme`` hashed UTF-8-decoded text, which only
+matches for valid UTF-8 files, so checksums of different schemes are not compared.
+"""
+
 
 def invoke_workspace_tool(
     tool: Any,
@@ -473,46 +481,29 @@ def create_workspace_snapshot(workspace_id: str) -> tuple[bool, dict[str, Any] |
         A tuple of (success, snapshot_data, error_message).
     """
     try:
-        # Get all files in the workspace
-        files = list_workspace_files(workspace_id)
-        
-        # Even if no files, create snapshot with empty state (workspace may just have directories)
-        # This is valid - a workspace can have just scaffolding directories
-        
-        # Create snapshot metadata
+        # One in-container pass lists, stats and hashes every file (binary-safe).
+        success, entries, error = scan_workspace_files(workspace_id)
+        if not success:
+            return False, None, f"Failed to create snapshot: {error}"
+
+        # An empty workspace (or one with only scaffolding directories) is a valid snapshot.
         snapshot = {
             "workspace_id": workspace_id,
             "timestamp": datetime.now(UTC).isoformat(),
+            "hash_scheme": SNAPSHOT_HASH_SCHEME,
             "files": {},
             "total_files": 0,
             "total_size": 0,
         }
-        
-        # Compute checksums for each file
-        for file_path in files:
-            # Skip directories and special files
-            if file_path.endswith('/'):
-                continue
-            
-            # Get file content and metadata
-            success, content = read_workspace_file(workspace_id, file_path)
-            if not success:
-                continue  # Skip files we can't read
 
-            metadata = get_file_metadata(workspace_id, file_path)
-
-            content_bytes = content.encode("utf-8", errors="replace")
-            checksum = hashlib.sha256(content_bytes).hexdigest()
-            
-            # Store file info
-            snapshot["files"][file_path] = {
-                "checksum": checksum,
-                "size": metadata.get("size", len(content_bytes)),
-                "modified": metadata.get("modified", ""),
+        for entry in entries:
+            snapshot["files"][entry["path"]] = {
+                "checksum": entry["sha256"],
+                "size": entry["size"],
+                "modified": datetime.fromtimestamp(entry["mtime"], tz=UTC).isoformat(),
             }
-            
             snapshot["total_files"] += 1
-            snapshot["total_size"] += metadata.get("size", len(content_bytes))
+            snapshot["total_size"] += entry["size"]
         
         return True, snapshot, None
         
@@ -615,6 +606,23 @@ def delete_workspace_snapshot(client: redis.Redis, workspace_id: str, snapshot_i
         return False
 
 
+def _snapshot_manifest(files: dict[str, Any], *, checksums: bool = True) -> list[dict[str, Any]]:
+    """Converts a UI snapshot's ``files`` mapping into manifest entries.
+
+    Without ``checksums`` each entry's digest is a stand-in built from its path
+    and size: files then count as modified only when their size changed, and
+    no renames are inferred from coincidentally equal sizes.
+    """
+    return [
+        {
+            "path": path,
+            "size": info.get("size", 0),
+            "sha256": info.get("checksum", "") if checksums else f"{path}\0{info.get('size', 0)}",
+        }
+        for path, info in files.items()
+    ]
+
+
 def compare_snapshots(
     workspace_id: str,
     snapshot1: dict[str, Any] | None,
@@ -629,7 +637,11 @@ def compare_snapshots(
         snapshot2: The second snapshot (or None for current state).
     
     Returns:
-        Dictionary with comparison results.
+        Dictionary with comparison results. Files that moved without changing
+        content are listed under ``renamed`` rather than as added and deleted.
+        When the snapshots use different checksum schemes (see
+        `SNAPSHOT_HASH_SCHEME`), ``checksums_compared`` is ``False`` and files
+        are compared by size only.
     """
     # Get current state if needed
     if snapshot1 is None:
@@ -644,33 +656,36 @@ def compare_snapshots(
             return {"error": error}
         snapshot2 = current
     
-    # Compare files
-    files1 = set(snapshot1.get("files", {}).keys())
-    files2 = set(snapshot2.get("files", {}).keys())
-    
-    added = files2 - files1
-    deleted = files1 - files2
-    common = files1 & files2
-    
-    modified = []
-    for file_path in common:
-        checksum1 = snapshot1["files"][file_path].get("checksum")
-        checksum2 = snapshot2["files"][file_path].get("checksum")
-        if checksum1 != checksum2:
-            modified.append(file_path)
-    
+    files1 = snapshot1.get("files", {})
+    files2 = snapshot2.get("files", {})
+    checksums = snapshot1.get("hash_scheme") == snapshot2.get("hash_scheme")
+    diff = diff_manifests(
+        _snapshot_manifest(files1, checksums=checksums),
+        _snapshot_manifest(files2, checksums=checksums),
+    )
+    modified = [change.path for change in diff.modified]
+    changed_in_place = set(modified)
+    unchanged = [path for path in files2 if path in files1 and path not in changed_in_place]
+    summary = diff.summary()
+
     return {
-        "added": sorted(list(added)),
-        "deleted": sorted(list(deleted)),
-        "modified": sorted(modified),
-        "unchanged": sorted(list(common - set(modified))),
+        "added": [change.path for change in diff.added],
+        "deleted": [change.path for change in diff.removed],
+        "modified": modified,
+        "renamed": [
+            {"from": change.previous_path, "to": change.path} for change in diff.renamed
+        ],
+        "unchanged": sorted(unchanged),
+        "checksums_compared": checksums,
         "summary": {
-            "added_count": len(added),
-            "deleted_count": len(deleted),
-            "modified_count": len(modified),
-            "unchanged_count": len(common) - len(modified),
+            "added_count": summary["added_count"],
+            "deleted_count": summary["removed_count"],
+            "modified_count": summary["modified_count"],
+            "renamed_count": summary["renamed_count"],
+            "unchanged_count": summary["unchanged_count"],
             "total_files_snapshot1": len(files1),
             "total_files_snapshot2": len(files2),
+            "net_byte_delta": summary["net_byte_delta"],
         },
         "timestamp1": snapshot1.get("timestamp"),
         "timestamp2": snapshot2.get("timestamp"),